@@ -0,0 +1,69 @@
+import os
+from threading import RLock
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def is_adaptive_concurrency_enabled():
+    return os.getenv(array_settings.ARRAY_ADAPTIVE_CONCURRENCY_ENV_VAR, 'false').lower() == 'true'
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    The number of concurrent operations of a single array, sized from the latency of its operations.
+
+    The average latency of every window of operations is compared to the lowest average seen so far.
+    The limit grows by one while the operations had to wait for each other and the latency stays close
+    to the lowest, and shrinks when the latency grows, so a busy array is not flooded.
+    The lowest average slowly drifts up, so a lasting change of the array is eventually accepted as its new normal.
+    """
+
+    def __init__(self, initial_limit, min_limit, max_limit,
+                 window_size=array_settings.ADAPTIVE_CONCURRENCY_WINDOW_SIZE):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = max(min_limit, min(initial_limit, max_limit))
+        self._window_size = window_size
+        self._lock = RLock()
+        self._latencies = []
+        self._is_saturated = False
+        self._min_latency = None
+
+    def record(self, latency, is_saturated):
+        """
+        Args:
+            latency : time in seconds of a single operation
+            is_saturated : whether all the allowed operations were in flight when it started
+        Returns:
+            the current limit
+        """
+        with self._lock:
+            self._latencies.append(latency)
+            self._is_saturated = self._is_saturated or is_saturated
+            if len(self._latencies) < self._window_size:
+                return self.limit
+            average_latency = sum(self._latencies) / len(self._latencies)
+            is_saturated = self._is_saturated
+            self._latencies = []
+            self._is_saturated = False
+            self._update_limit(average_latency, is_saturated)
+            return self.limit
+
+    def _update_limit(self, average_latency, is_saturated):
+        if self._min_latency is None:
+            self._min_latency = average_latency
+        else:
+            self._min_latency = min(average_latency,
+                                    self._min_latency * array_settings.ADAPTIVE_CONCURRENCY_MIN_LATENCY_DRIFT)
+        previous_limit = self.limit
+        if average_latency > self._min_latency * array_settings.ADAPTIVE_CONCURRENCY_BACKOFF_LATENCY_RATIO:
+            self.limit = max(self.min_limit, int(self.limit * array_settings.ADAPTIVE_CONCURRENCY_BACKOFF_RATIO))
+        elif is_saturated and \
+                average_latency <= self._min_latency * array_settings.ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE:
+            self.limit = min(self.max_limit, self.limit + 1)
+        if self.limit != previous_limit:
+            logger.debug("concurrency limit changed from {} to {}, average latency is {:.3f}s, "
+                         "lowest is {:.3f}s".format(previous_limit, self.limit, average_latency, self._min_latency))
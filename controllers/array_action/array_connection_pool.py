@@ -1,15 +1,69 @@
+import os
+import weakref
+from collections import deque
 from queue import Queue, Full, Empty
-from threading import RLock
-from controllers.common.csi_logger import get_stdout_logger
+from threading import RLock, Thread, Event
+from time import monotonic
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger, is_debug_enabled
+from controllers.common.metrics import metrics
 from controllers.common import settings
 
 logger = get_stdout_logger()
 
 
+def get_health_check_interval():
+    health_check_interval = os.getenv(array_settings.CONNECTION_POOL_HEALTH_CHECK_INTERVAL_ENV_VAR)
+    if not health_check_interval:
+        return array_settings.CONNECTION_POOL_DEFAULT_HEALTH_CHECK_INTERVAL_IN_SECONDS
+    return float(health_check_interval)
+
+
+class ConnectionPoolMaintainer(Thread):
+    """
+    Background thread which periodically probes the idle connections of a pool,
+    replaces the dead ones and keeps at least min_size connections open.
+    """
+
+    def __init__(self, pool, interval):
+        super().__init__(name="connection-pool-maintainer-{}".format(pool.endpoint_key), daemon=True)
+        # keep a weak reference, so the pool can still be garbage collected when its agent is removed.
+        self._pool_ref = weakref.ref(pool)
+        self._interval = interval
+        self._stop_event = Event()
+
+    def run(self):
+        while not self._stop_event.wait(self._interval):
+            pool = self._pool_ref()
+            if pool is None:
+                return
+            try:
+                pool.maintain()
+            except Exception as ex:
+                logger.error("Failed to maintain the connections for storage {}, reason is {}".format(
+                    pool.endpoint_key, ex))
+            del pool
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = Event()
+        self.item = None
+
+
 class ConnectionPool:
-    """A simple pool to hold connections."""
+    """
+    A simple pool to hold connections.
+
+    Callers that wait for a connection are served in FIFO order: a returned connection is handed
+    directly to the longest waiting caller, so new callers can not take it first.
+    """
 
-    def __init__(self, endpoints, username, password, med_class, min_size, max_size):
+    def __init__(self, endpoints, username, password, med_class, min_size, max_size, health_check_interval=0):
         self.endpoints = endpoints
         self.username = username
         self.password = password
@@ -17,14 +71,30 @@ class ConnectionPool:
         self.endpoint_key = settings.ENDPOINTS_SEPARATOR.join(endpoints)
 
         self.current_size = 0
+        self.min_size = min_size
         self.max_size = max_size
         self.channel = Queue(max_size)
         self.lock = RLock()
+        self._waiters = deque()
+
+        self._metrics_lock = RLock()
+        self._created_count = 0
+        self._reconnect_count = 0
+        self._wait_count = 0
+        self._total_wait_time = 0.0
+        self._max_wait_time = 0.0
 
         for _ in range(min_size):
             self.put(self.get())
 
+        self._maintainer = None
+        if health_check_interval:
+            self._maintainer = ConnectionPoolMaintainer(self, health_check_interval)
+            self._maintainer.start()
+
     def __del__(self):
+        if getattr(self, "_maintainer", None):
+            self._maintainer.stop()
         # delete the free clients in queue, and wait for outside ones.
         with self.lock:
             while self.current_size:
@@ -34,7 +104,10 @@ class ConnectionPool:
 
     def create(self):
         logger.debug("Creating a new connection for endpoint {}".format(self.endpoint_key))
-        return self.med_class(self.username, self.password, self.endpoints)
+        created = self.med_class(self.username, self.password, self.endpoints)
+        with self._metrics_lock:
+            self._created_count += 1
+        return created
 
     def get(self, block=True, timeout=None):
         """
@@ -50,47 +123,108 @@ class ConnectionPool:
         an item if one is immediately available, else raise the :class:`Empty` exception
         (*timeout* is ignored in that case).
         """
+        start_time = monotonic()
+        try:
+            return self._get(block, timeout)
+        finally:
+            self._record_wait_time(monotonic() - start_time)
 
-        # if there is a free and active item in the channel, return it directly.
+    def _get(self, block, timeout):
+        deadline = None if timeout is None else monotonic() + timeout
+        has_priority = False
         while True:
-            try:
-                item = self.channel.get(block=False)
+            waiter = None
+            with self.lock:
+                # if there is a free item in the channel, take it.
+                item = self._get_idle_item()
+                # If there is no free items, and current_size is not full, create a new item,
+                # unless other callers are already waiting for their turn.
+                should_create = item is None and self.current_size < self.max_size and \
+                    (has_priority or not self._waiters)
+                if should_create:
+                    self.current_size += 1
+                elif item is None and block:
+                    waiter = _Waiter()
+                    self._waiters.append(waiter)
+
+            if item is not None:
                 if item.is_active():
                     return item
-                with self.lock:
-                    self.current_size -= 1
-                try:
-                    logger.debug("The connection for storage {} is inactive, close it".format(self.endpoint_key))
-                    item.disconnect()
-                except Exception as ex:
-                    # failed to disconnect the mediator, delete the stale client.
-                    logger.error(
-                        "Failed to disconnect the connection for storage {} before use, "
-                        "reason is {}".format(self.endpoint_key, ex)
-                    )
-                    del item
-            except Empty:
-                break
+                self._discard_inactive(item, "before use")
+                continue
+
+            if should_create:
+                return self._create_reserved()
+
+            if waiter is None:
+                raise Empty
+
+            # If current_size is full, waiting for an available one.
+            item = self._wait_for_turn(waiter, deadline)
+            if item is not None:
+                if item.is_active():
+                    return item
+                self._discard_inactive(item, "before use")
+            # a connection was closed while waiting, so a new one can be created.
+            has_priority = True
+
+    def _get_idle_item(self):
+        try:
+            return self.channel.get(block=False)
+        except Empty:
+            return None
+
+    def _wait_for_turn(self, waiter, deadline):
+        remaining_time = None if deadline is None else max(deadline - monotonic(), 0)
+        if not waiter.event.wait(remaining_time):
+            with self.lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                    raise Empty
+        # the waiter was served just when it timed out.
+        return waiter.item
 
-        # If there is no free items, and current_size is not full, create a new item.
+    def _wake_waiter(self, item=None):
+        """
+        Hand an item to the longest waiting caller, or let it create a new one when item is None.
+        Must be called with the lock held.
+        """
+        if not self._waiters:
+            return False
+        waiter = self._waiters.popleft()
+        waiter.item = item
+        waiter.event.set()
+        return True
+
+    def _release_size(self):
         with self.lock:
-            is_full = self.current_size >= self.max_size
-            if not is_full:
-                self.current_size += 1
+            self.current_size -= 1
+            if self.current_size < self.max_size:
+                self._wake_waiter()
 
-        if not is_full:
-            try:
-                created = self.create()
-            except Exception as ex:
-                logger.error("Failed to create array connection")
-                logger.exception(ex)
-                with self.lock:
-                    self.current_size -= 1
-                raise ex
-            return created
+    def _create_reserved(self):
+        try:
+            return self.create()
+        except Exception as ex:
+            logger.error("Failed to create array connection")
+            logger.exception(ex)
+            self._release_size()
+            raise ex
 
-        # If current_size is full, waiting for an available one.
-        return self.channel.get(block, timeout)
+    def _discard_inactive(self, item, stage):
+        self._release_size()
+        with self._metrics_lock:
+            self._reconnect_count += 1
+        try:
+            logger.debug("The connection for storage {} is inactive, close it".format(self.endpoint_key))
+            item.disconnect()
+        except Exception as ex:
+            # failed to disconnect the mediator, delete the stale client.
+            logger.error(
+                "Failed to disconnect the connection for storage {} {}, "
+                "reason is {}".format(self.endpoint_key, stage, ex)
+            )
+            del item
 
     def put(self, item):
         """
@@ -100,13 +234,14 @@ class ConnectionPool:
             discard = self.current_size > self.max_size
             if discard:
                 self.current_size -= 1
-
-        if not discard:
-            try:
-                self.channel.put(item, block=False)
+            elif self._wake_waiter(item):
                 return
-            except Full:
-                discard = True
+            else:
+                try:
+                    self.channel.put(item, block=False)
+                    return
+                except Full:
+                    discard = True
 
         if discard:
             try:
@@ -118,3 +253,93 @@ class ConnectionPool:
                     "reason is {}".format(self.endpoint_key, ex)
                 )
                 del item
+
+    def set_max_size(self, max_size):
+        """
+        Change the maximal number of connections. When it grows, waiting callers may create new connections
+        right away. When it shrinks, idle connections are closed now and the ones in use are closed when put back.
+        """
+        extra_items = []
+        with self.lock:
+            self.max_size = max_size
+            self.channel.maxsize = max_size
+            for _ in range(max_size - self.current_size):
+                if not self._wake_waiter():
+                    break
+            while self.current_size > self.max_size:
+                item = self._get_idle_item()
+                if item is None:
+                    break
+                self.current_size -= 1
+                extra_items.append(item)
+
+        for item in extra_items:
+            try:
+                item.disconnect()
+            except Exception as ex:
+                logger.error(
+                    "Failed to disconnect the connection for storage {} after resize, "
+                    "reason is {}".format(self.endpoint_key, ex)
+                )
+
+    def _is_active(self, item):
+        try:
+            return item.is_active()
+        except Exception as ex:
+            logger.debug("Failed to check the connection for storage {}, reason is {}".format(self.endpoint_key, ex))
+            return False
+
+    def _probe_idle_connections(self):
+        for _ in range(self.channel.qsize()):
+            try:
+                item = self.channel.get(block=False)
+            except Empty:
+                return
+            if self._is_active(item):
+                self.put(item)
+            else:
+                self._discard_inactive(item, "during health check")
+
+    def _fill_to_min_size(self):
+        while True:
+            with self.lock:
+                if self.current_size >= self.min_size:
+                    return
+                self.current_size += 1
+            self.put(self._create_reserved())
+
+    def maintain(self):
+        """
+        Replace the dead idle connections and open new ones up to min_size, so requests do not pay for it.
+        """
+        self._probe_idle_connections()
+        self._fill_to_min_size()
+        if is_debug_enabled():
+            logger.debug("Connection pool for storage %s was maintained: %s", self.endpoint_key, self.get_metrics())
+
+    def _record_wait_time(self, wait_time):
+        metrics.observe(settings.ARRAY_CONNECTION_WAIT_METRIC, wait_time, endpoint=self.endpoint_key)
+        with self._metrics_lock:
+            self._wait_count += 1
+            self._total_wait_time += wait_time
+            self._max_wait_time = max(self._max_wait_time, wait_time)
+
+    def get_metrics(self):
+        with self.lock:
+            current_size = self.current_size
+            waiting = len(self._waiters)
+        idle_size = self.channel.qsize()
+        with self._metrics_lock:
+            average_wait_time = self._total_wait_time / self._wait_count if self._wait_count else 0.0
+            return {
+                'max_size': self.max_size,
+                'current_size': current_size,
+                'idle': idle_size,
+                'in_use': max(current_size - idle_size, 0),
+                'waiting': waiting,
+                'created': self._created_count,
+                'reconnects': self._reconnect_count,
+                'waits': self._wait_count,
+                'average_wait_seconds': average_wait_time,
+                'max_wait_seconds': self._max_wait_time
+            }
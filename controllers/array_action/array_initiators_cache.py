@@ -0,0 +1,90 @@
+import os
+from collections import defaultdict
+from copy import deepcopy
+from threading import RLock
+from time import monotonic
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.settings import CACHE_LOOKUPS_METRIC
+
+logger = get_stdout_logger()
+
+
+def _get_ttl():
+    ttl = os.getenv(array_settings.ARRAY_INITIATORS_CACHE_TTL_ENV_VAR)
+    if not ttl:
+        return array_settings.ARRAY_INITIATORS_CACHE_DEFAULT_TTL_IN_SECONDS
+    return float(ttl)
+
+
+def _get_endpoint_key(endpoint):
+    if isinstance(endpoint, list):
+        return tuple(endpoint)
+    return endpoint
+
+
+class _CachedArrayInitiators:
+    def __init__(self, array_initiators, expiry):
+        self.array_initiators = array_initiators
+        self.expiry = expiry
+
+
+class ArrayInitiatorsCache:
+    """
+    The array initiators (FC wwns or iSCSI targets) that a host is connected to, by endpoint, host and
+    connectivity type.
+
+    An entry expires after the TTL. Every change of a host bumps its version, so a load that started
+    before the change does not store an outdated entry.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._entries = {}
+        self._versions = defaultdict(int)
+
+    def get(self, endpoint, host_name, connectivity_type):
+        key = (_get_endpoint_key(endpoint), host_name, connectivity_type)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and monotonic() >= entry.expiry:
+                del self._entries[key]
+                entry = None
+            metrics.increment(CACHE_LOOKUPS_METRIC, cache='array_initiators',
+                              result='miss' if entry is None else 'hit')
+            if entry is None:
+                return None
+            return deepcopy(entry.array_initiators)
+
+    def get_version(self, endpoint, host_name):
+        with self._lock:
+            return self._versions[(_get_endpoint_key(endpoint), host_name)]
+
+    def put(self, endpoint, host_name, connectivity_type, array_initiators, version):
+        ttl = _get_ttl()
+        if ttl <= 0:
+            return
+        endpoint_key = _get_endpoint_key(endpoint)
+        with self._lock:
+            if version != self._versions[(endpoint_key, host_name)]:
+                logger.debug("host {} on {} changed while loading its array initiators".format(host_name, endpoint))
+                return
+            self._entries[(endpoint_key, host_name, connectivity_type)] = _CachedArrayInitiators(
+                deepcopy(array_initiators), monotonic() + ttl)
+
+    def invalidate_host(self, endpoint, host_name):
+        endpoint_key = _get_endpoint_key(endpoint)
+        with self._lock:
+            self._versions[(endpoint_key, host_name)] += 1
+            for key in [key for key in self._entries if key[:2] == (endpoint_key, host_name)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+
+array_initiators_cache = ArrayInitiatorsCache()
@@ -4,6 +4,7 @@ from retry import retry
 
 import controllers.array_action.errors as array_errors
 import controllers.servers.utils as utils
+from controllers.array_action.array_initiators_cache import array_initiators_cache
 from controllers.array_action.array_mediator_interface import ArrayMediator
 from controllers.array_action.errors import NoConnectionAvailableException, UnsupportedConnectivityTypeError
 from controllers.array_action.settings import (NVME_OVER_FC_CONNECTIVITY_TYPE,
@@ -40,7 +41,10 @@ class ArrayMediatorAbstract(ArrayMediator, ABC):
                     logger.debug(
                         "hostname : {}, connectivity_types  : {}".format(host.name, host.connectivity_types))
                     connectivity_type = utils.choose_connectivity_type(host.connectivity_types)
-                    array_initiators = self._get_array_initiators(host.name, connectivity_type)
+                    # publishing a volume which is already mapped again is usually a retry after the node
+                    # failed to connect to it, so the array initiators are read from the array again.
+                    array_initiators = self._get_array_initiators(host.name, connectivity_type,
+                                                                  is_refresh_forced=True)
                     return lun, connectivity_type, array_initiators
                 logger.debug(
                     "volume is already mapped to a host but doesn't match initiators continue search."
@@ -110,13 +114,25 @@ class ArrayMediatorAbstract(ArrayMediator, ABC):
         logger.debug("Rollback copy volume from source. Deleting volume {0}".format(volume_id))
         self.delete_volume(volume_id)
 
-    def _get_array_initiators(self, host_name, connectivity_type):
+    def _get_array_initiators(self, host_name, connectivity_type, is_refresh_forced=False):
         if NVME_OVER_FC_CONNECTIVITY_TYPE == connectivity_type:
-            array_initiators = []
-        elif FC_CONNECTIVITY_TYPE == connectivity_type:
+            return []
+        if connectivity_type not in (FC_CONNECTIVITY_TYPE, ISCSI_CONNECTIVITY_TYPE):
+            raise UnsupportedConnectivityTypeError(connectivity_type)
+        if is_refresh_forced:
+            self._invalidate_array_initiators(host_name)
+        else:
+            array_initiators = array_initiators_cache.get(self.endpoint, host_name, connectivity_type)
+            if array_initiators is not None:
+                logger.debug("found cached array initiators of host {}".format(host_name))
+                return array_initiators
+        version = array_initiators_cache.get_version(self.endpoint, host_name)
+        if FC_CONNECTIVITY_TYPE == connectivity_type:
             array_initiators = self.get_array_fc_wwns(host_name)
-        elif ISCSI_CONNECTIVITY_TYPE == connectivity_type:
-            array_initiators = self.get_iscsi_targets_by_iqn(host_name)
         else:
-            raise UnsupportedConnectivityTypeError(connectivity_type)
+            array_initiators = self.get_iscsi_targets_by_iqn(host_name)
+        array_initiators_cache.put(self.endpoint, host_name, connectivity_type, array_initiators, version)
         return array_initiators
+
+    def _invalidate_array_initiators(self, host_name):
+        array_initiators_cache.invalidate_host(self.endpoint, host_name)
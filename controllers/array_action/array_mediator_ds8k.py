@@ -1,3 +1,5 @@
+import re
+
 from decorator import decorator
 from packaging.version import parse
 from pyds8k import exceptions
@@ -12,7 +14,9 @@ import controllers.servers.settings as servers_settings
 from controllers.array_action.array_action_types import Volume, Snapshot, Host
 from controllers.array_action.array_mediator_abstract import ArrayMediatorAbstract
 from controllers.array_action.ds8k_rest_client import RESTClient, scsilun_to_int
-from controllers.array_action.ds8k_volume_cache import VolumeCache
+from controllers.array_action.ds8k_volume_cache import VolumeCache, VOLUME_NOT_IN_POOL
+from controllers.array_action.ds8k_volume_mappings_index import volume_mappings_indexes
+from controllers.array_action.single_flight import single_flight
 from controllers.array_action.utils import ClassProperty
 from controllers.common.csi_logger import get_stdout_logger
 
@@ -42,6 +46,10 @@ FLASHCOPY_NO_BACKGROUND_COPY_OPTION = ds8k_types.DS8K_OPTION_NBC
 FLASHCOPY_PERMIT_SPACE_EFFICIENT_TARGET_OPTION = ds8k_types.DS8K_OPTION_PSET
 FLASHCOPY_STATE_VALID = 'valid'
 
+LIST_VOLUMES_TOKEN_REGEX = re.compile('^[0-9A-F]{4}$')
+# the pool capacities are in GiB
+POOL_CAPACITY_UNIT_IN_BYTES = 1024 ** 3
+
 ARRAY_SPACE_EFFICIENCY_THIN = ds8k_types.DS8K_TP_ESE
 ARRAY_SPACE_EFFICIENCY_NONE = ds8k_types.DS8K_TP_NONE
 
@@ -162,6 +170,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
 
         self._connect()
         self.volume_cache = VolumeCache(self.service_address)
+        self.volume_mappings_index = volume_mappings_indexes.get(self.service_address)
 
     def _connect(self):
         try:
@@ -220,15 +229,16 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             source_id = self._generate_volume_scsi_identifier(volume_id=source_volume_id)
         return source_id
 
-    def _generate_volume_response(self, api_volume):
+    def _generate_volume_response(self, api_volume, is_source_needed=True):
         space_efficiency_aliases = _get_space_efficiency_aliases(api_volume.tp)
+        source_id = self._get_source_id(api_volume=api_volume) if is_source_needed else None
         return Volume(
             capacity_bytes=int(api_volume.cap),
             id=self._generate_volume_scsi_identifier(volume_id=api_volume.id),
             internal_id=api_volume.id,
             name=api_volume.name,
             array_address=self.service_address,
-            source_id=self._get_source_id(api_volume=api_volume),
+            source_id=source_id,
             pool=api_volume.pool,
             array_type=self.array_type,
             space_efficiency_aliases=space_efficiency_aliases,
@@ -237,6 +247,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
     def _create_api_volume(self, name, size_in_bytes, array_space_efficiency, pool_id):
         logger.info("creating volume with name: {}, size: {}, in pool: {}, with parameters: {}".format(
             name, size_in_bytes, pool_id, array_space_efficiency))
+        is_outcome_known = False
         try:
             cli_kwargs = {}
             cli_kwargs.update({
@@ -249,12 +260,16 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             logger.debug("start to create volume with parameters: {}".format(cli_kwargs))
             api_volume = self.client.create_volume(**cli_kwargs)
             logger.info("finished creating volume {}".format(name))
-            return self.client.get_volume(api_volume.id)
+            api_volume = self.client.get_volume(api_volume.id)
+            is_outcome_known = True
+            return api_volume
         except exceptions.ClientException as ex:
             error_message = str(ex.message).upper()
             if ERROR_CODE_RESOURCE_NOT_EXISTS in error_message or INCORRECT_ID in error_message:
+                is_outcome_known = True
                 raise array_errors.PoolDoesNotExist(pool_id, self.identifier)
             if ERROR_CODE_CREATE_VOLUME_NOT_ENOUGH_EXTENTS in error_message:
+                is_outcome_known = True
                 raise array_errors.NotEnoughSpaceInPool(pool_id)
             logger.error(
                 "failed to create volume {} on array {}, reason is: {}".format(
@@ -264,12 +279,17 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
                 )
             )
             raise array_errors.VolumeCreationError(name)
+        finally:
+            # the volume may have been created even though the call failed, so the pool is not known to be complete.
+            # a created volume is added to the cache by the caller, which keeps the pool complete.
+            if not is_outcome_known:
+                self.volume_cache.invalidate_pool(pool_id)
 
     def create_volume(self, name, size_in_bytes, space_efficiency, pool, io_group, volume_group, source_ids,
                       source_type, is_virt_snap_func):
         array_space_efficiency = get_array_space_efficiency(space_efficiency)
         api_volume = self._create_api_volume(name, size_in_bytes, array_space_efficiency, pool)
-        self.volume_cache.add(api_volume.name, api_volume.id)
+        self.volume_cache.add(api_volume.name, api_volume.id, api_volume.pool)
         return self._generate_volume_response(api_volume)
 
     def _extend_volume(self, api_volume, new_size_in_bytes):
@@ -344,8 +364,14 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         flashcopy_as_target = get_flashcopy_as_target_if_exists(api_volume=api_volume)
         if flashcopy_as_target:
             self._delete_flashcopy(flashcopy_id=flashcopy_as_target.id)
-        self._delete_volume(object_id)
-        self.volume_cache.remove(api_volume.name)
+        try:
+            self._delete_volume(object_id)
+        except Exception:
+            # the volume may have been deleted even though the call failed, so the pool is not known to be complete.
+            self.volume_cache.invalidate_pool(api_volume.pool)
+            raise
+        self.volume_cache.remove(api_volume.name, api_volume.pool)
+        self.volume_mappings_index.remove_volume(object_id)
 
     @convert_scsi_ids_to_array_ids()
     def delete_volume(self, volume_id):
@@ -354,7 +380,10 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         logger.info("finished deleting volume {}".format(volume_id))
 
     def _get_api_volume_with_cache(self, name, pool_id):
-        cached_volume_id = self.volume_cache.get(name)
+        cached_volume_id = self.volume_cache.get(name, pool_id)
+        if cached_volume_id is VOLUME_NOT_IN_POOL:
+            logger.debug("volume {} is not in pool {} by cache".format(name, pool_id))
+            return None
         api_volume = None
         if cached_volume_id:
             logger.debug("found object id: {} in cache".format(cached_volume_id))
@@ -363,14 +392,39 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             api_volume = self._get_api_volume_by_name(volume_name=name, pool_id=pool_id)
         return api_volume
 
+    @single_flight
     def get_volume(self, name, pool, is_virt_snap_func):
         logger.debug("getting volume {} in pool {}".format(name, pool))
         api_volume = self._get_api_volume_with_cache(name, pool)
         if api_volume:
-            self.volume_cache.add_or_delete(api_volume.name, api_volume.id)
+            self.volume_cache.add(api_volume.name, api_volume.id, api_volume.pool)
             return self._generate_volume_response(api_volume)
         raise array_errors.ObjectNotFoundError(name)
 
+    def get_pool_available_capacity(self, pool):
+        try:
+            api_pool = self.client.get_pool(pool)
+        except exceptions.NotFound:
+            raise array_errors.PoolDoesNotExist(pool, self.identifier)
+        return int(api_pool.capavail) * POOL_CAPACITY_UNIT_IN_BYTES
+
+    def list_volumes(self, start_token, name_prefix):
+        start_volume_id = start_token.upper() if start_token else ''
+        if start_volume_id and not LIST_VOLUMES_TOKEN_REGEX.match(start_volume_id):
+            raise array_errors.InvalidArgumentError(start_token)
+        # a volume id is its lss id followed by its number in the lss, so a page reads the lss of the token
+        # (up to 256 volumes) and the lsss after it, and never the lsss before it.
+        # the rest api has no filter by volume id, so the volumes of that lss are skipped here.
+        lss_ids = sorted(lss.id for lss in self.client.get_lss())
+        for lss_id in lss_ids:
+            if lss_id < start_volume_id[:2]:
+                continue
+            api_volumes = self.client.get_volumes_by_lss(lss_id)
+            for api_volume in sorted(api_volumes, key=lambda api_volume: api_volume.id):
+                if api_volume.id <= start_volume_id or not api_volume.name.startswith(name_prefix or ''):
+                    continue
+                yield self._generate_volume_response(api_volume, is_source_needed=False), api_volume.id
+
     @convert_scsi_ids_to_array_ids()
     def expand_volume(self, volume_id, required_bytes):
         logger.info("expanding volume with id : {0} to {1} bytes".format(volume_id, required_bytes))
@@ -381,18 +435,13 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         self._extend_volume(api_volume=api_volume, new_size_in_bytes=required_bytes)
         logger.info("finished Expanding volume {0}.".format(volume_id))
 
+    @single_flight
     @convert_scsi_ids_to_array_ids()
     def get_volume_mappings(self, volume_id):
         logger.debug("getting volume mappings for volume {}".format(volume_id))
         try:
-            host_name_to_lun_id = {}
-            for host in self.client.get_hosts():
-                host_mappings = host.mappings_briefs
-                for mapping in host_mappings:
-                    if volume_id == mapping["volume_id"]:
-                        host_name_to_lun_id[host.name] = scsilun_to_int(mapping["lunid"])
-                        break
-            logger.debug("found volume mappings: {}".format(host_name_to_lun_id))
+            host_name_to_lun_id = self.volume_mappings_index.get(volume_id, self._get_luns_by_host_by_volume)
+            logger.debug("found volume mappings: %s", host_name_to_lun_id)
             return host_name_to_lun_id
         except exceptions.ClientException as ex:
             logger.error(
@@ -400,12 +449,23 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             )
             raise ex
 
+    def _get_luns_by_host_by_volume(self):
+        luns_by_host_by_volume = {}
+        for host in self.client.get_hosts():
+            for mapping in host.mappings_briefs:
+                luns_by_host = luns_by_host_by_volume.setdefault(mapping["volume_id"], {})
+                luns_by_host.setdefault(host.name, scsilun_to_int(mapping["lunid"]))
+        return luns_by_host_by_volume
+
     @convert_scsi_ids_to_array_ids()
     def map_volume(self, volume_id, host_name, connectivity_type):
         logger.debug("mapping volume {} to host {}".format(volume_id, host_name))
+        is_index_updated = False
         try:
             mapping = self.client.map_volume_to_host(host_name, volume_id)
             lun = scsilun_to_int(mapping.lunid)
+            self.volume_mappings_index.add_mapping(volume_id, host_name, lun)
+            is_index_updated = True
             logger.debug("successfully mapped volume to host with lun {}".format(lun))
             return lun
         except exceptions.NotFound:
@@ -416,10 +476,15 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             if ERROR_CODE_VOLUME_NOT_FOUND_FOR_MAPPING in str(ex.message).upper():
                 raise array_errors.ObjectNotFoundError(volume_id)
             raise array_errors.MappingError(volume_id, host_name, ex.details)
+        finally:
+            # the mapping may or may not have been made, so the mappings of the array are loaded again
+            if not is_index_updated:
+                self.volume_mappings_index.invalidate()
 
     @convert_scsi_ids_to_array_ids()
     def unmap_volume(self, volume_id, host_name):
         logger.debug("unmapping volume {} from host {}".format(volume_id, host_name))
+        is_index_updated = False
         try:
             mappings = self.client.get_host_mappings(host_name)
             lunid = None
@@ -432,8 +497,12 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
                     host_name=host_name,
                     lunid=lunid
                 )
+                self.volume_mappings_index.remove_mapping(volume_id, host_name)
+                is_index_updated = True
                 logger.debug("successfully unmapped volume from host with lun {}.".format(lunid))
             else:
+                self.volume_mappings_index.remove_mapping(volume_id, host_name)
+                is_index_updated = True
                 raise array_errors.ObjectNotFoundError(volume_id)
         except exceptions.ClientException as ex:
             if HOST_DOES_NOT_EXIST in str(ex.message).upper():
@@ -441,6 +510,9 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             if MAPPING_DOES_NOT_EXIST in str(ex.message).upper():
                 raise array_errors.VolumeAlreadyUnmappedError(volume_id)
             raise array_errors.UnmappingError(volume_id, host_name, ex.details)
+        finally:
+            if not is_index_updated:
+                self.volume_mappings_index.invalidate()
 
     def _get_api_volume_from_volumes(self, volume_candidates, volume_name):
         for volume in volume_candidates:
@@ -458,6 +530,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             )
             raise array_errors.PoolParameterIsMissing(self.array_type)
 
+        version = self.volume_cache.get_pool_version(pool_id)
         try:
             volume_candidates = []
             volume_candidates.extend(self.client.get_volumes_by_pool(pool_id))
@@ -467,8 +540,15 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
                 raise array_errors.PoolDoesNotExist(pool_id, self.identifier)
             raise ex
 
+        self._load_pool_to_volume_cache(pool_id, volume_candidates, version)
         return self._get_api_volume_from_volumes(volume_candidates, volume_name)
 
+    def _load_pool_to_volume_cache(self, pool_id, api_volumes, version):
+        volume_ids_by_name = {}
+        for api_volume in api_volumes:
+            volume_ids_by_name.setdefault(api_volume.name, api_volume.id)
+        self.volume_cache.load_pool(pool_id, volume_ids_by_name, version)
+
     def _get_api_volume_by_id(self, volume_id, not_exist_err=True):
         try:
             volume = self.client.get_volume(volume_id)
@@ -507,6 +587,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
                                                                    self.service_address)
         return api_snapshot
 
+    @single_flight
     @convert_scsi_ids_to_array_ids()
     def get_snapshot(self, volume_id, snapshot_name, pool, is_virt_snap_func):
         if not pool:
@@ -515,7 +596,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         api_snapshot = self._get_api_snapshot(snapshot_name, pool)
         if api_snapshot is None:
             return None
-        self.volume_cache.add_or_delete(api_snapshot.name, api_snapshot.id)
+        self.volume_cache.add(api_snapshot.name, api_snapshot.id, api_snapshot.pool)
         return self._generate_snapshot_response_with_verification(api_snapshot)
 
     def _create_similar_volume(self, target_volume_name, source_api_volume, space_efficiency, pool):
@@ -573,6 +654,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             raise array_errors.ExpectedSnapshotButFoundVolumeError(api_object.name, self.service_address)
         return self._generate_snapshot_response(api_object, flashcopy_as_target.sourcevolume)
 
+    @single_flight
     @convert_scsi_ids_to_array_ids()
     def get_object_by_id(self, object_id, object_type, is_virt_snap_func=False):
         api_object = self._get_api_volume_by_id(object_id, not_exist_err=False)
@@ -588,9 +670,14 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         source_api_volume = self._get_api_volume_by_id(volume_id)
         if source_api_volume is None:
             raise array_errors.ObjectNotFoundError(volume_id)
-        target_api_volume = self._create_snapshot(snapshot_name, source_api_volume, space_efficiency, pool)
+        try:
+            target_api_volume = self._create_snapshot(snapshot_name, source_api_volume, space_efficiency, pool)
+        except Exception:
+            # the target volume may have been created even though the call failed.
+            self.volume_cache.invalidate_pool(pool or source_api_volume.pool)
+            raise
         logger.info("finished creating snapshot '{0}' from volume '{1}'".format(snapshot_name, volume_id))
-        self.volume_cache.add(target_api_volume.name, target_api_volume.id)
+        self.volume_cache.add(target_api_volume.name, target_api_volume.id, target_api_volume.pool)
         return self._generate_snapshot_response(target_api_volume, volume_id)
 
     def _delete_flashcopy(self, flashcopy_id):
@@ -615,6 +702,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
     def get_iscsi_targets_by_iqn(self, host_name):
         return {}
 
+    @single_flight
     def get_array_fc_wwns(self, host_name):
         logger.debug("getting the connected fc port wwpns for host {} from array".format(host_name))
         api_host = self._get_api_host(host_name)
@@ -635,6 +723,7 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
         host_ports = api_host.host_ports_briefs
         return [p["wwpn"] for p in host_ports]
 
+    @single_flight
     def get_host_by_name(self, host_name):
         api_host = self._get_api_host(host_name)
         fc_wwns = self._get_fc_wwns_from_api_host(api_host)
@@ -643,8 +732,9 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
             connectivity_types.append(array_settings.FC_CONNECTIVITY_TYPE)
         return Host(name=api_host.name, connectivity_types=connectivity_types, fc_wwns=fc_wwns)
 
+    @single_flight
     def get_host_by_host_identifiers(self, initiators):
-        logger.debug("getting host by initiators: {}".format(initiators))
+        logger.debug("getting host by initiators: %s", initiators)
         found = ""
         for host in self.client.get_hosts():
             wwpns = self._get_fc_wwns_from_api_host(host)
@@ -652,9 +742,9 @@ class DS8KArrayMediator(ArrayMediatorAbstract):
                 found = host.name
                 break
         if found:
-            logger.debug("found host {0} with fc wwpns: {1}".format(found, initiators.fc_wwns))
+            logger.debug("found host %s with fc wwpns: %s", found, initiators.fc_wwns)
             return found, [array_settings.FC_CONNECTIVITY_TYPE]
-        logger.debug("can not found host by initiators: {0} ".format(initiators))
+        logger.debug("can not found host by initiators: %s ", initiators)
         raise array_errors.HostNotFoundError(initiators)
 
     def validate_supported_space_efficiency(self, space_efficiency):
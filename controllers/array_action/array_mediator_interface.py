@@ -120,6 +120,39 @@ class ArrayMediator(ABC):
         """
         raise NotImplementedError
 
+    @abstractmethod
+    def get_pool_available_capacity(self, pool):
+        """
+        This function should return the capacity that is available for new volumes in a pool.
+
+        Args:
+            pool : name (or id) of the pool in the storage system
+
+        Returns:
+            available capacity in bytes
+
+        Raises:
+            PoolDoesNotExist
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_volumes(self, start_token, name_prefix):
+        """
+        This function should yield the volumes of the storage system one by one, in a stable order.
+
+        Args:
+            start_token : token of the volume to continue after (as yielded before), or empty to start from the first
+            name_prefix : list only the volumes which names start with it (if empty/None, list all the volumes)
+
+        Returns:
+            generator of (Volume, token) tuples
+
+        Raises:
+            InvalidArgument
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def expand_volume(self, volume_id, required_bytes):
         """
@@ -1,12 +1,15 @@
+import csv
 from collections import defaultdict
 from io import StringIO
-from random import choice
 from datetime import datetime, timedelta
+from functools import partial
 
 import os
+from munch import Munch
 from packaging.version import Version
 from pysvc import errors as svc_errors
 from pysvc.unified.client import connect
+from pysvc.unified.clispec import TAG_ERR, escape_shell_arg, show_return_code_if_fail
 from pysvc.unified.response import CLIFailureError, SVCResponse
 from retry import retry
 
@@ -15,15 +18,20 @@ from controllers.common.config import config
 import controllers.array_action.errors as array_errors
 import controllers.array_action.settings as array_settings
 from controllers.array_action.registration_cache import SVC_REGISTRATION_CACHE
+from controllers.array_action.svc_inventory_cache import svc_inventory_cache, is_inventory_cache_enabled
+from controllers.array_action.svc_host_ports_index import svc_host_ports_indexes
+from controllers.array_action.lun_allocator import host_luns_allocators
+from controllers.array_action.single_flight import single_flight
+from controllers.array_action.host_mappings_batcher import host_mappings_batcher, get_batch_window
 from controllers.array_action import svc_messages
 import controllers.servers.settings as controller_settings
 from controllers.servers.csi.decorators import register_csi_plugin
 from controllers.array_action.array_action_types import Volume, Snapshot, Replication, Host, VolumeGroup, ThinVolume
 from controllers.array_action.array_mediator_abstract import ArrayMediatorAbstract
-from controllers.array_action.utils import ClassProperty, convert_scsi_id_to_nguid
+from controllers.array_action.utils import ClassProperty, convert_scsi_id_to_nguid, time_array_commands
 from controllers.array_action.volume_group_interface import VolumeGroupInterface
 from controllers.common import settings as common_settings
-from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.csi_logger import get_stdout_logger, lazy
 from controllers.servers.utils import (get_connectivity_type_ports,
                                        split_string,
                                        is_call_home_enabled,
@@ -68,10 +76,19 @@ HOST_NQN = 'nqn'
 HOST_WWPN = 'WWPN'
 HOST_ISCSI_NAME = 'iscsi_name'
 HOST_PORTSET_ID = 'portset_id'
+HOST_PORT_ATTRIBUTES_BY_CONNECTIVITY_TYPE = {
+    array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE: HOST_NQN,
+    array_settings.FC_CONNECTIVITY_TYPE: HOST_WWPN,
+    array_settings.ISCSI_CONNECTIVITY_TYPE: HOST_ISCSI_NAME
+}
 LIST_HOSTS_CMD_FORMAT = 'lshost {HOST_ID};echo;'
+SVCINFO_BATCH_DELIMITER = ','
+SVCINFO_BATCH_SEPARATOR = 'csi411049e2batch'
+SVCINFO_BATCH_CMD_FORMAT = 'svcinfo {COMMAND} {RETURN_CODE_IF_FAIL};echo {SEPARATOR};'
+SVCTASK_BATCH_CMD_FORMAT = 'svctask {COMMAND} {RETURN_CODE_IF_FAIL};echo {SEPARATOR};'
+SVCTASK_POSITIONAL_KWARGS = {'mkvdiskhostmap': 'object_id', 'rmvdiskhostmap': 'vdisk_id'}
 HOSTS_LIST_ERR_MSG_MAX_LENGTH = 300
 
-LUN_INTERVAL = 128
 
 FCMAP_STATUS_DONE = 'idle_or_copied'
 
@@ -84,6 +101,13 @@ ENDPOINT_TYPE_MASTER = 'master'
 ENDPOINT_TYPE_AUX = 'aux'
 
 
+def _get_command_name(cmd, *_args, **_kwargs):
+    words = cmd.split()
+    if SVCINFO_BATCH_SEPARATOR in cmd:
+        return '{} batch'.format(words[0])
+    return ' '.join(words[:2])
+
+
 def is_warning_message(exception):
     """ Return True if the exception message is warning """
     info_seperated_by_quotation = str(exception).split('"')
@@ -297,6 +321,9 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 endpoint)
         self.endpoint = self.endpoint[0]
         self._cluster = None
+        self._inventory = None
+        if is_inventory_cache_enabled():
+            self._inventory = svc_inventory_cache.get(self.endpoint, self.user)
 
         logger.debug("in init")
         self._connect()
@@ -306,6 +333,9 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         try:
             self.client = connect(self.endpoint, username=self.user,
                                   password=self.password, port=self.port)
+            # svcinfo, svctask and the raw commands are all sent through send_raw_command
+            self.client.send_raw_command = time_array_commands(self.client.send_raw_command, self.array_type,
+                                                               _get_command_name)
             if Version(self._code_level) < Version(self.MIN_SUPPORTED_VERSION):
                 raise array_errors.UnsupportedStorageVersionError(
                     self._code_level, self.MIN_SUPPORTED_VERSION
@@ -337,6 +367,227 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
     def is_active(self):
         return self.client.transport.transport.get_transport().is_active()
 
+    def _keep_inventory_refreshed(self):
+        self._inventory.keep_refreshed(partial(SVCArrayMediator, self.user, self.password, [self.endpoint]))
+
+    def refresh_inventory(self):
+        generation = self._inventory.generation
+        logger.debug("refreshing inventory of {}".format(self.endpoint))
+        cli_volumes = self.client.svcinfo.lsvdisk(bytes=True).as_list
+        cli_hosts = self.client.svcinfo.lshost().as_list
+        fcmaps = self.client.svcinfo.lsfcmap().as_list
+        self._inventory.refresh(cli_volumes, cli_hosts, fcmaps, generation)
+
+    def _invalidate_inventory_volume(self, volume_id_or_name):
+        if self._inventory:
+            self._inventory.invalidate_volume(volume_id_or_name)
+
+    def _invalidate_inventory_host(self, host_id_or_name):
+        if self._inventory:
+            self._inventory.invalidate_host(host_id_or_name)
+
+    def _invalidate_inventory_fcmaps(self, volume_names=(), fcmap_id=None):
+        if self._inventory:
+            self._inventory.invalidate_fcmaps(volume_names, fcmap_id)
+
+    def _invalidate_inventory_volumes(self):
+        if self._inventory:
+            self._inventory.invalidate_volumes()
+
+    @staticmethod
+    def _get_cli_command(command_name, cli_kwargs, positional_kwarg='object_id', extra_args=()):
+        args = [command_name]
+        args.extend(extra_args)
+        positional_value = None
+        for key, value in cli_kwargs.items():
+            if key == positional_kwarg:
+                positional_value = value
+            elif value is True:
+                args.append('-{}'.format(key))
+            else:
+                args.extend(('-{}'.format(key), escape_shell_arg(str(value))))
+        if positional_value is not None:
+            args.append(escape_shell_arg(str(positional_value)))
+        return ' '.join(args)
+
+    def _get_svcinfo_command(self, command_name, cli_kwargs):
+        return self._get_cli_command(command_name, cli_kwargs, extra_args=('-delim', SVCINFO_BATCH_DELIMITER))
+
+    def _get_svcinfo_batch_cmd(self, queries):
+        writer = StringIO()
+        for command_name, cli_kwargs in queries:
+            writer.write(SVCINFO_BATCH_CMD_FORMAT.format(COMMAND=self._get_svcinfo_command(command_name, cli_kwargs),
+                                                         RETURN_CODE_IF_FAIL=show_return_code_if_fail(),
+                                                         SEPARATOR=SVCINFO_BATCH_SEPARATOR))
+        return writer.getvalue()
+
+    @staticmethod
+    def _split_svcinfo_batch_output(stdout):
+        if isinstance(stdout, bytes):
+            stdout = stdout.decode()
+        outputs = []
+        lines = []
+        for line in stdout.splitlines():
+            if line.strip() == SVCINFO_BATCH_SEPARATOR:
+                outputs.append('\n'.join(lines))
+                lines = []
+            else:
+                lines.append(line)
+        return outputs
+
+    def _svcinfo_batch(self, queries):
+        """
+        Send independent svcinfo queries in a single command channel.
+
+        Args:
+            queries : list of (command name, cli kwargs) tuples, the same kwargs that client.svcinfo accepts
+        Returns:
+            list of SVCResponse, one per query
+        Raises:
+            CLIFailureError : if one of the queries failed
+        """
+        logger.debug("Sending svcinfo batch of {} commands".format(len(queries)))
+        stdout, stderr = self.client.send_raw_command(self._get_svcinfo_batch_cmd(queries))
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode()
+        outputs = self._split_svcinfo_batch_output(stdout)
+        if len(outputs) != len(queries):
+            raise CLIFailureError('CLI failure. Error message is "{}"'.format(stderr))
+        return [SVCResponse((output, stderr), {'delim': SVCINFO_BATCH_DELIMITER, 'error_tag': TAG_ERR})
+                for output in outputs]
+
+    def _get_svctask_batch_cmd(self, commands):
+        writer = StringIO()
+        for command_name, cli_kwargs in commands:
+            command = self._get_cli_command(command_name, cli_kwargs,
+                                            positional_kwarg=SVCTASK_POSITIONAL_KWARGS.get(command_name, 'object_id'))
+            writer.write(SVCTASK_BATCH_CMD_FORMAT.format(COMMAND=command,
+                                                         RETURN_CODE_IF_FAIL=show_return_code_if_fail(),
+                                                         SEPARATOR=SVCINFO_BATCH_SEPARATOR))
+        return writer.getvalue()
+
+    def _svctask_batch(self, commands):
+        """
+        Send svctask commands in a single command channel.
+        The commands do not depend on each other, so a failed command does not stop the ones after it.
+
+        Args:
+            commands : list of (command name, cli kwargs) tuples, the same kwargs that client.svctask accepts
+        Returns:
+            list with None for every command that succeeded, and CLIFailureError for every command that failed
+        Raises:
+            CLIFailureError : if the output of the batch could not be split by command
+        """
+        logger.debug("Sending svctask batch of {} commands".format(len(commands)))
+        stdout, stderr = self.client.send_raw_command(self._get_svctask_batch_cmd(commands))
+        if isinstance(stderr, bytes):
+            stderr = stderr.decode()
+        outputs = self._split_svcinfo_batch_output(stdout)
+        if len(outputs) != len(commands):
+            raise CLIFailureError('CLI failure. Error message is "{}"'.format(stderr))
+        failed_indexes = [index for index, output in enumerate(outputs) if TAG_ERR in output]
+        # the restricted shell does not allow to redirect stderr per command, so the error messages are
+        # matched to the failed commands by their order, as long as every failed command wrote a single line.
+        error_messages = stderr.strip().splitlines()
+        if len(error_messages) != len(failed_indexes):
+            return self._run_failed_svctask_commands(commands, failed_indexes)
+        results = [None] * len(commands)
+        for index, error_message in zip(failed_indexes, error_messages):
+            results[index] = CLIFailureError('CLI failure. Error message is "{}"'.format(error_message))
+        return results
+
+    def _run_failed_svctask_commands(self, commands, failed_indexes):
+        logger.debug("the errors of the svctask batch can not be matched to its {} failed commands, "
+                     "running them one by one".format(len(failed_indexes)))
+        results = [None] * len(commands)
+        for index in failed_indexes:
+            command_name, cli_kwargs = commands[index]
+            try:
+                getattr(self.client.svctask, command_name)(**cli_kwargs)
+            except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
+                results[index] = ex
+        return results
+
+    def _run_host_mapping_command(self, host_name, command_name, cli_kwargs):
+        batch_window = get_batch_window()
+        if batch_window <= 0:
+            getattr(self.client.svctask, command_name)(**cli_kwargs)
+            return
+        host_mappings_batcher.run((self.endpoint, self.user, host_name), (command_name, cli_kwargs),
+                                  self._svctask_batch, batch_window)
+
+    def _iterate_svcinfo_rows(self, command_name, cli_kwargs):
+        """
+        Send a concise svcinfo list command and parse its rows one by one, instead of building
+        all of them up front like SVCResponse does.
+
+        Args:
+            command_name : svcinfo command name
+            cli_kwargs : the same kwargs that client.svcinfo accepts
+        Returns:
+            generator of Munch, one per row
+        Raises:
+            CLIFailureError : if the command failed
+        """
+        command = 'svcinfo {} {}'.format(self._get_svcinfo_command(command_name, cli_kwargs),
+                                         show_return_code_if_fail())
+        stdout, stderr = self.client.send_raw_command(command)
+        if isinstance(stdout, bytes):
+            stdout = stdout.decode()
+        if TAG_ERR in stdout:
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode()
+            raise CLIFailureError('CLI failure. Error message is "{}"'.format(stderr))
+        rows = csv.reader(StringIO(stdout), delimiter=SVCINFO_BATCH_DELIMITER)
+        header = next(rows, None)
+        for row in rows:
+            if row:
+                yield Munch(zip(header, row))
+
+    def _generate_listed_volume_response(self, cli_volume):
+        return Volume(
+            capacity_bytes=int(cli_volume.capacity),
+            id=cli_volume.vdisk_UID,
+            internal_id=cli_volume.id,
+            name=cli_volume.name,
+            array_address=self.endpoint,
+            pool=cli_volume.mdisk_grp_name,
+            source_id=None,
+            array_type=self.array_type,
+            volume_group_id=cli_volume.get('volume_group_id'),
+            volume_group_name=cli_volume.get('volume_group_name')
+        )
+
+    @staticmethod
+    def _get_volume_ids_filter_values(first_volume_id):
+        window_start = first_volume_id
+        while window_start <= array_settings.SVC_LIST_VOLUMES_MAX_VOLUME_ID:
+            window_end = window_start + array_settings.SVC_LIST_VOLUMES_ID_WINDOW
+            yield 'id>{}:id<{}'.format(window_start - 1, window_end)
+            window_start = window_end
+        # volume ids above the volumes limit are not expected, they are read by one last query.
+        yield 'id>{}'.format(window_start - 1)
+
+    def list_volumes(self, start_token, name_prefix):
+        try:
+            start_volume_id = int(start_token) if start_token else -1
+        except ValueError:
+            raise array_errors.InvalidArgumentError(start_token)
+        try:
+            # every query reads a bounded window of volume ids, so a page holds only the rows of its window,
+            # and the windows after the page are not read at all.
+            for ids_filter_value in self._get_volume_ids_filter_values(start_volume_id + 1):
+                filter_values = [ids_filter_value]
+                if name_prefix:
+                    filter_values.append('name={}*'.format(name_prefix))
+                cli_kwargs = {'bytes': True, 'filtervalue': ':'.join(filter_values)}
+                for cli_volume in self._iterate_svcinfo_rows('lsvdisk', cli_kwargs):
+                    yield self._generate_listed_volume_response(cli_volume), cli_volume.id
+        except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
+            if any(msg_id in ex.my_message for msg_id in (NON_ASCII_CHARS, VALUE_TOO_LONG, INVALID_FILTER_VALUE)):
+                raise array_errors.InvalidArgumentError(ex.my_message)
+            raise ex
+
     def _generate_volume_response(self, cli_volume, is_virt_snap_func=False):
         pool = self._get_volume_pool(cli_volume)
         source_id = None
@@ -393,6 +644,18 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             return None
         return lsvdisk_response.as_single_element
 
+    def _lsvdisk_single_element_with_inventory(self, get_from_inventory, key, **kwargs):
+        if not self._inventory:
+            return self._lsvdisk_single_element(**kwargs)
+        self._keep_inventory_refreshed()
+        cli_volume = get_from_inventory(key)
+        if cli_volume is None:
+            generation = self._inventory.generation
+            cli_volume = self._lsvdisk_single_element(**kwargs)
+            if cli_volume:
+                self._inventory.add_volume(cli_volume, generation)
+        return cli_volume
+
     def _lsvdisk_list(self, **kwargs):
         lsvdisk_response = self._lsvdisk(**kwargs)
         if lsvdisk_response is None:
@@ -437,6 +700,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if OBJ_ALREADY_EXIST in ex.my_message:
                     raise array_errors.VolumeAlreadyExists(cli_kwargs, self.endpoint)
                 raise ex
+        finally:
+            self._invalidate_inventory_volumes()
 
     def _lsvolumegroupreplication(self, id_or_name):
         try:
@@ -461,16 +726,20 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if OBJ_ALREADY_EXIST in ex.my_message:
                     raise array_errors.VolumeAlreadyExists(cli_kwargs, self.endpoint)
                 raise ex
+        finally:
+            self._invalidate_inventory_volumes()
 
     def _get_cli_volume(self, volume_name, not_exist_err=True):
-        cli_volume = self._lsvdisk_single_element(object_id=volume_name)
+        get_from_inventory = self._inventory.get_volume_by_name if self._inventory else None
+        cli_volume = self._lsvdisk_single_element_with_inventory(get_from_inventory, volume_name,
+                                                                 object_id=volume_name)
         if not cli_volume and not_exist_err:
             raise array_errors.ObjectNotFoundError(volume_name)
         return cli_volume
 
     def _get_cli_volume_if_exists(self, volume_name):
         cli_volume = self._get_cli_volume(volume_name, not_exist_err=False)
-        logger.debug("cli volume returned : {}".format(cli_volume))
+        logger.debug("cli volume returned : %s", cli_volume)
         return cli_volume
 
     def _get_fcmap_as_target_if_exists(self, volume_name):
@@ -503,6 +772,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         pools = self._get_volume_pools(cli_volume)
         return ':'.join(pools)
 
+    @single_flight
     def get_volume(self, name, pool, is_virt_snap_func):
         cli_volume = self._get_cli_volume(name)
         return self._generate_volume_response(cli_volume, is_virt_snap_func)
@@ -533,6 +803,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if NOT_ENOUGH_EXTENTS_IN_POOL_EXPAND in ex.my_message:
                     raise array_errors.NotEnoughSpaceInPool(id_or_name=cli_volume.mdisk_grp_name)
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(volume_name)
 
     def expand_volume(self, volume_id, required_bytes):
         logger.info("Expanding volume with id : {0} to {1} bytes".format(volume_id, required_bytes))
@@ -554,6 +826,17 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         Args:
             endpoint_type : 'source' or 'target'
         """
+        if not self._inventory:
+            return self._lsfcmap(volume_name, endpoint_type)
+        self._keep_inventory_refreshed()
+        fcmaps = self._inventory.get_fcmaps(volume_name, endpoint_type)
+        if fcmaps is None:
+            generation = self._inventory.generation
+            fcmaps = self._lsfcmap(volume_name, endpoint_type)
+            self._inventory.add_fcmaps(volume_name, endpoint_type, fcmaps, generation)
+        return fcmaps
+
+    def _lsfcmap(self, volume_name, endpoint_type):
         filter_value = '{0}_vdisk_name={1}'.format(endpoint_type, volume_name)
         return self.client.svcinfo.lsfcmap(filtervalue=filter_value).as_list
 
@@ -591,7 +874,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
 
     def _lsvdisk_by_uid(self, vdisk_uid):
         filter_value = 'vdisk_UID=' + vdisk_uid
-        return self._lsvdisk_single_element(filtervalue=filter_value)
+        get_from_inventory = self._inventory.get_volume_by_uid if self._inventory else None
+        return self._lsvdisk_single_element_with_inventory(get_from_inventory, vdisk_uid, filtervalue=filter_value)
 
     def _get_cli_volume_by_wwn(self, volume_id, not_exist_err=False):
         cli_volume = self._lsvdisk_by_uid(volume_id)
@@ -641,6 +925,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if any(msg_id in ex.my_message for msg_id in (NON_ASCII_CHARS, INVALID_NAME, TOO_MANY_CHARS)):
                     raise array_errors.InvalidArgumentError(ex.my_message)
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(name)
         logger.info("finished creating cli volume : {}".format(name))
 
     @retry(svc_errors.StorageArrayClientException, tries=5, delay=1)
@@ -727,6 +1013,9 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if (OBJ_NOT_FOUND in ex.my_message or VOL_NOT_FOUND in ex.my_message) and not_exist_err:
                     raise array_errors.ObjectNotFoundError(volume_id_or_name)
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(volume_id_or_name)
+            self._invalidate_inventory_fcmaps()
 
     @register_csi_plugin()
     def delete_volume(self, volume_id):
@@ -734,6 +1023,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         self._delete_volume(volume_id)
         logger.info("Finished volume deletion. id : {0}".format(volume_id))
 
+    @single_flight
     def get_snapshot(self, volume_id, snapshot_name, pool, is_virt_snap_func):
         logger.debug("Get snapshot : {}".format(snapshot_name))
         if is_virt_snap_func:
@@ -749,6 +1039,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             return None
         return self._generate_snapshot_response_with_verification(target_cli_volume)
 
+    @single_flight
     def get_object_by_id(self, object_id, object_type, is_virt_snap_func=False):
         if is_virt_snap_func and object_type == controller_settings.SNAPSHOT_TYPE_NAME:
             cli_snapshot = self._get_cli_snapshot_by_id(object_id)
@@ -796,6 +1087,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                                             target_volume_name))
                 else:
                     raise ex
+        finally:
+            self._invalidate_inventory_fcmaps(volume_names=(source_volume_name, target_volume_name))
 
     def _start_fcmap(self, fcmap_id):
         logger.info("starting FlashCopy Mapping '{0}'".format(fcmap_id))
@@ -811,6 +1104,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     logger.info("FlashCopy Mapping '{0}' already copying".format(fcmap_id))
                 else:
                     raise ex
+        finally:
+            self._invalidate_inventory_fcmaps(fcmap_id=fcmap_id)
 
     def _create_and_start_fcmap(self, source_volume_name, target_volume_name, is_copy):
         self._create_fcmap(source_volume_name, target_volume_name, is_copy)
@@ -829,6 +1124,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             else:
                 logger.error("Failed to delete fcmap '{0}': {1}".format(fcmap_id, ex))
                 raise ex
+        finally:
+            self._invalidate_inventory_fcmaps(fcmap_id=fcmap_id)
 
     def _stop_fcmap(self, fcmap_id):
         logger.info("stopping fcmap with id : {0}".format(fcmap_id))
@@ -844,6 +1141,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 else:
                     logger.error("Failed to stop fcmap '{0}': {1}".format(fcmap_id, ex))
                     raise ex
+        finally:
+            self._invalidate_inventory_fcmaps(fcmap_id=fcmap_id)
 
     def _safe_stop_and_delete_fcmap(self, fcmap):
         if not self._is_in_remote_copy_relationship(fcmap):
@@ -908,36 +1207,37 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             self._rollback_create_snapshot(target_volume_name)
             raise ex
 
-    def _get_pool_site(self, pool):
-        filter_value = 'name={}'.format(pool)
-        cli_pool = self.client.svcinfo.lsmdiskgrp(filtervalue=filter_value).as_single_element
-        if cli_pool:
-            return cli_pool.site_name
-        raise array_errors.PoolDoesNotExist(pool, self.endpoint)
-
-    def _is_cli_volume_in_site(self, cli_volume, site_name):
-        volume_pools = self._get_volume_pools(cli_volume)
-        for pool in volume_pools:
-            volume_site_name = self._get_pool_site(pool)
-            if volume_site_name == site_name:
-                return True
-        return False
+    def _get_pool_sites(self, pools):
+        queries = [('lsmdiskgrp', {'filtervalue': 'name={}'.format(pool)}) for pool in pools]
+        pool_sites = []
+        for pool, lsmdiskgrp_response in zip(pools, self._svcinfo_batch(queries)):
+            cli_pool = lsmdiskgrp_response.as_single_element
+            if not cli_pool:
+                raise array_errors.PoolDoesNotExist(pool, self.endpoint)
+            pool_sites.append(cli_pool.site_name)
+        return pool_sites
 
     def _get_rcrelationships_as_master_in_cluster(self, volume_name):
         filter_value = 'master_vdisk_name={}:aux_cluster_id={}'.format(volume_name, self.identifier)
         return self._lsrcrelationship(filter_value).as_list
 
+    def get_pool_available_capacity(self, pool):
+        cli_pool = self.client.svcinfo.lsmdiskgrp(bytes=True, filtervalue='name={}'.format(pool)).as_single_element
+        if not cli_pool:
+            raise array_errors.PoolDoesNotExist(pool, self.endpoint)
+        return int(cli_pool.free_capacity)
+
     def _get_cli_volume_in_pool_site(self, volume_name, pool_name):
         cli_volume = self._get_cli_volume(volume_name)
         if not pool_name or ':' in pool_name:
             return cli_volume
-        pool_site_name = self._get_pool_site(pool_name)
-        if self._is_cli_volume_in_site(cli_volume, pool_site_name):
+        pool_site_name, *volume_site_names = self._get_pool_sites([pool_name] + self._get_volume_pools(cli_volume))
+        if pool_site_name in volume_site_names:
             return cli_volume
         rcrelationships = self._get_rcrelationships_as_master_in_cluster(volume_name)
         for rcrelationship in rcrelationships:
             other_cli_volume = self._get_cli_volume(rcrelationship.aux_vdisk_name)
-            if self._is_cli_volume_in_site(other_cli_volume, pool_site_name):
+            if pool_site_name in self._get_pool_sites(self._get_volume_pools(other_cli_volume)):
                 return other_cli_volume
         raise RuntimeError('could not find a volume for {} in site {}'.format(volume_name, pool_site_name))
 
@@ -970,6 +1270,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             if SNAPSHOT_NOT_EXIST in ex.my_message:
                 raise array_errors.ObjectNotFoundError(internal_snapshot_id)
             raise ex
+        finally:
+            self._invalidate_inventory_volumes()
 
     @register_csi_plugin()
     def delete_snapshot(self, snapshot_id, internal_snapshot_id):
@@ -984,37 +1286,99 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         ports = host.get(attribute_name, [])
         return ports if isinstance(ports, list) else [ports]
 
+    def _get_host_ports_by_connectivity_type(self, host):
+        for connectivity_type, attribute_name in HOST_PORT_ATTRIBUTES_BY_CONNECTIVITY_TYPE.items():
+            for port in filter(None, self._get_host_ports(host, attribute_name)):
+                yield connectivity_type, port
+
+    @property
+    def _hosts_ports_index(self):
+        return svc_host_ports_indexes.get(self.endpoint, self.user)
+
+    def _get_ports_by_host_name(self, detailed_hosts_list):
+        return {host.name: list(self._get_host_ports_by_connectivity_type(host)) for host in detailed_hosts_list}
+
+    def _get_port_counts_by_host_name(self, hosts_list):
+        return {host.name: host.get('port_count') for host in hosts_list}
+
+    def _build_hosts_ports_index(self):
+        logger.debug("Building hosts ports index on array {0}".format(self.endpoint))
+        hosts_list = self.client.svcinfo.lshost()
+        ports_by_host_name = self._get_ports_by_host_name(self._get_detailed_hosts_list(hosts_list))
+        self._hosts_ports_index.build(ports_by_host_name, self._get_port_counts_by_host_name(hosts_list))
+
+    def _update_hosts_ports_index(self, stale_host_names):
+        logger.debug("Updating hosts ports index on array {0}".format(self.endpoint))
+        hosts_ports_index = self._hosts_ports_index
+        hosts_list = self.client.svcinfo.lshost()
+        port_counts_by_host_name = self._get_port_counts_by_host_name(hosts_list)
+        changed_host_names = hosts_ports_index.get_changed_host_names(port_counts_by_host_name)
+        changed_host_names.update(stale_host_names)
+        changed_hosts_list = [host for host in hosts_list if host.name in changed_host_names]
+        logger.debug("Reading the ports of {0} changed hosts".format(len(changed_hosts_list)))
+        ports_by_host_name = self._get_ports_by_host_name(self._get_detailed_hosts_list(changed_hosts_list))
+        hosts_ports_index.update(ports_by_host_name, port_counts_by_host_name)
+
+    def _is_host_matching_initiators(self, host_name, connectivity_types, initiators):
+        try:
+            cli_host = self._lshost_single_element(host_name)
+        except (array_errors.HostNotFoundError, svc_errors.CommandExecutionError, CLIFailureError):
+            return False
+        matchers = {
+            array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE: initiators.is_array_nvme_nqn_match,
+            array_settings.FC_CONNECTIVITY_TYPE: initiators.is_array_wwns_match,
+            array_settings.ISCSI_CONNECTIVITY_TYPE: initiators.is_array_iscsi_iqns_match
+        }
+        for connectivity_type in connectivity_types:
+            host_ports = self._get_host_ports(cli_host, HOST_PORT_ATTRIBUTES_BY_CONNECTIVITY_TYPE[connectivity_type])
+            if not matchers[connectivity_type](host_ports):
+                return False
+        return True
+
+    def _is_hosts_ports_index_valid(self, host_names_by_connectivity_type, initiators):
+        if not host_names_by_connectivity_type:
+            return False
+        connectivity_types_by_host_name = defaultdict(list)
+        for connectivity_type, host_name in host_names_by_connectivity_type.items():
+            connectivity_types_by_host_name[host_name].append(connectivity_type)
+        return all(self._is_host_matching_initiators(host_name, connectivity_types, initiators)
+                   for host_name, connectivity_types in connectivity_types_by_host_name.items())
+
+    def _get_host_names_by_connectivity_type_from_index(self, initiators):
+        hosts_ports_index = self._hosts_ports_index
+        if not hosts_ports_index.is_built:
+            self._build_hosts_ports_index()
+            return hosts_ports_index.get_host_names_by_connectivity_type(initiators)
+        host_names_by_connectivity_type = hosts_ports_index.get_host_names_by_connectivity_type(initiators)
+        if self._is_hosts_ports_index_valid(host_names_by_connectivity_type, initiators):
+            return host_names_by_connectivity_type
+        logger.debug("hosts ports index of array {0} does not match initiators : {1}, updating it".format(
+            self.endpoint, initiators))
+        self._update_hosts_ports_index(set(host_names_by_connectivity_type.values()))
+        host_names_by_connectivity_type = hosts_ports_index.get_host_names_by_connectivity_type(initiators)
+        if self._is_hosts_ports_index_valid(host_names_by_connectivity_type, initiators) or \
+                not hosts_ports_index.is_rebuild_due():
+            return host_names_by_connectivity_type
+        logger.debug("hosts ports index of array {0} still does not match initiators : {1}, rebuilding it".format(
+            self.endpoint, initiators))
+        self._build_hosts_ports_index()
+        return hosts_ports_index.get_host_names_by_connectivity_type(initiators)
+
     def _get_host_by_host_identifiers_slow(self, initiators):
-        logger.debug("Scanning all hosts for initiators : {0}".format(initiators))
-        detailed_hosts_list = self._get_detailed_hosts_list()
-        nvme_host, fc_host, iscsi_host = None, None, None
-        connectivity_types = set()
-        for host in detailed_hosts_list:
-            host_nqns = self._get_host_ports(host, HOST_NQN)
-            if initiators.is_array_nvme_nqn_match(host_nqns):
-                nvme_host = host.name
-                connectivity_types.add(array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE)
-                logger.debug("found nvme nqn in list : {0} for host : "
-                             "{1}".format(initiators.nvme_nqns, nvme_host))
-            host_wwns = self._get_host_ports(host, HOST_WWPN)
-            if initiators.is_array_wwns_match(host_wwns):
-                fc_host = host.name
-                connectivity_types.add(array_settings.FC_CONNECTIVITY_TYPE)
-                logger.debug("found fc wwns in list : {0} for host : "
-                             "{1}".format(initiators.fc_wwns, fc_host))
-            host_iqns = self._get_host_ports(host, HOST_ISCSI_NAME)
-            if initiators.is_array_iscsi_iqns_match(host_iqns):
-                iscsi_host = host.name
-                connectivity_types.add(array_settings.ISCSI_CONNECTIVITY_TYPE)
-                logger.debug("found iscsi iqn in list : {0} for host : "
-                             "{1}".format(initiators.iscsi_iqns, iscsi_host))
-        if not connectivity_types:
-            logger.debug("could not find host by using initiators: {0} ".format(initiators))
+        logger.debug("Looking up hosts ports index for initiators : %s", initiators)
+        host_names_by_connectivity_type = self._get_host_names_by_connectivity_type_from_index(initiators)
+        if not host_names_by_connectivity_type:
+            logger.debug("could not find host by using initiators: %s ", initiators)
             raise array_errors.HostNotFoundError(initiators)
+        nvme_host = host_names_by_connectivity_type.get(array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE)
+        fc_host = host_names_by_connectivity_type.get(array_settings.FC_CONNECTIVITY_TYPE)
+        iscsi_host = host_names_by_connectivity_type.get(array_settings.ISCSI_CONNECTIVITY_TYPE)
+        logger.debug("found hosts nvme : {0}, fc : {1}, iscsi : {2} for initiators : {3}".format(
+            nvme_host, fc_host, iscsi_host, initiators))
         host_name = self._get_host_name_if_equal(nvme_host, fc_host, iscsi_host)
         if not host_name:
             raise array_errors.MultipleHostsFoundError(initiators, fc_host)
-        return host_name, list(connectivity_types)
+        return host_name, list(host_names_by_connectivity_type)
 
     def _get_host_names_by_wwpn(self, host_wwpn):
         fabrics = self._lsfabric(wwpn=host_wwpn).as_list
@@ -1085,8 +1449,9 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     connectivity_types.add(array_settings.ISCSI_CONNECTIVITY_TYPE)
         return host_names, connectivity_types
 
+    @single_flight
     def get_host_by_host_identifiers(self, initiators):
-        logger.debug("Getting host name for initiators : {0}".format(initiators))
+        logger.debug("Getting host name for initiators : %s", initiators)
         host_names, connectivity_types = self._get_host_names_and_connectivity_types(initiators)
         host_names = set(filter(None, host_names))
         if len(host_names) > 1:
@@ -1095,9 +1460,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             return host_names.pop(), connectivity_types
         return self._get_host_by_host_identifiers_slow(initiators)
 
-    def _get_detailed_hosts_list(self):
+    def _get_detailed_hosts_list(self, hosts_list):
         logger.debug("Getting detailed hosts list on array {0}".format(self.endpoint))
-        hosts_list = self.client.svcinfo.lshost()
         if not hosts_list:
             return []
 
@@ -1115,11 +1479,23 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         return writer.getvalue()
 
     def _get_cli_host(self, id_or_name):
+        if not self._inventory:
+            return self._lshost_single_element(id_or_name)
+        self._keep_inventory_refreshed()
+        cli_host = self._inventory.get_host_by_name(id_or_name)
+        if cli_host is None:
+            generation = self._inventory.generation
+            cli_host = self._lshost_single_element(id_or_name)
+            self._inventory.add_host(cli_host, generation)
+        return cli_host
+
+    def _lshost_single_element(self, id_or_name):
         cli_host = self.client.svcinfo.lshost(object_id=id_or_name).as_single_element
         if not cli_host:
             raise array_errors.HostNotFoundError(id_or_name)
         return cli_host
 
+    @single_flight
     def get_host_by_name(self, host_name):
         cli_host = self._get_cli_host(host_name)
         nvme_nqns = self._get_host_ports(cli_host, HOST_NQN)
@@ -1142,6 +1518,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             logger.error(ex)
             raise array_errors.ObjectNotFoundError(volume_name)
 
+    @single_flight
     def get_volume_mappings(self, volume_id):
         logger.debug("Getting volume mappings for volume id : "
                      "{0}".format(volume_id))
@@ -1154,64 +1531,96 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             luns_by_host[mapping.get('host_name', '')] = mapping.get('SCSI_id', '')
         return luns_by_host
 
-    def _get_used_lun_ids_from_host(self, host_name):
+    def _get_volume_names_by_lun_from_host(self, host_name):
         logger.debug("getting used lun ids for host :{0}".format(host_name))
-        luns_in_use = set()
-
         try:
-            for mapping in self.client.svcinfo.lshostvdiskmap(host=host_name):
-                luns_in_use.add(mapping.get('SCSI_id', ''))
+            volume_names_by_lun = self._get_volume_names_by_lun(self.client.svcinfo.lshostvdiskmap(host=host_name))
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             logger.error(ex)
             raise array_errors.HostNotFoundError(host_name)
-        logger.debug("The used lun ids for host :{0}".format(luns_in_use))
+        logger.debug("The used lun ids for host :%s", lazy(list, volume_names_by_lun))
 
-        return luns_in_use
+        return volume_names_by_lun
+
+    @staticmethod
+    def _get_volume_names_by_lun(host_mappings):
+        volume_names_by_lun = {}
+        for mapping in host_mappings:
+            lun = mapping.get('SCSI_id', '')
+            if lun.isdigit():
+                volume_names_by_lun[int(lun)] = mapping.get('vdisk_name')
+        return volume_names_by_lun
 
-    def _get_free_lun(self, host_name):
-        logger.debug("getting random free lun id for "
+    @property
+    def _luns_allocator(self):
+        return host_luns_allocators.get(self.endpoint, self.user)
+
+    def _reserve_free_lun(self, host_name, host_mappings=None):
+        logger.debug("reserving free lun id for "
                      "host :{0}".format(host_name))
-        lun = None
-        luns_in_use = self._get_used_lun_ids_from_host(host_name)
         # Today we have SS_MAX_HLUN_MAPPINGS_PER_HOST as 2048 on high end
         # platforms (SVC / V7000 etc.) and 512 for the lower
         # end platforms (V3500 etc.). This limits the number of volumes that
         # can be mapped to a single host. (Note that some hosts such as linux
         # do not support more than 255 or 511 mappings today irrespective of
         # our constraint).
-        lun_range_gen = range(self.MIN_LUN_NUMBER, self.MAX_LUN_NUMBER + 1)
-        lun_range = [str(lun) for lun in lun_range_gen]
-        free_luns = [lun for lun in lun_range if lun not in luns_in_use]
-        free_luns_in_interval = free_luns[:LUN_INTERVAL]
-        if free_luns:
-            lun = choice(free_luns_in_interval)
+        # the mappings of the host may already be read together with the volume, in the same batch
+        get_volume_names_by_lun = (lambda: self._get_volume_names_by_lun(host_mappings)) \
+            if host_mappings is not None else (lambda: self._get_volume_names_by_lun_from_host(host_name))
+        lun = self._luns_allocator.reserve(host_name, get_volume_names_by_lun,
+                                           self.MIN_LUN_NUMBER, self.MAX_LUN_NUMBER)
+        logger.debug("The reserved available lun is : {0}".format(lun))
+        return str(lun)
+
+    def _settle_reserved_lun(self, host_name, lun, volume_name, is_mapped, is_lun_in_use):
+        if is_mapped:
+            self._luns_allocator.confirm(host_name, int(lun), volume_name)
         else:
-            raise array_errors.NoAvailableLunError(host_name)
-        logger.debug("The chosen available lun is : {0}".format(lun))
-        return lun
+            self._luns_allocator.release(host_name, int(lun), is_in_use=is_lun_in_use)
 
     def _raise_error_when_host_not_exist_or_not_meet_the_rules(self, host_name, error_message):
         if NAME_NOT_EXIST_OR_MEET_RULES in error_message:
             raise array_errors.HostNotFoundError(host_name)
 
+    def _get_volume_name_and_host_mappings(self, volume_id, host_name, connectivity_type):
+        is_host_luns_needed = (connectivity_type != array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE and
+                               not self._luns_allocator.is_loaded(host_name))
+        if self._inventory or not is_host_luns_needed:
+            return self._get_volume_name_by_wwn(volume_id), None
+        queries = [('lsvdisk', {'bytes': True, 'filtervalue': 'vdisk_UID=' + volume_id}),
+                   ('lshostvdiskmap', {'object_id': host_name})]
+        try:
+            lsvdisk_response, lshostvdiskmap_response = self._svcinfo_batch(queries)
+        except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
+            logger.debug("batched reads for mapping failed, reading one by one: {}".format(ex))
+            return self._get_volume_name_by_wwn(volume_id), None
+        cli_volume = lsvdisk_response.as_single_element
+        volume_name = cli_volume.name if cli_volume else self._get_volume_name_by_wwn(volume_id)
+        return volume_name, lshostvdiskmap_response
+
     @register_csi_plugin()
     def map_volume(self, volume_id, host_name, connectivity_type):
         logger.debug("mapping volume : {0} to host : "
                      "{1}".format(volume_id, host_name))
-        volume_name = self._get_volume_name_by_wwn(volume_id)
+        volume_name, host_mappings = self._get_volume_name_and_host_mappings(volume_id, host_name,
+                                                                             connectivity_type)
         cli_kwargs = {
             'host': host_name,
             'object_id': volume_name,
             'force': True
         }
         lun = ""
+        is_mapped = False
+        is_lun_in_use = False
         try:
             if connectivity_type != array_settings.NVME_OVER_FC_CONNECTIVITY_TYPE:
-                lun = self._get_free_lun(host_name)
+                lun = self._reserve_free_lun(host_name, host_mappings)
                 cli_kwargs.update({'scsi': lun})
-            self.client.svctask.mkvdiskhostmap(**cli_kwargs)
+            self._run_host_mapping_command(host_name, 'mkvdiskhostmap', cli_kwargs)
+            is_mapped = True
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             if is_warning_message(ex.my_message):
+                is_mapped = True
                 logger.warning("exception encountered during volume {0} mapping to host {1}: {2}".format(volume_name,
                                                                                                          host_name,
                                                                                                          ex.my_message))
@@ -1222,9 +1631,14 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if SPECIFIED_OBJ_NOT_EXIST in ex.my_message:
                     raise array_errors.ObjectNotFoundError(volume_name)
                 if LUN_ALREADY_IN_USE in ex.my_message:
+                    is_lun_in_use = True
                     raise array_errors.LunAlreadyInUseError(lun,
                                                             host_name)
                 raise array_errors.MappingError(volume_name, host_name, ex)
+        finally:
+            if lun:
+                self._settle_reserved_lun(host_name, lun, volume_name, is_mapped, is_lun_in_use)
+            self._invalidate_inventory_host(host_name)
 
         return str(lun)
 
@@ -1240,9 +1654,11 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         }
 
         try:
-            self.client.svctask.rmvdiskhostmap(**cli_kwargs)
+            self._run_host_mapping_command(host_name, 'rmvdiskhostmap', cli_kwargs)
+            self._luns_allocator.free_volume(host_name, volume_name)
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             if is_warning_message(ex.my_message):
+                self._luns_allocator.free_volume(host_name, volume_name)
                 logger.warning("exception encountered during volume {0}"
                                " unmapping from host {1}: {2}".format(volume_name,
                                                                       host_name,
@@ -1254,16 +1670,22 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if OBJ_NOT_FOUND in ex.my_message:
                     raise array_errors.ObjectNotFoundError(volume_name)
                 if VOL_ALREADY_UNMAPPED in ex.my_message:
+                    self._luns_allocator.free_volume(host_name, volume_name)
                     raise array_errors.VolumeAlreadyUnmappedError(volume_name)
                 if SPECIFIED_OBJ_NOT_EXIST in ex.my_message:
                     # host isn't in the volume's mappings
                     raise array_errors.VolumeNotMappedToHostError(volume_name, host_name)
                 raise array_errors.UnmappingError(volume_name,
                                                   host_name, ex)
+        finally:
+            self._invalidate_inventory_host(host_name)
 
     def _get_array_iqns_by_node_id(self):
         logger.debug("Getting array nodes id and iscsi name")
-        nodes_list = self.client.svcinfo.lsnode()
+        return self._get_online_iqns_by_node_id(self.client.svcinfo.lsnode())
+
+    @staticmethod
+    def _get_online_iqns_by_node_id(nodes_list):
         array_iqns_by_id = {node.id: node.iscsi_name for node in nodes_list
                             if node.status.lower() == "online"}
         logger.debug("Found iqns by node id: {}".format(array_iqns_by_id))
@@ -1298,15 +1720,27 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             ips_by_iqn[iqn].extend(ips)
         return dict(ips_by_iqn)
 
-    def _get_iscsi_targets_by_node_id(self, host_name):
-        portset_id = self._get_host_portset_id(host_name)
+    def _get_array_iqns_by_node_id_and_host_portset_id(self, host_name):
+        if not self._inventory:
+            queries = [('lsnode', {}), ('lshost', {'object_id': host_name})]
+            try:
+                lsnode_response, lshost_response = self._svcinfo_batch(queries)
+                cli_host = lshost_response.as_single_element
+                if cli_host:
+                    return self._get_online_iqns_by_node_id(lsnode_response), cli_host.get(HOST_PORTSET_ID)
+            except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
+                logger.debug("batched reads for iscsi targets failed, reading one by one: {}".format(ex))
+        return self._get_array_iqns_by_node_id(), self._get_host_portset_id(host_name)
+
+    def _get_iscsi_targets_by_node_id(self, portset_id):
         ports = self._list_ip_ports(portset_id)
         return self._create_ips_by_node_id_map(ports)
 
+    @single_flight
     def get_iscsi_targets_by_iqn(self, host_name):
         logger.debug("Getting iscsi targets by iqn")
-        iqns_by_node_id = self._get_array_iqns_by_node_id()
-        ips_by_node_id = self._get_iscsi_targets_by_node_id(host_name)
+        iqns_by_node_id, portset_id = self._get_array_iqns_by_node_id_and_host_portset_id(host_name)
+        ips_by_node_id = self._get_iscsi_targets_by_node_id(portset_id)
         ips_by_iqn = self._unify_ips_by_iqn(iqns_by_node_id, ips_by_node_id)
 
         if ips_by_iqn and any(ips_by_iqn.values()):
@@ -1322,6 +1756,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                          "is: {1}".format(kwargs, ex))
             raise ex
 
+    @single_flight
     def get_array_fc_wwns(self, host_name):
         logger.debug("Getting the connected fc port wwn value from array "
                      "related to host : {}.".format(host_name))
@@ -1515,6 +1950,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                                             other_system_id,
                                                                             ex))
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(master_cli_volume_id)
         return None
 
     def _start_rcrelationship(self, rcrelationship_id, primary_endpoint_type=None, force=False):
@@ -1530,6 +1967,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                                                                      ex.my_message))
             else:
                 logger.warning("failed to start rcrelationship '{}': {}".format(rcrelationship_id, ex))
+        finally:
+            self._invalidate_inventory_volumes()
 
     @register_csi_plugin()
     def create_replication(self, replication_request):
@@ -1569,6 +2008,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                                    ex.my_message))
             else:
                 logger.warning("failed to stop rcrelationship '{0}': {1}".format(rcrelationship_id, ex))
+        finally:
+            self._invalidate_inventory_volumes()
 
     def _delete_rcrelationship(self, rcrelationship_id):
         logger.info("deleting remote copy relationship with id: {0}".format(rcrelationship_id))
@@ -1581,6 +2022,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                              ex.my_message))
             else:
                 logger.warning("failed to delete rcrelationship '{0}': {1}".format(rcrelationship_id, ex))
+        finally:
+            self._invalidate_inventory_volumes()
 
     @register_csi_plugin()
     def delete_replication(self, replication):
@@ -1619,6 +2062,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                                                             replication_name,
                                                                                             ex.my_message))
                 raise
+        finally:
+            self._invalidate_inventory_volumes()
         logger.info("succeeded making '{}' primary for remote copy relationship {}".format(endpoint_type,
                                                                                            replication_name))
 
@@ -1709,6 +2154,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     raise array_errors.InvalidArgumentError(ex.my_message)
                 raise ex
             return None
+        finally:
+            self._invalidate_inventory_volume(source_volume_id)
 
     def _get_id_from_response(self, response):
         message = str(response.response[0])
@@ -1763,6 +2210,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                                                               INVALID_NAME, TOO_MANY_CHARS)):
                     raise array_errors.InvalidArgumentError(ex.my_message)
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(name)
         return None
 
     def _get_cli_volume_id_from_volume_group(self, filter, filter_parameter):
@@ -1804,6 +2253,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 if OBJ_ALREADY_EXIST in ex.my_message:
                     raise array_errors.VolumeAlreadyExists(kwargs, self.endpoint)
                 raise ex
+        finally:
+            self._invalidate_inventory_volume(cli_volume_id)
 
     def _rmvolumegroup(self, id_or_name, not_exist_error=False):
         logger.info("deleting volume group : {0}".format(id_or_name))
@@ -1820,6 +2271,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     if not not_exist_error:
                         return
                 raise ex
+        finally:
+            self._invalidate_inventory_volumes()
 
     def _is_vdisk_has_fcmaps(self, vdisk_uid):
         if not vdisk_uid:
@@ -1843,6 +2296,7 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         cli_kwargs = build_create_host_kwargs(host_name, connectivity_type, port, io_group)
         try:
             self.client.svctask.mkhost(**cli_kwargs)
+            self._hosts_ports_index.add_port(host_name, connectivity_type, port)
             return 200
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             self._raise_invalid_io_group(io_group, ex.my_message)
@@ -1858,6 +2312,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
             if is_warning_message(ex.my_message):
                 logger.warning("exception encountered during host {} creation : {}".format(host_name, ex.my_message))
             raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
 
     @register_csi_plugin()
     def create_host(self, host_name, initiators, connectivity_type, io_group):
@@ -1880,6 +2336,11 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 logger.warning("exception encountered during host {} deletion : {}".format(host_name, ex.my_message))
                 return
             raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
+            self._invalidate_array_initiators(host_name)
+            self._hosts_ports_index.remove_host(host_name)
+            self._luns_allocator.remove_host(host_name)
 
     @register_csi_plugin()
     def delete_host(self, host_name):
@@ -1896,12 +2357,16 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         cli_kwargs = build_host_port_command_kwargs(host_name, connectivity_type, port)
         try:
             self.client.svctask.addhostport(**cli_kwargs)
+            self._hosts_ports_index.add_port(host_name, connectivity_type, port)
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             if not self._is_port_invalid(ex.my_message):
                 if is_warning_message(ex.my_message):
                     logger.warning("exception encountered during adding port {} to host {} : {}".format(
                         port, host_name, ex.my_message))
                 raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
+            self._invalidate_array_initiators(host_name)
 
     @register_csi_plugin()
     def add_ports_to_host(self, host_name, initiators, connectivity_type):
@@ -1915,12 +2380,16 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
         cli_kwargs = build_host_port_command_kwargs(host_name, connectivity_type, port)
         try:
             self.client.svctask.rmhostport(**cli_kwargs)
+            self._hosts_ports_index.remove_port(host_name, connectivity_type, port)
         except (svc_errors.CommandExecutionError, CLIFailureError) as ex:
             if not self._is_port_invalid(ex.my_message):
                 if is_warning_message(ex.my_message):
                     logger.warning("exception encountered during removing port {} from host {} : {}".format(
                         port, host_name, ex.my_message))
                 raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
+            self._invalidate_array_initiators(host_name)
 
     @register_csi_plugin()
     def remove_ports_from_host(self, host_name, ports, connectivity_type):
@@ -1969,6 +2438,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     io_group, host_name, ex.my_message))
             else:
                 raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
 
     def add_io_group_to_host(self, host_name, io_group):
         if not io_group:
@@ -1987,6 +2458,8 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                     io_group, host_name, ex.my_message))
             else:
                 raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
 
     def remove_io_group_from_host(self, host_name, io_group):
         if not io_group:
@@ -2037,6 +2510,9 @@ class SVCArrayMediator(ArrayMediatorAbstract, VolumeGroupInterface):
                 logger.warning("exception encountered during getting io_group, from host {} : {}".format(
                     host_name, ex.my_message))
             raise ex
+        finally:
+            self._invalidate_inventory_host(host_name)
+            self._invalidate_array_initiators(host_name)
 
     def change_host_protocol(self, host_name, protocol):
         self._chhost(host_name, protocol)
@@ -1,5 +1,3 @@
-from random import randint
-
 from pyxcli import errors as xcli_errors
 from pyxcli.client import XCLIClient
 
@@ -7,10 +5,12 @@ import controllers.array_action.errors as array_errors
 import controllers.servers.settings as servers_settings
 from controllers.array_action.array_action_types import Volume, Snapshot, Host
 from controllers.array_action.array_mediator_abstract import ArrayMediatorAbstract
+from controllers.array_action.lun_allocator import host_luns_allocators
 from controllers.array_action.settings import FC_CONNECTIVITY_TYPE, ISCSI_CONNECTIVITY_TYPE
-from controllers.array_action.utils import ClassProperty
+from controllers.array_action.single_flight import single_flight
+from controllers.array_action.utils import ClassProperty, time_array_commands
 from controllers.common import settings
-from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.csi_logger import get_stdout_logger, lazy
 from controllers.common.utils import string_to_array
 
 array_connections_dict = {}
@@ -20,6 +20,9 @@ LUN_IS_ALREADY_IN_USE_ERROR = "LUN is already in use"
 UNDEFINED_MAPPING_ERROR = "The requested mapping is not defined"
 NO_ALLOCATION_SPACE_ERROR = "No space to allocate to the volume"
 NOT_AVAILABLE = "Not Available"
+LIST_VOLUMES_TOKEN_DELIMITER = ":"
+# the pool sizes are in decimal GB
+POOL_CAPACITY_UNIT_IN_BYTES = 1000 ** 3
 
 
 class XIVArrayMediator(ArrayMediatorAbstract):
@@ -80,6 +83,9 @@ class XIVArrayMediator(ArrayMediatorAbstract):
                 self.password,
                 self.endpoint
             )
+            # the commands of the cmd namespace are all sent through execute_remote
+            self.client.execute_remote = time_array_commands(self.client.execute_remote, self.array_type,
+                                                             lambda _remote_target, cmd, **_kwargs: cmd)
 
         except xcli_errors.CredentialsError:
             raise array_errors.CredentialsError(self.endpoint)
@@ -129,8 +135,8 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             return None
         return cli_volume.copy_master_wwn
 
-    def _generate_volume_response(self, cli_volume):
-        source_object_wwn = self._get_volume_source_wwn(cli_volume)
+    def _generate_volume_response(self, cli_volume, is_source_needed=True):
+        source_object_wwn = self._get_volume_source_wwn(cli_volume) if is_source_needed else None
         return Volume(
             capacity_bytes=self._convert_size_blocks_to_bytes(cli_volume.capacity),
             id=cli_volume.wwn,
@@ -161,11 +167,12 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             logger.exception(ex)
             raise array_errors.InvalidArgumentError(ex.status)
 
+    @single_flight
     def get_volume(self, name, pool, is_virt_snap_func):
         logger.debug("Get volume : {}".format(name))
         cli_volume = self._get_cli_object_by_name(name)
 
-        logger.debug("cli volume returned : {}".format(cli_volume))
+        logger.debug("cli volume returned : %s", cli_volume)
         if not cli_volume:
             raise array_errors.ObjectNotFoundError(name)
 
@@ -175,6 +182,39 @@ class XIVArrayMediator(ArrayMediatorAbstract):
         array_volume = self._generate_volume_response(cli_volume)
         return array_volume
 
+    def get_pool_available_capacity(self, pool):
+        cli_pool = self.client.cmd.pool_list(pool=pool).as_single_element
+        if not cli_pool:
+            raise array_errors.PoolDoesNotExist(pool, self.endpoint)
+        return int(cli_pool.empty_space_soft) * POOL_CAPACITY_UNIT_IN_BYTES
+
+    @staticmethod
+    def _split_list_volumes_token(start_token):
+        if not start_token:
+            return '', -1
+        pool_name, _, volume_id = start_token.rpartition(LIST_VOLUMES_TOKEN_DELIMITER)
+        try:
+            return pool_name, int(volume_id)
+        except ValueError:
+            raise array_errors.InvalidArgumentError(start_token)
+
+    def list_volumes(self, start_token, name_prefix):
+        start_pool_name, start_volume_id = self._split_list_volumes_token(start_token)
+        # vol_list has no filter by volume id, so a page reads the pool of the token and skips its volumes
+        # up to the token here. the pools before the token are never read.
+        pool_names = sorted(cli_pool.name for cli_pool in self.client.cmd.pool_list().as_list)
+        for pool_name in pool_names:
+            if pool_name < start_pool_name:
+                continue
+            cli_volumes = self.client.cmd.vol_list(pool=pool_name).as_list
+            for cli_volume in sorted(cli_volumes, key=lambda cli_volume: int(cli_volume.id)):
+                if pool_name == start_pool_name and int(cli_volume.id) <= start_volume_id:
+                    continue
+                if cli_volume.master_name or not cli_volume.name.startswith(name_prefix or ''):
+                    continue
+                token = LIST_VOLUMES_TOKEN_DELIMITER.join((pool_name, cli_volume.id))
+                yield self._generate_volume_response(cli_volume, is_source_needed=False), token
+
     def _expand_cli_volume(self, cli_volume, increase_in_blocks):
         try:
             self.client.cmd.vol_resize(vol=cli_volume.name, size_blocks=increase_in_blocks)
@@ -305,6 +345,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
 
         logger.info("Finished volume deletion. id : {0}".format(volume_id))
 
+    @single_flight
     def get_snapshot(self, volume_id, snapshot_name, pool, is_virt_snap_func):
         logger.debug("Get snapshot : {}".format(snapshot_name))
         try:
@@ -319,6 +360,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
         array_snapshot = self._generate_snapshot_response(cli_snapshot)
         return array_snapshot
 
+    @single_flight
     def get_object_by_id(self, object_id, object_type, is_virt_snap_func=False):
         cli_object = self._get_cli_object_by_wwn(object_id)
         if not cli_object:
@@ -371,6 +413,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
     def _get_cli_host(self, host_name):
         return self.client.cmd.host_list(host=host_name).as_single_element
 
+    @single_flight
     def get_host_by_name(self, host_name):
         cli_host = self._get_cli_host(host_name)
         if not cli_host:
@@ -384,8 +427,9 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             connectivity_types.append(ISCSI_CONNECTIVITY_TYPE)
         return Host(name=cli_host.name, connectivity_types=connectivity_types, fc_wwns=fc_wwns, iscsi_iqns=iscsi_iqn)
 
+    @single_flight
     def get_host_by_host_identifiers(self, initiators):
-        logger.debug("Getting host id for initiators : {0}".format(initiators))
+        logger.debug("Getting host id for initiators : %s", initiators)
         matching_hosts_set = set()
         port_types = []
 
@@ -395,11 +439,11 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             host_fc_ports = string_to_array(host.fc_ports, ',')
             if initiators.is_array_wwns_match(host_fc_ports):
                 matching_hosts_set.add(host.name)
-                logger.debug("found host : {0}, by fc port : {1}".format(host.name, host_fc_ports))
+                logger.debug("found host : %s, by fc port : %s", host.name, host_fc_ports)
                 port_types.append(FC_CONNECTIVITY_TYPE)
             if initiators.is_array_iscsi_iqns_match(host_iscsi_ports):
                 matching_hosts_set.add(host.name)
-                logger.debug("found host : {0}, by iscsi port : {1}".format(host.name, host_iscsi_ports))
+                logger.debug("found host : %s, by iscsi port : %s", host.name, host_iscsi_ports)
                 port_types.append(ISCSI_CONNECTIVITY_TYPE)
         matching_hosts = sorted(matching_hosts_set)
         if not matching_hosts:
@@ -408,6 +452,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             raise array_errors.MultipleHostsFoundError(initiators, matching_hosts)
         return matching_hosts[0], port_types
 
+    @single_flight
     def get_volume_mappings(self, volume_id):
         logger.debug("Getting volume mappings for volume id : {0}".format(volume_id))
         vol_name = self._get_object_name_by_wwn(volume_id)
@@ -420,7 +465,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
 
         return luns_by_host
 
-    def _get_next_available_lun(self, host_name):
+    def _get_volume_names_by_lun_from_host(self, host_name):
         logger.debug("getting host mapping list for host :{0}".format(host_name))
         try:
             host_mapping_list = self.client.cmd.mapping_list(host=host_name).as_list
@@ -428,27 +473,30 @@ class XIVArrayMediator(ArrayMediatorAbstract):
             logger.exception(ex)
             raise array_errors.HostNotFoundError(host_name)
 
-        luns_in_use = set(int(host_mapping.lun) for host_mapping in host_mapping_list)
-        logger.debug("luns in use : {0}".format(luns_in_use))
+        volume_names_by_lun = {int(host_mapping.lun): host_mapping.volume for host_mapping in host_mapping_list}
+        logger.debug("luns in use : %s", lazy(list, volume_names_by_lun))
+        return volume_names_by_lun
 
-        # try to use random lun number just in case there are many calls at the same time to reduce re-tries
-        all_available_luns = [i for i in range(self.MIN_LUN_NUMBER, self.MAX_LUN_NUMBER + 1) if i not in luns_in_use]
-
-        if len(all_available_luns) == 0:
-            raise array_errors.NoAvailableLunError(host_name)
+    @property
+    def _luns_allocator(self):
+        return host_luns_allocators.get(settings.ENDPOINTS_SEPARATOR.join(self.endpoint), self.user)
 
-        index = randint(0, len(all_available_luns) - 1)
-        lun = all_available_luns[index]
-        logger.debug("next random available lun is : {0}".format(lun))
+    def _reserve_next_available_lun(self, host_name):
+        lun = self._luns_allocator.reserve(host_name, lambda: self._get_volume_names_by_lun_from_host(host_name),
+                                           self.MIN_LUN_NUMBER, self.MAX_LUN_NUMBER)
+        logger.debug("next available lun is : {0}".format(lun))
         return lun
 
     def map_volume(self, volume_id, host_name, connectivity_type):
         logger.debug("mapping volume : {0} to host : {1}".format(volume_id, host_name))
         vol_name = self._get_object_name_by_wwn(volume_id)
-        lun = self._get_next_available_lun(host_name)
+        lun = self._reserve_next_available_lun(host_name)
+        is_mapped = False
+        is_lun_in_use = False
 
         try:
             self.client.cmd.map_vol(host=host_name, vol=vol_name, lun=lun)
+            is_mapped = True
         except xcli_errors.OperationForbiddenForUserCategoryError as ex:
             logger.exception(ex)
             raise array_errors.PermissionDeniedError("map volume : {0} to host : {1}".format(volume_id, host_name))
@@ -461,8 +509,14 @@ class XIVArrayMediator(ArrayMediatorAbstract):
         except xcli_errors.CommandFailedRuntimeError as ex:
             logger.exception(ex)
             if LUN_IS_ALREADY_IN_USE_ERROR in ex.status:
+                is_lun_in_use = True
                 raise array_errors.LunAlreadyInUseError(lun, host_name)
             raise array_errors.MappingError(vol_name, host_name, ex)
+        finally:
+            if is_mapped:
+                self._luns_allocator.confirm(host_name, lun, vol_name)
+            else:
+                self._luns_allocator.release(host_name, lun, is_in_use=is_lun_in_use)
 
         return str(lun)
 
@@ -473,6 +527,7 @@ class XIVArrayMediator(ArrayMediatorAbstract):
 
         try:
             self.client.cmd.unmap_vol(host=host_name, vol=volume_name)
+            self._luns_allocator.free_volume(host_name, volume_name)
         except xcli_errors.VolumeBadNameError as ex:
             logger.exception(ex)
             raise array_errors.ObjectNotFoundError(volume_name)
@@ -505,11 +560,13 @@ class XIVArrayMediator(ArrayMediatorAbstract):
         config_get_list = self.client.cmd.config_get().as_list
         return next(c.value for c in config_get_list if c.name == "iscsi_name")
 
+    @single_flight
     def get_iscsi_targets_by_iqn(self, host_name):
         array_iqn = self._get_array_iqn()
         iscsi_targets = self._get_iscsi_targets()
         return {array_iqn: iscsi_targets}
 
+    @single_flight
     def get_array_fc_wwns(self, host_name):
         fc_wwns_objects = self.client.cmd.fc_port_list()
         return [port.wwpn for port in fc_wwns_objects if port.port_state == 'Online' and port.role == 'Target']
@@ -1,11 +1,24 @@
+import os
+from time import monotonic
+
 from pyds8k.client.ds8k.v1.client import Client
-from pyds8k.exceptions import NotFound
+from pyds8k.exceptions import ConnectionError as ClientConnectionError, NotFound, Timeout
 
+import controllers.array_action.settings as array_settings
+from controllers.array_action.utils import time_array_commands
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.settings import ARRAY_TYPE_DS8K
 
 logger = get_stdout_logger()
 
 
+def _get_validity_window():
+    validity_window = os.getenv(array_settings.DS8K_CLIENT_VALIDITY_WINDOW_ENV_VAR)
+    if not validity_window:
+        return array_settings.DS8K_CLIENT_DEFAULT_VALIDITY_WINDOW_IN_SECONDS
+    return float(validity_window)
+
+
 def _int_lunid_to_hex(lunid):
     return '{0:0{1}x}'.format(int(lunid), 2)
 
@@ -47,6 +60,54 @@ def scsilun_to_int(lun):
            (pretreated_scsilun & 0xFFFF) << 16
 
 
+class _TimedClient:
+    """
+    Records the duration of every call of the pyds8k client.
+    """
+
+    def __init__(self, client):
+        self._client = client
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+        return time_array_commands(attribute, ARRAY_TYPE_DS8K, lambda *_args, **_kwargs: name)
+
+
+class _ReconnectingClient:
+    """
+    Remembers when a call of the pyds8k client last succeeded.
+    A read that fails to connect or times out is retried once with a new pyds8k client.
+    """
+
+    def __init__(self, create_client):
+        self._create_client = create_client
+        self._client = create_client()
+        self.last_successful_call_time = None
+
+    def __getattr__(self, name):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        def call(*args, **kwargs):
+            try:
+                result = getattr(self._client, name)(*args, **kwargs)
+            except (ClientConnectionError, Timeout):
+                self.last_successful_call_time = None
+                # a write may have reached the array before the connection failed, so only reads are retried.
+                if not name.startswith('get_'):
+                    raise
+                logger.info("{} failed to connect or timed out, reconnecting and retrying".format(name))
+                self._client = self._create_client()
+                result = getattr(self._client, name)(*args, **kwargs)
+            self.last_successful_call_time = monotonic()
+            return result
+
+        return call
+
+
 class RESTClient:
     """
     driver side client. Used to interaction with pyds8k client as an adaptor.
@@ -70,9 +131,13 @@ class RESTClient:
         if hostname:
             client_kwargs.update({'hostname': hostname})
 
-        self._client = Client(**client_kwargs)
+        self._client = _ReconnectingClient(lambda: _TimedClient(Client(**client_kwargs)))
 
     def is_valid(self):
+        last_successful_call_time = self._client.last_successful_call_time
+        if last_successful_call_time is not None and \
+                monotonic() - last_successful_call_time < _get_validity_window():
+            return True
         try:
             # Send command to check if client is still valid. IO enclosures is chosen since it is fast.
             self._client.get_io_enclosures()
@@ -1,41 +1,151 @@
-from collections import defaultdict
+import os
+from collections import OrderedDict, defaultdict
 from threading import RLock
+from time import monotonic
 
+import controllers.array_action.settings as array_settings
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.settings import CACHE_LOOKUPS_METRIC
 
 logger = get_stdout_logger()
 
+# returned by get when the pool is known to have no volume with the name
+VOLUME_NOT_IN_POOL = object()
+
+
+def _get_ttl():
+    ttl = os.getenv(array_settings.DS8K_VOLUME_CACHE_TTL_ENV_VAR)
+    if not ttl:
+        return array_settings.DS8K_VOLUME_CACHE_DEFAULT_TTL_IN_SECONDS
+    return float(ttl)
+
+
+def _get_max_size():
+    max_size = os.getenv(array_settings.DS8K_VOLUME_CACHE_MAX_SIZE_ENV_VAR)
+    if not max_size:
+        return array_settings.DS8K_VOLUME_CACHE_DEFAULT_MAX_SIZE
+    return int(max_size)
+
+
+class _PoolVolumes:
+    """
+    The volume ids of a single pool by volume name, with the expiry of every entry.
+
+    While the pool is complete, that is all its volumes were loaded and none of them was evicted since,
+    a name that is missing from it is not in the pool.
+    """
+
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.complete_until = None
+
+    def is_complete(self, now):
+        return self.complete_until is not None and now < self.complete_until
+
 
 class VolumeCacheByAddress:
     def __init__(self):
         logger.debug("creating a new cache")
         self._volume_cache_by_address = defaultdict(dict)
+        self._pool_versions = defaultdict(int)
         self._cache_lock = RLock()
 
-    def add(self, address, key, value):
+    def _get_pool_volumes(self, address, pool_id):
+        pools = self._volume_cache_by_address[address]
+        pool_volumes = pools.get(pool_id)
+        if pool_volumes is None:
+            pool_volumes = _PoolVolumes()
+            pools[pool_id] = pool_volumes
+        return pool_volumes
+
+    def _put(self, pool_volumes, key, value, expiry, max_size):
+        pool_volumes.entries[key] = (value, expiry)
+        pool_volumes.entries.move_to_end(key)
+        while len(pool_volumes.entries) > max_size:
+            pool_volumes.entries.popitem(last=False)
+            # an evicted name would be taken for a missing one.
+            pool_volumes.complete_until = None
+
+    def add(self, address, pool_id, key, value):
         logger.debug("adding {} to cache".format(key))
+        ttl = _get_ttl()
+        if ttl <= 0:
+            return
         with self._cache_lock:
-            self._volume_cache_by_address[address][key] = value
+            self._pool_versions[(address, pool_id)] += 1
+            pool_volumes = self._get_pool_volumes(address, pool_id)
+            self._put(pool_volumes, key, value, monotonic() + ttl, _get_max_size())
 
-    def remove(self, address, key):
+    def get_pool_version(self, address, pool_id):
+        with self._cache_lock:
+            return self._pool_versions[(address, pool_id)]
+
+    def load_pool(self, address, pool_id, volume_ids_by_name, version):
+        logger.debug("loading {} volumes of pool {} to cache".format(len(volume_ids_by_name), pool_id))
+        ttl = _get_ttl()
+        if ttl <= 0:
+            return
+        max_size = _get_max_size()
+        expiry = monotonic() + ttl
+        with self._cache_lock:
+            if version != self._pool_versions[(address, pool_id)]:
+                logger.debug("pool {} changed while loading its volumes".format(pool_id))
+                return
+            pool_volumes = _PoolVolumes()
+            if len(volume_ids_by_name) <= max_size:
+                pool_volumes.complete_until = expiry
+            for key, value in volume_ids_by_name.items():
+                self._put(pool_volumes, key, value, expiry, max_size)
+            self._volume_cache_by_address[address][pool_id] = pool_volumes
+
+    def remove(self, address, pool_id, key):
         logger.debug("removing {} from cache".format(key))
         with self._cache_lock:
-            if self._volume_cache_by_address[address].get(key) is not None:
-                del self._volume_cache_by_address[address][key]
+            for pool_key in [pool_key for pool_key in self._pool_versions
+                             if pool_key[0] == address and pool_id in (None, pool_key[1])]:
+                self._pool_versions[pool_key] += 1
+            for pool_volumes in self._get_pools_volumes(address, pool_id):
+                pool_volumes.entries.pop(key, None)
+
+    def invalidate_pool(self, address, pool_id):
+        logger.debug("invalidating pool {} in cache".format(pool_id))
+        with self._cache_lock:
+            self._pool_versions[(address, pool_id)] += 1
+            pool_volumes = self._volume_cache_by_address[address].get(pool_id)
+            if pool_volumes is not None:
+                pool_volumes.complete_until = None
 
-    def get(self, address, key):
+    def get(self, address, pool_id, key):
         logger.debug("getting {} from cache".format(key))
+        now = monotonic()
+        value = None
         with self._cache_lock:
-            return self._volume_cache_by_address[address].get(key)
-
-    def add_or_delete(self, address, key, value):
+            for pool_volumes in self._get_pools_volumes(address, pool_id):
+                entry = pool_volumes.entries.get(key)
+                if entry is not None and now >= entry[1]:
+                    del pool_volumes.entries[key]
+                    entry = None
+                if entry is not None:
+                    value = entry[0]
+                    break
+                if pool_id is not None and pool_volumes.is_complete(now):
+                    value = VOLUME_NOT_IN_POOL
+        result = 'miss' if value is None else 'negative_hit' if value is VOLUME_NOT_IN_POOL else 'hit'
+        metrics.increment(CACHE_LOOKUPS_METRIC, cache='ds8k_volumes', result=result)
+        return value
+
+    def _get_pools_volumes(self, address, pool_id):
+        pools = self._volume_cache_by_address[address]
+        if pool_id is None:
+            return list(pools.values())
+        pool_volumes = pools.get(pool_id)
+        return [pool_volumes] if pool_volumes else []
+
+    def clear(self):
         with self._cache_lock:
-            if self._volume_cache_by_address[address].get(key) is None:
-                logger.debug("adding {} to cache".format(key))
-                self._volume_cache_by_address[address][key] = value
-            else:
-                logger.debug("removing {} from cache".format(key))
-                del self._volume_cache_by_address[address][key]
+            self._volume_cache_by_address.clear()
+            self._pool_versions.clear()
 
 
 volume_cache_by_address = VolumeCacheByAddress()
@@ -45,14 +155,20 @@ class VolumeCache:
     def __init__(self, service_address):
         self._service_address = service_address
 
-    def add(self, key, value):
-        volume_cache_by_address.add(self._service_address, key, value)
+    def add(self, key, value, pool_id):
+        volume_cache_by_address.add(self._service_address, pool_id, key, value)
+
+    def get_pool_version(self, pool_id):
+        return volume_cache_by_address.get_pool_version(self._service_address, pool_id)
+
+    def load_pool(self, pool_id, volume_ids_by_name, version):
+        volume_cache_by_address.load_pool(self._service_address, pool_id, volume_ids_by_name, version)
 
-    def remove(self, key):
-        volume_cache_by_address.remove(self._service_address, key)
+    def invalidate_pool(self, pool_id):
+        volume_cache_by_address.invalidate_pool(self._service_address, pool_id)
 
-    def get(self, key):
-        return volume_cache_by_address.get(self._service_address, key)
+    def remove(self, key, pool_id=None):
+        volume_cache_by_address.remove(self._service_address, pool_id, key)
 
-    def add_or_delete(self, key, value):
-        volume_cache_by_address.add_or_delete(self._service_address, key, value)
+    def get(self, key, pool_id=None):
+        return volume_cache_by_address.get(self._service_address, pool_id, key)
@@ -0,0 +1,138 @@
+import os
+from functools import partial
+from threading import RLock
+from time import monotonic
+
+import controllers.array_action.settings as array_settings
+from controllers.array_action.single_flight import array_reads_single_flight
+from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.settings import CACHE_LOOKUPS_METRIC
+
+logger = get_stdout_logger()
+
+
+def _get_refresh_interval():
+    refresh_interval = os.getenv(array_settings.DS8K_MAPPINGS_INDEX_REFRESH_INTERVAL_ENV_VAR)
+    if not refresh_interval:
+        return array_settings.DS8K_MAPPINGS_INDEX_DEFAULT_REFRESH_INTERVAL_IN_SECONDS
+    return float(refresh_interval)
+
+
+class VolumeMappingsIndex:
+    """
+    The LUNs of the volumes of a single DS8K array by volume id and host name.
+
+    The index is loaded from the mappings of all the hosts, and then kept up to date by the map and unmap calls.
+    It is loaded again once it is older than the refresh interval, or after a call that failed left it unknown.
+    """
+
+    def __init__(self, service_address, refresh_interval):
+        self.service_address = service_address
+        self.refresh_interval = refresh_interval
+        self._lock = RLock()
+        self._luns_by_host_by_volume = {}
+        self._load_time = None
+        self._changes_during_load = None
+        self._is_invalidated_during_load = False
+
+    def _is_loaded(self):
+        return self._load_time is not None and monotonic() - self._load_time < self.refresh_interval
+
+    def get(self, volume_id, get_luns_by_host_by_volume):
+        """
+        Args:
+            volume_id : id of the volume on the array
+            get_luns_by_host_by_volume : function that returns a dict of the LUNs by host name of all the volumes
+        """
+        with self._lock:
+            is_loaded = self._is_loaded()
+            metrics.increment(CACHE_LOOKUPS_METRIC, cache='ds8k_volume_mappings',
+                              result='hit' if is_loaded else 'miss')
+            if is_loaded:
+                return dict(self._luns_by_host_by_volume.get(volume_id, {}))
+
+        array_reads_single_flight.run((type(self).__name__, self.service_address),
+                                      lambda: self._load(get_luns_by_host_by_volume))
+        with self._lock:
+            return dict(self._luns_by_host_by_volume.get(volume_id, {}))
+
+    def _load(self, get_luns_by_host_by_volume):
+        with self._lock:
+            self._changes_during_load = []
+            self._is_invalidated_during_load = False
+        logger.debug("loading the volume mappings of {}".format(self.service_address))
+        try:
+            luns_by_host_by_volume = get_luns_by_host_by_volume()
+        except Exception:
+            with self._lock:
+                self._changes_during_load = None
+            raise
+
+        with self._lock:
+            # a mapping that changed while the index was loaded may be missing from it, so it is applied again.
+            self._luns_by_host_by_volume = luns_by_host_by_volume
+            for change in self._changes_during_load:
+                change()
+            self._changes_during_load = None
+            if not self._is_invalidated_during_load:
+                self._load_time = monotonic()
+
+    def _apply_change(self, change):
+        change()
+        if self._changes_during_load is not None:
+            self._changes_during_load.append(change)
+
+    def _add_mapping(self, volume_id, host_name, lun):
+        self._luns_by_host_by_volume.setdefault(volume_id, {})[host_name] = lun
+
+    def _remove_mapping(self, volume_id, host_name):
+        luns_by_host = self._luns_by_host_by_volume.get(volume_id)
+        if luns_by_host is None:
+            return
+        luns_by_host.pop(host_name, None)
+        if not luns_by_host:
+            del self._luns_by_host_by_volume[volume_id]
+
+    def _remove_volume(self, volume_id):
+        self._luns_by_host_by_volume.pop(volume_id, None)
+
+    def add_mapping(self, volume_id, host_name, lun):
+        with self._lock:
+            self._apply_change(partial(self._add_mapping, volume_id, host_name, lun))
+
+    def remove_mapping(self, volume_id, host_name):
+        with self._lock:
+            self._apply_change(partial(self._remove_mapping, volume_id, host_name))
+
+    def remove_volume(self, volume_id):
+        with self._lock:
+            self._apply_change(partial(self._remove_volume, volume_id))
+
+    def invalidate(self):
+        with self._lock:
+            self._load_time = None
+            # the outcome of the call is unknown, so a load that was in flight during it may be missing it.
+            self._is_invalidated_during_load = True
+
+
+class VolumeMappingsIndexes:
+    def __init__(self):
+        self._indexes = {}
+        self._indexes_lock = RLock()
+
+    def get(self, service_address):
+        with self._indexes_lock:
+            index = self._indexes.get(service_address)
+            if index is None:
+                logger.debug("creating a new volume mappings index for {}".format(service_address))
+                index = VolumeMappingsIndex(service_address, _get_refresh_interval())
+                self._indexes[service_address] = index
+            return index
+
+    def clear(self):
+        with self._indexes_lock:
+            self._indexes.clear()
+
+
+volume_mappings_indexes = VolumeMappingsIndexes()
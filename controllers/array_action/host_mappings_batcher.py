@@ -0,0 +1,94 @@
+import os
+from threading import Event, Lock
+
+import controllers.array_action.settings as array_settings
+from controllers.array_action.single_flight import copy_error
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def get_batch_window():
+    batch_window = os.getenv(array_settings.HOST_MAPPINGS_BATCH_WINDOW_ENV_VAR)
+    if not batch_window:
+        return 0
+    return float(batch_window)
+
+
+class _Batch:
+    def __init__(self):
+        self.commands = []
+        self.results = None
+        self.error = None
+        self.full = Event()
+        self.done = Event()
+
+
+class HostMappingsBatcher:
+    """
+    Groups the map and unmap commands of the same host which arrive within a short window,
+    so they are sent to the storage together.
+
+    The first caller of a window collects the commands of the callers that arrive during it, runs them all
+    in one batch and hands every caller the result of its own command.
+    """
+
+    def __init__(self, max_batch_size=array_settings.HOST_MAPPINGS_MAX_BATCH_SIZE):
+        self._max_batch_size = max_batch_size
+        self._batches = {}
+        self._lock = Lock()
+
+    def run(self, key, command, run_batch, window):
+        """
+        Args:
+            key : key of the host, the commands of the same key are batched together
+            command : the command to run
+            run_batch : function that runs a list of commands, and returns a result or an exception for each one
+            window : time in seconds to wait for more commands
+        Returns:
+            the result of the command
+        Raises:
+            the exception of the command
+        """
+        with self._lock:
+            batch = self._batches.get(key)
+            is_leader = batch is None
+            if is_leader:
+                batch = _Batch()
+                self._batches[key] = batch
+            index = len(batch.commands)
+            batch.commands.append(command)
+            if len(batch.commands) >= self._max_batch_size:
+                self._close(key, batch)
+
+        if is_leader:
+            self._lead(key, batch, run_batch, window)
+        else:
+            batch.done.wait()
+        if batch.error is not None:
+            # every caller raises its own copy, since an exception collects the traceback of every raise.
+            raise copy_error(batch.error) from batch.error
+        result = batch.results[index]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _close(self, key, batch):
+        if self._batches.get(key) is batch:
+            del self._batches[key]
+        batch.full.set()
+
+    def _lead(self, key, batch, run_batch, window):
+        batch.full.wait(window)
+        with self._lock:
+            self._close(key, batch)
+        logger.debug("running a batch of {} commands for {}".format(len(batch.commands), key))
+        try:
+            batch.results = run_batch(batch.commands)
+        except Exception as ex:
+            batch.error = ex
+        finally:
+            batch.done.set()
+
+
+host_mappings_batcher = HostMappingsBatcher()
@@ -0,0 +1,170 @@
+import os
+from threading import RLock
+from time import monotonic
+
+import controllers.array_action.errors as array_errors
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def _get_refresh_interval():
+    refresh_interval = os.getenv(array_settings.LUN_ALLOCATOR_REFRESH_INTERVAL_ENV_VAR)
+    if not refresh_interval:
+        return array_settings.LUN_ALLOCATOR_DEFAULT_REFRESH_INTERVAL_IN_SECONDS
+    return float(refresh_interval)
+
+
+class HostLunBitmap:
+    """
+    The LUN ids of a single host, kept as bitmaps of the used LUNs and of the LUNs reserved by maps in flight.
+    """
+
+    def __init__(self, host_name, volume_names_by_lun, min_lun, max_lun):
+        self.host_name = host_name
+        self.load_time = monotonic()
+        self.changes = 0
+        self._range_mask = ((1 << (max_lun + 1)) - 1) ^ ((1 << min_lun) - 1)
+        self._used = 0
+        self._reserved = 0
+        self._luns_by_volume_name = {}
+        for lun, volume_name in volume_names_by_lun.items():
+            self._mark_used(lun, volume_name)
+
+    def _mark_used(self, lun, volume_name):
+        self._used |= 1 << lun
+        if volume_name:
+            self._luns_by_volume_name[volume_name] = lun
+
+    @property
+    def has_reservations(self):
+        return self._reserved != 0
+
+    def reserve(self):
+        free_luns = ~(self._used | self._reserved) & self._range_mask
+        if not free_luns:
+            raise array_errors.NoAvailableLunError(self.host_name)
+        # the lowest free lun
+        lun = (free_luns & -free_luns).bit_length() - 1
+        self._reserved |= 1 << lun
+        return lun
+
+    def confirm(self, lun, volume_name):
+        self._reserved &= ~(1 << lun)
+        self._mark_used(lun, volume_name)
+        self.changes += 1
+
+    def release(self, lun, is_in_use):
+        self._reserved &= ~(1 << lun)
+        if is_in_use:
+            self._used |= 1 << lun
+            self.changes += 1
+
+    def free_volume(self, volume_name):
+        lun = self._luns_by_volume_name.pop(volume_name, None)
+        if lun is None:
+            return False
+        self._used &= ~(1 << lun)
+        self.changes += 1
+        return True
+
+
+class HostLunsAllocator:
+    """
+    Allocates the LUN ids of the hosts of a single endpoint.
+
+    The used LUNs of a host are loaded from the array on its first map, and then kept up to date by the
+    map and unmap calls. A reserved LUN is not handed out again until its map is confirmed or released,
+    so concurrent maps to the same host do not collide.
+    """
+
+    def __init__(self, endpoint, refresh_interval):
+        self.endpoint = endpoint
+        self.refresh_interval = refresh_interval
+        self._lock = RLock()
+        self._bitmaps = {}
+
+    def _is_stale(self, bitmap):
+        return monotonic() - bitmap.load_time >= self.refresh_interval and not bitmap.has_reservations
+
+    def is_loaded(self, host_name):
+        with self._lock:
+            bitmap = self._bitmaps.get(host_name)
+            return bitmap is not None and not self._is_stale(bitmap)
+
+    def reserve(self, host_name, get_volume_names_by_lun, min_lun, max_lun):
+        """
+        Args:
+            host_name : name of the host to reserve a LUN on
+            get_volume_names_by_lun : function that returns a dict of the used LUNs of the host to volume names
+            min_lun : minimal LUN id
+            max_lun : maximal LUN id
+        """
+        with self._lock:
+            previous_bitmap = self._bitmaps.get(host_name)
+            if previous_bitmap is not None and not self._is_stale(previous_bitmap):
+                return previous_bitmap.reserve()
+            previous_changes = previous_bitmap.changes if previous_bitmap else None
+
+        logger.debug("loading the used luns of host {} on {}".format(host_name, self.endpoint))
+        volume_names_by_lun = get_volume_names_by_lun()
+
+        with self._lock:
+            bitmap = self._bitmaps.get(host_name)
+            # keep the current bitmap if it changed while the luns were loaded.
+            if bitmap is None or (bitmap is previous_bitmap and bitmap.changes == previous_changes and
+                                  self._is_stale(bitmap)):
+                bitmap = HostLunBitmap(host_name, volume_names_by_lun, min_lun, max_lun)
+                self._bitmaps[host_name] = bitmap
+            return bitmap.reserve()
+
+    def confirm(self, host_name, lun, volume_name):
+        with self._lock:
+            bitmap = self._bitmaps.get(host_name)
+            if bitmap:
+                bitmap.confirm(lun, volume_name)
+
+    def release(self, host_name, lun, is_in_use=False):
+        with self._lock:
+            bitmap = self._bitmaps.get(host_name)
+            if bitmap:
+                bitmap.release(lun, is_in_use)
+
+    def free_volume(self, host_name, volume_name):
+        with self._lock:
+            bitmap = self._bitmaps.get(host_name)
+            if bitmap and not bitmap.free_volume(volume_name) and not bitmap.has_reservations:
+                # the lun of the volume is unknown, load the host luns again on the next map.
+                del self._bitmaps[host_name]
+
+    def remove_host(self, host_name):
+        with self._lock:
+            self._bitmaps.pop(host_name, None)
+
+    def clear(self):
+        with self._lock:
+            self._bitmaps.clear()
+
+
+class HostLunsAllocators:
+    def __init__(self):
+        self._allocators = {}
+        self._allocators_lock = RLock()
+
+    def get(self, endpoint, user):
+        with self._allocators_lock:
+            key = (endpoint, user)
+            allocator = self._allocators.get(key)
+            if allocator is None:
+                logger.debug("creating a new luns allocator for endpoint {}".format(endpoint))
+                allocator = HostLunsAllocator(endpoint, _get_refresh_interval())
+                self._allocators[key] = allocator
+            return allocator
+
+    def clear(self):
+        with self._allocators_lock:
+            self._allocators.clear()
+
+
+host_luns_allocators = HostLunsAllocators()
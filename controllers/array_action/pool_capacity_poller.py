@@ -0,0 +1,126 @@
+import os
+import random
+from threading import RLock, Thread, Event
+from time import monotonic
+
+import controllers.array_action.errors as array_errors
+import controllers.array_action.settings as array_settings
+from controllers.array_action.storage_agent import get_agent
+from controllers.common import settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def _get_endpoint_key(array_connection_info):
+    return settings.ENDPOINTS_SEPARATOR.join(array_connection_info.array_addresses)
+
+
+def get_poll_interval():
+    poll_interval = os.getenv(array_settings.POOL_CAPACITY_POLL_INTERVAL_ENV_VAR)
+    if not poll_interval:
+        return array_settings.POOL_CAPACITY_DEFAULT_POLL_INTERVAL_IN_SECONDS
+    return float(poll_interval)
+
+
+class PoolCapacityPoller(Thread):
+    """
+    Background thread which periodically reads the available capacity of a single pool of a storage.
+
+    The interval is jittered, so the pollers of many pools do not hit the storage at the same time.
+    The poller stops once its capacity was not asked for during several intervals.
+    """
+
+    def __init__(self, array_connection_info, pool, interval, on_stop):
+        endpoint_key = _get_endpoint_key(array_connection_info)
+        super().__init__(name="pool-capacity-poller-{}-{}".format(endpoint_key, pool), daemon=True)
+        self.array_connection_info = array_connection_info
+        self.key = (endpoint_key, array_connection_info.user, pool)
+        self.endpoint_key = endpoint_key
+        self.pool = pool
+        self.available_capacity = None
+        self.is_pool_missing = False
+        self.last_read_time = monotonic()
+        self.first_poll_done = Event()
+        self._interval = interval
+        self._on_stop = on_stop
+        self._stop_event = Event()
+
+    def _get_jittered_interval(self):
+        jitter = array_settings.POOL_CAPACITY_POLL_JITTER
+        return self._interval * random.uniform(1 - jitter, 1 + jitter)
+
+    def _is_idle(self):
+        return monotonic() - self.last_read_time > self._interval * array_settings.POOL_CAPACITY_IDLE_POLLS
+
+    def _poll(self):
+        try:
+            with get_agent(self.array_connection_info).get_mediator() as mediator:
+                self.available_capacity = mediator.get_pool_available_capacity(self.pool)
+            self.is_pool_missing = False
+        except array_errors.PoolDoesNotExist:
+            self.available_capacity = None
+            self.is_pool_missing = True
+        except Exception as ex:
+            logger.error("Failed to get the capacity of pool {} on storage {}, reason is {}".format(
+                self.pool, self.endpoint_key, ex))
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                self._poll()
+                self.first_poll_done.set()
+                if self._stop_event.wait(self._get_jittered_interval()) or self._is_idle():
+                    break
+        finally:
+            self.first_poll_done.set()
+            self._on_stop(self)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class PoolCapacityPollers:
+    def __init__(self):
+        self._pollers = {}
+        self._lock = RLock()
+
+    def get_available_capacity(self, array_connection_info, pool):
+        """
+        Starts polling the pool on its first read, and never waits for the storage.
+
+        Returns:
+            the last polled available capacity of the pool in bytes, or None if the pool was not polled
+            successfully yet
+        Raises:
+            PoolDoesNotExist
+        """
+        key = (_get_endpoint_key(array_connection_info), array_connection_info.user, pool)
+        with self._lock:
+            poller = self._pollers.get(key)
+            if poller is None:
+                logger.debug("starting to poll the capacity of pool {} on storage {}".format(pool, key[0]))
+                poller = PoolCapacityPoller(array_connection_info, pool, get_poll_interval(), self._remove)
+                self._pollers[key] = poller
+                poller.start()
+            # the latest connection info, in case the password was changed
+            poller.array_connection_info = array_connection_info
+            poller.last_read_time = monotonic()
+        if poller.is_pool_missing:
+            raise array_errors.PoolDoesNotExist(pool, key[0])
+        return poller.available_capacity
+
+    def _remove(self, poller):
+        with self._lock:
+            if self._pollers.get(poller.key) is poller:
+                del self._pollers[poller.key]
+
+    def clear(self):
+        with self._lock:
+            pollers = list(self._pollers.values())
+            self._pollers.clear()
+        for poller in pollers:
+            poller.stop()
+
+
+pool_capacity_pollers = PoolCapacityPollers()
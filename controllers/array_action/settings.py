@@ -29,3 +29,60 @@ VERSION_KEY = 'version'
 REGISTRATION_PLUGIN = 'block.csi.ibm.com'
 ODF_REGISTRATION_PLUGIN = 'odf.ibm.com'
 MINIMUM_HOURS_BETWEEN_REGISTRATIONS = 2
+
+SVC_INVENTORY_CACHE_ENV_VAR = 'SVC_INVENTORY_CACHE'
+SVC_INVENTORY_REFRESH_INTERVAL_ENV_VAR = 'SVC_INVENTORY_REFRESH_INTERVAL'
+SVC_INVENTORY_DEFAULT_REFRESH_INTERVAL_IN_SECONDS = 30
+SVC_INVENTORY_IDLE_REFRESHES = 10
+SVC_INVENTORY_MAX_TRACKED_CHANGES = 10000
+
+SVC_HOSTS_PORTS_INDEX_MIN_REBUILD_INTERVAL_ENV_VAR = 'SVC_HOSTS_PORTS_INDEX_MIN_REBUILD_INTERVAL'
+SVC_HOSTS_PORTS_INDEX_DEFAULT_MIN_REBUILD_INTERVAL_IN_SECONDS = 60
+
+SVC_LIST_VOLUMES_ID_WINDOW = 1000
+# a system has at most 15864 volumes, and the array gives a new volume the lowest free id.
+SVC_LIST_VOLUMES_MAX_VOLUME_ID = 16383
+
+CONNECTION_POOL_HEALTH_CHECK_INTERVAL_ENV_VAR = 'CONNECTION_POOL_HEALTH_CHECK_INTERVAL'
+CONNECTION_POOL_DEFAULT_HEALTH_CHECK_INTERVAL_IN_SECONDS = 30
+
+ARRAY_TYPE_NEGATIVE_CACHE_TTL_ENV_VAR = 'ARRAY_TYPE_NEGATIVE_CACHE_TTL'
+ARRAY_TYPE_NEGATIVE_CACHE_DEFAULT_TTL_IN_SECONDS = 30
+
+ARRAY_CONNECTION_ACQUIRE_TIMEOUT_ENV_VAR = 'ARRAY_CONNECTION_ACQUIRE_TIMEOUT'
+
+ARRAY_MAX_CONNECTIONS_ENV_VAR = 'ARRAY_MAX_CONNECTIONS'
+
+ARRAY_ADAPTIVE_CONCURRENCY_ENV_VAR = 'ARRAY_ADAPTIVE_CONCURRENCY'
+ADAPTIVE_CONCURRENCY_WINDOW_SIZE = 20
+ADAPTIVE_CONCURRENCY_LATENCY_TOLERANCE = 1.5
+ADAPTIVE_CONCURRENCY_BACKOFF_LATENCY_RATIO = 2
+ADAPTIVE_CONCURRENCY_BACKOFF_RATIO = 0.75
+ADAPTIVE_CONCURRENCY_MIN_LATENCY_DRIFT = 1.05
+
+ARRAY_SINGLE_FLIGHT_ENV_VAR = 'ARRAY_SINGLE_FLIGHT'
+
+LUN_ALLOCATOR_REFRESH_INTERVAL_ENV_VAR = 'LUN_ALLOCATOR_REFRESH_INTERVAL'
+LUN_ALLOCATOR_DEFAULT_REFRESH_INTERVAL_IN_SECONDS = 300
+
+ARRAY_INITIATORS_CACHE_TTL_ENV_VAR = 'ARRAY_INITIATORS_CACHE_TTL'
+ARRAY_INITIATORS_CACHE_DEFAULT_TTL_IN_SECONDS = 300
+
+POOL_CAPACITY_POLL_INTERVAL_ENV_VAR = 'POOL_CAPACITY_POLL_INTERVAL'
+POOL_CAPACITY_DEFAULT_POLL_INTERVAL_IN_SECONDS = 60
+POOL_CAPACITY_POLL_JITTER = 0.2
+POOL_CAPACITY_IDLE_POLLS = 10
+
+HOST_MAPPINGS_BATCH_WINDOW_ENV_VAR = 'HOST_MAPPINGS_BATCH_WINDOW'
+HOST_MAPPINGS_MAX_BATCH_SIZE = 64
+
+DS8K_CLIENT_VALIDITY_WINDOW_ENV_VAR = 'DS8K_CLIENT_VALIDITY_WINDOW'
+DS8K_CLIENT_DEFAULT_VALIDITY_WINDOW_IN_SECONDS = 30
+
+DS8K_MAPPINGS_INDEX_REFRESH_INTERVAL_ENV_VAR = 'DS8K_MAPPINGS_INDEX_REFRESH_INTERVAL'
+DS8K_MAPPINGS_INDEX_DEFAULT_REFRESH_INTERVAL_IN_SECONDS = 60
+
+DS8K_VOLUME_CACHE_TTL_ENV_VAR = 'DS8K_VOLUME_CACHE_TTL'
+DS8K_VOLUME_CACHE_DEFAULT_TTL_IN_SECONDS = 300
+DS8K_VOLUME_CACHE_MAX_SIZE_ENV_VAR = 'DS8K_VOLUME_CACHE_MAX_SIZE'
+DS8K_VOLUME_CACHE_DEFAULT_MAX_SIZE = 50000
@@ -0,0 +1,102 @@
+import os
+from copy import deepcopy
+from threading import Event, Lock, get_ident
+
+from decorator import decorator
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def is_single_flight_enabled():
+    return os.getenv(array_settings.ARRAY_SINGLE_FLIGHT_ENV_VAR, 'true').lower() == 'true'
+
+
+def copy_error(error):
+    # a new instance of the same type, without calling __init__, which may build the message again from its args.
+    error_copy = type(error).__new__(type(error), *error.args)
+    error_copy.__dict__.update(error.__dict__)
+    return error_copy
+
+
+class _InFlightCall:
+    def __init__(self):
+        self.leader_thread_id = get_ident()
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses identical calls which are in flight at the same time into one call.
+    The first caller runs the call, and the callers that arrive while it runs wait for its result.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = Lock()
+        self._calls_count = 0
+        self._coalesced_count = 0
+
+    def run(self, key, function):
+        with self._lock:
+            self._calls_count += 1
+            call = self._calls.get(key)
+            # a nested identical call of the running thread can not wait for itself.
+            if call is not None and call.leader_thread_id != get_ident():
+                self._coalesced_count += 1
+                is_leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                is_leader = True
+
+        if is_leader:
+            return self._lead(key, call, function)
+        logger.debug("waiting for in flight call : {}".format(key))
+        call.done.wait()
+        if call.error is not None:
+            # every waiter raises its own copy, since an exception collects the traceback of every raise.
+            raise copy_error(call.error) from call.error
+        # every waiter gets its own copy, so it can not change the result of the others.
+        return deepcopy(call.result)
+
+    def _lead(self, key, call, function):
+        try:
+            call.result = function()
+            return call.result
+        except Exception as ex:
+            call.error = ex
+            raise ex
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:
+                    del self._calls[key]
+            call.done.set()
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                'calls': self._calls_count,
+                'coalesced': self._coalesced_count,
+                'in_flight': len(self._calls)
+            }
+
+
+array_reads_single_flight = SingleFlight()
+
+
+def _get_call_key(mediator, mediator_method, args, kwargs):
+    return (type(mediator).__name__, mediator.user, repr(mediator.endpoint), mediator_method.__name__,
+            repr(args), repr(sorted(kwargs.items())))
+
+
+@decorator
+def single_flight(mediator_method, self, *args, **kwargs):
+    if not is_single_flight_enabled():
+        return mediator_method(self, *args, **kwargs)
+    key = _get_call_key(self, mediator_method, args, kwargs)
+    return array_reads_single_flight.run(key, lambda: mediator_method(self, *args, **kwargs))
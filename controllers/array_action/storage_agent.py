@@ -1,17 +1,24 @@
+import os
 import socket
 from collections import OrderedDict
+from concurrent import futures
 from contextlib import contextmanager
 from queue import Empty
-from threading import RLock
+from threading import RLock, Lock
+from time import monotonic
 
 import controllers.array_action.errors as array_errors
-from controllers.array_action.array_connection_pool import ConnectionPool
+import controllers.array_action.settings as array_settings
+from controllers.array_action.adaptive_concurrency import AdaptiveConcurrencyLimit, is_adaptive_concurrency_enabled
+from controllers.array_action.array_connection_pool import ConnectionPool, get_health_check_interval
 from controllers.array_action.array_mediator_ds8k import DS8KArrayMediator
 from controllers.array_action.array_mediator_svc import SVCArrayMediator
 from controllers.array_action.array_mediator_xiv import XIVArrayMediator
 from controllers.array_action.errors import FailedToFindStorageSystemType
 from controllers.common import settings
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.utils import get_controller_server_workers
 
 logger = get_stdout_logger()
 _array_agents = {}
@@ -35,6 +42,41 @@ else:
     array_type_to_mediator[SVCArrayMediator.array_type] = SVCArrayMediator
 
 array_type_cache = {}
+# endpoints tuple -> expiration time of a failed detection
+array_type_negative_cache = {}
+
+
+def _get_array_type_negative_cache_ttl():
+    ttl = os.getenv(array_settings.ARRAY_TYPE_NEGATIVE_CACHE_TTL_ENV_VAR)
+    if not ttl:
+        return array_settings.ARRAY_TYPE_NEGATIVE_CACHE_DEFAULT_TTL_IN_SECONDS
+    return float(ttl)
+
+
+def _get_acquire_timeout():
+    acquire_timeout = os.getenv(array_settings.ARRAY_CONNECTION_ACQUIRE_TIMEOUT_ENV_VAR)
+    if not acquire_timeout:
+        return None
+    return float(acquire_timeout)
+
+
+def get_configured_max_connections():
+    max_connections = os.getenv(array_settings.ARRAY_MAX_CONNECTIONS_ENV_VAR)
+    if max_connections:
+        return int(max_connections)
+    return get_controller_server_workers() or settings.CSI_CONTROLLER_SERVER_WORKERS
+
+
+def _get_max_connections(med_class):
+    return min(med_class.max_connections, get_configured_max_connections())
+
+
+def get_max_connections_by_endpoints(endpoints):
+    for endpoint in endpoints:
+        array_type = array_type_cache.get(endpoint)
+        if array_type:
+            return _get_max_connections(array_type_to_mediator[array_type])
+    return get_configured_max_connections()
 
 
 def _get_array_type_from_cache(endpoints):
@@ -43,23 +85,57 @@ def _get_array_type_from_cache(endpoints):
         if storage_type:
             logger.debug(
                 "found in cache, for endpoint : {}, storage array type is : {}".format(endpoint, storage_type))
+            metrics.increment(settings.CACHE_LOOKUPS_METRIC, cache='array_type', result='hit')
             return storage_type
+    metrics.increment(settings.CACHE_LOOKUPS_METRIC, cache='array_type', result='miss')
     return None
 
 
+def _is_array_type_detection_failed_recently(endpoints):
+    expiration_time = array_type_negative_cache.get(tuple(endpoints))
+    if expiration_time is None:
+        return False
+    if monotonic() < expiration_time:
+        return True
+    array_type_negative_cache.pop(tuple(endpoints), None)
+    return False
+
+
+def _probe_array_type(endpoints):
+    probes = [(storage_type, endpoint, port) for storage_type, port in array_type_to_port.items()
+              for endpoint in endpoints]
+    executor = futures.ThreadPoolExecutor(max_workers=len(probes))
+    try:
+        probe_futures = [(storage_type, executor.submit(_socket_connect_test, endpoint, port))
+                         for storage_type, endpoint, port in probes]
+        # all the probes run concurrently, but the results are checked by the order of array_type_to_port,
+        # so a success of an earlier array type takes precedence.
+        for storage_type, probe_future in probe_futures:
+            if probe_future.result() == 0:
+                return storage_type
+        return None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
 def detect_array_type(endpoints):
     logger.debug("detecting array connection type")
     storage_type = _get_array_type_from_cache(endpoints)
     if storage_type:
         return storage_type
 
-    for storage_type, port in array_type_to_port.items():
+    if _is_array_type_detection_failed_recently(endpoints):
+        logger.debug("storage array type detection failed recently for endpoints : {}".format(endpoints))
+        raise FailedToFindStorageSystemType(endpoints)
+
+    storage_type = _probe_array_type(endpoints)
+    if storage_type:
+        logger.debug("storage array type is : {0}".format(storage_type))
         for endpoint in endpoints:
-            if _socket_connect_test(endpoint, port) == 0:
-                logger.debug("storage array type is : {0}".format(storage_type))
-                array_type_cache[endpoint] = storage_type
-                return storage_type
+            array_type_cache[endpoint] = storage_type
+        return storage_type
 
+    array_type_negative_cache[tuple(endpoints)] = monotonic() + _get_array_type_negative_cache_ttl()
     raise FailedToFindStorageSystemType(endpoints)
 
 
@@ -119,6 +195,31 @@ def get_agents():
     return _array_agents
 
 
+def get_agents_by_endpoint_key():
+    """
+    One agent for each of the endpoints that were connected to, whatever the user it connected with.
+    """
+    with lock:
+        agents_by_endpoint_key = {}
+        for agent in _array_agents.values():
+            agents_by_endpoint_key.setdefault(agent.endpoint_key, agent)
+        return agents_by_endpoint_key
+
+
+def _collect_connection_pools_metrics():
+    with lock:
+        agents = list(_array_agents.values())
+    for agent in agents:
+        if agent.conn_pool is None:
+            continue
+        labels = {'endpoint': agent.endpoint_key, 'user': agent.username}
+        for metric_name, value in agent.conn_pool.get_metrics().items():
+            yield 'csi_array_connection_pool_{}'.format(metric_name), labels, value
+
+
+metrics.add_collector('connection_pools', _collect_connection_pools_metrics)
+
+
 def clear_agents():
     with lock:
         agents = list(_array_agents.values())
@@ -148,6 +249,16 @@ class StorageAgent:
             array_type = detect_array_type(self.endpoints)
 
         med_class = array_type_to_mediator[array_type]
+        max_connections = _get_max_connections(med_class)
+
+        self.concurrency_limit = None
+        if is_adaptive_concurrency_enabled():
+            # the pool shrinks below the configured number of connections while the array is slow, and never
+            # grows above it, so the connections of all the arrays stay within the configured budget.
+            self.concurrency_limit = AdaptiveConcurrencyLimit(max_connections, min_limit=1,
+                                                              max_limit=max_connections)
+        self._in_flight = 0
+        self._in_flight_lock = Lock()
 
         self.conn_pool = ConnectionPool(
             endpoints=self.endpoints,
@@ -156,7 +267,9 @@ class StorageAgent:
             med_class=med_class,
             # Specifying a non-zero min_size pre-populates the pool with min_size items
             min_size=1,
-            max_size=min(med_class.max_connections, settings.CSI_CONTROLLER_SERVER_WORKERS)
+            max_size=max_connections,
+            # dead idle connections are replaced, and min_size is kept, in the background
+            health_check_interval=get_health_check_interval()
         )
 
     def __del__(self):
@@ -170,13 +283,36 @@ class StorageAgent:
     def get_mediator(self, timeout=None):
         """
         Get an object out of the pool, for use with with-statement.
+        Waits for an available object up to timeout seconds, or ARRAY_CONNECTION_ACQUIRE_TIMEOUT when not given.
         """
+        if timeout is None:
+            timeout = _get_acquire_timeout()
         try:
             med = self.conn_pool.get(timeout=timeout)
         except Empty:
             raise array_errors.NoConnectionAvailableException(", ".join(self.endpoint_key))
 
+        if self.concurrency_limit is None:
+            try:
+                yield med
+            finally:
+                self.conn_pool.put(med)
+            return
+
+        with self._in_flight_lock:
+            self._in_flight += 1
+            is_saturated = self._in_flight >= self.conn_pool.max_size
+        start_time = monotonic()
         try:
             yield med
         finally:
             self.conn_pool.put(med)
+            with self._in_flight_lock:
+                self._in_flight -= 1
+            self._adapt_concurrency(monotonic() - start_time, is_saturated)
+
+    def _adapt_concurrency(self, latency, is_saturated):
+        limit = self.concurrency_limit.record(latency, is_saturated)
+        if limit != self.conn_pool.max_size:
+            logger.debug("Resizing the connection pool for endpoint {} to {}".format(self.endpoint_key, limit))
+            self.conn_pool.set_max_size(limit)
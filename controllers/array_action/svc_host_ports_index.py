@@ -0,0 +1,155 @@
+import os
+from collections import defaultdict
+from threading import RLock
+from time import monotonic
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def _get_min_rebuild_interval():
+    min_rebuild_interval = os.getenv(array_settings.SVC_HOSTS_PORTS_INDEX_MIN_REBUILD_INTERVAL_ENV_VAR)
+    if not min_rebuild_interval:
+        return array_settings.SVC_HOSTS_PORTS_INDEX_DEFAULT_MIN_REBUILD_INTERVAL_IN_SECONDS
+    return float(min_rebuild_interval)
+
+
+def _get_port_key(connectivity_type, port):
+    return connectivity_type, port.lower()
+
+
+class SVCHostPortsIndex:
+    """
+    Index of the host ports (WWPN, IQN and NQN) of a single SVC endpoint, pointing to the host name.
+
+    The port count of every host is kept as well, so the hosts whose ports changed can be found from the
+    concise host list and updated, without reading the details of all the hosts again.
+    """
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self._lock = RLock()
+        self._host_names_by_port = {}
+        self._ports_by_host_name = defaultdict(set)
+        self._port_counts_by_host_name = {}
+        self._build_time = None
+        self.is_built = False
+
+    def build(self, ports_by_host_name, port_counts_by_host_name):
+        """
+        Args:
+            ports_by_host_name : dict of host name to an iterable of (connectivity type, port) tuples
+            port_counts_by_host_name : dict of host name to its port count, as listed by the concise host list
+        """
+        with self._lock:
+            self._host_names_by_port = {}
+            self._ports_by_host_name = defaultdict(set)
+            for host_name, ports in ports_by_host_name.items():
+                self._set_host_ports(host_name, ports)
+            self._port_counts_by_host_name = dict(port_counts_by_host_name)
+            self._build_time = monotonic()
+            self.is_built = True
+        logger.debug("hosts ports index of {} was built with {} hosts".format(self.endpoint,
+                                                                              len(ports_by_host_name)))
+
+    def get_changed_host_names(self, port_counts_by_host_name):
+        with self._lock:
+            return {host_name for host_name, port_count in port_counts_by_host_name.items()
+                    if host_name not in self._port_counts_by_host_name or
+                    self._port_counts_by_host_name[host_name] != port_count}
+
+    def update(self, ports_by_host_name, port_counts_by_host_name):
+        """
+        Args:
+            ports_by_host_name : dict of host name to an iterable of (connectivity type, port) tuples,
+                                 of the hosts that changed
+            port_counts_by_host_name : dict of host name to its port count, of all the hosts
+        """
+        with self._lock:
+            if not self.is_built:
+                return
+            for host_name in set(self._ports_by_host_name) - set(port_counts_by_host_name):
+                self._remove_host(host_name)
+            for host_name, ports in ports_by_host_name.items():
+                self._remove_host(host_name)
+                self._set_host_ports(host_name, ports)
+            self._port_counts_by_host_name = dict(port_counts_by_host_name)
+        logger.debug("hosts ports index of {} was updated with {} hosts".format(self.endpoint,
+                                                                                len(ports_by_host_name)))
+
+    def is_rebuild_due(self):
+        with self._lock:
+            return self._build_time is None or monotonic() - self._build_time >= _get_min_rebuild_interval()
+
+    def _set_host_ports(self, host_name, ports):
+        for connectivity_type, port in ports:
+            self._add_port(host_name, connectivity_type, port)
+
+    def _add_port(self, host_name, connectivity_type, port):
+        port_key = _get_port_key(connectivity_type, port)
+        self._host_names_by_port[port_key] = host_name
+        self._ports_by_host_name[host_name].add(port_key)
+
+    def add_port(self, host_name, connectivity_type, port):
+        with self._lock:
+            if self.is_built:
+                self._add_port(host_name, connectivity_type, port)
+
+    def remove_port(self, host_name, connectivity_type, port):
+        with self._lock:
+            port_key = _get_port_key(connectivity_type, port)
+            if self._host_names_by_port.get(port_key) == host_name:
+                del self._host_names_by_port[port_key]
+            self._ports_by_host_name[host_name].discard(port_key)
+
+    def remove_host(self, host_name):
+        with self._lock:
+            self._remove_host(host_name)
+            self._port_counts_by_host_name.pop(host_name, None)
+
+    def _remove_host(self, host_name):
+        for port_key in self._ports_by_host_name.pop(host_name, set()):
+            if self._host_names_by_port.get(port_key) == host_name:
+                del self._host_names_by_port[port_key]
+
+    def get_host_names_by_connectivity_type(self, initiators):
+        host_names_by_connectivity_type = {}
+        with self._lock:
+            for connectivity_type, initiator in initiators:
+                host_name = self._host_names_by_port.get(_get_port_key(connectivity_type, initiator))
+                if host_name:
+                    host_names_by_connectivity_type[connectivity_type] = host_name
+        return host_names_by_connectivity_type
+
+    def clear(self):
+        with self._lock:
+            self._host_names_by_port = {}
+            self._ports_by_host_name = defaultdict(set)
+            self._port_counts_by_host_name = {}
+            self._build_time = None
+            self.is_built = False
+
+
+class SVCHostPortsIndexes:
+    def __init__(self):
+        self._indexes = {}
+        self._indexes_lock = RLock()
+
+    def get(self, endpoint, user):
+        with self._indexes_lock:
+            key = (endpoint, user)
+            index = self._indexes.get(key)
+            if index is None:
+                logger.debug("creating a new hosts ports index for endpoint {}".format(endpoint))
+                index = SVCHostPortsIndex(endpoint)
+                self._indexes[key] = index
+            return index
+
+    def clear(self):
+        with self._indexes_lock:
+            self._indexes.clear()
+
+
+svc_host_ports_indexes = SVCHostPortsIndexes()
@@ -0,0 +1,414 @@
+import os
+from collections import defaultdict, OrderedDict
+from threading import RLock, Thread, Event
+from time import monotonic
+
+import controllers.array_action.settings as array_settings
+from controllers.common.csi_logger import get_stdout_logger, is_debug_enabled
+from controllers.common.metrics import metrics
+
+logger = get_stdout_logger()
+
+VOLUMES_TABLE = 'vdisk'
+HOSTS_TABLE = 'host'
+FCMAPS_TABLE = 'fcmap'
+
+VOLUME_SUMMARY_ATTRIBUTES = ('name', 'vdisk_UID', 'capacity', 'FC_id', 'fc_map_count', 'copy_count',
+                             'volume_group_id')
+HOST_SUMMARY_ATTRIBUTES = ('name', 'port_count', 'protocol')
+
+FCMAP_ENDPOINT_TYPE_SOURCE = 'source'
+FCMAP_ENDPOINT_TYPE_TARGET = 'target'
+
+
+def is_inventory_cache_enabled():
+    return os.getenv(array_settings.SVC_INVENTORY_CACHE_ENV_VAR, 'false').lower() == 'true'
+
+
+def _get_refresh_interval():
+    refresh_interval = os.getenv(array_settings.SVC_INVENTORY_REFRESH_INTERVAL_ENV_VAR)
+    if not refresh_interval:
+        return array_settings.SVC_INVENTORY_DEFAULT_REFRESH_INTERVAL_IN_SECONDS
+    return float(refresh_interval)
+
+
+def _get_summary(cli_object, attributes):
+    return tuple(getattr(cli_object, attribute, None) for attribute in attributes)
+
+
+def _lower(value):
+    return value.lower() if value else value
+
+
+def _get_volume_keys(cli_volume):
+    return cli_volume.id, cli_volume.name, _lower(cli_volume.vdisk_UID)
+
+
+class SVCInventoryRefresher(Thread):
+    """
+    Background thread which periodically refreshes the inventory of a single SVC endpoint.
+
+    The refresher lists the tables over a mediator of its own, so requests are never blocked by a refresh.
+    It stops once the inventory was not used during several intervals.
+    """
+
+    def __init__(self, inventory, connect, on_stop):
+        super().__init__(name="svc-inventory-refresher-{}".format(inventory.endpoint), daemon=True)
+        self.inventory = inventory
+        self.connect = connect
+        self.last_used_time = monotonic()
+        self._mediator = None
+        self._on_stop = on_stop
+        self._stop_event = Event()
+
+    def _is_idle(self):
+        return monotonic() - self.last_used_time > \
+            self.inventory.refresh_interval * array_settings.SVC_INVENTORY_IDLE_REFRESHES
+
+    def _disconnect(self):
+        if self._mediator is not None:
+            self._mediator.disconnect()
+            self._mediator = None
+
+    def _refresh(self):
+        try:
+            if self._mediator is None:
+                self._mediator = self.connect()
+            self._mediator.refresh_inventory()
+        except Exception as ex:
+            logger.warning("failed to refresh inventory of {}: {}".format(self.inventory.endpoint, ex))
+            self._disconnect()
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                self._refresh()
+                if self._stop_event.wait(self.inventory.refresh_interval) or self._is_idle():
+                    break
+        finally:
+            self._disconnect()
+            self._on_stop(self)
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class SVCInventory:
+    """
+    In-memory snapshot of the vdisk, host and fcmap tables of a single SVC endpoint.
+
+    Detailed vdisk and host views are cached as they are read. A background refresher lists the concise
+    tables, evicts only the entries that changed, and reloads the fcmap table as a whole.
+    Every invalidation records the sequence number of the change for the objects it touches, so a result
+    read from the array is not added back only if one of its own keys changed after the read started.
+    """
+
+    def __init__(self, endpoint, refresh_interval):
+        self.endpoint = endpoint
+        self.refresh_interval = refresh_interval
+        self._lock = RLock()
+        self._sequence = 0
+        self._volume_change_sequences = OrderedDict()
+        self._host_change_sequences = OrderedDict()
+        self._volumes_change_sequence = 0
+        self._fcmaps_change_sequence = 0
+        self._forgotten_change_sequence = 0
+        self._last_refresh_time = None
+        self._refresher = None
+
+        self._volumes_by_id = {}
+        self._volume_ids_by_name = {}
+        self._volume_ids_by_uid = {}
+        self._hosts_by_id = {}
+        self._host_ids_by_name = {}
+        self._fcmaps = {}
+        self._is_fcmaps_table_complete = False
+
+        self._hits = defaultdict(int)
+        self._misses = defaultdict(int)
+        self._invalidations = 0
+        self._refreshes = 0
+        self._max_served_staleness = 0
+
+    @property
+    def generation(self):
+        """
+        The sequence number of the latest change, to be taken before reading from the array
+        and passed back when adding the result.
+        """
+        with self._lock:
+            return self._sequence
+
+    def keep_refreshed(self, connect):
+        """
+        Args:
+            connect : returns a new mediator of the endpoint, for the background refresher to list the tables with
+        """
+        with self._lock:
+            if self._refresher is None:
+                logger.debug("starting to refresh the inventory of {}".format(self.endpoint))
+                self._refresher = SVCInventoryRefresher(self, connect, self._remove_refresher)
+                self._refresher.start()
+            # the latest credentials, in case the password was changed
+            self._refresher.connect = connect
+            self._refresher.last_used_time = monotonic()
+
+    def _remove_refresher(self, refresher):
+        with self._lock:
+            if self._refresher is refresher:
+                self._refresher = None
+
+    def stop_refresher(self):
+        with self._lock:
+            refresher = self._refresher
+            self._refresher = None
+        if refresher is not None:
+            refresher.stop()
+
+    def _record_change(self, change_sequences, keys):
+        self._sequence += 1
+        self._invalidations += 1
+        for key in keys:
+            if key is not None:
+                change_sequences[key] = self._sequence
+                change_sequences.move_to_end(key)
+        while len(change_sequences) > array_settings.SVC_INVENTORY_MAX_TRACKED_CHANGES:
+            _, change_sequence = change_sequences.popitem(last=False)
+            self._forgotten_change_sequence = max(self._forgotten_change_sequence, change_sequence)
+
+    def _is_changed_since(self, change_sequences, keys, generation):
+        if generation < self._forgotten_change_sequence:
+            return True
+        return any(change_sequences.get(key, 0) > generation for key in keys)
+
+    def refresh(self, cli_volumes, cli_hosts, fcmaps, generation):
+        # refresh only evicts volumes and hosts, so a listing that is older than a change can not add it back
+        with self._lock:
+            evicted_volumes = self._evict_changed(self._volumes_by_id, cli_volumes, VOLUME_SUMMARY_ATTRIBUTES,
+                                                  self._remove_volume)
+            evicted_hosts = self._evict_changed(self._hosts_by_id, cli_hosts, HOST_SUMMARY_ATTRIBUTES,
+                                                self._remove_host)
+            if generation >= self._fcmaps_change_sequence:
+                self._load_fcmaps(fcmaps)
+            self._last_refresh_time = monotonic()
+            self._refreshes += 1
+        if is_debug_enabled():
+            logger.debug("inventory of %s was refreshed, evicted %s volumes and %s hosts. metrics : %s",
+                         self.endpoint, evicted_volumes, evicted_hosts, self.get_metrics())
+
+    def _evict_changed(self, cached_objects_by_id, cli_objects, summary_attributes, remove_function):
+        summaries_by_id = {cli_object.id: _get_summary(cli_object, summary_attributes) for cli_object in cli_objects}
+        changed_ids = [object_id for object_id, cached_object in cached_objects_by_id.items()
+                       if summaries_by_id.get(object_id) != _get_summary(cached_object, summary_attributes)]
+        for object_id in changed_ids:
+            remove_function(object_id)
+        return len(changed_ids)
+
+    def _load_fcmaps(self, fcmaps):
+        self._fcmaps = defaultdict(list)
+        for fcmap in fcmaps:
+            self._fcmaps[(FCMAP_ENDPOINT_TYPE_SOURCE, fcmap.source_vdisk_name)].append(fcmap)
+            self._fcmaps[(FCMAP_ENDPOINT_TYPE_TARGET, fcmap.target_vdisk_name)].append(fcmap)
+        self._fcmaps = dict(self._fcmaps)
+        self._is_fcmaps_table_complete = True
+
+    def _clear_volumes(self):
+        self._volumes_by_id.clear()
+        self._volume_ids_by_name.clear()
+        self._volume_ids_by_uid.clear()
+
+    def _clear_fcmaps(self):
+        self._fcmaps = {}
+        self._is_fcmaps_table_complete = False
+
+    def _record_lookup(self, table, cached_object):
+        if cached_object is None:
+            self._misses[table] += 1
+            return
+        self._hits[table] += 1
+        if self._last_refresh_time is not None:
+            staleness = monotonic() - self._last_refresh_time
+            self._max_served_staleness = max(self._max_served_staleness, staleness)
+
+    def get_volume_by_name(self, name_or_id):
+        with self._lock:
+            cli_volume = self._volumes_by_id.get(self._volume_ids_by_name.get(name_or_id))
+            self._record_lookup(VOLUMES_TABLE, cli_volume)
+            return cli_volume
+
+    def get_volume_by_uid(self, vdisk_uid):
+        with self._lock:
+            cli_volume = self._volumes_by_id.get(self._volume_ids_by_uid.get(_lower(vdisk_uid)))
+            self._record_lookup(VOLUMES_TABLE, cli_volume)
+            return cli_volume
+
+    def add_volume(self, cli_volume, generation):
+        with self._lock:
+            if generation < self._volumes_change_sequence or \
+                    self._is_changed_since(self._volume_change_sequences, _get_volume_keys(cli_volume), generation):
+                return
+            self._volumes_by_id[cli_volume.id] = cli_volume
+            self._volume_ids_by_name[cli_volume.id] = cli_volume.id
+            self._volume_ids_by_name[cli_volume.name] = cli_volume.id
+            self._volume_ids_by_uid[_lower(cli_volume.vdisk_UID)] = cli_volume.id
+
+    def _remove_volume(self, volume_id):
+        cli_volume = self._volumes_by_id.pop(volume_id, None)
+        if cli_volume is None:
+            return
+        self._volume_ids_by_name.pop(cli_volume.id, None)
+        self._volume_ids_by_name.pop(cli_volume.name, None)
+        self._volume_ids_by_uid.pop(_lower(cli_volume.vdisk_UID), None)
+
+    def _invalidate_volumes_by_name(self, names_or_ids):
+        keys = set(names_or_ids)
+        for name_or_id in names_or_ids:
+            cli_volume = self._volumes_by_id.get(self._volume_ids_by_name.get(name_or_id))
+            if cli_volume is not None:
+                keys.update(_get_volume_keys(cli_volume))
+                self._remove_volume(cli_volume.id)
+        self._record_change(self._volume_change_sequences, keys)
+
+    def invalidate_volume(self, name_or_id):
+        with self._lock:
+            self._invalidate_volumes_by_name([name_or_id])
+
+    def invalidate_volumes(self):
+        with self._lock:
+            self._record_change(self._volume_change_sequences, ())
+            self._volumes_change_sequence = self._sequence
+            self._fcmaps_change_sequence = self._sequence
+            self._clear_volumes()
+            self._clear_fcmaps()
+
+    def get_host_by_name(self, name_or_id):
+        with self._lock:
+            cli_host = self._hosts_by_id.get(self._host_ids_by_name.get(name_or_id))
+            self._record_lookup(HOSTS_TABLE, cli_host)
+            return cli_host
+
+    def add_host(self, cli_host, generation):
+        with self._lock:
+            if self._is_changed_since(self._host_change_sequences, (cli_host.id, cli_host.name), generation):
+                return
+            self._hosts_by_id[cli_host.id] = cli_host
+            self._host_ids_by_name[cli_host.id] = cli_host.id
+            self._host_ids_by_name[cli_host.name] = cli_host.id
+
+    def _remove_host(self, host_id):
+        cli_host = self._hosts_by_id.pop(host_id, None)
+        if cli_host is None:
+            return
+        self._host_ids_by_name.pop(cli_host.id, None)
+        self._host_ids_by_name.pop(cli_host.name, None)
+
+    def invalidate_host(self, name_or_id):
+        with self._lock:
+            keys = {name_or_id}
+            cli_host = self._hosts_by_id.get(self._host_ids_by_name.get(name_or_id))
+            if cli_host is not None:
+                keys.update((cli_host.id, cli_host.name))
+                self._remove_host(cli_host.id)
+            self._record_change(self._host_change_sequences, keys)
+
+    def get_fcmaps(self, volume_name, endpoint_type):
+        with self._lock:
+            fcmaps = self._fcmaps.get((endpoint_type, volume_name))
+            if fcmaps is None and self._is_fcmaps_table_complete:
+                fcmaps = []
+            self._record_lookup(FCMAPS_TABLE, fcmaps)
+            return None if fcmaps is None else list(fcmaps)
+
+    def add_fcmaps(self, volume_name, endpoint_type, fcmaps, generation):
+        with self._lock:
+            if generation < self._fcmaps_change_sequence:
+                return
+            self._fcmaps[(endpoint_type, volume_name)] = list(fcmaps)
+
+    def _get_fcmap_volume_names(self, fcmap_id):
+        volume_names = set()
+        for fcmaps in self._fcmaps.values():
+            for fcmap in fcmaps:
+                if fcmap.id == fcmap_id:
+                    volume_names.update((fcmap.source_vdisk_name, fcmap.target_vdisk_name))
+        return volume_names
+
+    def invalidate_fcmaps(self, volume_names=(), fcmap_id=None):
+        with self._lock:
+            volume_names = set(volume_names)
+            if fcmap_id is not None:
+                volume_names.update(self._get_fcmap_volume_names(fcmap_id))
+                volume_names.update(cli_volume.name for cli_volume in self._volumes_by_id.values()
+                                    if getattr(cli_volume, 'FC_id', None) in (fcmap_id, 'many'))
+            self._invalidate_volumes_by_name(volume_names)
+            self._fcmaps_change_sequence = self._sequence
+            self._clear_fcmaps()
+
+    def get_metrics(self):
+        with self._lock:
+            metrics = {}
+            for table in (VOLUMES_TABLE, HOSTS_TABLE, FCMAPS_TABLE):
+                hits = self._hits[table]
+                lookups = hits + self._misses[table]
+                metrics[table] = {
+                    'hits': hits,
+                    'misses': self._misses[table],
+                    'hit_rate': hits / lookups if lookups else 0.0
+                }
+            staleness = None
+            if self._last_refresh_time is not None:
+                staleness = monotonic() - self._last_refresh_time
+            metrics.update({
+                'staleness_seconds': staleness,
+                'max_served_staleness_seconds': self._max_served_staleness,
+                'refreshes': self._refreshes,
+                'invalidations': self._invalidations,
+                'cached_volumes': len(self._volumes_by_id),
+                'cached_hosts': len(self._hosts_by_id)
+            })
+            return metrics
+
+
+class SVCInventoryCache:
+    def __init__(self):
+        self._inventories = {}
+        self._cache_lock = RLock()
+
+    def get(self, endpoint, user):
+        with self._cache_lock:
+            key = (endpoint, user)
+            inventory = self._inventories.get(key)
+            if inventory is None:
+                logger.debug("creating a new inventory for endpoint {}".format(endpoint))
+                inventory = SVCInventory(endpoint, _get_refresh_interval())
+                self._inventories[key] = inventory
+            return inventory
+
+    def get_metrics(self):
+        with self._cache_lock:
+            return {key: inventory.get_metrics() for key, inventory in self._inventories.items()}
+
+    def clear(self):
+        with self._cache_lock:
+            inventories = list(self._inventories.values())
+            self._inventories.clear()
+        for inventory in inventories:
+            inventory.stop_refresher()
+
+
+svc_inventory_cache = SVCInventoryCache()
+
+
+def _collect_svc_inventory_metrics():
+    for (endpoint, user), inventory_metrics in svc_inventory_cache.get_metrics().items():
+        labels = {'endpoint': endpoint, 'user': user}
+        for metric_name, value in inventory_metrics.items():
+            if isinstance(value, dict):
+                for table_metric_name, table_value in value.items():
+                    yield 'csi_svc_inventory_{}'.format(table_metric_name), dict(labels, table=metric_name), \
+                        table_value
+            else:
+                yield 'csi_svc_inventory_{}'.format(metric_name), labels, value
+
+
+metrics.add_collector('svc_inventory', _collect_svc_inventory_metrics)
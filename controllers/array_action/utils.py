@@ -3,6 +3,8 @@ import encodings
 from controllers.array_action.settings import WWN_OUI_END, WWN_VENDOR_IDENTIFIER_END, VENDOR_IDENTIFIER_LENGTH, \
     NGUID_OUI_END
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.settings import ARRAY_COMMAND_DURATION_METRIC
 
 UTF_8 = encodings.utf_8.getregentry().name
 
@@ -36,3 +38,21 @@ class ClassProperty:
 
     def __get__(self, instance, owner):
         return self._function(owner)
+
+
+def time_array_commands(send_command, array_type, get_command_name):
+    """
+    Args:
+        send_command : the function of the array client that sends a command
+        array_type : type of the array, used as a metric label
+        get_command_name : function that returns the command name out of the arguments of send_command
+    Returns:
+        send_command, recording the duration of every command
+    """
+
+    def send_timed_command(*args, **kwargs):
+        with metrics.time(ARRAY_COMMAND_DURATION_METRIC, array_type=array_type,
+                          command=get_command_name(*args, **kwargs)):
+            return send_command(*args, **kwargs)
+
+    return send_timed_command
@@ -1,5 +1,13 @@
+import atexit
 import logging
+import os
 import sys
+from collections import OrderedDict
+from copy import copy
+from logging.handlers import QueueHandler, QueueListener
+from queue import SimpleQueue
+from threading import Lock
+from time import monotonic
 
 logger_properties = {
     'log_level': 'DEBUG',
@@ -7,16 +15,149 @@ logger_properties = {
              '(%(filename)s:%(funcName)s:%(lineno)d) - %(message)s'
 }
 
+LOGGER_NAME = "csi_logger"
+LOG_RATE_LIMIT_BURST_ENV_VAR = 'CSI_LOG_RATE_LIMIT_BURST'
+LOG_RATE_LIMIT_DEFAULT_BURST = 20
+LOG_RATE_LIMIT_INTERVAL_ENV_VAR = 'CSI_LOG_RATE_LIMIT_INTERVAL'
+LOG_RATE_LIMIT_DEFAULT_INTERVAL_IN_SECONDS = 10
+LOG_RATE_LIMIT_MAX_LEVEL_ENV_VAR = 'CSI_LOG_RATE_LIMIT_MAX_LEVEL'
+LOG_RATE_LIMIT_DEFAULT_MAX_LEVEL = 'INFO'
+LOG_RATE_LIMIT_MAX_TRACKED_MESSAGES = 1024
+
+
+class _MessageWindow:
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.count = 1
+        self.suppressed = 0
+
+
+def _get_args_key(args):
+    try:
+        hash(args)
+        return args
+    except TypeError:
+        return repr(args)
+
+
+class RepeatedMessagesFilter(logging.Filter):
+    """
+    Lets the same message from the same line through up to burst times in every interval, and drops the rest.
+    The next message of a new interval tells how many messages were dropped.
+
+    Only the messages up to max level are dropped, and the messages are compared by their format and arguments,
+    so they are not formatted here.
+    """
+
+    def __init__(self, burst, interval, max_level=logging.INFO,
+                 max_tracked_messages=LOG_RATE_LIMIT_MAX_TRACKED_MESSAGES):
+        super().__init__()
+        self._burst = burst
+        self._interval = interval
+        self._max_level = max_level
+        self._max_tracked_messages = max_tracked_messages
+        self._lock = Lock()
+        self._windows = OrderedDict()
+        self._evicted_suppressed = 0
+
+    def filter(self, record):
+        if self._burst <= 0 or record.levelno > self._max_level:
+            return True
+        key = (record.levelno, record.pathname, record.lineno, record.msg, _get_args_key(record.args))
+        now = monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and now - window.start_time < self._interval:
+                window.count += 1
+                if window.count > self._burst:
+                    window.suppressed += 1
+                    return False
+                return True
+            suppressed = window.suppressed if window is not None else 0
+            evicted_suppressed = self._evicted_suppressed
+            self._evicted_suppressed = 0
+            self._windows[key] = _MessageWindow(now)
+            self._windows.move_to_end(key)
+            if len(self._windows) > self._max_tracked_messages:
+                _, evicted_window = self._windows.popitem(last=False)
+                self._evicted_suppressed += evicted_window.suppressed
+        if suppressed:
+            record.msg = "{} (suppressed {} repeated messages)".format(record.msg, suppressed)
+        if evicted_suppressed:
+            record.msg = "{} (suppressed {} repeated messages of other lines)".format(record.msg, evicted_suppressed)
+        return True
+
+
+class _RecordsQueueHandler(QueueHandler):
+    """
+    Puts the records in the queue with their message already merged with its arguments, like QueueHandler does,
+    so an argument that changes after the call does not change the message.
+    The entry is formatted by the handler of the listener thread.
+
+    The records are prepared only once they passed the level and the filters, so a message which is dropped
+    is never built.
+    """
+
+    def prepare(self, record):
+        record = copy(record)
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        return record
+
+
+class LazyMessage:
+    """
+    A log argument which is built only when the record is formatted, for messages that are expensive to build.
+    """
+
+    def __init__(self, build_message, *args, **kwargs):
+        self._build_message = build_message
+        self._args = args
+        self._kwargs = kwargs
+
+    def __str__(self):
+        return str(self._build_message(*self._args, **self._kwargs))
+
+
+def lazy(build_message, *args, **kwargs):
+    return LazyMessage(build_message, *args, **kwargs)
+
+
+def is_debug_enabled():
+    return logging.getLogger(LOGGER_NAME).isEnabledFor(logging.DEBUG)
+
+
+def _get_rate_limit_filter():
+    burst = os.getenv(LOG_RATE_LIMIT_BURST_ENV_VAR)
+    interval = os.getenv(LOG_RATE_LIMIT_INTERVAL_ENV_VAR)
+    max_level = os.getenv(LOG_RATE_LIMIT_MAX_LEVEL_ENV_VAR) or LOG_RATE_LIMIT_DEFAULT_MAX_LEVEL
+    max_level = logging.getLevelName(max_level.upper())
+    if not isinstance(max_level, int):
+        # getLevelName returns a 'Level <name>' string for an unknown level name
+        max_level = logging.getLevelName(LOG_RATE_LIMIT_DEFAULT_MAX_LEVEL)
+    return RepeatedMessagesFilter(int(burst) if burst else LOG_RATE_LIMIT_DEFAULT_BURST,
+                                  float(interval) if interval else LOG_RATE_LIMIT_DEFAULT_INTERVAL_IN_SECONDS,
+                                  max_level)
+
 
 def get_stdout_logger():
-    csi_logger = logging.getLogger("csi_logger")
+    csi_logger = logging.getLogger(LOGGER_NAME)
 
     if not getattr(csi_logger, 'handler_set', None):
         csi_logger.setLevel(logger_properties['log_level'])
-        handler = logging.StreamHandler(sys.stdout)
-        handler.setLevel(logging.DEBUG)
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setLevel(logging.DEBUG)
         formatter = logging.Formatter(logger_properties['entry'])
-        handler.setFormatter(formatter)
+        stream_handler.setFormatter(formatter)
+
+        # the records are written to stdout by a background thread, so a slow stdout does not block the requests.
+        records_queue = SimpleQueue()
+        handler = _RecordsQueueHandler(records_queue)
+        handler.addFilter(_get_rate_limit_filter())
+        listener = QueueListener(records_queue, stream_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
         csi_logger.addHandler(handler)
 
         csi_logger.handler_set = True
@@ -31,5 +172,5 @@ def set_log_level(log_level_to_set):
     """
     if log_level_to_set:
         logger_properties['log_level'] = log_level_to_set.upper()
-        csi_logger = logging.getLogger("csi_logger")
+        csi_logger = logging.getLogger(LOGGER_NAME)
         csi_logger.setLevel(logger_properties['log_level'])
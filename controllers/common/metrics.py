@@ -0,0 +1,174 @@
+import os
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import RLock, Thread
+from time import monotonic
+
+from controllers.common import settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+def _get_labels_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels_key, extra_labels=()):
+    labels = list(labels_key) + list(extra_labels)
+    if not labels:
+        return ''
+    formatted_labels = ('{}="{}"'.format(name, str(value).replace('\\', '\\\\').replace('"', '\\"')
+                                         .replace('\n', '\\n'))
+                        for name, value in labels)
+    return '{{{}}}'.format(','.join(formatted_labels))
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.sum += value
+        for index, bucket in enumerate(self.buckets):
+            if value <= bucket:
+                self.bucket_counts[index] += 1
+
+
+class MetricsRegistry:
+    """
+    The histograms and counters of the controller, by metric name and labels.
+
+    Components that already keep their own statistics register a collector instead,
+    which is called on every render and returns (metric name, labels, value) gauges.
+    """
+
+    def __init__(self, buckets=settings.METRICS_HISTOGRAM_BUCKETS):
+        self._buckets = buckets
+        self._lock = RLock()
+        self._histograms = {}
+        self._counters = {}
+        self._collectors = {}
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            histograms = self._histograms.setdefault(name, {})
+            labels_key = _get_labels_key(labels)
+            histogram = histograms.get(labels_key)
+            if histogram is None:
+                histogram = Histogram(self._buckets)
+                histograms[labels_key] = histogram
+            histogram.observe(value)
+
+    @contextmanager
+    def time(self, name, **labels):
+        start_time = monotonic()
+        try:
+            yield
+        finally:
+            self.observe(name, monotonic() - start_time, **labels)
+
+    def increment(self, name, amount=1, **labels):
+        with self._lock:
+            counters = self._counters.setdefault(name, {})
+            labels_key = _get_labels_key(labels)
+            counters[labels_key] = counters.get(labels_key, 0) + amount
+
+    def add_collector(self, collector_name, collect):
+        with self._lock:
+            self._collectors[collector_name] = collect
+
+    def get_histogram(self, name, **labels):
+        with self._lock:
+            return self._histograms.get(name, {}).get(_get_labels_key(labels))
+
+    def get_counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get(name, {}).get(_get_labels_key(labels), 0)
+
+    def _render_histograms(self, lines):
+        for name, histograms in sorted(self._histograms.items()):
+            lines.append('# TYPE {} histogram'.format(name))
+            for labels_key, histogram in histograms.items():
+                for bucket, bucket_count in zip(histogram.buckets, histogram.bucket_counts):
+                    lines.append('{}_bucket{} {}'.format(name, _format_labels(labels_key, (('le', bucket),)),
+                                                         bucket_count))
+                lines.append('{}_bucket{} {}'.format(name, _format_labels(labels_key, (('le', '+Inf'),)),
+                                                     histogram.count))
+                lines.append('{}_sum{} {}'.format(name, _format_labels(labels_key), histogram.sum))
+                lines.append('{}_count{} {}'.format(name, _format_labels(labels_key), histogram.count))
+
+    def _render_counters(self, lines):
+        for name, counters in sorted(self._counters.items()):
+            lines.append('# TYPE {} counter'.format(name))
+            for labels_key, value in counters.items():
+                lines.append('{}{} {}'.format(name, _format_labels(labels_key), value))
+
+    def _render_collectors(self, lines, collectors):
+        gauges = {}
+        for collector_name, collect in collectors:
+            try:
+                for name, labels, value in collect():
+                    if value is not None:
+                        gauges.setdefault(name, []).append((_get_labels_key(labels), value))
+            except Exception as ex:
+                logger.error("Failed to collect the {} metrics, reason is {}".format(collector_name, ex))
+        for name, values in sorted(gauges.items()):
+            lines.append('# TYPE {} gauge'.format(name))
+            for labels_key, value in values:
+                lines.append('{}{} {}'.format(name, _format_labels(labels_key), value))
+
+    def render(self):
+        """
+        Returns
+            The metrics in the Prometheus text format
+        """
+        lines = []
+        with self._lock:
+            self._render_histograms(lines)
+            self._render_counters(lines)
+            collectors = list(self._collectors.items())
+        # the collectors take the locks of their components, so they are called without holding the registry lock.
+        self._render_collectors(lines, collectors)
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+metrics = MetricsRegistry()
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        if self.path != settings.METRICS_PATH:
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        logger.debug("metrics server: {}".format(format % args))
+
+
+def start_metrics_server():
+    """
+    Serve the metrics over HTTP, on the port set by CSI_METRICS_PORT. Nothing is served when it is not set.
+    """
+    port = os.getenv(settings.METRICS_PORT_ENV_VAR)
+    if not port:
+        return None
+    server = ThreadingHTTPServer(('', int(port)), _MetricsRequestHandler)
+    Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics on port {}".format(port))
+    return server
@@ -4,6 +4,17 @@ NAME_PREFIX_SEPARATOR = "_"
 ENDPOINTS_SEPARATOR = ", "
 
 CSI_CONTROLLER_SERVER_WORKERS = 10
+CSI_CONTROLLER_SERVER_WORKERS_ENV_VAR = 'CSI_CONTROLLER_SERVER_WORKERS'
+CSI_CONTROLLER_SERVER_MAX_CONCURRENT_RPCS_ENV_VAR = 'CSI_CONTROLLER_SERVER_MAX_CONCURRENT_RPCS'
+CSI_CONTROLLER_SERVER_ASYNC_ENV_VAR = 'CSI_CONTROLLER_SERVER_ASYNC'
+
+METRICS_PORT_ENV_VAR = 'CSI_METRICS_PORT'
+METRICS_PATH = '/metrics'
+METRICS_HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+CSI_METHOD_DURATION_METRIC = 'csi_method_duration_seconds'
+ARRAY_COMMAND_DURATION_METRIC = 'csi_array_command_duration_seconds'
+ARRAY_CONNECTION_WAIT_METRIC = 'csi_array_connection_wait_seconds'
+CACHE_LOOKUPS_METRIC = 'csi_cache_lookups_total'
 
 # array types
 ARRAY_TYPE_XIV = 'A9000'
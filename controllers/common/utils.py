@@ -1,3 +1,4 @@
+import os
 import threading
 
 from controllers.common import settings
@@ -19,6 +20,17 @@ def set_current_thread_name(name):
         current_thread.setName(name)
 
 
+def get_controller_server_workers():
+    """
+    Returns
+        The number of workers of the controller server, or None when it is not configured
+    """
+    workers = os.getenv(settings.CSI_CONTROLLER_SERVER_WORKERS_ENV_VAR)
+    if not workers:
+        return None
+    return int(workers)
+
+
 def string_to_array(str_val, separator):
     """
     Args
@@ -0,0 +1,100 @@
+import asyncio
+from concurrent import futures
+from functools import partial
+from threading import RLock
+
+import controllers.servers.settings as servers_settings
+from controllers.array_action.storage_agent import get_configured_max_connections, get_max_connections_by_endpoints
+from controllers.common import settings
+from controllers.common.csi_logger import get_stdout_logger
+from controllers.servers.utils import get_array_connection_info_from_secrets
+
+logger = get_stdout_logger()
+
+
+def _get_array_addresses(request):
+    secrets = getattr(request, "secrets", None)
+    if not secrets:
+        return None
+    try:
+        array_connection_info = get_array_connection_info_from_secrets(secrets)
+    except Exception:
+        # secrets of several systems are resolved by the method itself, from the request topologies.
+        return None
+    return array_connection_info.array_addresses
+
+
+class ArrayExecutors:
+    """
+    A thread pool per array, so the blocking calls to one array are bounded by its number of connections
+    and do not hold back the calls to other arrays.
+    Requests that do not name a single array run in a shared thread pool, and the identity requests run in
+    a small thread pool of their own, so a probe is answered even when all the arrays are busy.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._executors = {}
+        self._identity_executor = None
+
+    def get(self, array_addresses):
+        if array_addresses:
+            endpoint_key = settings.ENDPOINTS_SEPARATOR.join(array_addresses)
+            # the max connections of the array type, once the type of the array is known
+            max_workers = get_max_connections_by_endpoints(array_addresses)
+        else:
+            endpoint_key = None
+            max_workers = get_configured_max_connections()
+        with self._lock:
+            executor, executor_max_workers = self._executors.get(endpoint_key, (None, None))
+            if executor_max_workers != max_workers:
+                logger.debug("creating a new executor with {} workers for endpoint {}".format(
+                    max_workers, endpoint_key))
+                if executor is not None:
+                    executor.shutdown(wait=False)
+                executor = futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="array-executor")
+                self._executors[endpoint_key] = (executor, max_workers)
+            return executor
+
+    def get_identity_executor(self):
+        with self._lock:
+            if self._identity_executor is None:
+                self._identity_executor = futures.ThreadPoolExecutor(
+                    max_workers=servers_settings.IDENTITY_EXECUTOR_WORKERS, thread_name_prefix="identity-executor")
+            return self._identity_executor
+
+    def shutdown(self):
+        with self._lock:
+            for executor, _ in self._executors.values():
+                executor.shutdown(wait=False)
+            self._executors.clear()
+            if self._identity_executor is not None:
+                self._identity_executor.shutdown(wait=False)
+                self._identity_executor = None
+
+
+class AsyncServicer:
+    """
+    Exposes the methods of a servicer as coroutines for a grpc.aio server.
+    Every call runs in the executor of its array, so many in-flight calls can wait without holding a thread.
+    """
+
+    def __init__(self, servicer, array_executors):
+        self._servicer = servicer
+        self._array_executors = array_executors
+
+    def __getattr__(self, name):
+        method = getattr(self._servicer, name)
+        if not callable(method) or name.startswith("_"):
+            return method
+
+        async def call_method(request, context):
+            if name in servers_settings.IDENTITY_METHOD_NAMES:
+                executor = self._array_executors.get_identity_executor()
+            else:
+                executor = self._array_executors.get(_get_array_addresses(request))
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(method, request, context))
+
+        call_method.__name__ = name
+        return call_method
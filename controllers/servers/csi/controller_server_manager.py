@@ -1,3 +1,4 @@
+import asyncio
 import os
 import time
 from concurrent import futures
@@ -7,8 +8,11 @@ from csi_general import csi_pb2_grpc, replication_pb2_grpc, volumegroup_pb2_grpc
 
 from controllers.common.config import config
 from controllers.common.csi_logger import get_stdout_logger
-from controllers.common.settings import CSI_CONTROLLER_SERVER_WORKERS
+from controllers.common.settings import CSI_CONTROLLER_SERVER_WORKERS, \
+    CSI_CONTROLLER_SERVER_MAX_CONCURRENT_RPCS_ENV_VAR, CSI_CONTROLLER_SERVER_ASYNC_ENV_VAR
+from controllers.common.utils import get_controller_server_workers
 from controllers.servers.csi.addons_server import ReplicationControllerServicer
+from controllers.servers.csi.async_servicer import ArrayExecutors, AsyncServicer
 from controllers.servers.csi.csi_controller_server import CSIControllerServicer
 from controllers.servers.csi.volume_group_server import VolumeGroupControllerServicer
 
@@ -16,10 +20,24 @@ logger = get_stdout_logger()
 
 
 def get_max_workers_count():
+    workers = get_controller_server_workers()
+    if workers:
+        return workers
     cpu_count = (os.cpu_count() or 1) + 4
     return CSI_CONTROLLER_SERVER_WORKERS if cpu_count < CSI_CONTROLLER_SERVER_WORKERS else None
 
 
+def get_max_concurrent_rpcs():
+    max_concurrent_rpcs = os.getenv(CSI_CONTROLLER_SERVER_MAX_CONCURRENT_RPCS_ENV_VAR)
+    if not max_concurrent_rpcs:
+        return None
+    return int(max_concurrent_rpcs)
+
+
+def is_async_server():
+    return os.getenv(CSI_CONTROLLER_SERVER_ASYNC_ENV_VAR, 'false').lower() == 'true'
+
+
 class ControllerServerManager:
     def __init__(self, array_endpoint):
         self.endpoint = array_endpoint
@@ -27,14 +45,11 @@ class ControllerServerManager:
         self.replication_servicer = ReplicationControllerServicer()
         self.volume_group_servicer = VolumeGroupControllerServicer()
 
-    def start_server(self):
-        max_workers = get_max_workers_count()
-        controller_server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers))
-
-        csi_pb2_grpc.add_ControllerServicer_to_server(self.csi_servicer, controller_server)
-        csi_pb2_grpc.add_IdentityServicer_to_server(self.csi_servicer, controller_server)
-        replication_pb2_grpc.add_ControllerServicer_to_server(self.replication_servicer, controller_server)
-        volumegroup_pb2_grpc.add_ControllerServicer_to_server(self.volume_group_servicer, controller_server)
+    def _add_servicers_to_server(self, controller_server, csi_servicer, replication_servicer, volume_group_servicer):
+        csi_pb2_grpc.add_ControllerServicer_to_server(csi_servicer, controller_server)
+        csi_pb2_grpc.add_IdentityServicer_to_server(csi_servicer, controller_server)
+        replication_pb2_grpc.add_ControllerServicer_to_server(replication_servicer, controller_server)
+        volumegroup_pb2_grpc.add_ControllerServicer_to_server(volume_group_servicer, controller_server)
 
         # bind the server to the port defined above
         # controller_server.add_insecure_port('[::]:{}'.format(self.server_port))
@@ -46,6 +61,17 @@ class ControllerServerManager:
         # start the server
         logger.debug("Listening for connections on endpoint address: {}".format(self.endpoint))
 
+    def start_server(self):
+        if is_async_server():
+            asyncio.run(self._serve_async())
+            return
+
+        max_workers = get_max_workers_count()
+        controller_server = grpc.server(futures.ThreadPoolExecutor(max_workers=max_workers),
+                                        maximum_concurrent_rpcs=get_max_concurrent_rpcs())
+        self._add_servicers_to_server(controller_server, self.csi_servicer, self.replication_servicer,
+                                      self.volume_group_servicer)
+
         controller_server.start()
         logger.debug('Controller Server running ...')
 
@@ -55,3 +81,21 @@ class ControllerServerManager:
         except KeyboardInterrupt:
             controller_server.stop(0)
             logger.debug('Controller Server Stopped ...')
+
+    async def _serve_async(self):
+        array_executors = ArrayExecutors()
+        controller_server = grpc.aio.server(maximum_concurrent_rpcs=get_max_concurrent_rpcs())
+        self._add_servicers_to_server(controller_server,
+                                      AsyncServicer(self.csi_servicer, array_executors),
+                                      AsyncServicer(self.replication_servicer, array_executors),
+                                      AsyncServicer(self.volume_group_servicer, array_executors))
+
+        await controller_server.start()
+        logger.debug('Controller Server running in async mode ...')
+
+        try:
+            await controller_server.wait_for_termination()
+        finally:
+            await controller_server.stop(0)
+            array_executors.shutdown()
+            logger.debug('Controller Server Stopped ...')
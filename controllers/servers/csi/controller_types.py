@@ -3,7 +3,7 @@ from dataclasses import dataclass, field, InitVar
 from controllers.array_action.array_action_types import ObjectIds, VolumeGroupIds
 
 
-@dataclass
+@dataclass(frozen=True)
 class ArrayConnectionInfo:
     array_addresses: list
     user: str
@@ -36,7 +36,7 @@ class VolumeGroupIdInfo(CommonIdInfo):
         self.ids = VolumeGroupIds(internal_id=internal_id, name=name)
 
 
-@dataclass
+@dataclass(frozen=True)
 class ObjectParameters:
     pool: str
     space_efficiency: str
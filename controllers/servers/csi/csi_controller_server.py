@@ -1,3 +1,7 @@
+from contextlib import closing
+from itertools import islice
+from os import getenv
+
 import grpc
 from csi_general import csi_pb2
 from csi_general import csi_pb2_grpc
@@ -7,15 +11,18 @@ import controllers.servers.settings as servers_settings
 import controllers.servers.utils as utils
 from controllers.array_action import messages
 from controllers.array_action.array_action_types import ObjectIds
+from controllers.array_action.pool_capacity_poller import pool_capacity_pollers
 from controllers.array_action.storage_agent import get_agent, detect_array_type
+from controllers.common import settings
 from controllers.common.config import config as common_config
 from controllers.common.csi_logger import get_stdout_logger
 from controllers.common.node_info import NodeIdInfo
 from controllers.servers import messages as controller_messages
 from controllers.servers.csi.decorators import csi_method
+from controllers.servers.csi.managed_secrets import managed_secrets
 from controllers.servers.csi.exception_handler import handle_exception, \
     build_error_response
-from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId
+from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId, InvalidStartingToken
 
 logger = get_stdout_logger()
 
@@ -105,7 +112,7 @@ class CSIControllerServicer(csi_pb2_grpc.ControllerServicer):
                                                           volume_parameters.io_group, volume_parameters.volume_group,
                                                           source_ids, source_type, is_virt_snap_func)
                 else:
-                    logger.debug("volume found : {}".format(volume))
+                    logger.debug("volume found : %s", volume)
 
                     volume_capacity_bytes = volume.capacity_bytes
                     if not source_id and volume_capacity_bytes < required_bytes:
@@ -297,7 +304,7 @@ class CSIControllerServicer(csi_pb2_grpc.ControllerServicer):
             if not volume:
                 raise array_errors.ObjectNotFoundError(volume_id)
 
-            logger.debug("volume found : {}".format(volume))
+            logger.debug("volume found : %s", volume)
 
             if request.volume_context:
                 utils.validate_volume_context_match_volume(request.volume_context, volume)
@@ -313,7 +320,50 @@ class CSIControllerServicer(csi_pb2_grpc.ControllerServicer):
 
     @csi_method(error_response_type=csi_pb2.ListVolumesResponse)
     def ListVolumes(self, request, context):
-        raise NotImplementedError()
+        utils.validate_list_volumes_request(request)
+        max_entries = request.max_entries or servers_settings.LIST_VOLUMES_DEFAULT_MAX_ENTRIES
+        # the request carries no secrets, so the volumes are of the systems of the secrets that were seen so far.
+        # an empty list would tell that all the volumes are gone, so nothing is listed until a system is known.
+        array_connection_infos = self._get_managed_array_connection_infos()
+        if not array_connection_infos:
+            return build_error_response(controller_messages.NO_MANAGED_STORAGE_SYSTEMS_MESSAGE, context,
+                                        grpc.StatusCode.UNAVAILABLE, csi_pb2.ListVolumesResponse)
+        try:
+            # one volume more than the page, to know if there is a next page
+            with closing(self._generate_listed_volumes(array_connection_infos,
+                                                       request.starting_token)) as listed_volumes:
+                page = list(islice(listed_volumes, max_entries + 1))
+        except (InvalidStartingToken, array_errors.InvalidArgumentError) as ex:
+            return handle_exception(ex, context, grpc.StatusCode.ABORTED, csi_pb2.ListVolumesResponse)
+
+        next_token = ""
+        if len(page) > max_entries:
+            page = page[:max_entries]
+            _, _, next_token = page[-1]
+        volumes_with_system_ids = [(volume, system_id) for volume, system_id, _ in page]
+        return utils.generate_csi_list_volumes_response(volumes_with_system_ids, next_token)
+
+    def _generate_listed_volumes(self, array_connection_infos, starting_token):
+        start_endpoint_key, array_start_token = utils.split_list_volumes_token(starting_token)
+        array_connection_infos_by_endpoint_key = {}
+        # the most recent secret of an array is the one that is used to list it
+        for array_connection_info in reversed(array_connection_infos):
+            endpoint_key = settings.ENDPOINTS_SEPARATOR.join(array_connection_info.array_addresses)
+            array_connection_infos_by_endpoint_key.setdefault(endpoint_key, array_connection_info)
+        if start_endpoint_key and start_endpoint_key not in array_connection_infos_by_endpoint_key:
+            raise InvalidStartingToken(starting_token)
+        name_prefix = getenv(servers_settings.LIST_VOLUMES_NAME_PREFIX_ENV_VAR)
+        for endpoint_key in sorted(array_connection_infos_by_endpoint_key):
+            if start_endpoint_key and endpoint_key < start_endpoint_key:
+                continue
+            array_connection_info = array_connection_infos_by_endpoint_key[endpoint_key]
+            array_token = array_start_token if endpoint_key == start_endpoint_key else ""
+            logger.debug("listing volumes of {} from token : {}".format(endpoint_key, array_token))
+            with get_agent(array_connection_info).get_mediator() as array_mediator, \
+                    closing(array_mediator.list_volumes(array_token, name_prefix)) as array_volumes:
+                for volume, volume_token in array_volumes:
+                    next_token = utils.get_list_volumes_token(endpoint_key, volume_token)
+                    yield volume, array_connection_info.system_id, next_token
 
     @csi_method(error_response_type=csi_pb2.CreateSnapshotResponse, lock_request_attribute="name")
     def CreateSnapshot(self, request, context):
@@ -399,7 +449,54 @@ class CSIControllerServicer(csi_pb2_grpc.ControllerServicer):
 
     @csi_method(error_response_type=csi_pb2.GetCapacityResponse)
     def GetCapacity(self, request, context):
-        raise NotImplementedError()
+        parameters = request.parameters
+        if not (parameters.get(servers_settings.PARAMETERS_POOL) or
+                parameters.get(servers_settings.PARAMETERS_BY_SYSTEM)):
+            raise ValidationException(controller_messages.POOL_SHOULD_NOT_BE_EMPTY_MESSAGE)
+        topologies = utils.get_accessible_topology(request)
+
+        # the request carries no secrets, so the capacity is of the systems of the secrets that were seen so far,
+        # narrowed to the system of the accessible topology, or to the systems that have a pool in by_system.
+        # the capacities are polled in the background, so the request is answered from memory without waiting
+        is_pool_on_any_system = False
+        available_capacities = []
+        for array_connection_info in self._get_managed_array_connection_infos(topologies):
+            pool = utils.get_volume_parameters(parameters, system_id=array_connection_info.system_id).pool
+            if not pool:
+                continue
+            is_pool_on_any_system = True
+            try:
+                available_capacities.append(pool_capacity_pollers.get_available_capacity(array_connection_info,
+                                                                                         pool))
+            except array_errors.PoolDoesNotExist as ex:
+                logger.debug(ex)
+        if not is_pool_on_any_system or None in available_capacities:
+            message = controller_messages.CAPACITY_IS_UNKNOWN_MESSAGE.format(
+                parameters.get(servers_settings.PARAMETERS_POOL))
+            return build_error_response(message, context, grpc.StatusCode.UNAVAILABLE, csi_pb2.GetCapacityResponse)
+        # a pool name that exists on several systems can not be told apart, so a volume must fit in the smallest
+        available_capacity = min(available_capacities, default=0)
+        logger.debug("available capacity : {}".format(available_capacity))
+        return utils.generate_csi_get_capacity_response(available_capacity)
+
+    def _get_managed_array_connection_infos(self, topologies=None):
+        array_connection_infos = []
+        for secrets in managed_secrets.get_all():
+            try:
+                utils.validate_secrets(secrets)
+                if topologies:
+                    if not secrets.get(servers_settings.SECRET_CONFIG_PARAMETER):
+                        logger.debug("skipping a secret without topologies")
+                        continue
+                    system_ids = [None]
+                else:
+                    system_ids = utils.get_system_ids_from_secrets(secrets)
+                for system_id in system_ids:
+                    array_connection_infos.append(utils.get_array_connection_info_from_secrets(
+                        secrets, topologies=topologies, system_id=system_id))
+            except ValidationException as ex:
+                logger.debug("skipping a secret that does not match the request: {}".format(ex))
+        return array_connection_infos
 
     @csi_method(error_response_type=csi_pb2.ControllerExpandVolumeResponse, lock_request_attribute="volume_id")
     def ControllerExpandVolume(self, request, context):
@@ -467,7 +564,10 @@ class CSIControllerServicer(csi_pb2_grpc.ControllerServicer):
                           self._get_controller_service_capability("CREATE_DELETE_SNAPSHOT"),
                           self._get_controller_service_capability("PUBLISH_UNPUBLISH_VOLUME"),
                           self._get_controller_service_capability("CLONE_VOLUME"),
-                          self._get_controller_service_capability("EXPAND_VOLUME")])
+                          self._get_controller_service_capability("EXPAND_VOLUME"),
+                          self._get_controller_service_capability("LIST_VOLUMES"),
+                          self._get_controller_service_capability("VOLUME_CONDITION"),
+                          self._get_controller_service_capability("GET_CAPACITY")])
 
         logger.info("finished ControllerGetCapabilities")
         return response
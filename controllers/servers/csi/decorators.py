@@ -2,6 +2,8 @@ import grpc
 from decorator import decorator
 
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.common.settings import CSI_METHOD_DURATION_METRIC
 from controllers.common.utils import set_current_thread_name
 from controllers.servers.errors import ObjectAlreadyProcessingError
 from controllers.servers.settings import (VOLUME_TYPE_NAME, VOLUME_GROUP_TYPE_NAME,
@@ -9,6 +11,7 @@ from controllers.servers.settings import (VOLUME_TYPE_NAME, VOLUME_GROUP_TYPE_NA
 from controllers.array_action.settings import METADATA_KEY
 from controllers.array_action.registration_maps import REGISTRATION_MAP
 from controllers.servers.csi.exception_handler import handle_exception, handle_common_exceptions
+from controllers.servers.csi.managed_secrets import managed_secrets
 from controllers.servers.csi.sync_lock import SyncLock
 
 logger = get_stdout_logger()
@@ -46,11 +49,14 @@ def _set_sync_lock(lock_id, lock_request_attribute, error_response_type,
     set_current_thread_name(lock_id)
     controller_method_name = controller_method.__name__
     logger.info(controller_method_name)
-    try:
-        with SyncLock(lock_request_attribute, lock_id, controller_method_name):
-            response = handle_common_exceptions(controller_method, servicer, request, context, error_response_type)
-    except ObjectAlreadyProcessingError as ex:
-        return handle_exception(ex, context, grpc.StatusCode.ABORTED, error_response_type)
+    managed_secrets.add(getattr(request, 'secrets', None))
+    with metrics.time(CSI_METHOD_DURATION_METRIC, method=controller_method_name):
+        try:
+            with SyncLock(lock_request_attribute, lock_id, controller_method_name):
+                response = handle_common_exceptions(controller_method, servicer, request, context,
+                                                    error_response_type)
+        except ObjectAlreadyProcessingError as ex:
+            return handle_exception(ex, context, grpc.StatusCode.ABORTED, error_response_type)
     logger.info("finished {}".format(controller_method_name))
     return response
 
@@ -1,6 +1,7 @@
 from argparse import ArgumentParser
 
 from controllers.common.csi_logger import set_log_level
+from controllers.common.metrics import start_metrics_server
 from controllers.servers.csi.controller_server_manager import ControllerServerManager
 
 
@@ -11,6 +12,7 @@ def main():
     arguments = parser.parse_args()
 
     set_log_level(arguments.loglevel)
+    start_metrics_server()
 
     server_manager = ControllerServerManager(arguments.endpoint)
     server_manager.start_server()
@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from collections.abc import Mapping
+from threading import Lock
+
+import controllers.servers.settings as servers_settings
+from controllers.common.csi_logger import get_stdout_logger
+
+logger = get_stdout_logger()
+
+
+class ManagedSecrets:
+    """
+    The secrets of the most recent requests, for the requests that carry no secrets (GetCapacity, ListVolumes).
+
+    A secret whose password was changed replaces the previous version of it.
+    """
+
+    def __init__(self, max_size=servers_settings.MANAGED_SECRETS_MAX_SIZE):
+        self._max_size = max_size
+        self._lock = Lock()
+        self._secrets = OrderedDict()
+
+    @staticmethod
+    def _get_key(secrets):
+        return tuple(sorted((key, value) for key, value in secrets.items()
+                            if key != servers_settings.SECRET_PASSWORD_PARAMETER))
+
+    def add(self, secrets):
+        if not isinstance(secrets, Mapping) or not secrets:
+            return
+        secrets = dict(secrets)
+        key = self._get_key(secrets)
+        with self._lock:
+            if key not in self._secrets:
+                logger.debug("managing a new secret")
+            self._secrets[key] = secrets
+            self._secrets.move_to_end(key)
+            if len(self._secrets) > self._max_size:
+                self._secrets.popitem(last=False)
+
+    def get_all(self):
+        with self._lock:
+            return list(self._secrets.values())
+
+    def clear(self):
+        with self._lock:
+            self._secrets.clear()
+
+
+managed_secrets = ManagedSecrets()
@@ -1,31 +1,127 @@
+import os
 import threading
-from collections import defaultdict
+from collections import defaultdict, deque
+from time import monotonic
 
+import controllers.servers.settings as servers_settings
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
 from controllers.servers.errors import ObjectAlreadyProcessingError
 
 logger = get_stdout_logger()
 
-ids_in_use = defaultdict(set)
-ids_in_use_lock = threading.Lock()
 
+def get_wait_timeout():
+    wait_timeout = os.getenv(servers_settings.SYNC_LOCK_WAIT_TIMEOUT_ENV_VAR)
+    if not wait_timeout:
+        return 0
+    return float(wait_timeout)
 
-def _add_to_ids_in_use(lock_key, object_id):
-    ids_in_use[lock_key].add(object_id)
 
+class _ObjectLock:
+    def __init__(self):
+        self.waiters = deque()
 
-def _remove_from_ids_in_use(lock_key, object_id):
-    if object_id in ids_in_use[lock_key]:
-        ids_in_use[lock_key].remove(object_id)
-    else:
-        logger.error("could not find lock to release for {}: {}".format(lock_key, object_id))
+
+class _LockStripe:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.object_locks = {}
+
+
+class _ActionMetrics:
+    def __init__(self):
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.total_hold_time = 0.0
+        self.max_hold_time = 0.0
+
+
+class SyncLockMetrics:
+    """
+    Queue depth and lock hold time of the sync locks, by action.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics_by_action = defaultdict(_ActionMetrics)
+
+    def wait_started(self, action_name):
+        with self._lock:
+            metrics = self._metrics_by_action[action_name]
+            metrics.waiting += 1
+            metrics.max_waiting = max(metrics.max_waiting, metrics.waiting)
+
+    def wait_ended(self, action_name):
+        with self._lock:
+            self._metrics_by_action[action_name].waiting -= 1
+
+    def acquired(self, action_name):
+        with self._lock:
+            self._metrics_by_action[action_name].acquired += 1
+
+    def rejected(self, action_name):
+        with self._lock:
+            self._metrics_by_action[action_name].rejected += 1
+
+    def released(self, action_name, hold_time):
+        with self._lock:
+            metrics = self._metrics_by_action[action_name]
+            metrics.total_hold_time += hold_time
+            metrics.max_hold_time = max(metrics.max_hold_time, hold_time)
+
+    def get_metrics(self):
+        with self._lock:
+            return {action_name: {
+                'queue_depth': metrics.waiting,
+                'max_queue_depth': metrics.max_waiting,
+                'acquired': metrics.acquired,
+                'rejected': metrics.rejected,
+                'total_hold_time': metrics.total_hold_time,
+                'max_hold_time': metrics.max_hold_time
+            } for action_name, metrics in self._metrics_by_action.items()}
+
+    def clear(self):
+        with self._lock:
+            self._metrics_by_action.clear()
+
+
+sync_lock_metrics = SyncLockMetrics()
+
+
+def _collect_sync_lock_metrics():
+    for action_name, action_metrics in sync_lock_metrics.get_metrics().items():
+        for metric_name, value in action_metrics.items():
+            yield 'csi_sync_lock_{}'.format(metric_name), {'action': action_name}, value
+
+
+metrics.add_collector('sync_lock', _collect_sync_lock_metrics)
+
+# the objects in use are spread over stripes, so requests for different objects rarely share a mutex.
+lock_stripes = [_LockStripe() for _ in range(servers_settings.SYNC_LOCK_STRIPES)]
+
+
+def _get_lock_stripe(object_key):
+    return lock_stripes[hash(object_key) % len(lock_stripes)]
 
 
 class SyncLock:
+    """
+    Makes sure that only one request processes an object at a time.
+
+    By default a request for an object which is in use fails right away. When SYNC_LOCK_WAIT_TIMEOUT is set,
+    the request waits in the queue of the object, up to the timeout, and the object is handed to the waiting
+    requests in their arrival order.
+    """
+
     def __init__(self, lock_key, object_id, action_name):
         self.lock_key = lock_key
         self.object_id = object_id
         self.action_name = action_name
+        self._object_key = (lock_key, object_id)
+        self._acquire_time = None
 
     def __enter__(self):
         if self.lock_key:
@@ -39,20 +135,64 @@ class SyncLock:
         logger.debug(
             ("trying to acquire lock for action {} with {}: {}".format(self.action_name, self.lock_key,
                                                                        self.object_id)))
-        with ids_in_use_lock:
-            if self.object_id in ids_in_use[self.lock_key]:
-                logger.error(
-                    "lock for action {} with {}: {} is already in use by another thread".format(self.action_name,
-                                                                                                self.lock_key,
-                                                                                                self.object_id))
-                raise ObjectAlreadyProcessingError(self.object_id)
-            _add_to_ids_in_use(self.lock_key, self.object_id)
-            logger.debug(
-                "succeed to acquire lock for action {} with {}: {}".format(self.action_name,
-                                                                           self.lock_key,
-                                                                           self.object_id))
+        wait_timeout = get_wait_timeout()
+        stripe = _get_lock_stripe(self._object_key)
+        with stripe.lock:
+            object_lock = stripe.object_locks.get(self._object_key)
+            if object_lock is None:
+                stripe.object_locks[self._object_key] = _ObjectLock()
+                waiter = None
+            elif wait_timeout <= 0:
+                self._reject()
+            else:
+                waiter = threading.Event()
+                object_lock.waiters.append(waiter)
+
+        if waiter:
+            self._wait_for_object_lock(stripe, object_lock, waiter, wait_timeout)
+        self._acquire_time = monotonic()
+        sync_lock_metrics.acquired(self.action_name)
+        logger.debug(
+            "succeed to acquire lock for action {} with {}: {}".format(self.action_name,
+                                                                       self.lock_key,
+                                                                       self.object_id))
+
+    def _wait_for_object_lock(self, stripe, object_lock, waiter, wait_timeout):
+        logger.debug("waiting for lock for action {} with {}: {}".format(self.action_name, self.lock_key,
+                                                                         self.object_id))
+        sync_lock_metrics.wait_started(self.action_name)
+        try:
+            if waiter.wait(wait_timeout):
+                return
+            with stripe.lock:
+                # the lock may have been handed over right after the wait timed out
+                if waiter.is_set():
+                    return
+                object_lock.waiters.remove(waiter)
+            self._reject()
+        finally:
+            sync_lock_metrics.wait_ended(self.action_name)
+
+    def _reject(self):
+        logger.error(
+            "lock for action {} with {}: {} is already in use by another thread".format(self.action_name,
+                                                                                        self.lock_key,
+                                                                                        self.object_id))
+        sync_lock_metrics.rejected(self.action_name)
+        raise ObjectAlreadyProcessingError(self.object_id)
 
     def _remove_object_lock(self):
         logger.debug("release lock for action {} with {}: {}".format(self.action_name, self.lock_key, self.object_id))
-        with ids_in_use_lock:
-            _remove_from_ids_in_use(self.lock_key, self.object_id)
+        stripe = _get_lock_stripe(self._object_key)
+        with stripe.lock:
+            object_lock = stripe.object_locks.get(self._object_key)
+            if object_lock is None:
+                logger.error("could not find lock to release for {}: {}".format(self.lock_key, self.object_id))
+                return
+            if object_lock.waiters:
+                # hand the lock to the longest waiting request
+                object_lock.waiters.popleft().set()
+            else:
+                del stripe.object_locks[self._object_key]
+        if self._acquire_time is not None:
+            sync_lock_metrics.released(self.action_name, monotonic() - self._acquire_time)
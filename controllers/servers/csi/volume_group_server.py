@@ -39,7 +39,7 @@ class VolumeGroupControllerServicer(volumegroup_pb2_grpc.ControllerServicer):
                         "volume group was not found. creating a new volume group")
                     volume_group = array_mediator.create_volume_group(volume_group_final_name)
                 else:
-                    logger.debug("volume group found : {}".format(volume_group))
+                    logger.debug("volume group found : %s", volume_group)
 
                     if len(volume_group.volumes) > 0:
                         message = "Volume group {} is not empty".format(volume_group.name)
@@ -21,6 +21,13 @@ class InvalidNodeId(BaseControllerServerException):
         self.message = messages.WRONG_ID_FORMAT_MESSAGE.format("node", node_id)
 
 
+class InvalidStartingToken(BaseControllerServerException):
+
+    def __init__(self, starting_token):
+        super().__init__()
+        self.message = messages.WRONG_ID_FORMAT_MESSAGE.format("starting token", starting_token)
+
+
 class ObjectIdError(BaseControllerServerException):
 
     def __init__(self, object_type, object_id):
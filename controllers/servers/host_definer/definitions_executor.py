@@ -0,0 +1,183 @@
+import heapq
+import itertools
+import os
+from concurrent import futures
+from contextlib import contextmanager
+from threading import Condition, Lock, Thread, local
+from time import monotonic
+
+import controllers.servers.host_definer.messages as messages
+from controllers.array_action.storage_agent import get_max_connections_by_endpoints
+from controllers.common.csi_logger import get_stdout_logger
+from controllers.common.metrics import metrics
+from controllers.servers.host_definer import settings
+
+logger = get_stdout_logger()
+
+
+def get_definitions_workers():
+    workers = os.getenv(settings.DEFINITIONS_WORKERS_ENV_VAR)
+    if not workers:
+        return settings.DEFINITIONS_DEFAULT_WORKERS
+    return int(workers)
+
+
+class _ArraySlots:
+    def __init__(self):
+        self._condition = Condition()
+        self._in_use = 0
+
+    def acquire(self, limit):
+        with self._condition:
+            while self._in_use >= limit:
+                self._condition.wait()
+            self._in_use += 1
+
+    def release(self):
+        with self._condition:
+            self._in_use -= 1
+            self._condition.notify()
+
+
+class DefinitionsExecutor:
+    """
+    Runs the host definitions on a bounded pool of workers.
+
+    Work that is submitted with the key of work that is still queued is not queued again, the caller gets the
+    future of the queued work. Work that is submitted while the work of its key runs may see a change that the
+    running work missed, so it is queued once more after the running work finishes, and later submits of the key
+    get the future of that rerun. The calls to an array are limited to the max connections of its mediator.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._executor = None
+        self._queued = {}
+        self._running_keys = set()
+        self._reruns = {}
+        self._array_slots = {}
+        self._worker_state = local()
+        self._scheduled = []
+        self._scheduled_sequence = itertools.count()
+        self._scheduled_condition = Condition()
+        self._scheduler = None
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+
+    def submit(self, key, function, *args):
+        with self._lock:
+            future = self._queued.get(key)
+            if future is None:
+                future = self._get_executor().submit(self._run, key, function, *args)
+                self._queued[key] = future
+                return future
+            if key not in self._running_keys:
+                logger.debug(messages.DEFINITION_ALREADY_QUEUED.format(key))
+                return future
+            rerun = self._reruns.get(key)
+            if rerun is None:
+                rerun = (futures.Future(), function, args)
+                self._reruns[key] = rerun
+            return rerun[0]
+
+    def submit_after(self, delay_in_seconds, key, function, *args):
+        with self._scheduled_condition:
+            heapq.heappush(self._scheduled, (monotonic() + delay_in_seconds, next(self._scheduled_sequence),
+                                             key, function, args))
+            self._start_scheduler()
+            self._scheduled_condition.notify()
+
+    def run_all(self, tasks):
+        if getattr(self._worker_state, 'is_worker', False):
+            # a worker that waits for other workers can exhaust the pool, so it runs the tasks by itself.
+            for _, function, args in tasks:
+                self._run_safely(function, *args)
+            return
+        tasks_futures = [self.submit(key, function, *args) for key, function, args in tasks]
+        futures.wait(tasks_futures)
+
+    @contextmanager
+    def array_slot(self, endpoints):
+        endpoints_key = tuple(endpoints)
+        with self._lock:
+            array_slots = self._array_slots.setdefault(endpoints_key, _ArraySlots())
+        array_slots.acquire(get_max_connections_by_endpoints(endpoints))
+        try:
+            yield
+        finally:
+            array_slots.release()
+
+    def get_metrics(self):
+        with self._lock:
+            return {
+                'queued': len(self._queued) - len(self._running_keys) + len(self._reruns),
+                'running': self._running,
+                'completed': self._completed,
+                'failed': self._failed,
+            }
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = futures.ThreadPoolExecutor(max_workers=get_definitions_workers(),
+                                                        thread_name_prefix='host-definer-worker')
+        return self._executor
+
+    def _run(self, key, function, *args):
+        with self._lock:
+            self._running_keys.add(key)
+            self._running += 1
+        self._worker_state.is_worker = True
+        succeeded = self._run_safely(function, *args)
+        with self._lock:
+            self._running_keys.discard(key)
+            self._queued.pop(key, None)
+            self._running -= 1
+            self._completed += 1
+            if not succeeded:
+                self._failed += 1
+            rerun = self._reruns.pop(key, None)
+            if rerun is not None:
+                self._submit_rerun(key, *rerun)
+            is_idle = not self._queued and not self._running
+            if is_idle or self._completed % settings.DEFINITIONS_PROGRESS_LOG_INTERVAL == 0:
+                logger.info(messages.DEFINITIONS_PROGRESS.format(
+                    self._completed, self._failed, len(self._queued), self._running))
+
+    def _submit_rerun(self, key, rerun_future, function, args):
+        future = self._get_executor().submit(self._run, key, function, *args)
+        self._queued[key] = future
+        future.add_done_callback(lambda _: rerun_future.set_result(None))
+
+    def _run_safely(self, function, *args):
+        try:
+            function(*args)
+            return True
+        except Exception as ex:
+            logger.exception(messages.DEFINITION_FAILED.format(ex))
+            return False
+
+    def _start_scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = Thread(target=self._submit_scheduled, name='host-definer-scheduler', daemon=True)
+            self._scheduler.start()
+
+    def _submit_scheduled(self):
+        while True:
+            with self._scheduled_condition:
+                while not self._scheduled or self._scheduled[0][0] > monotonic():
+                    timeout = self._scheduled[0][0] - monotonic() if self._scheduled else None
+                    self._scheduled_condition.wait(timeout)
+                _, _, key, function, args = heapq.heappop(self._scheduled)
+            self.submit(key, function, *args)
+
+
+definitions_executor = DefinitionsExecutor()
+
+
+def _collect_definitions_metrics():
+    for metric_name, value in definitions_executor.get_metrics().items():
+        yield 'csi_host_definer_definitions_{}'.format(metric_name), {}, value
+
+
+metrics.add_collector('host_definitions', _collect_definitions_metrics)
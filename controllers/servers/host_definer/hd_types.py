@@ -1,6 +1,7 @@
 from dataclasses import dataclass, field
 from controllers.servers.csi.controller_types import ArrayConnectionInfo
 from controllers.servers.host_definer import utils
+from controllers.servers.topology_index import TopologyIndex
 
 
 @dataclass
@@ -30,6 +31,13 @@ class SecretInfo:
     nodes_with_system_id: dict
     system_ids_topologies: dict
     managed_storage_classes: int = 0
+    _topology_index: TopologyIndex = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def topology_index(self):
+        if self._topology_index is None:
+            self._topology_index = TopologyIndex(self.system_ids_topologies)
+        return self._topology_index
 
 
 @dataclass
@@ -0,0 +1,185 @@
+from collections import defaultdict
+from threading import Event, RLock
+
+from kubernetes.client.rest import ApiException
+from munch import Munch
+
+from controllers.common.csi_logger import get_stdout_logger
+import controllers.servers.host_definer.messages as messages
+from controllers.servers.host_definer import settings
+
+logger = get_stdout_logger()
+
+
+def _get_resource_version(k8s_object):
+    metadata = k8s_object.metadata
+    return getattr(metadata, 'resource_version', None) or getattr(metadata, 'resourceVersion', None)
+
+
+def _get_key(k8s_object):
+    metadata = k8s_object.metadata
+    namespace = getattr(metadata, 'namespace', None)
+    if namespace:
+        return namespace, metadata.name
+    return metadata.name
+
+
+class Informer:
+    """
+    An in-memory store of one kind of kubernetes resources, kept current by a long-lived watch.
+
+    The resources are listed once, and then watched from the last resource version seen, including bookmarks.
+    They are listed again only when the watch resource version expired (410 Gone), and the changes that were
+    missed meanwhile are yielded as watch events.
+    With watch_from_start, the first watch starts from the beginning instead of the listed resource version,
+    so the existing resources are also yielded as ADDED events.
+    The indexers map an index name to a function that returns the index key of a resource.
+    """
+
+    def __init__(self, kind, list_resources, watch_resources, watch_from_start=False, indexers=None):
+        self._kind = kind
+        self._list_resources = list_resources
+        self._watch_resources = watch_resources
+        self._watch_from_start = watch_from_start
+        self._indexers = indexers or {}
+        self._lock = RLock()
+        self._store = {}
+        self._indexes = {index_name: defaultdict(dict) for index_name in self._indexers}
+        self._resource_version = None
+        self._synced = Event()
+
+    def has_synced(self):
+        return self._synced.is_set()
+
+    def get(self, name, namespace=None):
+        key = (namespace, name) if namespace else name
+        with self._lock:
+            return self._store.get(key)
+
+    def list(self):
+        with self._lock:
+            return list(self._store.values())
+
+    def get_by_index(self, index_name, index_key):
+        with self._lock:
+            return list(self._indexes[index_name].get(index_key, {}).values())
+
+    def put(self, k8s_object):
+        """
+        Stores a resource that was just created or changed, before its watch event arrives.
+        """
+        with self._lock:
+            self._put(_get_key(k8s_object), k8s_object)
+
+    def remove(self, name, namespace=None):
+        key = (namespace, name) if namespace else name
+        with self._lock:
+            self._remove(key)
+
+    def watch(self):
+        """
+        Yields the next watch events of the resources, after they are applied to the store.
+        Returns when the watch times out, and the next call resumes from where this one stopped.
+        """
+        if self._resource_version is None:
+            yield from self._resync()
+        try:
+            for watch_event in self._watch_resources(self._resource_version):
+                watch_event = Munch.fromDict(watch_event)
+                if watch_event.type == settings.BOOKMARK_EVENT:
+                    self._resource_version = _get_resource_version(watch_event.object)
+                    continue
+                self._apply(watch_event)
+                yield watch_event
+        except ApiException as ex:
+            if ex.status != 410:
+                raise
+            logger.info(messages.WATCH_RESOURCE_VERSION_EXPIRED.format(self._resource_version, self._kind))
+            self._resource_version = None
+
+    def _apply(self, watch_event):
+        k8s_object = watch_event.object
+        with self._lock:
+            if watch_event.type == settings.DELETED_EVENT:
+                self._remove(_get_key(k8s_object))
+            else:
+                self._put(_get_key(k8s_object), k8s_object)
+        self._resource_version = _get_resource_version(k8s_object) or self._resource_version
+
+    def _put(self, key, k8s_object):
+        self._remove(key)
+        self._store[key] = k8s_object
+        for index_name, get_index_key in self._indexers.items():
+            self._indexes[index_name][get_index_key(k8s_object)][key] = k8s_object
+
+    def _remove(self, key):
+        k8s_object = self._store.pop(key, None)
+        if k8s_object is None:
+            return
+        for index_name, get_index_key in self._indexers.items():
+            index_key = get_index_key(k8s_object)
+            indexed_k8s_objects = self._indexes[index_name][index_key]
+            indexed_k8s_objects.pop(key, None)
+            if not indexed_k8s_objects:
+                del self._indexes[index_name][index_key]
+
+    def _resync(self):
+        logger.info(messages.LIST_RESOURCES_FOR_INFORMER.format(self._kind))
+        k8s_objects_list = self._list_resources()
+        store = {_get_key(k8s_object): k8s_object for k8s_object in Munch.fromDict(k8s_objects_list.items)}
+        with self._lock:
+            is_first_sync = not self.has_synced()
+            missed_watch_events = [] if is_first_sync else self._get_missed_watch_events(store)
+            self._store = {}
+            self._indexes = {index_name: defaultdict(dict) for index_name in self._indexers}
+            for key, k8s_object in store.items():
+                self._put(key, k8s_object)
+        if is_first_sync and self._watch_from_start:
+            self._resource_version = ''
+        else:
+            self._resource_version = _get_resource_version(k8s_objects_list)
+        self._synced.set()
+        return missed_watch_events
+
+    def _get_missed_watch_events(self, store):
+        missed_watch_events = []
+        for key, k8s_object in store.items():
+            stored_k8s_object = self._store.get(key)
+            if stored_k8s_object is None:
+                missed_watch_events.append(Munch(type=settings.ADDED_EVENT, object=k8s_object))
+            elif _get_resource_version(stored_k8s_object) != _get_resource_version(k8s_object):
+                missed_watch_events.append(Munch(type=settings.MODIFIED_EVENT, object=k8s_object))
+        for key, stored_k8s_object in self._store.items():
+            if key not in store:
+                missed_watch_events.append(Munch(type=settings.DELETED_EVENT, object=stored_k8s_object))
+        return missed_watch_events
+
+
+class Informers:
+    """
+    The informers shared by all the watchers, by resource kind.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._informers = {}
+
+    def get_or_create(self, kind, create_informer):
+        with self._lock:
+            if kind not in self._informers:
+                self._informers[kind] = create_informer()
+            return self._informers[kind]
+
+    def get_synced(self, kind):
+        with self._lock:
+            informer = self._informers.get(kind)
+        if informer and informer.has_synced():
+            return informer
+        return None
+
+    def clear(self):
+        with self._lock:
+            self._informers.clear()
+
+
+informers = Informers()
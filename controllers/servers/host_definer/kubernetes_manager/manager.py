@@ -1,8 +1,9 @@
 import ast
 import datetime
 import base64
+from functools import partial
 
-from kubernetes import client, config, dynamic
+from kubernetes import client, config, dynamic, watch
 from kubernetes.client import api_client
 from kubernetes.client.rest import ApiException
 
@@ -12,6 +13,7 @@ from controllers.servers.host_definer import settings
 import controllers.common.settings as common_settings
 from controllers.servers.host_definer.hd_types import (
     CsiNodeInfo, PodInfo, NodeInfo, StorageClassInfo, HostDefinitionInfo)
+from controllers.servers.host_definer.kubernetes_manager.informer import Informer, informers
 
 logger = get_stdout_logger()
 
@@ -41,6 +43,50 @@ class KubernetesManager():
         return self.dynamic_client.resources.get(api_version=settings.CSI_IBM_API_VERSION,
                                                  kind=settings.HOST_DEFINITION_KIND)
 
+    def _get_informer(self, kind, list_resources, watch_resources, **informer_options):
+        return informers.get_or_create(
+            kind, lambda: Informer(kind, list_resources, watch_resources, **informer_options))
+
+    def _get_nodes_informer(self):
+        return self._get_informer(settings.NODE_KIND, self.core_api.list_node,
+                                  partial(self._watch_core_resources, self.core_api.list_node))
+
+    def _get_secrets_informer(self):
+        return self._get_informer(settings.SECRET_KIND, self.core_api.list_secret_for_all_namespaces,
+                                  partial(self._watch_core_resources, self.core_api.list_secret_for_all_namespaces))
+
+    def _get_storage_classes_informer(self):
+        return self._get_informer(settings.STORAGE_CLASS_KIND, self.storage_api.list_storage_class,
+                                  partial(self._watch_core_resources, self.storage_api.list_storage_class))
+
+    def _get_csi_nodes_informer(self):
+        return self._get_informer(settings.CSINODE_KIND, self.csi_nodes_api.get,
+                                  partial(self._watch_dynamic_resources, self.csi_nodes_api))
+
+    def _get_host_definitions_informer(self):
+        # the host definitions are watched from the start, so the pending ones are handled on startup
+        return self._get_informer(
+            settings.HOST_DEFINITION_KIND, self.host_definitions_api.get,
+            partial(self._watch_dynamic_resources, self.host_definitions_api), watch_from_start=True,
+            indexers={settings.HOST_DEFINITION_NODE_INDEX: self._get_host_definition_node_index_key,
+                      settings.HOST_DEFINITION_NODE_AND_SECRET_INDEX:
+                          self._get_host_definition_node_and_secret_index_key})
+
+    def _get_host_definition_node_index_key(self, k8s_host_definition):
+        return self._get_attr_from_host_definition(k8s_host_definition, settings.NODE_NAME_FIELD)
+
+    def _get_host_definition_node_and_secret_index_key(self, k8s_host_definition):
+        return (self._get_attr_from_host_definition(k8s_host_definition, settings.NODE_NAME_FIELD),
+                self._get_attr_from_host_definition(k8s_host_definition, settings.SECRET_NAME_FIELD),
+                self._get_attr_from_host_definition(k8s_host_definition, settings.SECRET_NAMESPACE_FIELD))
+
+    def _watch_core_resources(self, list_resources, resource_version):
+        return watch.Watch().stream(list_resources, resource_version=resource_version,
+                                    timeout_seconds=settings.WATCH_TIMEOUT_IN_SECONDS, allow_watch_bookmarks=True)
+
+    def _watch_dynamic_resources(self, resources_api, resource_version):
+        return resources_api.watch(resource_version=resource_version, timeout=settings.WATCH_TIMEOUT_IN_SECONDS)
+
     def _get_csi_nodes_info_with_driver(self):
         csi_nodes_info_with_driver = []
         k8s_csi_nodes = self._get_k8s_csi_nodes()
@@ -58,6 +104,9 @@ class KubernetesManager():
             return []
 
     def _get_nodes_info(self):
+        nodes_informer = informers.get_synced(settings.NODE_KIND)
+        if nodes_informer:
+            return [self._generate_node_info(k8s_node) for k8s_node in nodes_informer.list()]
         try:
             nodes_info = []
             for k8s_node in self.core_api.list_node().items:
@@ -95,6 +144,13 @@ class KubernetesManager():
         return False
 
     def _get_csi_node_info(self, node_name):
+        csi_nodes_informer = informers.get_synced(settings.CSINODE_KIND)
+        if csi_nodes_informer:
+            k8s_csi_node = csi_nodes_informer.get(node_name)
+            if k8s_csi_node:
+                return self._generate_csi_node_info(k8s_csi_node)
+            logger.error(messages.CSI_NODE_DOES_NOT_EXIST.format(node_name))
+            return CsiNodeInfo()
         try:
             k8s_csi_node = self.csi_nodes_api.get(name=node_name)
             return self._generate_csi_node_info(k8s_csi_node)
@@ -119,13 +175,20 @@ class KubernetesManager():
         return ''
 
     def _get_matching_host_definition_info(self, node_name, secret_name, secret_namespace):
-        k8s_host_definitions = self._get_k8s_host_definitions()
+        k8s_host_definitions = self._get_indexed_k8s_host_definitions(
+            settings.HOST_DEFINITION_NODE_AND_SECRET_INDEX, (node_name, secret_name, secret_namespace))
         for k8s_host_definition in k8s_host_definitions:
             host_definition_info = self._generate_host_definition_info(k8s_host_definition)
             if self._is_host_definition_matches(host_definition_info, node_name, secret_name, secret_namespace):
                 return host_definition_info
         return None
 
+    def _get_indexed_k8s_host_definitions(self, index_name, index_key):
+        host_definitions_informer = informers.get_synced(settings.HOST_DEFINITION_KIND)
+        if host_definitions_informer:
+            return host_definitions_informer.get_by_index(index_name, index_key)
+        return self._get_k8s_host_definitions()
+
     def _get_k8s_host_definitions(self):
         try:
             return self.host_definitions_api.get().items
@@ -176,6 +239,7 @@ class KubernetesManager():
         try:
             k8s_host_definition = self.host_definitions_api.create(body=host_definition_manifest)
             logger.info(messages.CREATED_HOST_DEFINITION.format(k8s_host_definition.metadata.name))
+            self._put_in_host_definitions_informer(k8s_host_definition)
             self._add_finalizer(k8s_host_definition.metadata.name)
             return self._generate_host_definition_info(k8s_host_definition)
         except ApiException as ex:
@@ -183,6 +247,11 @@ class KubernetesManager():
                 logger.error(messages.FAILED_TO_CREATE_HOST_DEFINITION.format(
                     host_definition_manifest[settings.METADATA][common_settings.NAME_FIELD], ex.body))
 
+    def _put_in_host_definitions_informer(self, k8s_host_definition):
+        host_definitions_informer = informers.get_synced(settings.HOST_DEFINITION_KIND)
+        if host_definitions_informer:
+            host_definitions_informer.put(k8s_host_definition)
+
     def _add_finalizer(self, host_definition_name):
         logger.info(messages.ADD_FINALIZER_TO_HOST_DEFINITION.format(host_definition_name))
         self._update_finalizer(host_definition_name, [settings.CSI_IBM_FINALIZER, ])
@@ -236,6 +305,7 @@ class KubernetesManager():
             remove_finalizer_status_code = self._remove_finalizer(host_definition_name)
             if remove_finalizer_status_code == 200:
                 self.host_definitions_api.delete(name=host_definition_name, body={})
+                self._remove_from_host_definitions_informer(host_definition_name)
             else:
                 logger.error(messages.FAILED_TO_DELETE_HOST_DEFINITION.format(
                     host_definition_name, messages.FAILED_TO_REMOVE_FINALIZER))
@@ -243,6 +313,11 @@ class KubernetesManager():
             if ex.status != 404:
                 logger.error(messages.FAILED_TO_DELETE_HOST_DEFINITION.format(host_definition_name, ex.body))
 
+    def _remove_from_host_definitions_informer(self, host_definition_name):
+        host_definitions_informer = informers.get_synced(settings.HOST_DEFINITION_KIND)
+        if host_definitions_informer:
+            host_definitions_informer.remove(host_definition_name)
+
     def _remove_finalizer(self, host_definition_name):
         logger.info(messages.REMOVE_FINALIZER_TO_HOST_DEFINITION.format(host_definition_name))
         return self._update_finalizer(host_definition_name, [])
@@ -328,6 +403,9 @@ class KubernetesManager():
         return NodeInfo('', {})
 
     def _read_node(self, node_name):
+        nodes_informer = informers.get_synced(settings.NODE_KIND)
+        if nodes_informer:
+            return nodes_informer.get(node_name)
         try:
             logger.info(messages.READ_NODE.format(node_name))
             return self.core_api.read_node(name=node_name)
@@ -1,7 +1,9 @@
+from controllers.common.metrics import start_metrics_server
 from controllers.servers.host_definer.host_definer_manager import HostDefinerManager
 
 
 def main():
+    start_metrics_server()
     host_definition_manager = HostDefinerManager()
     host_definition_manager.start_host_definition()
 
@@ -75,3 +75,8 @@ DEFINE_NODE_ON_SECRET = 'Defining node {} on secret {} in namespace {}'
 GENERATE_REQUEST_FOR_NODE = 'Generating define request for node {}'
 COULD_NOT_CHANGE_HOST_PROTOCOL_USING_CHHOST = "Could not change host [{}] protocol using chhost command, "\
     "changing the host protocol by deleting it and creating it again"
+LIST_RESOURCES_FOR_INFORMER = 'Listing {} resources for the informer'
+WATCH_RESOURCE_VERSION_EXPIRED = 'Resource version {} of {} watch expired, listing the resources again'
+DEFINITION_ALREADY_QUEUED = 'Definition {} is already queued'
+DEFINITION_FAILED = 'Definition failed: {}'
+DEFINITIONS_PROGRESS = 'Definitions progress: {} completed, {} failed, {} queued, {} running'
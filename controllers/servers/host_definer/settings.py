@@ -4,6 +4,9 @@ import controllers.array_action.settings as array_config
 STORAGE_API_VERSION = 'storage.k8s.io/v1'
 CSI_PARAMETER_PREFIX = "csi.storage.k8s.io/"
 CSINODE_KIND = 'CSINode'
+NODE_KIND = 'Node'
+SECRET_KIND = 'Secret'
+STORAGE_CLASS_KIND = 'StorageClass'
 CSI_IBM_API_VERSION = 'csi.ibm.com/v1'
 HOST_DEFINITION_KIND = 'HostDefinition'
 SECRET_NAME_SUFFIX = 'secret-name'
@@ -11,6 +14,10 @@ CSI_PROVISIONER_NAME = 'block.csi.ibm.com'
 ADDED_EVENT = 'ADDED'
 DELETED_EVENT = 'DELETED'
 MODIFIED_EVENT = 'MODIFIED'
+BOOKMARK_EVENT = 'BOOKMARK'
+WATCH_TIMEOUT_IN_SECONDS = 300
+HOST_DEFINITION_NODE_INDEX = 'node'
+HOST_DEFINITION_NODE_AND_SECRET_INDEX = 'node_and_secret'
 PENDING_PREFIX = 'Pending'
 PENDING_CREATION_PHASE = 'PendingCreation'
 PENDING_DELETION_PHASE = 'PendingDeletion'
@@ -58,6 +65,9 @@ CSI_IBM_FINALIZER = HOST_DEFINITION_PLURAL + '.' + CSI_IBM_GROUP
 HOST_DEFINITION_PENDING_RETRIES = 5
 HOST_DEFINITION_PENDING_EXPONENTIAL_BACKOFF_IN_SECONDS = 3
 HOST_DEFINITION_PENDING_DELAY_IN_SECONDS = 3
+DEFINITIONS_WORKERS_ENV_VAR = 'DEFINITIONS_WORKERS'
+DEFINITIONS_DEFAULT_WORKERS = 10
+DEFINITIONS_PROGRESS_LOG_INTERVAL = 50
 SECRET_CONFIG_FIELD = 'config'
 TOPOLOGY_PREFIXES = ['topology.block.csi.ibm.com']
 POSSIBLE_NUMBER_OF_IO_GROUP = 4
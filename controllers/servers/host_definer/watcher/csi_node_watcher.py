@@ -1,7 +1,7 @@
 import time
-from threading import Thread
 
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.servers.host_definer.definitions_executor import definitions_executor
 from controllers.servers.host_definer.watcher.watcher_helper import Watcher, NODES, MANAGED_SECRETS
 import controllers.servers.host_definer.messages as messages
 from controllers.servers.host_definer import settings
@@ -18,11 +18,9 @@ class CsiNodeWatcher(Watcher):
                 self._add_node_to_nodes(csi_node_info)
 
     def watch_csi_nodes_resources(self):
+        csi_nodes_informer = self._get_csi_nodes_informer()
         while self._loop_forever():
-            resource_version = self._get_k8s_object_resource_version(self.csi_nodes_api.get())
-            stream = self.csi_nodes_api.watch(resource_version=resource_version, timeout=5)
-            for watch_event in stream:
-                watch_event = self._munch(watch_event)
+            for watch_event in csi_nodes_informer.watch():
                 csi_node_info = self._generate_csi_node_info(watch_event.object)
                 if (watch_event.type == settings.DELETED_EVENT) and (csi_node_info.name in NODES):
                     self._handle_deleted_csi_node_pod(csi_node_info)
@@ -42,8 +40,8 @@ class CsiNodeWatcher(Watcher):
 
     def _handle_deleted_csi_node_pod(self, csi_node_info):
         if self._is_node_has_manage_node_label(csi_node_info.name):
-            remove_host_thread = Thread(target=self._undefine_host_when_node_pod_is_deleted, args=(csi_node_info,))
-            remove_host_thread.start()
+            definitions_executor.submit((settings.CSINODE_KIND, csi_node_info.name),
+                                        self._undefine_host_when_node_pod_is_deleted, csi_node_info)
 
     def _undefine_host_when_node_pod_is_deleted(self, csi_node_info):
         node_name = csi_node_info.name
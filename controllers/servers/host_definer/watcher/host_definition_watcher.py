@@ -1,8 +1,6 @@
-from threading import Thread
-from time import sleep
-
 import controllers.servers.host_definer.messages as messages
 from controllers.common.csi_logger import get_stdout_logger
+from controllers.servers.host_definer.definitions_executor import definitions_executor
 from controllers.servers.host_definer.watcher.watcher_helper import Watcher
 from controllers.servers.host_definer.hd_types import DefineHostResponse
 from controllers.servers.host_definer import settings
@@ -14,46 +12,45 @@ logger = get_stdout_logger()
 class HostDefinitionWatcher(Watcher):
 
     def watch_host_definitions_resources(self):
-        self._watch_host_definition_with_timeout('')
+        host_definitions_informer = self._get_host_definitions_informer()
         while self._loop_forever():
-            resource_version = self._get_k8s_object_resource_version(self.host_definitions_api.get())
-            self._watch_host_definition_with_timeout(resource_version)
-
-    def _watch_host_definition_with_timeout(self, resource_version, timeout=5):
-        stream = self.host_definitions_api.watch(resource_version=resource_version, timeout=timeout)
-        for watch_event in stream:
-            watch_event = self._munch(watch_event)
-            host_definition_info = self._generate_host_definition_info(watch_event.object)
-            if self._is_host_definition_in_pending_phase(host_definition_info.phase) and \
-                    watch_event.type != settings.DELETED_EVENT:
-                self._define_host_definition_after_pending_state(host_definition_info)
+            for watch_event in host_definitions_informer.watch():
+                host_definition_info = self._generate_host_definition_info(watch_event.object)
+                if self._is_host_definition_in_pending_phase(host_definition_info.phase) and \
+                        watch_event.type != settings.DELETED_EVENT:
+                    self._define_host_definition_after_pending_state(host_definition_info)
 
     def _is_host_definition_in_pending_phase(self, phase):
         return phase.startswith(settings.PENDING_PREFIX)
 
     def _define_host_definition_after_pending_state(self, host_definition_info):
         logger.info(messages.FOUND_HOST_DEFINITION_IN_PENDING_STATE.format(host_definition_info.name))
-        remove_host_thread = Thread(target=self._define_host_using_exponential_backoff,
-                                    args=(host_definition_info, ))
-        remove_host_thread.start()
-
-    def _define_host_using_exponential_backoff(self, host_definition_info):
-        retries = settings.HOST_DEFINITION_PENDING_RETRIES
-        backoff_in_seconds = settings.HOST_DEFINITION_PENDING_EXPONENTIAL_BACKOFF_IN_SECONDS
-        delay_in_seconds = settings.HOST_DEFINITION_PENDING_DELAY_IN_SECONDS
-        while retries > 0:
-            logger.info(messages.VERIFY_HOST_DEFINITION_USING_EXPONENTIAL_BACKOFF.format(
-                host_definition_info.name, retries))
-            if self._is_host_definition_not_pending(host_definition_info) and \
-                    retries != settings.HOST_DEFINITION_PENDING_RETRIES:
-                logger.info(messages.HOST_DEFINITION_IS_NOT_PENDING.format(host_definition_info.name))
-                return
-            self._handle_pending_host_definition(host_definition_info)
-            retries -= 1
-            delay_in_seconds *= backoff_in_seconds
-            sleep(delay_in_seconds)
-
-        self._set_host_definition_phase_to_error(host_definition_info)
+        definitions_executor.submit(self._get_pending_host_definition_key(host_definition_info),
+                                    self._define_host_using_exponential_backoff, host_definition_info,
+                                    settings.HOST_DEFINITION_PENDING_RETRIES,
+                                    settings.HOST_DEFINITION_PENDING_DELAY_IN_SECONDS)
+
+    def _get_pending_host_definition_key(self, host_definition_info):
+        return (settings.HOST_DEFINITION_KIND, host_definition_info.name)
+
+    def _define_host_using_exponential_backoff(self, host_definition_info, retries, delay_in_seconds):
+        logger.info(messages.VERIFY_HOST_DEFINITION_USING_EXPONENTIAL_BACKOFF.format(
+            host_definition_info.name, retries))
+        if self._is_host_definition_not_pending(host_definition_info) and \
+                retries != settings.HOST_DEFINITION_PENDING_RETRIES:
+            logger.info(messages.HOST_DEFINITION_IS_NOT_PENDING.format(host_definition_info.name))
+            return
+        self._handle_pending_host_definition(host_definition_info)
+        retries -= 1
+        delay_in_seconds *= settings.HOST_DEFINITION_PENDING_EXPONENTIAL_BACKOFF_IN_SECONDS
+        # the retry is scheduled instead of slept on, so the waiting does not hold a worker.
+        key = self._get_pending_host_definition_key(host_definition_info)
+        if retries > 0:
+            definitions_executor.submit_after(delay_in_seconds, key, self._define_host_using_exponential_backoff,
+                                              host_definition_info, retries, delay_in_seconds)
+        else:
+            definitions_executor.submit_after(delay_in_seconds, key, self._set_host_definition_phase_to_error,
+                                              host_definition_info)
 
     def _is_host_definition_not_pending(self, host_definition_info):
         current_host_definition_info_on_cluster = self._get_matching_host_definition_info(
@@ -1,7 +1,4 @@
-from kubernetes import watch
-
 from controllers.common.csi_logger import get_stdout_logger
-from controllers.servers.utils import is_topology_match
 from controllers.servers.host_definer.watcher.watcher_helper import NODES, Watcher, MANAGED_SECRETS
 from controllers.servers.host_definer import settings
 from controllers.servers.host_definer import utils
@@ -31,11 +28,9 @@ class NodeWatcher(Watcher):
             self._is_node_has_host_definitions(csi_node_info.name) and not csi_node_info.node_id
 
     def watch_nodes_resources(self):
+        nodes_informer = self._get_nodes_informer()
         while self._loop_forever():
-            resource_version = self._get_k8s_object_resource_version(self.core_api.list_node())
-            stream = watch.Watch().stream(self.core_api.list_node, resource_version=resource_version, timeout_seconds=5)
-            for watch_event in stream:
-                watch_event = self._munch(watch_event)
+            for watch_event in nodes_informer.watch():
                 node_name = watch_event.object.metadata.name
                 csi_node_info = self._get_csi_node_info(node_name)
                 node_info = self._generate_node_info(watch_event.object)
@@ -86,31 +81,27 @@ class NodeWatcher(Watcher):
                 continue
             if self._is_node_should_managed_on_secret_info(node_info.name, managed_secret_info):
                 self._remove_node_if_topology_not_match(node_info, index, managed_secret_info)
-            elif self._is_node_in_system_ids_topologies(managed_secret_info.system_ids_topologies, node_info.labels):
+            elif self._is_node_in_system_ids_topologies(managed_secret_info.topology_index, node_info.labels):
                 self._define_host_with_new_topology(node_info, index, managed_secret_info)
 
     def _define_host_with_new_topology(self, node_info, index, managed_secret_info):
         node_name = node_info.name
-        system_id = self._get_system_id_for_node_labels(
-            managed_secret_info.system_ids_topologies, node_info.labels)
+        system_id = self._get_system_id_for_node_labels(managed_secret_info.topology_index, node_info.labels)
         managed_secret_info.nodes_with_system_id[node_name] = system_id
         MANAGED_SECRETS[index] = managed_secret_info
         self._define_host_on_all_storages(node_name)
 
     def _remove_node_if_topology_not_match(self, node_info, index, managed_secret_info):
-        if not self._is_node_in_system_ids_topologies(managed_secret_info.system_ids_topologies, node_info.labels):
+        if not self._is_node_in_system_ids_topologies(managed_secret_info.topology_index, node_info.labels):
             managed_secret_info.nodes_with_system_id.pop(node_info.name, None)
             MANAGED_SECRETS[index] = managed_secret_info
 
-    def _is_node_in_system_ids_topologies(self, system_ids_topologies, node_labels):
-        return self._get_system_id_for_node_labels(system_ids_topologies, node_labels) != ''
+    def _is_node_in_system_ids_topologies(self, topology_index, node_labels):
+        return self._get_system_id_for_node_labels(topology_index, node_labels) != ''
 
-    def _get_system_id_for_node_labels(self, system_ids_topologies, node_labels):
+    def _get_system_id_for_node_labels(self, topology_index, node_labels):
         topology_labels = self._get_topology_labels(node_labels)
-        for system_id, system_topologies in system_ids_topologies.items():
-            if is_topology_match(system_topologies, topology_labels):
-                return system_id
-        return ''
+        return topology_index.get_system_id(topology_labels) or ''
 
     def _update_io_group(self, node_info):
         io_group = utils.generate_io_group_from_labels(node_info.labels)
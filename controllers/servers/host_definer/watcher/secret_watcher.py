@@ -1,5 +1,3 @@
-from kubernetes import watch
-
 import controllers.servers.host_definer.messages as messages
 from controllers.common.csi_logger import get_stdout_logger
 from controllers.servers.host_definer.watcher.watcher_helper import Watcher, MANAGED_SECRETS
@@ -12,12 +10,9 @@ logger = get_stdout_logger()
 class SecretWatcher(Watcher):
 
     def watch_secret_resources(self):
+        secrets_informer = self._get_secrets_informer()
         while self._loop_forever():
-            resource_version = self._get_k8s_object_resource_version(self.core_api.list_secret_for_all_namespaces())
-            stream = watch.Watch().stream(self.core_api.list_secret_for_all_namespaces,
-                                          resource_version=resource_version, timeout_seconds=5)
-            for watch_event in stream:
-                watch_event = self._munch(watch_event)
+            for watch_event in secrets_informer.watch():
                 secret_info = self._generate_k8s_secret_to_secret_info(watch_event.object)
                 if self._is_secret_managed(secret_info):
                     secret_data = self._change_decode_base64_secret_config(watch_event.object.data)
@@ -1,5 +1,4 @@
 import json
-from kubernetes import watch
 
 import controllers.servers.host_definer.messages as messages
 from controllers.common.csi_logger import get_stdout_logger
@@ -19,12 +18,9 @@ class StorageClassWatcher(Watcher):
             self._handle_added_watch_event(secrets_info, storage_class_info.name)
 
     def watch_storage_class_resources(self):
+        storage_classes_informer = self._get_storage_classes_informer()
         while self._loop_forever():
-            resource_version = self._get_k8s_object_resource_version(self.storage_api.list_storage_class())
-            stream = watch.Watch().stream(self.storage_api.list_storage_class,
-                                          resource_version=resource_version, timeout_seconds=5)
-            for watch_event in stream:
-                watch_event = self._munch(watch_event)
+            for watch_event in storage_classes_informer.watch():
                 storage_class_info = self._generate_storage_class_info(watch_event.object)
                 secrets_info = self._get_secrets_info_from_storage_class_with_driver_provisioner(storage_class_info)
                 if watch_event.type == settings.ADDED_EVENT:
@@ -1,7 +1,7 @@
 import os
 import random
 import string
-from munch import Munch
+from dataclasses import replace
 import json
 
 from controllers.common.csi_logger import get_stdout_logger
@@ -9,7 +9,9 @@ from controllers.servers.settings import SECRET_SUPPORTED_TOPOLOGIES_PARAMETER
 from controllers.servers.utils import (
     validate_secrets, get_array_connection_info_from_secrets, get_system_info_for_topologies)
 from controllers.servers.errors import ValidationException
+from controllers.servers.topology_index import TopologyIndex
 import controllers.servers.host_definer.messages as messages
+from controllers.servers.host_definer.definitions_executor import definitions_executor
 from controllers.servers.host_definer.kubernetes_manager.manager import KubernetesManager
 from controllers.servers.host_definer import settings
 import controllers.common.settings as common_settings
@@ -29,11 +31,10 @@ class Watcher(KubernetesManager):
 
     def _define_host_on_all_storages(self, node_name):
         logger.info(messages.DEFINE_NODE_ON_ALL_MANAGED_SECRETS.format(node_name))
-        for secret_info in MANAGED_SECRETS:
-            if secret_info.managed_storage_classes == 0:
-                continue
-            host_definition_info = self._get_host_definition_info_from_secret_and_node_name(node_name, secret_info)
-            self._create_definition(host_definition_info)
+        host_definitions_info = [self._get_host_definition_info_from_secret_and_node_name(node_name, secret_info)
+                                 for secret_info in list(MANAGED_SECRETS)
+                                 if secret_info.managed_storage_classes != 0]
+        self._create_definitions(host_definitions_info)
 
     def _get_host_definition_info_from_secret_and_node_name(self, node_name, secret_info):
         host_definition_info = self._get_host_definition_info_from_secret(secret_info)
@@ -47,9 +48,9 @@ class Watcher(KubernetesManager):
         return host_definition_info
 
     def _define_nodes(self, host_definition_info):
-        for node_name, _ in NODES.items():
-            host_definition_info = self._add_name_to_host_definition_info(node_name, host_definition_info)
-            self._create_definition(host_definition_info)
+        host_definitions_info = [self._add_name_to_host_definition_info(node_name, replace(host_definition_info))
+                                 for node_name in list(NODES)]
+        self._create_definitions(host_definitions_info)
 
     def _add_name_to_host_definition_info(self, node_name, host_definition_info):
         host_definition_info.node_name = node_name
@@ -57,6 +58,14 @@ class Watcher(KubernetesManager):
         host_definition_info.name = self._get_host_definition_name(node_name)
         return host_definition_info
 
+    def _create_definitions(self, host_definitions_info):
+        definitions_executor.run_all([(self._get_definition_key(host_definition_info), self._create_definition,
+                                       (host_definition_info,)) for host_definition_info in host_definitions_info])
+
+    def _get_definition_key(self, host_definition_info):
+        return (host_definition_info.node_name, host_definition_info.secret_name,
+                host_definition_info.secret_namespace)
+
     def _create_definition(self, host_definition_info):
         if not self._is_node_should_be_managed_on_secret(
                 host_definition_info.node_name, host_definition_info.secret_name,
@@ -235,7 +244,8 @@ class Watcher(KubernetesManager):
             response.error_message = messages.FAILED_TO_GET_SECRET_EVENT.format(
                 host_definition_info.secret_name, host_definition_info.secret_namespace)
             return response
-        return define_function(request)
+        with definitions_executor.array_slot(request.array_connection_info.array_addresses):
+            return define_function(request)
 
     def _get_request_from_host_definition(self, host_definition_info):
         node_name = host_definition_info.node_name
@@ -298,16 +308,14 @@ class Watcher(KubernetesManager):
         return secret_data
 
     def _decode_array_connectivity_info(self, array_connection_info):
-        array_connection_info.array_addresses = self._decode_list_base64_to_list_string(
-            array_connection_info.array_addresses)
-        array_connection_info.user = self._decode_base64_to_string(array_connection_info.user)
-        array_connection_info.password = self._decode_base64_to_string(array_connection_info.password)
-        return array_connection_info
+        return replace(
+            array_connection_info,
+            array_addresses=self._decode_list_base64_to_list_string(array_connection_info.array_addresses),
+            user=self._decode_base64_to_string(array_connection_info.user),
+            password=self._decode_base64_to_string(array_connection_info.password))
 
     def _decode_list_base64_to_list_string(self, list_with_base64):
-        for index, base64_content in enumerate(list_with_base64):
-            list_with_base64[index] = self._decode_base64_to_string(base64_content)
-        return list_with_base64
+        return [self._decode_base64_to_string(base64_content) for base64_content in list_with_base64]
 
     def _get_node_id_by_node(self, host_definition_info):
         try:
@@ -362,16 +370,13 @@ class Watcher(KubernetesManager):
 
     def _get_all_node_host_definitions_info(self, node_name):
         node_host_definitions_info = []
-        k8s_host_definitions = self._get_k8s_host_definitions()
+        k8s_host_definitions = self._get_indexed_k8s_host_definitions(settings.HOST_DEFINITION_NODE_INDEX, node_name)
         for k8s_host_definition in k8s_host_definitions:
             host_definition_info = self._generate_host_definition_info(k8s_host_definition)
             if host_definition_info.node_name == node_name:
                 node_host_definitions_info.append(host_definition_info)
         return node_host_definitions_info
 
-    def _munch(self, watch_event):
-        return Munch.fromDict(watch_event)
-
     def _loop_forever(self):
         return True
 
@@ -393,15 +398,17 @@ class Watcher(KubernetesManager):
     def _generate_nodes_with_system_id(self, secret_data):
         nodes_with_system_id = {}
         secret_config = self._get_secret_secret_config(secret_data)
+        topology_index = TopologyIndex.from_secrets_config(secret_config)
         nodes_info = self._get_nodes_info()
         for node_info in nodes_info:
-            nodes_with_system_id[node_info.name] = self._get_system_id_for_node(node_info, secret_config)
+            nodes_with_system_id[node_info.name] = self._get_system_id_for_node(node_info, secret_config,
+                                                                                topology_index)
         return nodes_with_system_id
 
-    def _get_system_id_for_node(self, node_info, secret_config):
+    def _get_system_id_for_node(self, node_info, secret_config, topology_index=None):
         node_topology_labels = self._get_topology_labels(node_info.labels)
         try:
-            _, system_id = get_system_info_for_topologies(secret_config, node_topology_labels)
+            _, system_id = get_system_info_for_topologies(secret_config, node_topology_labels, topology_index)
         except ValidationException:
             return ''
         return system_id
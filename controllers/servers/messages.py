@@ -25,9 +25,13 @@ PARAMETER_SHOULD_NOT_BE_EMPTY_MESSAGE = '{} should not be empty'
 VOLUME_ID_SHOULD_NOT_BE_EMPTY_MESSAGE = 'volume id should not be empty'
 SNAPSHOT_ID_SHOULD_NOT_BE_EMPTY_MESSAGE = 'snapshot id should not be empty'
 SIZE_SHOULD_NOT_BE_NEGATIVE_MESSAGE = 'size should not be negative'
+MAX_ENTRIES_SHOULD_NOT_BE_NEGATIVE_MESSAGE = 'max entries should not be negative'
 NO_CAPACITY_RANGE_MESSAGE = 'no capacity range set'
 POOL_IS_MISSING_MESSAGE = 'pool parameter is missing.'
 POOL_SHOULD_NOT_BE_EMPTY_MESSAGE = 'pool should not be empty'
+CAPACITY_IS_UNKNOWN_MESSAGE = 'the available capacity of pool {} is not known yet'
+NO_MANAGED_STORAGE_SYSTEMS_MESSAGE = 'no storage system is known yet, its secret was not seen by a request'
+LISTED_VOLUME_CONDITION_MESSAGE = 'volume exists on the storage system'
 WRONG_FORMAT_MESSAGE = '{} has wrong format'
 READONLY_NOT_SUPPORTED_MESSAGE = 'readonly parameter is not supported'
 VOLUME_SOURCE_ID_IS_MISSING = 'volume source {0} id is missing'
@@ -54,6 +54,7 @@ PARAMETERS_TOPOLOGY_DELIMITER = "/"
 PARAMETERS_ARRAY_ADDRESSES_DELIMITER = ","
 
 REQUEST_ACCESSIBILITY_REQUIREMENTS_FIELD = "accessibility_requirements"
+REQUEST_ACCESSIBLE_TOPOLOGY_FIELD = "accessible_topology"
 LOCK_REPLICATION_REQUEST_ATTR = "replication_source"
 
 SNAPSHOT_TYPE_NAME = "snapshot"
@@ -64,6 +65,20 @@ VOLUME_SOURCE_ID_FIELDS = {SNAPSHOT_TYPE_NAME: 'snapshot_id', VOLUME_TYPE_NAME:
 MINIMUM_VOLUME_ID_PARTS = 2
 MAXIMUM_VOLUME_ID_PARTS = 3
 
+LIST_VOLUMES_DEFAULT_MAX_ENTRIES = 500
+LIST_VOLUMES_TOKEN_DELIMITER = "/"
+LIST_VOLUMES_NAME_PREFIX_ENV_VAR = "LIST_VOLUMES_NAME_PREFIX"
+
+SYNC_LOCK_WAIT_TIMEOUT_ENV_VAR = "SYNC_LOCK_WAIT_TIMEOUT"
+SYNC_LOCK_STRIPES = 64
+
+PARSED_REQUESTS_CACHE_SIZE = 256
+
+MANAGED_SECRETS_MAX_SIZE = 64
+
+IDENTITY_METHOD_NAMES = ('GetPluginInfo', 'GetPluginCapabilities', 'Probe')
+IDENTITY_EXECUTOR_WORKERS = 2
+
 ENABLE_CALL_HOME_ENV_VAR = 'ENABLE_CALL_HOME'
 ODF_VERSION_FOR_CALL_HOME_ENV_VAR = 'ODF_VERSION_FOR_CALL_HOME'
 UNIQUE_KEY_KEY = 'uniquekey'
@@ -0,0 +1,47 @@
+from controllers.common.csi_logger import get_stdout_logger
+from controllers.servers.settings import SECRET_SUPPORTED_TOPOLOGIES_PARAMETER
+
+logger = get_stdout_logger()
+
+
+class TopologyIndex:
+    """
+    The systems of a secret config by their supported topologies.
+
+    The topologies are grouped by the names of their labels, and every group maps the label values to the system,
+    so finding the system of a node costs a lookup per group instead of a comparison per system and topology.
+    When several systems match, the first one in the config wins, as in a linear scan.
+    """
+
+    def __init__(self, system_ids_topologies):
+        self._systems_by_label_names = {}
+        for priority, (system_id, system_topologies) in enumerate(system_ids_topologies.items()):
+            for topology in system_topologies or ():
+                label_names = tuple(sorted(topology))
+                label_values = tuple(topology[label_name] for label_name in label_names)
+                systems_by_label_values = self._systems_by_label_names.setdefault(label_names, {})
+                systems_by_label_values.setdefault(label_values, (priority, system_id))
+
+    @classmethod
+    def from_secrets_config(cls, secrets_config):
+        return cls({system_id: system_info.get(SECRET_SUPPORTED_TOPOLOGIES_PARAMETER)
+                    for system_id, system_info in secrets_config.items()})
+
+    def get_system_id(self, node_topologies):
+        """
+        Args:
+            node_topologies : topology labels of the node
+        Returns:
+            id of the first system with a topology that all its labels are in node_topologies, or None
+        """
+        found_system = None
+        for label_names, systems_by_label_values in self._systems_by_label_names.items():
+            try:
+                label_values = tuple(node_topologies[label_name] for label_name in label_names)
+            except KeyError:
+                continue
+            system = systems_by_label_values.get(label_values)
+            if system and (found_system is None or system < found_system):
+                found_system = system
+        logger.debug("system for topologies {} is {}".format(node_topologies, found_system))
+        return found_system[1] if found_system else None
@@ -1,8 +1,10 @@
 from os import getenv
 import json
 import re
+from collections import OrderedDict
 from hashlib import sha256
 from operator import eq
+from threading import Lock
 
 import base58
 from csi_general import csi_pb2, volumegroup_pb2
@@ -23,11 +25,59 @@ from controllers.common.settings import NAME_PREFIX_SEPARATOR
 from controllers.servers.csi.controller_types import (ArrayConnectionInfo,
                                                       ObjectIdInfo,
                                                       ObjectParameters, VolumeGroupParameters, VolumeGroupIdInfo)
-from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId
+from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId, InvalidStartingToken
+from controllers.servers.topology_index import TopologyIndex
 
 logger = get_stdout_logger()
 
 
+class ParsedRequestsCache:
+    """
+    The connection info, parameters and validations parsed out of recent requests, by a hash of the secrets
+    and parameters they were parsed from, so a large secret config is not parsed again on every request.
+    Failures are not cached.
+    """
+
+    def __init__(self, max_size=servers_settings.PARSED_REQUESTS_CACHE_SIZE):
+        self._max_size = max_size
+        self._lock = Lock()
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def _get_key(key_parts):
+        return sha256(json.dumps(key_parts, sort_keys=True, default=dict).encode()).hexdigest()
+
+    def get_or_parse(self, key_parts, parse):
+        """
+        Args:
+            key_parts : list of the maps and values that the result depends on
+            parse : function that returns the result
+        """
+        key = self._get_key(key_parts)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key]
+        value = parse()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+parsed_requests_cache = ParsedRequestsCache()
+
+
+def _to_dict(map_or_none):
+    return dict(map_or_none) if map_or_none is not None else None
+
+
 def _parse_raw_json(raw_json):
     try:
         parsed_json = json.loads(raw_json)
@@ -56,29 +106,53 @@ def get_volume_topologies(request):
     return None
 
 
-def get_system_info_for_topologies(secrets_config, node_topologies):
-    for system_id, system_info in secrets_config.items():
-        system_topologies = system_info.get(servers_settings.SECRET_SUPPORTED_TOPOLOGIES_PARAMETER)
-        if is_topology_match(system_topologies, node_topologies):
-            return system_info, system_id
-    raise ValidationException(messages.NO_SYSTEM_MATCH_REQUESTED_TOPOLOGIES.format(node_topologies))
+def get_accessible_topology(request):
+    if request.HasField(servers_settings.REQUEST_ACCESSIBLE_TOPOLOGY_FIELD):
+        return request.accessible_topology.segments
+    return None
+
+
+def get_system_info_for_topologies(secrets_config, node_topologies, topology_index=None):
+    if topology_index is None:
+        topology_index = TopologyIndex.from_secrets_config(secrets_config)
+    system_id = topology_index.get_system_id(node_topologies)
+    if system_id is None:
+        raise ValidationException(messages.NO_SYSTEM_MATCH_REQUESTED_TOPOLOGIES.format(node_topologies))
+    return secrets_config[system_id], system_id
+
+
+def _parse_secrets_config(raw_secrets_config):
+    secrets_config = _parse_raw_json(raw_json=raw_secrets_config)
+    return secrets_config, TopologyIndex.from_secrets_config(secrets_config)
 
 
 def _get_system_info_from_secrets(secrets, topologies=None, system_id=None):
     raw_secrets_config = secrets.get(servers_settings.SECRET_CONFIG_PARAMETER)
     system_info = secrets
     if raw_secrets_config:
-        secrets_config = _parse_raw_json(raw_json=raw_secrets_config)
+        # the config and its topology index are built once for every version of the secret
+        secrets_config, topology_index = parsed_requests_cache.get_or_parse(
+            ["secrets_config", raw_secrets_config], lambda: _parse_secrets_config(raw_secrets_config))
         if system_id:
             system_info = secrets_config.get(system_id)
         elif topologies:
             system_info, system_id = get_system_info_for_topologies(secrets_config=secrets_config,
-                                                                    node_topologies=topologies)
+                                                                    node_topologies=topologies,
+                                                                    topology_index=topology_index)
         else:
             raise ValidationException(messages.INSUFFICIENT_DATA_TO_CHOOSE_A_STORAGE_SYSTEM_MESSAGE)
     return system_info, system_id
 
 
+def get_system_ids_from_secrets(secrets):
+    raw_secrets_config = secrets.get(servers_settings.SECRET_CONFIG_PARAMETER)
+    if not raw_secrets_config:
+        return [None]
+    secrets_config, _ = parsed_requests_cache.get_or_parse(
+        ["secrets_config", raw_secrets_config], lambda: _parse_secrets_config(raw_secrets_config))
+    return sorted(secrets_config)
+
+
 def _get_array_connection_info_from_system_info(secrets, system_id):
     user = secrets[servers_settings.SECRET_USERNAME_PARAMETER]
     password = secrets[servers_settings.SECRET_PASSWORD_PARAMETER]
@@ -87,11 +161,18 @@ def _get_array_connection_info_from_system_info(secrets, system_id):
     return ArrayConnectionInfo(array_addresses=array_addresses, user=user, password=password, system_id=system_id)
 
 
-def get_array_connection_info_from_secrets(secrets, topologies=None, system_id=None):
+def _parse_array_connection_info(secrets, topologies, system_id):
     system_info, system_id = _get_system_info_from_secrets(secrets, topologies, system_id)
     return _get_array_connection_info_from_system_info(system_info, system_id)
 
 
+def get_array_connection_info_from_secrets(secrets, topologies=None, system_id=None):
+    secrets, topologies = _to_dict(secrets), _to_dict(topologies)
+    return parsed_requests_cache.get_or_parse(
+        ["connection_info", secrets, topologies, system_id],
+        lambda: _parse_array_connection_info(secrets, topologies, system_id))
+
+
 def get_volume_parameters(parameters, system_id=None):
     return get_object_parameters(parameters, servers_settings.PARAMETERS_VOLUME_NAME_PREFIX, system_id)
 
@@ -111,6 +192,13 @@ def _str_to_bool(parameter):
 
 
 def get_object_parameters(parameters, prefix_param_name, system_id):
+    parameters = _to_dict(parameters) or {}
+    return parsed_requests_cache.get_or_parse(
+        ["object_parameters", parameters, prefix_param_name, system_id],
+        lambda: _parse_object_parameters(parameters, prefix_param_name, system_id))
+
+
+def _parse_object_parameters(parameters, prefix_param_name, system_id):
     raw_parameters_by_system = parameters.get(servers_settings.PARAMETERS_BY_SYSTEM)
     system_parameters = {}
     if raw_parameters_by_system and system_id:
@@ -198,13 +286,19 @@ def validate_secrets(secrets):
     logger.debug("validating secrets")
     if not secrets:
         raise ValidationException(messages.SECRET_MISSING_MESSAGE)
+    secrets = dict(secrets)
+    parsed_requests_cache.get_or_parse(["validated_secrets", secrets], lambda: _validate_secrets_map(secrets))
+    logger.debug("secrets validation finished")
+
+
+def _validate_secrets_map(secrets):
     raw_secrets_config = secrets.get(servers_settings.SECRET_CONFIG_PARAMETER)
     if raw_secrets_config:
         secrets_config = _parse_raw_json(raw_secrets_config)
         _validate_secrets_config(secrets_config)
     else:
         _validate_secrets(secrets)
-    logger.debug("secrets validation finished")
+    return True
 
 
 def validate_csi_volume_capability(cap):
@@ -378,6 +472,27 @@ def validate_expand_volume_request(request):
     logger.debug("expand volume validation finished")
 
 
+def validate_list_volumes_request(request):
+    logger.debug("validating list volumes request")
+    if request.max_entries < 0:
+        raise ValidationException(messages.MAX_ENTRIES_SHOULD_NOT_BE_NEGATIVE_MESSAGE)
+
+    logger.debug("list volumes validation finished")
+
+
+def get_list_volumes_token(endpoint_key, array_token):
+    return servers_settings.LIST_VOLUMES_TOKEN_DELIMITER.join((endpoint_key, array_token))
+
+
+def split_list_volumes_token(token):
+    if not token:
+        return None, None
+    endpoint_key, delimiter, array_token = token.partition(servers_settings.LIST_VOLUMES_TOKEN_DELIMITER)
+    if not endpoint_key or not delimiter:
+        raise InvalidStartingToken(token)
+    return endpoint_key, array_token
+
+
 def _generate_volumes_response(new_volumes):
     volumes = []
     for volume in new_volumes:
@@ -414,38 +529,38 @@ def _generate_volumegroup_volume_response(new_volume, system_id=None):
 
 
 def generate_csi_create_volume_response(new_volume, system_id=None, source_type=None):
-    logger.debug("creating create volume response for volume : {0}".format(new_volume))
+    logger.debug("creating create volume response for volume : %s", new_volume)
 
     response = csi_pb2.CreateVolumeResponse(volume=_generate_volume_response(new_volume, system_id, source_type))
 
-    logger.debug("finished creating volume response : {0}".format(response))
+    logger.debug("finished creating volume response : %s", response)
     return response
 
 
 def generate_csi_create_volume_group_response(volume_group):
-    logger.debug("creating create volume group response for volume group : {0}".format(volume_group))
+    logger.debug("creating create volume group response for volume group : %s", volume_group)
 
     response = volumegroup_pb2.CreateVolumeGroupResponse(volume_group=volumegroup_pb2.VolumeGroup(
         volume_group_id=get_volume_group_id(volume_group, None),
         volumes=[]))
-    logger.debug("finished creating volume group response : {0}".format(response))
+    logger.debug("finished creating volume group response : %s", response)
 
     return response
 
 
 def generate_csi_modify_volume_group_response(volume_group):
-    logger.debug("creating modify volume group response for volume group : {0}".format(volume_group))
+    logger.debug("creating modify volume group response for volume group : %s", volume_group)
 
     response = volumegroup_pb2.ModifyVolumeGroupMembershipResponse(volume_group=volumegroup_pb2.VolumeGroup(
         volume_group_id=get_volume_group_id(volume_group, None),
         volumes=_generate_volumes_response(volume_group.volumes)))
-    logger.debug("finished creating volume group response : {0}".format(response))
+    logger.debug("finished creating volume group response : %s", response)
 
     return response
 
 
 def generate_csi_create_snapshot_response(new_snapshot, system_id, source_volume_id):
-    logger.debug("creating create snapshot response for snapshot : {0}".format(new_snapshot))
+    logger.debug("creating create snapshot response for snapshot : %s", new_snapshot)
 
     response = csi_pb2.CreateSnapshotResponse(snapshot=csi_pb2.Snapshot(
         size_bytes=new_snapshot.capacity_bytes,
@@ -454,10 +569,28 @@ def generate_csi_create_snapshot_response(new_snapshot, system_id, source_volume
         creation_time=get_current_timestamp(),
         ready_to_use=new_snapshot.is_ready))
 
-    logger.debug("finished creating snapshot response : {0}".format(response))
+    logger.debug("finished creating snapshot response : %s", response)
+    return response
+
+
+def generate_csi_list_volumes_response(volumes_with_system_ids, next_token):
+    logger.debug("creating list volumes response for {} volumes".format(len(volumes_with_system_ids)))
+    # a listed volume exists on the storage system, the volumes that are gone are the ones that are not listed.
+    volume_status = csi_pb2.ListVolumesResponse.VolumeStatus(volume_condition=csi_pb2.VolumeCondition(
+        abnormal=False, message=messages.LISTED_VOLUME_CONDITION_MESSAGE))
+    entries = [csi_pb2.ListVolumesResponse.Entry(volume=_generate_volume_response(volume, system_id),
+                                                 status=volume_status)
+               for volume, system_id in volumes_with_system_ids]
+    response = csi_pb2.ListVolumesResponse(entries=entries, next_token=next_token)
+
+    logger.debug("finished creating list volumes response, next token : {}".format(next_token))
     return response
 
 
+def generate_csi_get_capacity_response(available_capacity):
+    return csi_pb2.GetCapacityResponse(available_capacity=available_capacity)
+
+
 def generate_csi_expand_volume_response(capacity_bytes, node_expansion_required=True):
     logger.debug("creating response for expand volume")
     response = csi_pb2.ControllerExpandVolumeResponse(
@@ -621,7 +754,7 @@ def generate_csi_publish_volume_response(lun, connectivity_type, array_initiator
 
     response = csi_pb2.ControllerPublishVolumeResponse(publish_context=publish_context)
 
-    logger.debug("publish volume response is :{0}".format(response))
+    logger.debug("publish volume response is :%s", response)
     return response
 
 
@@ -5,6 +5,7 @@ import controllers.array_action.errors as array_errors
 import controllers.tests.array_action.test_settings as array_settings
 import controllers.tests.common.test_settings as common_settings
 from controllers.array_action.array_action_types import Host
+from controllers.array_action.array_initiators_cache import array_initiators_cache
 from controllers.array_action.array_mediator_abstract import ArrayMediatorAbstract
 from controllers.common.node_info import Initiators
 from controllers.tests import utils
@@ -38,6 +39,7 @@ def _get_array_mediator_abstract_class():
 class BaseMediatorAbstractSetUp(unittest.TestCase):
 
     def setUp(self):
+        array_initiators_cache.clear()
         self.mediator = _get_array_mediator_abstract_class()
 
         self.mediator.get_volume_mappings.return_value = {}
@@ -152,6 +154,26 @@ class TestMapVolumeByInitiators(BaseMediatorAbstractSetUp):
     def test_map_volume_by_initiators_get_volume_mappings_one_map_for_existing_host_rwx(self):
         self._test_map_volume_by_initiators_get_volume_mappings_one_map_for_existing_host_common(False)
 
+    def test_map_volume_by_initiators_caches_array_initiators(self):
+        self.mediator.map_volume_by_initiators('', self.initiators)
+        response = self.mediator.map_volume_by_initiators('', self.initiators)
+        self.assertTupleEqual((self.lun_id, self.connectivity_type, self.fc_ports), response)
+        self.mediator.get_array_fc_wwns.assert_called_once_with(self.hostname)
+
+    def test_map_volume_by_initiators_of_mapped_volume_refreshes_array_initiators(self):
+        self.mediator.map_volume_by_initiators('', self.initiators)
+        self.mediator.get_volume_mappings.return_value = {self.hostname: self.lun_id}
+        self.mediator.get_host_by_name.return_value = Host(name=self.hostname,
+                                                           connectivity_types=[self.connectivity_type],
+                                                           fc_wwns=self.fc_ports)
+        self.initiators.fc_wwns = self.fc_ports
+        self.mediator.get_array_fc_wwns.return_value = [array_settings.DUMMY_FC_WWN3]
+
+        response = self.mediator.map_volume_by_initiators('', self.initiators)
+
+        self.assertTupleEqual((self.lun_id, self.connectivity_type, [array_settings.DUMMY_FC_WWN3]), response)
+        self.assertEqual(2, self.mediator.get_array_fc_wwns.call_count)
+
     def test_map_volume_by_initiators_map_volume_excpetions(self):
         self.mediator.map_volume.side_effect = [array_errors.PermissionDeniedError('')]
 
@@ -186,6 +208,7 @@ class TestMapVolumeByInitiators(BaseMediatorAbstractSetUp):
                                                 array_settings.DUMMY_LUN_ID_INT]
         self.mediator.get_host_by_host_identifiers = Mock()
         self.mediator.get_host_by_host_identifiers.return_value = self.hostname, [array_settings.FC_CONNECTIVITY_TYPE]
+        array_initiators_cache.clear()
         self.mediator.get_array_fc_wwns = Mock()
         self.mediator.get_array_fc_wwns.return_value = [array_settings.DUMMY_FC_WWN3]
 
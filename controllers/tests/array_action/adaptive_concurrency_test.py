@@ -0,0 +1,43 @@
+import unittest
+
+from mock import patch
+
+from controllers.array_action.adaptive_concurrency import AdaptiveConcurrencyLimit, is_adaptive_concurrency_enabled
+
+
+class TestAdaptiveConcurrencyLimit(unittest.TestCase):
+
+    def setUp(self):
+        self.limit = AdaptiveConcurrencyLimit(initial_limit=4, min_limit=1, max_limit=6, window_size=2)
+
+    def _record_window(self, latency, is_saturated=True):
+        self.limit.record(latency, is_saturated)
+        return self.limit.record(latency, is_saturated)
+
+    def test_limit_does_not_change_within_window(self):
+        self.assertEqual(4, self.limit.record(1, True))
+
+    def test_limit_grows_when_saturated_and_latency_is_low(self):
+        self.assertEqual(5, self._record_window(1))
+        self.assertEqual(6, self._record_window(1))
+        self.assertEqual(6, self._record_window(1))
+
+    def test_limit_does_not_grow_when_not_saturated(self):
+        self.assertEqual(4, self._record_window(1, is_saturated=False))
+
+    def test_limit_shrinks_when_latency_grows(self):
+        self._record_window(1)
+        self.assertEqual(3, self._record_window(3))
+        self.assertEqual(2, self._record_window(3))
+        self.assertEqual(1, self._record_window(3))
+        self.assertEqual(1, self._record_window(3))
+
+    def test_initial_limit_is_capped_by_max_limit(self):
+        self.assertEqual(6, AdaptiveConcurrencyLimit(initial_limit=10, min_limit=1, max_limit=6).limit)
+
+    @patch.dict("os.environ", {"ARRAY_ADAPTIVE_CONCURRENCY": "True"})
+    def test_is_adaptive_concurrency_enabled(self):
+        self.assertTrue(is_adaptive_concurrency_enabled())
+
+    def test_adaptive_concurrency_is_disabled_by_default(self):
+        self.assertFalse(is_adaptive_concurrency_enabled())
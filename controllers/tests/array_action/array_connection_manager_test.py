@@ -2,15 +2,14 @@ import unittest
 
 from mock import patch
 
-import controllers.array_action.array_connection_manager as array_connection_manager
 import controllers.tests.array_action.test_settings as array_settings
 import controllers.tests.common.test_settings as common_settings
-from controllers.array_action.array_connection_manager import (ArrayConnectionManager,
-                                                               NoConnectionAvailableException)
+from controllers.array_action.array_connection_manager import ArrayConnectionManager
 from controllers.array_action.array_mediator_ds8k import DS8KArrayMediator
 from controllers.array_action.array_mediator_svc import SVCArrayMediator
 from controllers.array_action.array_mediator_xiv import XIVArrayMediator
-from controllers.array_action.errors import FailedToFindStorageSystemType
+from controllers.array_action.errors import FailedToFindStorageSystemType, NoConnectionAvailableException
+from controllers.array_action.storage_agent import clear_agents, get_agents, array_type_cache
 
 
 class TestWithFunctionality(unittest.TestCase):
@@ -22,14 +21,28 @@ class TestWithFunctionality(unittest.TestCase):
             array_settings.DUMMY_USER_PARAMETER, array_settings.DUMMY_PASSWORD_PARAMETER, self.endpoint,
             XIVArrayMediator.array_type)
 
-    @patch("controllers.array_action.array_connection_manager.XIVArrayMediator._connect")
-    @patch("controllers.array_action.array_connection_manager.XIVArrayMediator.disconnect")
-    def test_with_opens_and_closes_the_connection(self, close, connect):
+    def tearDown(self):
+        clear_agents()
+
+    @patch("controllers.array_action.array_mediator_xiv.XIVArrayMediator._connect")
+    def test_with_borrows_and_returns_a_pooled_connection(self, connect):
         with self.array_connection as array_mediator:
             self.assertEqual(True, self.array_connection.connected)
             self.assertEqual(self.endpoint, array_mediator.endpoint)
-        connect.assert_called_with()
-        close.assert_called_with()
+            pool = list(get_agents().values())[0].conn_pool
+            self.assertEqual(1, pool.get_metrics()["in_use"])
+        self.assertEqual(False, self.array_connection.connected)
+        self.assertEqual(1, pool.get_metrics()["idle"])
+        connect.assert_called_once_with()
+
+    @patch("controllers.array_action.array_mediator_xiv.XIVArrayMediator._connect")
+    def test_with_reuses_the_pooled_connection(self, connect):
+        with self.array_connection as first_mediator:
+            pass
+        with self.array_connection as second_mediator:
+            pass
+        self.assertIs(first_mediator, second_mediator)
+        connect.assert_called_once_with()
 
     @patch("controllers.array_action.array_connection_manager.ArrayConnectionManager.get_array_connection")
     def test_with_throws_error_if_other_error_occures(self, get_connection):
@@ -48,45 +61,43 @@ class TestGetconnection(unittest.TestCase):
     def setUp(self):
         self.connections = [common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE,
                             common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE]
-        self.connection_key = ",".join(self.connections)
         self.array_connection = ArrayConnectionManager(
             array_settings.DUMMY_USER_PARAMETER, array_settings.DUMMY_PASSWORD_PARAMETER, self.connections,
             XIVArrayMediator.array_type)
-        array_connection_manager.array_connections_dict = {}
-        self.connect_patcher = patch("controllers.array_action.array_connection_manager.XIVArrayMediator._connect")
+        self.connect_patcher = patch("controllers.array_action.array_mediator_xiv.XIVArrayMediator._connect")
         self.connect = self.connect_patcher.start()
 
     def tearDown(self):
-        array_connection_manager.array_connections_dict = {}
+        clear_agents()
         self.connect_patcher.stop()
 
-    def test_connection_adds_the_new_endpoint_for_the_first_time(self):
-        self.assertEqual({}, array_connection_manager.array_connections_dict)
-        self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 1}, array_connection_manager.array_connections_dict)
+    def _get_new_array_connection(self, timeout=None):
+        return ArrayConnectionManager(array_settings.DUMMY_USER_PARAMETER, array_settings.DUMMY_PASSWORD_PARAMETER,
+                                      self.connections, XIVArrayMediator.array_type, timeout=timeout)
 
+    def test_connection_uses_one_agent_per_endpoint(self):
+        self.array_connection.get_array_connection()
         new_management_address = "new_" + common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE
         array_connection2 = ArrayConnectionManager(array_settings.DUMMY_USER_PARAMETER,
                                                    array_settings.DUMMY_PASSWORD_PARAMETER,
                                                    [new_management_address], XIVArrayMediator.array_type)
 
         array_connection2.get_array_connection()
-        self.assertEqual({self.connection_key: 1, new_management_address: 1},
-                         array_connection_manager.array_connections_dict)
+        self._get_new_array_connection().get_array_connection()
+        self.assertEqual(2, len(get_agents()))
 
-    def test_connection_adds_connections_to_connection_dict(self):
-        self.assertEqual({}, array_connection_manager.array_connections_dict)
-        self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 1}, array_connection_manager.array_connections_dict)
-
-        self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 2}, array_connection_manager.array_connections_dict)
+    def test_connection_is_limited_by_max_connections(self):
+        array_connections = [self._get_new_array_connection() for _ in range(XIVArrayMediator.max_connections)]
+        for array_connection in array_connections:
+            array_connection.get_array_connection()
 
-    def test_connection_returns_error_on_too_many_connection(self):
-        array_connection_manager.array_connections_dict = {
-            self.connection_key: array_connection_manager.XIVArrayMediator.max_connections}
         with self.assertRaises(NoConnectionAvailableException):
-            self.array_connection.get_array_connection()
+            self._get_new_array_connection(timeout=0.1).get_array_connection()
+
+        array_connections[0].__exit__(None, None, None)
+        with self._get_new_array_connection(timeout=0.1):
+            pass
+        array_connections[1].__exit__(None, None, None)
 
     def test_connection_returns_error_from_connect_function(self):
         error_msg = array_settings.DUMMY_ERROR_MESSAGE
@@ -97,7 +108,7 @@ class TestGetconnection(unittest.TestCase):
 
         self.assertTrue(error_msg in str(ex.exception))
 
-    @patch("controllers.array_action.array_connection_manager._socket_connect_test")
+    @patch("controllers.array_action.storage_agent._socket_connect_test")
     def test_detect_array_type(self, socket_connect_test_mock):
         # arrays is a [host, open_ports] dict, note that both port 22 and 8452 are opened in ds8k
         arrays = {
@@ -113,6 +124,7 @@ class TestGetconnection(unittest.TestCase):
             return 1
 
         socket_connect_test_mock.side_effect = side_effect
+        array_type_cache.clear()
 
         self.assertEqual(
             ArrayConnectionManager("", "", ["svc_host", ]).detect_array_type(),
@@ -132,19 +144,11 @@ class TestGetconnection(unittest.TestCase):
         with self.assertRaises(FailedToFindStorageSystemType):
             ArrayConnectionManager("", "", ["unkonwn_host", ]).detect_array_type()
 
-    def test_exit_reduces_connection_to_zero(self):
-        self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 1}, array_connection_manager.array_connections_dict)
-
-        self.array_connection.__exit__("", "", None)
-        self.assertEqual({}, array_connection_manager.array_connections_dict)
-
-    def test_exit_reduces_connection(self):
-        self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 1}, array_connection_manager.array_connections_dict)
-
+    def test_exit_returns_the_connection_to_the_pool(self):
         self.array_connection.get_array_connection()
-        self.assertEqual({self.connection_key: 2}, array_connection_manager.array_connections_dict)
+        pool = list(get_agents().values())[0].conn_pool
+        self.assertEqual(1, pool.get_metrics()["in_use"])
 
-        self.array_connection.__exit__("", "", None)
-        self.assertEqual({self.connection_key: 1}, array_connection_manager.array_connections_dict)
+        self.array_connection.__exit__(None, None, None)
+        self.assertEqual(0, pool.get_metrics()["in_use"])
+        self.assertEqual(1, pool.current_size)
@@ -0,0 +1,62 @@
+import unittest
+
+from mock import patch
+
+from controllers.array_action.array_initiators_cache import ArrayInitiatorsCache
+
+ENDPOINT = ["endpoint"]
+HOST_NAME = "host"
+CONNECTIVITY_TYPE = "fc"
+ARRAY_INITIATORS = ["wwn1", "wwn2"]
+
+
+class TestArrayInitiatorsCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ArrayInitiatorsCache()
+
+    def _put(self, array_initiators=None, version=None):
+        if version is None:
+            version = self.cache.get_version(ENDPOINT, HOST_NAME)
+        self.cache.put(ENDPOINT, HOST_NAME, CONNECTIVITY_TYPE, array_initiators or ARRAY_INITIATORS, version)
+
+    def _get(self):
+        return self.cache.get(ENDPOINT, HOST_NAME, CONNECTIVITY_TYPE)
+
+    def test_get_returns_a_copy_of_the_cached_initiators(self):
+        self._put()
+        array_initiators = self._get()
+        array_initiators.append("wwn3")
+        self.assertEqual(ARRAY_INITIATORS, self._get())
+
+    def test_get_missing_entry(self):
+        self.assertIsNone(self._get())
+        self.assertIsNone(self.cache.get(ENDPOINT, HOST_NAME, "iscsi"))
+
+    @patch("controllers.array_action.array_initiators_cache.monotonic")
+    def test_entry_expires_after_ttl(self, monotonic):
+        monotonic.return_value = 100
+        self._put()
+        monotonic.return_value = 399
+        self.assertEqual(ARRAY_INITIATORS, self._get())
+        monotonic.return_value = 400
+        self.assertIsNone(self._get())
+
+    def test_invalidate_host_drops_its_entries(self):
+        self._put()
+        self.cache.put(ENDPOINT, "other_host", CONNECTIVITY_TYPE, ARRAY_INITIATORS,
+                       self.cache.get_version(ENDPOINT, "other_host"))
+        self.cache.invalidate_host(ENDPOINT, HOST_NAME)
+        self.assertIsNone(self._get())
+        self.assertEqual(ARRAY_INITIATORS, self.cache.get(ENDPOINT, "other_host", CONNECTIVITY_TYPE))
+
+    def test_put_of_load_started_before_invalidation_is_ignored(self):
+        version = self.cache.get_version(ENDPOINT, HOST_NAME)
+        self.cache.invalidate_host(ENDPOINT, HOST_NAME)
+        self._put(version=version)
+        self.assertIsNone(self._get())
+
+    @patch.dict("os.environ", {"ARRAY_INITIATORS_CACHE_TTL": "0"})
+    def test_put_when_disabled(self):
+        self._put()
+        self.assertIsNone(self._get())
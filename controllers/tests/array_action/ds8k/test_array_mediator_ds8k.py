@@ -3,6 +3,7 @@ import unittest
 from mock import patch, NonCallableMagicMock, Mock
 from munch import Munch
 from pyds8k.exceptions import ClientError, ClientException, InternalServerError, NotFound
+from pyds8k.exceptions import ConnectionError as ClientConnectionError
 
 import controllers.array_action.errors as array_errors
 import controllers.tests.array_action.ds8k.test_settings as ds8k_settings
@@ -13,6 +14,8 @@ from controllers.array_action.array_mediator_ds8k import DS8KArrayMediator, FLAS
     FLASHCOPY_PERMIT_SPACE_EFFICIENT_TARGET_OPTION
 from controllers.array_action.array_mediator_ds8k import LOGIN_PORT_WWPN, LOGIN_PORT_STATE, \
     LOGIN_PORT_STATE_ONLINE
+from controllers.array_action.ds8k_volume_cache import VolumeCache, VOLUME_NOT_IN_POOL, volume_cache_by_address
+from controllers.array_action.ds8k_volume_mappings_index import volume_mappings_indexes
 from controllers.common.node_info import Initiators
 from controllers.common.settings import SPACE_EFFICIENCY_THIN, SPACE_EFFICIENCY_NONE
 
@@ -20,6 +23,7 @@ from controllers.common.settings import SPACE_EFFICIENCY_THIN, SPACE_EFFICIENCY_
 class TestArrayMediatorDS8K(unittest.TestCase):
 
     def setUp(self):
+        volume_mappings_indexes.clear()
         self.endpoint = [common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE]
         self.client_mock = NonCallableMagicMock()
         patcher = patch("controllers.array_action.array_mediator_ds8k.RESTClient")
@@ -129,12 +133,53 @@ class TestArrayMediatorDS8K(unittest.TestCase):
                                        is_virt_snap_func=False)
 
         self.assertEqual(self.volume_response.name, volume.name)
-        self.array.volume_cache.add_or_delete.assert_called_once_with(self.volume_response.name,
-                                                                      self.volume_response.id)
+        self.array.volume_cache.add.assert_called_once_with(self.volume_response.name, self.volume_response.id,
+                                                            self.volume_response.pool)
+
+    def test_get_volume_not_in_pool_by_cache(self):
+        self.array.volume_cache.get.return_value = VOLUME_NOT_IN_POOL
+        with self.assertRaises(array_errors.ObjectNotFoundError):
+            self.array.get_volume(self.volume_response.name, pool=self.volume_response.pool,
+                                  is_virt_snap_func=False)
+        self.client_mock.get_volumes_by_pool.assert_not_called()
+
+    def test_get_volume_after_failed_create_scans_the_pool(self):
+        volume_cache_by_address.clear()
+        self.array.volume_cache = VolumeCache(self.array.service_address)
+        pool = self.volume_response.pool
+        self.client_mock.get_volumes_by_pool.return_value = []
+        with self.assertRaises(array_errors.ObjectNotFoundError):
+            self.array.get_volume(self.volume_response.name, pool=pool, is_virt_snap_func=False)
+        self.client_mock.create_volume.side_effect = ClientConnectionError
+        with self.assertRaises(ClientConnectionError):
+            self.array.create_volume(self.volume_response.name, 10, SPACE_EFFICIENCY_NONE, pool, None, None, None,
+                                     None, False)
+        self.client_mock.get_volumes_by_pool.return_value = [self.volume_response]
+        volume = self.array.get_volume(self.volume_response.name, pool=pool, is_virt_snap_func=False)
+        self.assertEqual(self.volume_response.name, volume.name)
+        self.assertEqual(2, self.client_mock.get_volumes_by_pool.call_count)
+
+    def test_get_volume_after_successful_create_does_not_scan_the_pool(self):
+        volume_cache_by_address.clear()
+        self.array.volume_cache = VolumeCache(self.array.service_address)
+        pool = self.volume_response.pool
+        self.client_mock.get_volumes_by_pool.return_value = []
+        with self.assertRaises(array_errors.ObjectNotFoundError):
+            self.array.get_volume(self.volume_response.name, pool=pool, is_virt_snap_func=False)
+        self.client_mock.create_volume.return_value = self.volume_response
+        self.client_mock.get_volume.return_value = self.volume_response
+        self.array.create_volume(self.volume_response.name, 10, SPACE_EFFICIENCY_NONE, pool, None, None, None,
+                                 None, False)
+        with self.assertRaises(array_errors.ObjectNotFoundError):
+            self.array.get_volume("other_volume", pool=pool, is_virt_snap_func=False)
+        self.client_mock.get_volumes_by_pool.assert_called_once_with(pool)
 
     def test_get_volume_with_empty_cache(self, ):
         self._test_get_volume()
         self.client_mock.get_volumes_by_pool.assert_called_once_with(self.volume_response.pool)
+        self.array.volume_cache.load_pool.assert_called_once_with(
+            self.volume_response.pool, {self.volume_response.name: self.volume_response.id},
+            self.array.volume_cache.get_pool_version.return_value)
 
     def test_get_volume_with_volume_in_cache(self):
         self._test_get_volume(with_cache=True)
@@ -158,6 +203,44 @@ class TestArrayMediatorDS8K(unittest.TestCase):
             self.array.get_volume(ds8k_settings.VOLUME_FAKE_NAME, pool=self.volume_response.pool,
                                   is_virt_snap_func=False)
 
+    def test_get_pool_available_capacity(self):
+        self.client_mock.get_pool.return_value = Munch({"capavail": "5"})
+        self.assertEqual(5 * 1024 ** 3, self.array.get_pool_available_capacity(common_settings.DUMMY_POOL1))
+        self.client_mock.get_pool.assert_called_once_with(common_settings.DUMMY_POOL1)
+
+    def test_get_pool_available_capacity_of_missing_pool(self):
+        self.client_mock.get_pool.side_effect = NotFound("404")
+        with self.assertRaises(array_errors.PoolDoesNotExist):
+            self.array.get_pool_available_capacity(common_settings.DUMMY_POOL1)
+
+    def _prepare_mocks_for_list_volumes(self):
+        volumes_by_lss = {"00": [self._get_volume_response("0001", "vol2"), self._get_volume_response("0000", "vol1")],
+                          "01": [self._get_volume_response("0100", "other")]}
+        self.client_mock.get_lss.return_value = [Munch({"id": "01"}), Munch({"id": "00"})]
+        self.client_mock.get_volumes_by_lss.side_effect = lambda lss_id: volumes_by_lss[lss_id]
+
+    def test_list_volumes_in_volume_id_order(self):
+        self._prepare_mocks_for_list_volumes()
+        listed_volumes = list(self.array.list_volumes("", None))
+        self.assertEqual(["0000", "0001", "0100"], [token for _, token in listed_volumes])
+        self.assertEqual(["vol1", "vol2", "other"], [volume.name for volume, _ in listed_volumes])
+        self.assertIsNone(listed_volumes[0][0].source_id)
+
+    def test_list_volumes_from_token_with_name_prefix(self):
+        self._prepare_mocks_for_list_volumes()
+        listed_volumes = list(self.array.list_volumes("0000", "vol"))
+        self.assertEqual(["0001"], [token for _, token in listed_volumes])
+        self.client_mock.get_volumes_by_lss.assert_called_with("01")
+
+    def test_list_volumes_stops_reading_lss_after_the_last_taken_volume(self):
+        self._prepare_mocks_for_list_volumes()
+        next(self.array.list_volumes("", None))
+        self.client_mock.get_volumes_by_lss.assert_called_once_with("00")
+
+    def test_list_volumes_with_invalid_token(self):
+        with self.assertRaises(array_errors.InvalidArgumentError):
+            next(self.array.list_volumes("volume", None))
+
     def test_create_volume_with_default_space_efficiency_success(self):
         self._test_create_volume_success(space_efficiency=SPACE_EFFICIENCY_NONE)
 
@@ -169,7 +252,8 @@ class TestArrayMediatorDS8K(unittest.TestCase):
 
     def test_create_volume_with_empty_cache(self):
         self._test_create_volume_success()
-        self.array.volume_cache.add.assert_called_once_with(self.volume_response.name, self.volume_response.id)
+        self.array.volume_cache.add.assert_called_once_with(self.volume_response.name, self.volume_response.id,
+                                                            self.volume_response.pool)
 
     def _test_create_volume_success(self, space_efficiency=""):
         self.client_mock.create_volume.return_value = self.volume_response
@@ -224,7 +308,7 @@ class TestArrayMediatorDS8K(unittest.TestCase):
         self.client_mock.get_volume.return_value = self.volume_response
         scsi_id = ds8k_settings.DUMMY_ABSTRACT_VOLUME_UID.format(self.volume_response.id)
         self.array.delete_volume(scsi_id)
-        self.array.volume_cache.remove.assert_called_once_with(self.volume_response.name)
+        self.array.volume_cache.remove.assert_called_once_with(self.volume_response.name, self.volume_response.pool)
 
     def test_delete_volume_fail_with_client_exception(self):
         self.client_mock.delete_volume.side_effect = ClientException("500")
@@ -336,6 +420,35 @@ class TestArrayMediatorDS8K(unittest.TestCase):
         self.assertDictEqual(self.array.get_volume_mappings(scsi_id),
                              {common_settings.HOST_NAME: int(array_settings.DUMMY_LUN_ID)})
 
+    def test_get_volume_mappings_after_map_and_unmap_uses_the_index(self):
+        scsi_id = ds8k_settings.DUMMY_ABSTRACT_VOLUME_UID.format(ds8k_settings.DUMMY_VOLUME_ID1)
+        self.client_mock.get_hosts.return_value = self._mock_get_hosts_response()
+        self.assertDictEqual(self.array.get_volume_mappings(scsi_id), {})
+        self.client_mock.map_volume_to_host.return_value = Munch({
+            ds8k_settings.GET_HOSTS_LUN_ID_ATTR_KEY: array_settings.DUMMY_LUN_ID})
+        self.array.map_volume(scsi_id, common_settings.HOST_NAME, array_settings.DUMMY_CONNECTIVITY_TYPE)
+        self.assertDictEqual(self.array.get_volume_mappings(scsi_id),
+                             {common_settings.HOST_NAME: int(array_settings.DUMMY_LUN_ID)})
+        self.client_mock.get_host_mappings.return_value = [
+            Munch({
+                ds8k_settings.GET_HOST_MAPPINGS_VOLUME_ATTR_KEY: ds8k_settings.DUMMY_VOLUME_ID1,
+                ds8k_settings.GET_HOST_MAPPINGS_ID_ATTR_KEY: array_settings.DUMMY_LUN_ID
+            })
+        ]
+        self.array.unmap_volume(scsi_id, common_settings.HOST_NAME)
+        self.assertDictEqual(self.array.get_volume_mappings(scsi_id), {})
+        self.client_mock.get_hosts.assert_called_once_with()
+
+    def test_get_volume_mappings_after_map_that_failed_to_connect_reloads_the_index(self):
+        scsi_id = ds8k_settings.DUMMY_ABSTRACT_VOLUME_UID.format(ds8k_settings.DUMMY_VOLUME_ID1)
+        self.client_mock.get_hosts.return_value = self._mock_get_hosts_response()
+        self.array.get_volume_mappings(scsi_id)
+        self.client_mock.map_volume_to_host.side_effect = ClientConnectionError
+        with self.assertRaises(ClientConnectionError):
+            self.array.map_volume(scsi_id, common_settings.HOST_NAME, array_settings.DUMMY_CONNECTIVITY_TYPE)
+        self.array.get_volume_mappings(scsi_id)
+        self.assertEqual(2, self.client_mock.get_hosts.call_count)
+
     def test_map_volume_host_not_found(self):
         self.client_mock.map_volume_to_host.side_effect = NotFound("404")
         with self.assertRaises(array_errors.HostNotFoundError):
@@ -492,8 +605,8 @@ class TestArrayMediatorDS8K(unittest.TestCase):
                                          pool=self.volume_response.pool,
                                          is_virt_snap_func=False)
         self.assertEqual(volume.name, target_volume.name)
-        self.array.volume_cache.add_or_delete.assert_called_once_with(target_volume.name,
-                                                                      target_volume.id)
+        self.array.volume_cache.add.assert_called_once_with(target_volume.name, target_volume.id,
+                                                            target_volume.pool)
 
     def test_get_snapshot_with_empty_cache(self):
         self._test_get_snapshot_success()
@@ -588,7 +701,8 @@ class TestArrayMediatorDS8K(unittest.TestCase):
                                    pool=None,
                                    is_virt_snap_func=False)
 
-        self.array.volume_cache.add.assert_called_once_with(self.snapshot_response.name, self.snapshot_response.id)
+        self.array.volume_cache.add.assert_called_once_with(self.snapshot_response.name, self.snapshot_response.id,
+                                                            self.snapshot_response.pool)
 
     def test_create_snapshot_with_different_pool_success(self):
         self._prepare_mocks_for_create_snapshot()
@@ -667,7 +781,8 @@ class TestArrayMediatorDS8K(unittest.TestCase):
         self._prepare_mocks_for_snapshot()
         self.array.delete_snapshot(self.snapshot_response.id, common_settings.INTERNAL_SNAPSHOT_ID)
 
-        self.array.volume_cache.remove.assert_called_once_with(self.snapshot_response.name)
+        self.array.volume_cache.remove.assert_called_once_with(self.snapshot_response.name,
+                                                               self.snapshot_response.pool)
 
     def test_delete_snapshot_flashcopy_fail_with_client_exception(self):
         self._prepare_mocks_for_snapshot()
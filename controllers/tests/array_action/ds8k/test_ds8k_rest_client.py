@@ -0,0 +1,79 @@
+import unittest
+
+from mock import patch, Mock
+from pyds8k.exceptions import ConnectionError as ClientConnectionError, Timeout
+
+from controllers.array_action.ds8k_rest_client import RESTClient
+
+DS8K_REST_CLIENT_PATH = "controllers.array_action.ds8k_rest_client"
+
+
+class TestRESTClient(unittest.TestCase):
+
+    def setUp(self):
+        client_patcher = patch("{}.Client".format(DS8K_REST_CLIENT_PATH))
+        self.client_class = client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+        monotonic_patcher = patch("{}.monotonic".format(DS8K_REST_CLIENT_PATH))
+        self.monotonic = monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+        self.monotonic.return_value = 100
+        self.client = self.client_class.return_value
+        self.rest_client = RESTClient("service_address", "user", "password")
+
+    def test_is_valid_probes_the_array_when_no_call_succeeded(self):
+        self.assertTrue(self.rest_client.is_valid())
+        self.client.get_io_enclosures.assert_called_once_with()
+
+    def test_is_valid_skips_the_probe_after_a_recent_successful_call(self):
+        self.rest_client.get_system()
+        self.monotonic.return_value = 129
+        self.assertTrue(self.rest_client.is_valid())
+        self.client.get_io_enclosures.assert_not_called()
+
+    def test_is_valid_probes_the_array_after_the_validity_window(self):
+        self.rest_client.get_system()
+        self.monotonic.return_value = 130
+        self.client.get_io_enclosures.side_effect = Exception
+        self.assertFalse(self.rest_client.is_valid())
+
+    @patch.dict("os.environ", {"DS8K_CLIENT_VALIDITY_WINDOW": "0"})
+    def test_is_valid_always_probes_when_the_window_is_disabled(self):
+        self.rest_client.get_system()
+        self.assertTrue(self.rest_client.is_valid())
+        self.client.get_io_enclosures.assert_called_once_with()
+
+    def test_read_that_failed_to_connect_is_retried_with_a_new_client(self):
+        new_client = Mock()
+        self.client_class.side_effect = [new_client]
+        new_client.get_systems.return_value = ["system"]
+        self.client.get_systems.side_effect = ClientConnectionError
+        self.assertEqual("system", self.rest_client.get_system())
+        self.client.get_io_enclosures.side_effect = Exception
+        self.assertTrue(self.rest_client.is_valid())
+
+    def test_write_that_failed_to_connect_is_not_retried(self):
+        self.rest_client.get_system()
+        self.client.delete_volume.side_effect = ClientConnectionError
+        with self.assertRaises(ClientConnectionError):
+            self.rest_client.delete_volume("volume_id")
+        self.client.delete_volume.assert_called_once()
+        self.assertEqual(1, self.client_class.call_count)
+        self.client.get_io_enclosures.side_effect = Exception
+        self.assertFalse(self.rest_client.is_valid())
+
+    def test_read_that_timed_out_is_retried_with_a_new_client(self):
+        new_client = Mock()
+        self.client_class.side_effect = [new_client]
+        new_client.get_systems.return_value = ["system"]
+        self.client.get_systems.side_effect = Timeout("url")
+        self.assertEqual("system", self.rest_client.get_system())
+
+    def test_write_that_timed_out_is_not_retried(self):
+        self.rest_client.get_system()
+        self.client.delete_volume.side_effect = Timeout("url")
+        with self.assertRaises(Timeout):
+            self.rest_client.delete_volume("volume_id")
+        self.client.delete_volume.assert_called_once()
+        self.client.get_io_enclosures.side_effect = Exception
+        self.assertFalse(self.rest_client.is_valid())
@@ -0,0 +1,86 @@
+import unittest
+
+from mock import patch
+
+from controllers.array_action.ds8k_volume_cache import VolumeCacheByAddress, VOLUME_NOT_IN_POOL
+
+ADDRESS = "address"
+POOL_ID = "P1"
+VOLUME_NAME = "volume"
+VOLUME_ID = "0001"
+
+
+class TestVolumeCacheByAddress(unittest.TestCase):
+
+    def setUp(self):
+        monotonic_patcher = patch("controllers.array_action.ds8k_volume_cache.monotonic")
+        self.monotonic = monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+        self.monotonic.return_value = 100
+        self.cache = VolumeCacheByAddress()
+
+    def _load_pool(self, volume_ids_by_name=None, version=None):
+        if version is None:
+            version = self.cache.get_pool_version(ADDRESS, POOL_ID)
+        self.cache.load_pool(ADDRESS, POOL_ID, volume_ids_by_name or {VOLUME_NAME: VOLUME_ID}, version)
+
+    def _get(self, volume_name=VOLUME_NAME, pool_id=POOL_ID):
+        return self.cache.get(ADDRESS, pool_id, volume_name)
+
+    def test_get_from_loaded_pool(self):
+        self._load_pool()
+        self.assertEqual(VOLUME_ID, self._get())
+        self.assertIs(VOLUME_NOT_IN_POOL, self._get("other_volume"))
+
+    def test_get_from_pool_that_was_not_loaded(self):
+        self.cache.add(ADDRESS, POOL_ID, VOLUME_NAME, VOLUME_ID)
+        self.assertEqual(VOLUME_ID, self._get())
+        self.assertIsNone(self._get("other_volume"))
+
+    def test_get_without_pool_finds_the_volume_in_any_pool(self):
+        self._load_pool()
+        self.assertEqual(VOLUME_ID, self._get(pool_id=None))
+        self.assertIsNone(self._get("other_volume", pool_id=None))
+
+    def test_loaded_pool_expires_after_ttl(self):
+        self._load_pool()
+        self.monotonic.return_value = 400
+        self.assertIsNone(self._get())
+        self.assertIsNone(self._get("other_volume"))
+
+    def test_removed_volume_is_not_in_pool(self):
+        self._load_pool()
+        self.cache.remove(ADDRESS, POOL_ID, VOLUME_NAME)
+        self.assertIs(VOLUME_NOT_IN_POOL, self._get())
+
+    @patch.dict("os.environ", {"DS8K_VOLUME_CACHE_MAX_SIZE": "1"})
+    def test_pool_is_not_complete_after_eviction(self):
+        self._load_pool()
+        self.cache.add(ADDRESS, POOL_ID, "other_volume", "0002")
+        self.assertEqual("0002", self._get("other_volume"))
+        self.assertIsNone(self._get())
+
+    @patch.dict("os.environ", {"DS8K_VOLUME_CACHE_MAX_SIZE": "1"})
+    def test_pool_larger_than_max_size_is_not_complete(self):
+        self._load_pool({VOLUME_NAME: VOLUME_ID, "other_volume": "0002"})
+        self.assertIsNone(self._get("third_volume"))
+
+    def test_load_started_before_a_change_is_ignored(self):
+        version = self.cache.get_pool_version(ADDRESS, POOL_ID)
+        self.cache.add(ADDRESS, POOL_ID, "other_volume", "0002")
+        self._load_pool(version=version)
+        self.assertEqual("0002", self._get("other_volume"))
+        self.assertIsNone(self._get())
+
+    @patch.dict("os.environ", {"DS8K_VOLUME_CACHE_TTL": "0"})
+    def test_load_when_disabled(self):
+        self._load_pool()
+        self.assertIsNone(self._get())
+
+    def test_invalidated_pool_is_not_complete(self):
+        version = self.cache.get_pool_version(ADDRESS, POOL_ID)
+        self._load_pool()
+        self.cache.invalidate_pool(ADDRESS, POOL_ID)
+        self.assertEqual(VOLUME_ID, self._get())
+        self.assertIsNone(self._get("other_volume"))
+        self.assertNotEqual(version, self.cache.get_pool_version(ADDRESS, POOL_ID))
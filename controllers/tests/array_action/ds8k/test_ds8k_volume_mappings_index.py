@@ -0,0 +1,93 @@
+import unittest
+from threading import Event, Thread
+
+from mock import patch, Mock
+
+from controllers.array_action.ds8k_volume_mappings_index import VolumeMappingsIndex
+
+SERVICE_ADDRESS = "service_address"
+VOLUME_ID = "0001"
+HOST_NAME = "host"
+
+
+def _get_luns_by_host_by_volume():
+    return {VOLUME_ID: {HOST_NAME: 1}}
+
+
+class TestVolumeMappingsIndex(unittest.TestCase):
+
+    def setUp(self):
+        monotonic_patcher = patch("controllers.array_action.ds8k_volume_mappings_index.monotonic")
+        self.monotonic = monotonic_patcher.start()
+        self.addCleanup(monotonic_patcher.stop)
+        self.monotonic.return_value = 100
+        self.index = VolumeMappingsIndex(SERVICE_ADDRESS, refresh_interval=60)
+        self.get_luns_by_host_by_volume = Mock(side_effect=_get_luns_by_host_by_volume)
+
+    def _get(self, volume_id=VOLUME_ID):
+        return self.index.get(volume_id, self.get_luns_by_host_by_volume)
+
+    def test_get_loads_the_mappings_once(self):
+        self.assertEqual({HOST_NAME: 1}, self._get())
+        self.assertEqual({}, self._get("0002"))
+        self.get_luns_by_host_by_volume.assert_called_once_with()
+
+    def test_get_loads_the_mappings_again_after_refresh_interval(self):
+        self._get()
+        self.monotonic.return_value = 160
+        self._get()
+        self.assertEqual(2, self.get_luns_by_host_by_volume.call_count)
+
+    def test_add_and_remove_mapping(self):
+        self._get()
+        self.index.add_mapping("0002", HOST_NAME, 2)
+        self.index.remove_mapping(VOLUME_ID, HOST_NAME)
+        self.assertEqual({HOST_NAME: 2}, self._get("0002"))
+        self.assertEqual({}, self._get())
+        self.get_luns_by_host_by_volume.assert_called_once_with()
+
+    def test_invalidate_loads_the_mappings_again(self):
+        self._get()
+        self.index.invalidate()
+        self._get()
+        self.assertEqual(2, self.get_luns_by_host_by_volume.call_count)
+
+    def test_mappings_changed_during_a_load_are_applied_on_the_loaded_mappings(self):
+        def load_while_mapping():
+            self.index.add_mapping("0002", HOST_NAME, 2)
+            self.index.remove_mapping(VOLUME_ID, HOST_NAME)
+            return _get_luns_by_host_by_volume()
+
+        self.assertEqual({}, self.index.get(VOLUME_ID, load_while_mapping))
+        self.assertEqual({HOST_NAME: 2}, self._get("0002"))
+        self.get_luns_by_host_by_volume.assert_not_called()
+
+    def test_mappings_loaded_during_an_invalidation_are_not_kept(self):
+        def load_while_invalidating():
+            self.index.invalidate()
+            return _get_luns_by_host_by_volume()
+
+        self.assertEqual({HOST_NAME: 1}, self.index.get(VOLUME_ID, load_while_invalidating))
+        self._get()
+        self.get_luns_by_host_by_volume.assert_called_once_with()
+
+    def test_concurrent_gets_load_the_mappings_once(self):
+        loading = Event()
+        can_load = Event()
+
+        def wait_and_load():
+            loading.set()
+            can_load.wait(5)
+            return _get_luns_by_host_by_volume()
+
+        self.get_luns_by_host_by_volume.side_effect = wait_and_load
+        results = []
+        threads = [Thread(target=lambda: results.append(self._get())) for _ in range(2)]
+        threads[0].start()
+        self.assertTrue(loading.wait(5))
+        threads[1].start()
+        can_load.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([{HOST_NAME: 1}] * 2, results)
+        self.get_luns_by_host_by_volume.assert_called_once_with()
@@ -0,0 +1,71 @@
+import unittest
+from threading import Thread
+
+from mock import Mock, patch
+
+from controllers.array_action.host_mappings_batcher import HostMappingsBatcher, get_batch_window
+
+KEY = ("endpoint", "host")
+WINDOW = 0.2
+
+
+class TestHostMappingsBatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.batcher = HostMappingsBatcher(max_batch_size=3)
+        self.run_batch = Mock(side_effect=lambda commands: ["result_{}".format(command) for command in commands])
+
+    def _run_concurrently(self, commands, key=KEY):
+        results = {}
+
+        def run(command):
+            try:
+                results[command] = self.batcher.run(key, command, self.run_batch, WINDOW)
+            except Exception as ex:
+                results[command] = ex
+
+        threads = [Thread(target=run, args=(command,)) for command in commands]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def test_commands_in_the_same_window_run_in_one_batch(self):
+        results = self._run_concurrently(["command1", "command2"])
+        self.run_batch.assert_called_once()
+        self.assertCountEqual(["command1", "command2"], self.run_batch.call_args[0][0])
+        self.assertEqual({"command1": "result_command1", "command2": "result_command2"}, results)
+
+    def test_full_batch_does_not_wait_for_the_window(self):
+        self.batcher = HostMappingsBatcher(max_batch_size=1)
+        self.assertEqual("result_command1", self.batcher.run(KEY, "command1", self.run_batch, 60))
+
+    def test_every_caller_gets_its_own_error(self):
+        error = Exception("failed")
+        self.run_batch.side_effect = lambda commands: [error if command == "command2" else None
+                                                       for command in commands]
+        results = self._run_concurrently(["command1", "command2"])
+        self.assertIsNone(results["command1"])
+        self.assertIs(error, results["command2"])
+
+    def test_batch_failure_is_raised_to_all_callers(self):
+        error = Exception("failed")
+        self.run_batch.side_effect = error
+        results = self._run_concurrently(["command1", "command2"])
+        self.assertIsNot(results["command1"], results["command2"])
+        for result in results.values():
+            self.assertEqual(error.args, result.args)
+            self.assertIs(error, result.__cause__)
+
+    def test_commands_of_different_keys_are_not_batched_together(self):
+        self.batcher.run(("endpoint", "host1"), "command1", self.run_batch, 0)
+        self.batcher.run(("endpoint", "host2"), "command2", self.run_batch, 0)
+        self.assertEqual(2, self.run_batch.call_count)
+
+    @patch.dict("os.environ", {"HOST_MAPPINGS_BATCH_WINDOW": "0.05"})
+    def test_get_batch_window(self):
+        self.assertEqual(0.05, get_batch_window())
+
+    def test_get_batch_window_default_is_disabled(self):
+        self.assertEqual(0, get_batch_window())
@@ -0,0 +1,74 @@
+import unittest
+
+from mock import Mock, patch
+
+import controllers.array_action.errors as array_errors
+from controllers.array_action.lun_allocator import HostLunsAllocator
+
+ENDPOINT = "endpoint"
+HOST_NAME = "host_name"
+VOLUME_NAME = "volume_name"
+MIN_LUN = 1
+MAX_LUN = 4
+
+
+class TestHostLunsAllocator(unittest.TestCase):
+
+    def setUp(self):
+        self.allocator = HostLunsAllocator(ENDPOINT, refresh_interval=300)
+        self.get_volume_names_by_lun = Mock(return_value={1: "used_volume"})
+
+    def _reserve(self):
+        return self.allocator.reserve(HOST_NAME, self.get_volume_names_by_lun, MIN_LUN, MAX_LUN)
+
+    def test_reserve_lowest_free_lun_in_range(self):
+        self.get_volume_names_by_lun.return_value = {0: "out_of_range", 1: "used_volume", 3: "other_volume"}
+        self.assertEqual(2, self._reserve())
+        self.assertEqual(4, self._reserve())
+        self.get_volume_names_by_lun.assert_called_once_with()
+
+    def test_reserve_no_available_lun(self):
+        for _ in range(MIN_LUN + 1, MAX_LUN + 1):
+            self._reserve()
+        with self.assertRaises(array_errors.NoAvailableLunError):
+            self._reserve()
+
+    def test_release_makes_lun_available(self):
+        lun = self._reserve()
+        self.allocator.release(HOST_NAME, lun)
+        self.assertEqual(lun, self._reserve())
+
+    def test_release_lun_in_use_keeps_it_used(self):
+        lun = self._reserve()
+        self.allocator.release(HOST_NAME, lun, is_in_use=True)
+        self.assertEqual(lun + 1, self._reserve())
+
+    def test_free_volume_makes_its_lun_available(self):
+        lun = self._reserve()
+        self.allocator.confirm(HOST_NAME, lun, VOLUME_NAME)
+        self.assertEqual(lun + 1, self._reserve())
+        self.allocator.free_volume(HOST_NAME, VOLUME_NAME)
+        self.assertEqual(lun, self._reserve())
+
+    def test_free_unknown_volume_reloads_host_luns(self):
+        self.allocator.release(HOST_NAME, self._reserve())
+        self.allocator.free_volume(HOST_NAME, "unknown_volume")
+        self._reserve()
+        self.assertEqual(2, self.get_volume_names_by_lun.call_count)
+
+    @patch("controllers.array_action.lun_allocator.monotonic")
+    def test_reload_host_luns_after_refresh_interval(self, monotonic_mock):
+        monotonic_mock.return_value = 0
+        self.allocator.release(HOST_NAME, self._reserve())
+        monotonic_mock.return_value = 301
+        self.get_volume_names_by_lun.return_value = {1: "used_volume", 2: "new_volume"}
+        self.assertEqual(3, self._reserve())
+        self.assertEqual(2, self.get_volume_names_by_lun.call_count)
+
+    @patch("controllers.array_action.lun_allocator.monotonic")
+    def test_do_not_reload_host_luns_with_reservations(self, monotonic_mock):
+        monotonic_mock.return_value = 0
+        first_lun = self._reserve()
+        monotonic_mock.return_value = 301
+        self.assertNotEqual(first_lun, self._reserve())
+        self.get_volume_names_by_lun.assert_called_once_with()
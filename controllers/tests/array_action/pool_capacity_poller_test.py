@@ -0,0 +1,90 @@
+import unittest
+from threading import Event
+
+from mock import patch, Mock, MagicMock
+
+import controllers.array_action.errors as array_errors
+from controllers.array_action.pool_capacity_poller import PoolCapacityPoller, PoolCapacityPollers
+from controllers.tests.utils import get_fake_array_connection_info
+
+POLLER_PATH = "controllers.array_action.pool_capacity_poller"
+ENDPOINT_KEY = "endpoint"
+ARRAY_CONNECTION_INFO = get_fake_array_connection_info(array_addresses=[ENDPOINT_KEY])
+POOL = "pool"
+AVAILABLE_CAPACITY = 1024
+
+
+class TestPoolCapacityPollers(unittest.TestCase):
+
+    def setUp(self):
+        self.pollers = PoolCapacityPollers()
+        self.addCleanup(self.pollers.clear)
+        self.mediator = Mock()
+        self.mediator.get_pool_available_capacity.return_value = AVAILABLE_CAPACITY
+        agent = MagicMock()
+        agent.get_mediator.return_value.__enter__.return_value = self.mediator
+        get_agent_patcher = patch("{}.get_agent".format(POLLER_PATH), return_value=agent)
+        self.get_agent = get_agent_patcher.start()
+        self.addCleanup(get_agent_patcher.stop)
+        env_patcher = patch.dict("os.environ", {"POOL_CAPACITY_POLL_INTERVAL": "100"})
+        env_patcher.start()
+        self.addCleanup(env_patcher.stop)
+
+    def _get_available_capacity(self, array_connection_info=ARRAY_CONNECTION_INFO):
+        return self.pollers.get_available_capacity(array_connection_info, POOL)
+
+    def _get_polled_available_capacity(self, array_connection_info=ARRAY_CONNECTION_INFO):
+        self._get_available_capacity(array_connection_info)
+        key = (ENDPOINT_KEY, array_connection_info.user, POOL)
+        self.assertTrue(self.pollers._pollers[key].first_poll_done.wait(5))
+        return self._get_available_capacity(array_connection_info)
+
+    def test_get_available_capacity_is_answered_from_the_last_poll(self):
+        self.assertEqual(AVAILABLE_CAPACITY, self._get_polled_available_capacity())
+        self.assertEqual(AVAILABLE_CAPACITY, self._get_available_capacity())
+        self.mediator.get_pool_available_capacity.assert_called_once_with(POOL)
+        self.get_agent.assert_called_once_with(ARRAY_CONNECTION_INFO)
+
+    def test_get_available_capacity_does_not_wait_for_the_first_poll(self):
+        polled = Event()
+        self.mediator.get_pool_available_capacity.side_effect = lambda pool: polled.wait(5)
+        self.assertIsNone(self._get_available_capacity())
+        polled.set()
+
+    def test_get_available_capacity_of_missing_pool(self):
+        self.mediator.get_pool_available_capacity.side_effect = array_errors.PoolDoesNotExist(POOL, ENDPOINT_KEY)
+        with self.assertRaises(array_errors.PoolDoesNotExist):
+            self._get_polled_available_capacity()
+
+    def test_get_available_capacity_when_poll_fails(self):
+        self.mediator.get_pool_available_capacity.side_effect = Exception("error")
+        self.assertIsNone(self._get_polled_available_capacity())
+
+    def test_get_available_capacity_when_storage_is_not_connected(self):
+        self.get_agent.side_effect = Exception("error")
+        self.assertIsNone(self._get_polled_available_capacity())
+
+    def test_pools_of_different_users_are_polled_separately(self):
+        other_user_connection_info = get_fake_array_connection_info(user="other", array_addresses=[ENDPOINT_KEY])
+        self._get_polled_available_capacity()
+        self._get_polled_available_capacity(other_user_connection_info)
+        self.assertEqual(2, self.mediator.get_pool_available_capacity.call_count)
+
+
+class TestPoolCapacityPoller(unittest.TestCase):
+
+    @patch("{}.random.uniform".format(POLLER_PATH))
+    def test_interval_is_jittered(self, uniform):
+        uniform.return_value = 1.1
+        poller = PoolCapacityPoller(ARRAY_CONNECTION_INFO, POOL, 60, Mock())
+        self.assertAlmostEqual(66, poller._get_jittered_interval())
+        uniform.assert_called_once_with(0.8, 1.2)
+
+    @patch("{}.monotonic".format(POLLER_PATH))
+    def test_poller_is_idle_when_not_read_for_several_intervals(self, monotonic):
+        monotonic.return_value = 100
+        poller = PoolCapacityPoller(ARRAY_CONNECTION_INFO, POOL, 60, Mock())
+        monotonic.return_value = 700
+        self.assertFalse(poller._is_idle())
+        monotonic.return_value = 701
+        self.assertTrue(poller._is_idle())
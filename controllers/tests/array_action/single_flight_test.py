@@ -0,0 +1,136 @@
+import unittest
+from threading import Event, Thread
+
+from mock import Mock, patch
+from munch import Munch
+
+import controllers.array_action.errors as array_errors
+from controllers.array_action.single_flight import SingleFlight, single_flight
+
+KEY = "key"
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def setUp(self):
+        self.single_flight = SingleFlight()
+        self.leader_started = Event()
+        self.release_leader = Event()
+
+    def _blocking_function(self, result):
+        def function():
+            self.leader_started.set()
+            self.release_leader.wait()
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        return Mock(side_effect=function)
+
+    def _run_leader_and_follower(self, function, follower_key=KEY):
+        results = {}
+
+        def call(name, key):
+            try:
+                results[name] = self.single_flight.run(key, function)
+            except Exception as ex:
+                results[name] = ex
+
+        leader = Thread(target=call, args=("leader", KEY))
+        leader.start()
+        self.leader_started.wait()
+        follower = Thread(target=call, args=("follower", follower_key))
+        follower.start()
+        while self.single_flight.get_metrics()["calls"] < 2:
+            self.release_leader.wait(0.01)
+        self.release_leader.set()
+        leader.join()
+        follower.join()
+        return results
+
+    def test_identical_calls_in_flight_are_coalesced(self):
+        result = Munch({"name": "volume"})
+        function = self._blocking_function(result)
+
+        results = self._run_leader_and_follower(function)
+
+        function.assert_called_once_with()
+        self.assertEqual(result, results["leader"])
+        self.assertEqual(result, results["follower"])
+        self.assertIsNot(results["leader"], results["follower"])
+        self.assertEqual(1, self.single_flight.get_metrics()["coalesced"])
+
+    def test_different_calls_are_not_coalesced(self):
+        function = self._blocking_function("result")
+
+        self._run_leader_and_follower(function, follower_key="other_key")
+
+        self.assertEqual(2, function.call_count)
+
+    def test_error_is_raised_to_all_waiters(self):
+        error = Exception("failed")
+        function = self._blocking_function(error)
+
+        results = self._run_leader_and_follower(function)
+
+        function.assert_called_once_with()
+        self.assertIs(error, results["leader"])
+        self.assertIsNot(error, results["follower"])
+        self.assertIs(error, results["follower"].__cause__)
+        self.assertEqual(error.args, results["follower"].args)
+
+    def test_error_copy_keeps_its_type_and_attributes(self):
+        error = array_errors.ObjectNotFoundError("name")
+        function = self._blocking_function(error)
+
+        results = self._run_leader_and_follower(function)
+
+        self.assertIsInstance(results["follower"], array_errors.ObjectNotFoundError)
+        self.assertEqual(str(error), str(results["follower"]))
+        self.assertEqual(error.message, results["follower"].message)
+
+    def test_sequential_calls_are_not_coalesced(self):
+        function = Mock(return_value="result")
+        self.single_flight.run(KEY, function)
+        self.single_flight.run(KEY, function)
+        self.assertEqual(2, function.call_count)
+        self.assertEqual(0, self.single_flight.get_metrics()["in_flight"])
+
+    def test_nested_identical_call_runs_in_the_same_thread(self):
+        function = Mock(return_value="result")
+        result = self.single_flight.run(KEY, lambda: self.single_flight.run(KEY, function))
+        self.assertEqual("result", result)
+
+
+class _Mediator:
+    user = "user"
+    endpoint = ["endpoint"]
+
+    def __init__(self):
+        self.array_call = Mock(return_value="result")
+
+    @single_flight
+    def get_volume(self, name, pool=None):
+        return self.array_call(name, pool)
+
+
+class TestSingleFlightDecorator(unittest.TestCase):
+
+    def test_decorated_method_returns_the_result(self):
+        mediator = _Mediator()
+        self.assertEqual("result", mediator.get_volume("name", pool="pool"))
+        mediator.array_call.assert_called_once_with("name", "pool")
+
+    @patch("controllers.array_action.single_flight.array_reads_single_flight")
+    def test_decorated_method_is_keyed_by_endpoint_method_and_args(self, single_flight_mock):
+        _Mediator().get_volume("name", pool="pool")
+        key = single_flight_mock.run.call_args[0][0]
+        self.assertEqual(("_Mediator", "user", "['endpoint']", "get_volume"), key[:4])
+        self.assertIn("name", key[4])
+
+    @patch("controllers.array_action.single_flight.array_reads_single_flight")
+    @patch.dict("os.environ", {"ARRAY_SINGLE_FLIGHT": "false"})
+    def test_decorated_method_when_disabled(self, single_flight_mock):
+        mediator = _Mediator()
+        self.assertEqual("result", mediator.get_volume("name"))
+        single_flight_mock.run.assert_not_called()
@@ -1,4 +1,5 @@
 import unittest
+from itertools import chain, repeat
 from unittest.mock import MagicMock
 from datetime import datetime, timedelta
 
@@ -14,7 +15,10 @@ import controllers.tests.array_action.test_settings as array_settings
 import controllers.tests.common.test_settings as common_settings
 from controllers.array_action.array_action_types import ReplicationRequest
 from controllers.array_action.array_mediator_svc import SVCArrayMediator, build_kwargs_from_parameters, \
-    FCMAP_STATUS_DONE, YES
+    FCMAP_STATUS_DONE, YES, LIST_HOSTS_CMD_FORMAT
+from controllers.array_action.svc_inventory_cache import SVCInventory
+from controllers.array_action.svc_host_ports_index import svc_host_ports_indexes
+from controllers.array_action.lun_allocator import host_luns_allocators
 from controllers.array_action.settings import REPLICATION_TYPE_MIRROR, REPLICATION_TYPE_EAR, \
     RCRELATIONSHIP_STATE_READY, ENDPOINT_TYPE_PRODUCTION
 from controllers.common.node_info import Initiators
@@ -31,6 +35,8 @@ EMPTY_BYTES = b""
 class TestArrayMediatorSVC(unittest.TestCase):
 
     def setUp(self):
+        svc_host_ports_indexes.clear()
+        host_luns_allocators.clear()
         self.endpoint = [common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE]
         with patch("controllers.array_action.array_mediator_svc.SVCArrayMediator._connect"):
             self.svc = SVCArrayMediator(common_settings.SECRET_USERNAME_VALUE, common_settings.SECRET_PASSWORD_VALUE,
@@ -56,6 +62,10 @@ class TestArrayMediatorSVC(unittest.TestCase):
         self.svc.client.svcinfo.lsfcmap.return_value = Mock(as_list=self.fcmaps)
         del self.svc.client.svctask.addsnapshot
         del self.svc.client.svctask.chvolumereplicationinternals
+        self.svc._svcinfo_batch = self._run_svcinfo_queries_one_by_one
+
+    def _run_svcinfo_queries_one_by_one(self, queries):
+        return [getattr(self.svc.client.svcinfo, command_name)(**cli_kwargs) for command_name, cli_kwargs in queries]
 
     def _mock_node(self, node_id=svc_settings.DUMMY_INTERNAL_ID1, name=array_settings.DUMMY_NODE1_NAME,
                    iqn=array_settings.DUMMY_NODE1_IQN, status=svc_settings.ONLINE_STATUS):
@@ -1418,11 +1428,22 @@ class TestArrayMediatorSVC(unittest.TestCase):
                     array_settings.DUMMY_NODE3_IQN])
         hosts = [host_1, host_2, host_3]
         self.svc.client.svcinfo.lshost = Mock()
-        self.svc.client.svcinfo.lshost.return_value = self._get_hosts_list_result(hosts)
+        self.svc.client.svcinfo.lshost.side_effect = self._get_lshost_side_effect(
+            self._get_hosts_list_result(hosts), svc_response)
         self.svc.client.send_raw_command = Mock()
         self.svc.client.send_raw_command.return_value = EMPTY_BYTES, EMPTY_BYTES
         svc_response.return_value = hosts
 
+    @staticmethod
+    def _get_lshost_side_effect(hosts_list, svc_response):
+        def lshost(object_id=None):
+            if object_id is None:
+                return hosts_list
+            detailed_hosts = [host for host in svc_response.return_value if object_id in (host.id, host.name)]
+            return Mock(as_single_element=detailed_hosts[0] if detailed_hosts else None)
+
+        return lshost
+
     def _prepare_mocks_for_get_host_by_identifiers_backward_compatible(self, svc_response):
         self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
         del self.svc.client.svcinfo.lshostiplogin
@@ -1671,6 +1692,91 @@ class TestArrayMediatorSVC(unittest.TestCase):
              array_settings.ISCSI_CONNECTIVITY_TYPE},
             connectivity_types)
 
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_uses_hosts_ports_index(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        initiators = Initiators([], [array_settings.DUMMY_FC_WWN2.upper()], [])
+        for _ in range(2):
+            hostname, connectivity_types = self.svc.get_host_by_host_identifiers(initiators)
+            self.assertEqual(array_settings.DUMMY_HOST_NAME2, hostname)
+            self.assertEqual([array_settings.FC_CONNECTIVITY_TYPE], connectivity_types)
+        self.svc.client.send_raw_command.assert_called_once()
+
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_after_create_host_without_rebuilding_index(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        with self.assertRaises(array_errors.HostNotFoundError):
+            self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        self.svc.create_host(common_settings.HOST_NAME, Initiators([], [array_settings.DUMMY_FC_WWN4], []),
+                             array_settings.FC_CONNECTIVITY_TYPE, "")
+        new_host = self._get_host_as_munch(array_settings.DUMMY_HOST_ID4, common_settings.HOST_NAME,
+                                           wwpns_list=[array_settings.DUMMY_FC_WWN4])
+        svc_response.return_value = svc_response.return_value + [new_host]
+        hostname, _ = self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        self.assertEqual(common_settings.HOST_NAME, hostname)
+        self.svc.client.send_raw_command.assert_called_once()
+
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_after_delete_host(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN2], []))
+        self.svc.delete_host(array_settings.DUMMY_HOST_NAME2)
+        svc_response.return_value = svc_response.return_value[:1]
+        with self.assertRaises(array_errors.HostNotFoundError):
+            self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN2], []))
+
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_after_ports_moved_between_hosts(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN2], []))
+        host_1, host_2, _ = svc_response.return_value
+        host_1.port_count = "2"
+        self.svc.remove_ports_from_host(array_settings.DUMMY_HOST_NAME2, [array_settings.DUMMY_FC_WWN2],
+                                        array_settings.FC_CONNECTIVITY_TYPE)
+        self.svc.add_ports_to_host(array_settings.DUMMY_HOST_NAME1, Initiators([], [array_settings.DUMMY_FC_WWN2], []),
+                                   array_settings.FC_CONNECTIVITY_TYPE)
+        host_1.WWPN = [array_settings.DUMMY_FC_WWN1, array_settings.DUMMY_FC_WWN2]
+        del host_2.WWPN
+        hostname, _ = self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN2], []))
+        self.assertEqual(array_settings.DUMMY_HOST_NAME1, hostname)
+        self.svc.client.send_raw_command.assert_called_once()
+
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_reads_only_the_changed_hosts(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        with self.assertRaises(array_errors.HostNotFoundError):
+            self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        new_host = self._get_host_as_munch(array_settings.DUMMY_HOST_ID4, common_settings.HOST_NAME,
+                                           wwpns_list=[array_settings.DUMMY_FC_WWN4])
+        self.svc.client.svcinfo.lshost().append(Munch(new_host))
+        svc_response.return_value = svc_response.return_value + [new_host]
+        hostname, _ = self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        self.assertEqual(common_settings.HOST_NAME, hostname)
+        self.assertEqual(2, self.svc.client.send_raw_command.call_count)
+        self.svc.client.send_raw_command.assert_called_with(
+            LIST_HOSTS_CMD_FORMAT.format(HOST_ID=array_settings.DUMMY_HOST_ID4))
+
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_does_not_rebuild_index_within_min_interval(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN1], []))
+        host_1 = svc_response.return_value[0]
+        host_1.WWPN = [array_settings.DUMMY_FC_WWN1, array_settings.DUMMY_FC_WWN4]
+        with self.assertRaises(array_errors.HostNotFoundError):
+            self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        self.svc.client.send_raw_command.assert_called_once()
+
+    @patch.dict("os.environ", {"SVC_HOSTS_PORTS_INDEX_MIN_REBUILD_INTERVAL": "0"})
+    @patch.object(SVCResponse, svc_settings.SVC_RESPONSE_AS_LIST, new_callable=PropertyMock)
+    def test_get_host_by_identifiers_slow_rebuilds_index_after_min_interval(self, svc_response):
+        self._prepare_mocks_for_get_host_by_identifiers_slow(svc_response)
+        self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN1], []))
+        host_1 = svc_response.return_value[0]
+        host_1.WWPN = [array_settings.DUMMY_FC_WWN1, array_settings.DUMMY_FC_WWN4]
+        hostname, _ = self.svc.get_host_by_host_identifiers(Initiators([], [array_settings.DUMMY_FC_WWN4], []))
+        self.assertEqual(array_settings.DUMMY_HOST_NAME1, hostname)
+        self.assertEqual(2, self.svc.client.send_raw_command.call_count)
+
     def _get_host_as_munch(self, host_id, host_name, nqn_list=None, wwpns_list=None, iscsi_names_list=None,
                            portset_id=None):
         host = Munch(id=host_id, name=host_name)
@@ -1724,11 +1830,11 @@ class TestArrayMediatorSVC(unittest.TestCase):
         mappings = self.svc.get_volume_mappings(common_settings.VOLUME_UID)
         self.assertEqual({"host_0": "0", "host_1": "1"}, mappings)
 
-    def test_get_free_lun_raises_host_not_found_error(self):
+    def test_reserve_free_lun_raises_host_not_found_error(self):
         self.svc.client.svcinfo.lshostvdiskmap.side_effect = [
             svc_errors.CommandExecutionError(array_settings.DUMMY_ERROR_MESSAGE)]
         with self.assertRaises(array_errors.HostNotFoundError):
-            self.svc._get_free_lun(common_settings.HOST_NAME)
+            self.svc._reserve_free_lun(common_settings.HOST_NAME)
 
     def _get_mock_host_list(self, lun_list):
         maps = []
@@ -1740,29 +1846,26 @@ class TestArrayMediatorSVC(unittest.TestCase):
                                                 host_name="host_{}".format(index)))
         return maps
 
-    def _test_get_free_lun_host_mappings(self, lun_list, expected_lun="0"):
+    def _test_reserve_free_lun_host_mappings(self, lun_list, expected_lun="0"):
         maps = self._get_mock_host_list(lun_list)
         self.svc.client.svcinfo.lshostvdiskmap.return_value = maps
-        lun = self.svc._get_free_lun(common_settings.HOST_NAME)
+        lun = self.svc._reserve_free_lun(common_settings.HOST_NAME)
         if lun_list:
             self.assertNotIn(lun, lun_list)
         self.assertEqual(lun, expected_lun)
 
-    @patch("controllers.array_action.array_mediator_svc.choice")
-    def test_get_free_lun_with_no_host_mappings(self, random_choice):
-        random_choice.return_value = "0"
-        self._test_get_free_lun_host_mappings([])
+    def test_reserve_free_lun_with_no_host_mappings(self):
+        self._test_reserve_free_lun_host_mappings([])
 
     @patch.object(SVCArrayMediator, "MAX_LUN_NUMBER", 2)
     @patch.object(SVCArrayMediator, "MIN_LUN_NUMBER", 0)
-    def test_get_free_lun_success(self):
-        self._test_get_free_lun_host_mappings(("1", "2"))
+    def test_reserve_free_lun_success(self):
+        self._test_reserve_free_lun_host_mappings(("1", "2"))
 
     @patch.object(SVCArrayMediator, "MAX_LUN_NUMBER", 4)
     @patch.object(SVCArrayMediator, "MIN_LUN_NUMBER", 0)
-    @patch("controllers.array_action.array_mediator_svc.LUN_INTERVAL", 1)
-    def test_get_free_lun_in_interval_success(self):
-        self._test_get_free_lun_host_mappings(("0", "1"), expected_lun="2")
+    def test_reserve_free_lun_lowest_free_success(self):
+        self._test_reserve_free_lun_host_mappings(("0", "1", "3"), expected_lun="2")
 
     @patch.object(SVCArrayMediator, "MAX_LUN_NUMBER", 3)
     @patch.object(SVCArrayMediator, "MIN_LUN_NUMBER", 1)
@@ -1770,11 +1873,66 @@ class TestArrayMediatorSVC(unittest.TestCase):
         maps = self._get_mock_host_list(("1", "2", "3"))
         self.svc.client.svcinfo.lshostvdiskmap.return_value = maps
         with self.assertRaises(array_errors.NoAvailableLunError):
-            self.svc._get_free_lun(common_settings.HOST_NAME)
+            self.svc._reserve_free_lun(common_settings.HOST_NAME)
 
-    @patch("controllers.array_action.array_mediator_svc.SVCArrayMediator._get_free_lun")
-    def _test_map_volume_mkvdiskhostmap_error(self, client_error, expected_error, mock_get_free_lun):
-        mock_get_free_lun.return_value = array_settings.DUMMY_LUN_ID
+    def test_reserve_free_lun_does_not_repeat_reserved_luns(self):
+        self.svc.client.svcinfo.lshostvdiskmap.return_value = self._get_mock_host_list(("0",))
+        first_lun = self.svc._reserve_free_lun(common_settings.HOST_NAME)
+        second_lun = self.svc._reserve_free_lun(common_settings.HOST_NAME)
+        self.assertEqual(("1", "2"), (first_lun, second_lun))
+        self.svc.client.svcinfo.lshostvdiskmap.assert_called_once_with(host=common_settings.HOST_NAME)
+
+    def _prepare_mocks_for_map_volume(self):
+        self.svc.client.svcinfo.lshostvdiskmap.return_value = []
+        self.svc.client.svcinfo.lsvdisk.return_value = Mock(
+            as_single_element=self._get_cli_volume(name=common_settings.VOLUME_NAME))
+
+    def _map_volume(self):
+        return self.svc.map_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME,
+                                   array_settings.DUMMY_CONNECTIVITY_TYPE)
+
+    def test_map_volume_keeps_used_luns_of_host(self):
+        self._prepare_mocks_for_map_volume()
+        self.assertEqual("0", self._map_volume())
+        self.assertEqual("1", self._map_volume())
+        self.svc.client.svcinfo.lshostvdiskmap.assert_called_once_with(object_id=common_settings.HOST_NAME)
+
+    @patch("controllers.array_action.array_mediator_svc.is_warning_message", Mock(return_value=False))
+    def test_map_volume_lun_already_in_use_skips_the_lun(self):
+        self._prepare_mocks_for_map_volume()
+        self.svc.client.svctask.mkvdiskhostmap.side_effect = [CLIFailureError("CMMVC5879E"), None]
+        with self.assertRaises(array_errors.LunAlreadyInUseError):
+            self._map_volume()
+        self.assertEqual("1", self._map_volume())
+
+    @patch("controllers.array_action.array_mediator_svc.is_warning_message", Mock(return_value=False))
+    def test_map_volume_failure_releases_the_lun(self):
+        self._prepare_mocks_for_map_volume()
+        self.svc.client.svctask.mkvdiskhostmap.side_effect = [CLIFailureError(array_settings.DUMMY_ERROR_MESSAGE), None]
+        with self.assertRaises(array_errors.MappingError):
+            self._map_volume()
+        self.assertEqual("0", self._map_volume())
+
+    def test_unmap_volume_frees_the_lun(self):
+        self._prepare_mocks_for_map_volume()
+        self.assertEqual("0", self._map_volume())
+        self.svc.unmap_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME)
+        self.assertEqual("0", self._map_volume())
+        self.svc.client.svcinfo.lshostvdiskmap.assert_called_once_with(object_id=common_settings.HOST_NAME)
+
+    def test_map_volume_reads_volume_and_host_mappings_in_one_batch(self):
+        self._prepare_mocks_for_map_volume()
+        self.svc._svcinfo_batch = Mock(side_effect=self._run_svcinfo_queries_one_by_one)
+        self.assertEqual("0", self._map_volume())
+        self.assertEqual("1", self._map_volume())
+        filtervalue = self._get_filtervalue(svc_settings.VOLUME_VDISK_UID_ATTR_KEY, common_settings.VOLUME_UID)
+        self.svc._svcinfo_batch.assert_called_once_with([
+            ("lsvdisk", {"bytes": True, "filtervalue": filtervalue}),
+            ("lshostvdiskmap", {"object_id": common_settings.HOST_NAME})])
+
+    @patch("controllers.array_action.array_mediator_svc.SVCArrayMediator._reserve_free_lun")
+    def _test_map_volume_mkvdiskhostmap_error(self, client_error, expected_error, mock_reserve_free_lun):
+        mock_reserve_free_lun.return_value = array_settings.DUMMY_LUN_ID
         self._test_mediator_method_client_error(self.svc.map_volume, (
             common_settings.VOLUME_UID, common_settings.HOST_NAME,
             array_settings.DUMMY_CONNECTIVITY_TYPE),
@@ -1792,9 +1950,9 @@ class TestArrayMediatorSVC(unittest.TestCase):
                                                    array_errors.MappingError)
         self._test_map_volume_mkvdiskhostmap_error(Exception, Exception)
 
-    @patch("controllers.array_action.array_mediator_svc.SVCArrayMediator._get_free_lun")
-    def test_map_volume_success(self, mock_get_free_lun):
-        mock_get_free_lun.return_value = array_settings.DUMMY_LUN_ID
+    @patch("controllers.array_action.array_mediator_svc.SVCArrayMediator._reserve_free_lun")
+    def test_map_volume_success(self, mock_reserve_free_lun):
+        mock_reserve_free_lun.return_value = array_settings.DUMMY_LUN_ID
         self.svc.client.svctask.mkvdiskhostmap.return_value = None
         self.svc.client.svcinfo.lsvdisk.return_value = Mock(
             as_single_element=self._get_cli_volume(name=common_settings.VOLUME_NAME))
@@ -1841,6 +1999,59 @@ class TestArrayMediatorSVC(unittest.TestCase):
         self.svc.client.svctask.rmvdiskhostmap.return_value = None
         self.svc.unmap_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME)
 
+    def test_svctask_batch_sends_all_commands_in_one_channel(self):
+        self.svc.client.send_raw_command.return_value = (
+            b"csi411049e2batch\nerror411049e268734c0c996d65b3854f1113 1\ncsi411049e2batch\n",
+            b"CMMVC5879E The command failed.\n")
+        results = self.svc._svctask_batch([
+            ("mkvdiskhostmap", {"host": common_settings.HOST_NAME, "object_id": "volume1", "force": True,
+                                "scsi": "0"}),
+            ("rmvdiskhostmap", {"host": common_settings.HOST_NAME, "vdisk_id": "volume2"})])
+        self.svc.client.send_raw_command.assert_called_once()
+        batch_cmd = self.svc.client.send_raw_command.call_args[0][0]
+        self.assertIn("svctask mkvdiskhostmap -host '{}' -force -scsi 0 volume1".format(common_settings.HOST_NAME),
+                      batch_cmd)
+        self.assertIn("svctask rmvdiskhostmap -host '{}' volume2".format(common_settings.HOST_NAME), batch_cmd)
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], CLIFailureError)
+        self.assertIn("CMMVC5879E", results[1].my_message)
+
+    def test_svctask_batch_with_unmatched_errors_runs_the_failed_commands_one_by_one(self):
+        self.svc.client.send_raw_command.return_value = (
+            b"error411049e268734c0c996d65b3854f1113 1\ncsi411049e2batch\n"
+            b"error411049e268734c0c996d65b3854f1113 1\ncsi411049e2batch\n",
+            b"CMMVC5879E The command failed.\n")
+        self.svc.client.svctask.rmvdiskhostmap.side_effect = [CLIFailureError("CMMVC5842E")]
+        results = self.svc._svctask_batch([
+            ("mkvdiskhostmap", {"host": common_settings.HOST_NAME, "object_id": "volume1", "force": True,
+                                "scsi": "0"}),
+            ("rmvdiskhostmap", {"host": common_settings.HOST_NAME, "vdisk_id": "volume2"})])
+        self.svc.client.svctask.mkvdiskhostmap.assert_called_once_with(
+            host=common_settings.HOST_NAME, object_id="volume1", force=True, scsi="0")
+        self.svc.client.svctask.rmvdiskhostmap.assert_called_once_with(host=common_settings.HOST_NAME,
+                                                                       vdisk_id="volume2")
+        self.assertIsNone(results[0])
+        self.assertIn("CMMVC5842E", str(results[1]))
+
+    @patch.dict("os.environ", {"HOST_MAPPINGS_BATCH_WINDOW": "0.01"})
+    @patch("controllers.array_action.array_mediator_svc.is_warning_message", Mock(return_value=False))
+    def test_map_volume_with_batch_window_raises_the_error_of_its_command(self):
+        self._prepare_mocks_for_map_volume()
+        self.svc._svctask_batch = Mock(return_value=[CLIFailureError("CMMVC5879E")])
+        with self.assertRaises(array_errors.LunAlreadyInUseError):
+            self._map_volume()
+        self.svc._svctask_batch.assert_called_once_with([
+            ("mkvdiskhostmap", {"host": common_settings.HOST_NAME, "object_id": common_settings.VOLUME_NAME,
+                                "force": True, "scsi": "0"})])
+        self.svc.client.svctask.mkvdiskhostmap.assert_not_called()
+
+    @patch.dict("os.environ", {"HOST_MAPPINGS_BATCH_WINDOW": "0.01"})
+    def test_unmap_volume_with_batch_window_success(self):
+        self.svc._svctask_batch = Mock(return_value=[None])
+        self.svc.unmap_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME)
+        self.svc._svctask_batch.assert_called_once()
+        self.svc.client.svctask.rmvdiskhostmap.assert_not_called()
+
     def _prepare_mocks_for_get_iscsi_targets(self, portset_id=None):
         host = self._get_host_as_munch(array_settings.DUMMY_HOST_ID1, common_settings.HOST_NAME, wwpns_list=[
             array_settings.DUMMY_FC_WWN1],
@@ -1918,6 +2129,121 @@ class TestArrayMediatorSVC(unittest.TestCase):
         with self.assertRaises(Exception):
             self.svc.get_iscsi_targets_by_iqn(common_settings.HOST_NAME)
 
+    def _svcinfo_batch(self, queries):
+        return SVCArrayMediator._svcinfo_batch(self.svc, queries)
+
+    def test_svcinfo_batch_sends_one_command_and_splits_the_responses(self):
+        self.svc.client.send_raw_command.return_value = (
+            "id,name,status\n1,node1,online\ncsi411049e2batch\n"
+            "id,2\nname,host1\nportset_id,64\ncsi411049e2batch\n").encode(), EMPTY_BYTES
+
+        nodes, hosts = self._svcinfo_batch([("lsnode", {}), ("lshost", {"object_id": "host 1"})])
+
+        self.svc.client.send_raw_command.assert_called_once()
+        batch_cmd = self.svc.client.send_raw_command.call_args[0][0]
+        self.assertIn("svcinfo lsnode -delim , ||", batch_cmd)
+        self.assertIn("svcinfo lshost -delim , 'host 1' ||", batch_cmd)
+        self.assertEqual("node1", nodes.as_list[0].name)
+        self.assertEqual("64", hosts.as_single_element.portset_id)
+
+    def test_svcinfo_batch_adds_the_kwargs_as_flags(self):
+        self.svc.client.send_raw_command.return_value = b"csi411049e2batch\n", EMPTY_BYTES
+
+        responses = self._svcinfo_batch([("lsvdisk", {"bytes": True, "filtervalue": "vdisk_UID=1"})])
+
+        batch_cmd = self.svc.client.send_raw_command.call_args[0][0]
+        self.assertIn("svcinfo lsvdisk -delim , -bytes -filtervalue 'vdisk_UID=1' ||", batch_cmd)
+        self.assertIsNone(responses[0].as_single_element)
+
+    def test_svcinfo_batch_raises_when_a_command_fails(self):
+        self.svc.client.send_raw_command.return_value = (
+            b"id,name\n1,node1\ncsi411049e2batch\nerror411049e268734c0c996d65b3854f1113 1\ncsi411049e2batch\n",
+            b"CMMVC5753E The specified object does not exist")
+
+        with self.assertRaises(CLIFailureError):
+            self._svcinfo_batch([("lsnode", {}), ("lshost", {"object_id": "host1"})])
+
+    def test_get_pool_available_capacity(self):
+        self.svc.client.svcinfo.lsmdiskgrp.return_value = Mock(as_single_element=Munch({"free_capacity": "2048"}))
+
+        self.assertEqual(2048, self.svc.get_pool_available_capacity(common_settings.DUMMY_POOL1))
+
+        self.svc.client.svcinfo.lsmdiskgrp.assert_called_once_with(
+            bytes=True, filtervalue="name={}".format(common_settings.DUMMY_POOL1))
+
+    def test_get_pool_available_capacity_of_missing_pool(self):
+        self.svc.client.svcinfo.lsmdiskgrp.return_value = Mock(as_single_element=None)
+
+        with self.assertRaises(array_errors.PoolDoesNotExist):
+            self.svc.get_pool_available_capacity(common_settings.DUMMY_POOL1)
+
+    def _prepare_mocks_for_list_volumes(self, rows):
+        header = "id,name,mdisk_grp_name,capacity,vdisk_UID\n"
+        self.svc.client.send_raw_command.side_effect = chain([((header + rows).encode(), EMPTY_BYTES)],
+                                                             repeat((header.encode(), EMPTY_BYTES)))
+
+    def test_list_volumes_streams_the_concise_lsvdisk_rows(self):
+        self._prepare_mocks_for_list_volumes("3,vol1,pool1,1024,uid1\n"
+                                             "8,vol2,pool2,2048,uid2\n")
+
+        listed_volumes = list(self.svc.list_volumes("", None))
+
+        command = self.svc.client.send_raw_command.call_args_list[0][0][0]
+        self.assertIn("svcinfo lsvdisk -delim , -bytes -filtervalue 'id>-1:id<1000' ||", command)
+        self.assertEqual(["3", "8"], [token for _, token in listed_volumes])
+        volume = listed_volumes[1][0]
+        self.assertEqual(("vol2", "uid2", "8", "pool2", 2048),
+                         (volume.name, volume.id, volume.internal_id, volume.pool, volume.capacity_bytes))
+        self.assertIsNone(volume.source_id)
+        self.svc.client.svcinfo.lsvdisk.assert_not_called()
+
+    def test_list_volumes_from_token_with_name_prefix(self):
+        self._prepare_mocks_for_list_volumes("8,vol2,pool2,2048,uid2\n")
+
+        listed_volumes = list(self.svc.list_volumes("3", "vol"))
+
+        command = self.svc.client.send_raw_command.call_args_list[0][0][0]
+        self.assertIn("-filtervalue 'id>3:id<1004:name=vol*'", command)
+        self.assertEqual(["8"], [token for _, token in listed_volumes])
+
+    def test_list_volumes_reads_the_volume_ids_window_by_window(self):
+        self._prepare_mocks_for_list_volumes("3,vol1,pool1,1024,uid1\n")
+
+        listed_volumes = self.svc.list_volumes("", None)
+        next(listed_volumes)
+        self.svc.client.send_raw_command.assert_called_once()
+        self.assertEqual([], list(listed_volumes))
+
+        commands = [call_args[0][0] for call_args in self.svc.client.send_raw_command.call_args_list]
+        self.assertEqual(18, len(commands))
+        self.assertIn("-filtervalue 'id>999:id<2000'", commands[1])
+        self.assertIn("-filtervalue 'id>16999' ||", commands[-1])
+
+    def test_list_volumes_with_invalid_token(self):
+        with self.assertRaises(array_errors.InvalidArgumentError):
+            next(self.svc.list_volumes("vol", None))
+
+    def test_list_volumes_with_invalid_filter(self):
+        self.svc.client.send_raw_command.return_value = (b"error411049e268734c0c996d65b3854f1113 1\n",
+                                                         b"CMMVC5741E The filter value is not valid.")
+
+        with self.assertRaises(array_errors.InvalidArgumentError):
+            next(self.svc.list_volumes("", "vol"))
+
+    def test_get_iscsi_targets_reads_nodes_and_host_in_one_batch(self):
+        self._prepare_mocks_for_get_iscsi_targets()
+        self.svc._svcinfo_batch = Mock(side_effect=self._run_svcinfo_queries_one_by_one)
+        self.svc.get_iscsi_targets_by_iqn(common_settings.HOST_NAME)
+        self.svc._svcinfo_batch.assert_called_once_with([("lsnode", {}),
+                                                         ("lshost", {"object_id": common_settings.HOST_NAME})])
+
+    def test_get_iscsi_targets_batch_failure_reads_one_by_one(self):
+        self._prepare_mocks_for_get_iscsi_targets()
+        self.svc._svcinfo_batch = Mock(side_effect=CLIFailureError(array_settings.DUMMY_ERROR_MESSAGE))
+        ips_by_iqn = self.svc.get_iscsi_targets_by_iqn(common_settings.HOST_NAME)
+        self.assertEqual({array_settings.DUMMY_NODE1_IQN: [array_settings.DUMMY_IP_ADDRESS1]}, ips_by_iqn)
+        self.svc.client.svcinfo.lsnode.assert_called_once_with()
+
     def _mock_cli_port_ip(self, node_id=svc_settings.DUMMY_INTERNAL_ID1,
                           ip_addr=array_settings.DUMMY_IP_ADDRESS1,
                           ip_addr6=None):
@@ -2586,3 +2912,85 @@ class TestArrayMediatorSVC(unittest.TestCase):
                       version='1.7.0')
 
         self.svc.client.svctask.registerplugin.assert_has_calls([call_1, call_2])
+
+    def _prepare_inventory(self):
+        self.svc._inventory = SVCInventory(self.svc.endpoint, refresh_interval=30)
+        self.svc._inventory.keep_refreshed = Mock()
+        cli_volume = self._get_cli_volume()
+        self.svc.client.svcinfo.lsvdisk.return_value = Mock(as_single_element=cli_volume, as_list=[cli_volume])
+        self.svc.client.svcinfo.lshost.return_value = Mock(as_list=[])
+        self.svc.client.svcinfo.lsfcmap.return_value = Mock(as_list=[])
+        return cli_volume
+
+    def test_get_volume_twice_served_from_inventory(self):
+        self._prepare_inventory()
+        for _ in range(2):
+            volume = self.svc.get_volume(common_settings.SOURCE_VOLUME_NAME, pool=common_settings.DUMMY_POOL1,
+                                         is_virt_snap_func=False)
+            self.assertEqual(common_settings.VOLUME_UID, volume.id)
+        self.svc.client.svcinfo.lsvdisk.assert_called_once()
+        self.svc._inventory.keep_refreshed.assert_called()
+        metrics = self.svc._inventory.get_metrics()
+        self.assertEqual(1, metrics["vdisk"]["hits"])
+        self.assertEqual(1, metrics["vdisk"]["misses"])
+
+    def test_get_cli_volume_by_wwn_served_from_inventory(self):
+        cli_volume = self._prepare_inventory()
+        self.svc._get_cli_volume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc.client.svcinfo.lsvdisk.reset_mock()
+        self.assertEqual(cli_volume, self.svc._get_cli_volume_by_wwn(common_settings.VOLUME_UID.lower()))
+        self.svc.client.svcinfo.lsvdisk.assert_not_called()
+
+    def test_refresh_inventory(self):
+        cli_volume = self._prepare_inventory()
+        self.svc.refresh_inventory()
+        self.svc.client.svcinfo.lsvdisk.assert_called_once_with(bytes=True)
+        self.svc.client.svcinfo.lshost.assert_called_once_with()
+        self.svc.client.svcinfo.lsfcmap.assert_called_once_with()
+        self.assertEqual([], self.svc._inventory.get_fcmaps(cli_volume.name, "source"))
+
+    def test_rmvolume_invalidates_inventory_volume(self):
+        self._prepare_inventory()
+        self.svc._get_cli_volume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc._rmvolume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc.client.svcinfo.lsvdisk.reset_mock()
+        self.svc._get_cli_volume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc.client.svcinfo.lsvdisk.assert_called_once_with(object_id=common_settings.SOURCE_VOLUME_NAME,
+                                                                bytes=True)
+
+    def test_failed_rmvolumegroup_invalidates_inventory_volumes(self):
+        self._prepare_inventory()
+        self.svc._get_cli_volume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc.client.svctask.rmvolumegroup.side_effect = [CLIFailureError('Failed "CMMVC1234E failed"')]
+        with self.assertRaises(CLIFailureError):
+            self.svc._rmvolumegroup(common_settings.VOLUME_GROUP_NAME)
+        self.svc.client.svcinfo.lsvdisk.reset_mock()
+        self.svc._get_cli_volume(common_settings.SOURCE_VOLUME_NAME)
+        self.svc.client.svcinfo.lsvdisk.assert_called_once_with(object_id=common_settings.SOURCE_VOLUME_NAME,
+                                                                bytes=True)
+
+    def test_map_volume_invalidates_inventory_host(self):
+        self._prepare_inventory()
+        self.svc.client.svcinfo.lshost.return_value = Mock(
+            as_single_element=self._get_host_as_munch(array_settings.DUMMY_HOST_ID1, array_settings.DUMMY_HOST_NAME1,
+                                                      wwpns_list=[array_settings.DUMMY_FC_WWN1]),
+            as_list=[])
+        self.svc.client.svcinfo.lshostvdiskmap.return_value = []
+        self.svc.get_host_by_name(array_settings.DUMMY_HOST_NAME1)
+        self.svc.get_host_by_name(array_settings.DUMMY_HOST_NAME1)
+        self.assertEqual(1, self.svc.client.svcinfo.lshost.call_count)
+        self.svc.map_volume(common_settings.VOLUME_UID, array_settings.DUMMY_HOST_NAME1,
+                            array_settings.DUMMY_CONNECTIVITY_TYPE)
+        self.svc.get_host_by_name(array_settings.DUMMY_HOST_NAME1)
+        self.assertEqual(2, self.svc.client.svcinfo.lshost.call_count)
+
+    def test_add_io_group_to_host_invalidates_inventory_host(self):
+        self._prepare_inventory()
+        self.svc.client.svcinfo.lshost.return_value = Mock(
+            as_single_element=self._get_host_as_munch(array_settings.DUMMY_HOST_ID1, array_settings.DUMMY_HOST_NAME1,
+                                                      wwpns_list=[array_settings.DUMMY_FC_WWN1]),
+            as_list=[])
+        self.svc.get_host_by_name(array_settings.DUMMY_HOST_NAME1)
+        self.svc.add_io_group_to_host(array_settings.DUMMY_HOST_NAME1, array_settings.DUMMY_IO_GROUP_TO_ADD)
+        self.svc.get_host_by_name(array_settings.DUMMY_HOST_NAME1)
+        self.assertEqual(2, self.svc.client.svcinfo.lshost.call_count)
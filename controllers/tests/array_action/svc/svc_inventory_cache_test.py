@@ -0,0 +1,165 @@
+import unittest
+from threading import Event
+
+from mock import Mock
+from munch import Munch
+
+from controllers.array_action.svc_inventory_cache import SVCInventory, SVCInventoryCache
+
+ENDPOINT = "endpoint"
+VOLUME_ID = "1"
+VOLUME_NAME = "volume_name"
+VOLUME_UID = "6005076810810000000000000000001A"
+HOST_ID = "2"
+HOST_NAME = "host_name"
+FCMAP_ID = "3"
+
+
+def _get_cli_volume(capacity="1024", fc_id=""):
+    return Munch({"id": VOLUME_ID, "name": VOLUME_NAME, "vdisk_UID": VOLUME_UID, "capacity": capacity,
+                  "FC_id": fc_id, "fc_map_count": "0", "copy_count": "1", "volume_group_id": ""})
+
+
+def _get_cli_host(port_count="1"):
+    return Munch({"id": HOST_ID, "name": HOST_NAME, "port_count": port_count, "protocol": "scsi"})
+
+
+def _get_fcmap():
+    return Munch({"id": FCMAP_ID, "source_vdisk_name": VOLUME_NAME, "target_vdisk_name": "target"})
+
+
+class TestSVCInventory(unittest.TestCase):
+
+    def setUp(self):
+        self.inventory = SVCInventory(ENDPOINT, refresh_interval=30)
+        self.addCleanup(self.inventory.stop_refresher)
+
+    def _add_volume(self, cli_volume=None):
+        self.inventory.add_volume(cli_volume or _get_cli_volume(), self.inventory.generation)
+
+    def test_get_volume_by_name_id_and_uid(self):
+        cli_volume = _get_cli_volume()
+        self._add_volume(cli_volume)
+        self.assertEqual(cli_volume, self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertEqual(cli_volume, self.inventory.get_volume_by_name(VOLUME_ID))
+        self.assertEqual(cli_volume, self.inventory.get_volume_by_uid(VOLUME_UID.lower()))
+
+    def test_add_volume_read_before_invalidation_is_ignored(self):
+        generation = self.inventory.generation
+        self.inventory.invalidate_volume(VOLUME_NAME)
+        self.inventory.add_volume(_get_cli_volume(), generation)
+        self.assertIsNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+
+    def test_invalidate_volume(self):
+        self._add_volume()
+        self.inventory.invalidate_volume(VOLUME_ID)
+        self.assertIsNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertIsNone(self.inventory.get_volume_by_uid(VOLUME_UID))
+
+    def test_add_volume_read_before_other_volume_invalidation_is_added(self):
+        generation = self.inventory.generation
+        self.inventory.invalidate_volume("other_volume")
+        self.inventory.add_volume(_get_cli_volume(), generation)
+        self.assertIsNotNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+
+    def test_add_volume_read_before_invalidation_by_other_key_is_ignored(self):
+        generation = self.inventory.generation
+        self.inventory.invalidate_volume(VOLUME_ID)
+        self.inventory.add_volume(_get_cli_volume(), generation)
+        self.assertIsNone(self.inventory.get_volume_by_uid(VOLUME_UID))
+
+    def test_add_host_read_before_invalidation_is_ignored(self):
+        generation = self.inventory.generation
+        self.inventory.invalidate_host(HOST_NAME)
+        self.inventory.add_host(_get_cli_host(), generation)
+        self.assertIsNone(self.inventory.get_host_by_name(HOST_ID))
+
+    def test_keep_refreshed_refreshes_over_its_own_mediator(self):
+        refreshed = Event()
+        mediator = Mock()
+        mediator.refresh_inventory.side_effect = refreshed.set
+        connect = Mock(return_value=mediator)
+        self.inventory.keep_refreshed(connect)
+        self.inventory.keep_refreshed(connect)
+        self.assertTrue(refreshed.wait(5))
+        refresher = self.inventory._refresher
+        self.inventory.stop_refresher()
+        refresher.join(5)
+        connect.assert_called_once_with()
+        mediator.disconnect.assert_called_once_with()
+
+    def test_keep_refreshed_reconnects_after_failure(self):
+        self.inventory.refresh_interval = 0.01
+        refreshed = Event()
+        mediator = Mock()
+        mediator.refresh_inventory.side_effect = refreshed.set
+        connect = Mock(side_effect=[Exception("error"), mediator])
+        self.inventory.keep_refreshed(connect)
+        self.assertTrue(refreshed.wait(5))
+        self.assertEqual(2, connect.call_count)
+
+    def test_refresh_evicts_only_changed_objects(self):
+        self._add_volume()
+        self.inventory.add_host(_get_cli_host(), self.inventory.generation)
+        self.inventory.refresh([_get_cli_volume()], [_get_cli_host(port_count="2")], [], self.inventory.generation)
+        self.assertIsNotNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertIsNone(self.inventory.get_host_by_name(HOST_NAME))
+
+    def test_refresh_evicts_deleted_volume(self):
+        self._add_volume()
+        self.inventory.refresh([], [], [], self.inventory.generation)
+        self.assertIsNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+
+    def test_refresh_with_invalidation_in_progress_keeps_unchanged_entries(self):
+        self._add_volume()
+        self.inventory.add_host(_get_cli_host(), self.inventory.generation)
+        generation = self.inventory.generation
+        self.inventory.invalidate_host("other_host")
+        self.inventory.refresh([_get_cli_volume()], [_get_cli_host()], [], generation)
+        self.assertIsNotNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertIsNotNone(self.inventory.get_host_by_name(HOST_NAME))
+
+    def test_invalidate_volumes(self):
+        self._add_volume()
+        self.inventory.refresh([_get_cli_volume()], [], [_get_fcmap()], self.inventory.generation)
+        self.inventory.invalidate_volumes()
+        self.assertIsNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertIsNone(self.inventory.get_fcmaps(VOLUME_NAME, "source"))
+
+    def test_get_fcmaps_from_complete_table(self):
+        fcmap = _get_fcmap()
+        self.inventory.refresh([], [], [fcmap], self.inventory.generation)
+        self.assertEqual([fcmap], self.inventory.get_fcmaps(VOLUME_NAME, "source"))
+        self.assertEqual([fcmap], self.inventory.get_fcmaps("target", "target"))
+        self.assertEqual([], self.inventory.get_fcmaps(VOLUME_NAME, "target"))
+
+    def test_refresh_with_invalidation_in_progress_does_not_load_fcmaps(self):
+        generation = self.inventory.generation
+        self.inventory.invalidate_fcmaps()
+        self.inventory.refresh([], [], [_get_fcmap()], generation)
+        self.assertIsNone(self.inventory.get_fcmaps(VOLUME_NAME, "source"))
+
+    def test_invalidate_fcmap_by_id_evicts_its_volumes(self):
+        self._add_volume(_get_cli_volume(fc_id=FCMAP_ID))
+        self.inventory.refresh([_get_cli_volume(fc_id=FCMAP_ID)], [], [_get_fcmap()], self.inventory.generation)
+        self.inventory.invalidate_fcmaps(fcmap_id=FCMAP_ID)
+        self.assertIsNone(self.inventory.get_volume_by_name(VOLUME_NAME))
+        self.assertIsNone(self.inventory.get_fcmaps(VOLUME_NAME, "source"))
+
+    def test_get_metrics(self):
+        self._add_volume()
+        self.inventory.get_volume_by_name(VOLUME_NAME)
+        self.inventory.get_volume_by_name("other_name")
+        metrics = self.inventory.get_metrics()
+        self.assertEqual(0.5, metrics["vdisk"]["hit_rate"])
+        self.assertIsNone(metrics["staleness_seconds"])
+        self.assertEqual(1, metrics["cached_volumes"])
+
+
+class TestSVCInventoryCache(unittest.TestCase):
+
+    def test_get_inventory_per_endpoint_and_user(self):
+        cache = SVCInventoryCache()
+        inventory = cache.get(ENDPOINT, "user")
+        self.assertIs(inventory, cache.get(ENDPOINT, "user"))
+        self.assertIsNot(inventory, cache.get(ENDPOINT, "other_user"))
@@ -11,7 +11,8 @@ from controllers.array_action.array_mediator_svc import SVCArrayMediator
 from controllers.array_action.array_mediator_xiv import XIVArrayMediator
 from controllers.array_action.errors import FailedToFindStorageSystemType
 from controllers.array_action.storage_agent import (StorageAgent, get_agent, clear_agents,
-                                                    get_agents, detect_array_type, array_type_cache)
+                                                    get_agents, detect_array_type, array_type_cache,
+                                                    array_type_negative_cache)
 from controllers.servers.csi.controller_types import ArrayConnectionInfo
 
 
@@ -141,6 +142,30 @@ class TestStorageAgent(unittest.TestCase):
 
         self.assertEqual(first_call_count, second_call_count)
 
+    def test_detect_array_type_caches_all_endpoints(self):
+        array_type_cache.clear()
+        self.assertEqual(SVCArrayMediator.array_type, detect_array_type(["unknown_host", "svc_host"]))
+        self.assertEqual(SVCArrayMediator.array_type, array_type_cache["unknown_host"])
+        self.assertEqual(SVCArrayMediator.array_type, array_type_cache["svc_host"])
+
+    @patch("controllers.array_action.storage_agent.monotonic")
+    def test_detect_array_type_with_negative_cache(self, monotonic_mock):
+        array_type_negative_cache.clear()
+        monotonic_mock.return_value = 100
+        self.socket_mock.reset_mock()
+        with self.assertRaises(FailedToFindStorageSystemType):
+            detect_array_type(["unknown_host", ])
+        first_call_count = self.socket_mock.call_count
+
+        with self.assertRaises(FailedToFindStorageSystemType):
+            detect_array_type(["unknown_host", ])
+        self.assertEqual(first_call_count, self.socket_mock.call_count)
+
+        monotonic_mock.return_value = 131
+        with self.assertRaises(FailedToFindStorageSystemType):
+            detect_array_type(["unknown_host", ])
+        self.assertEqual(first_call_count * 2, self.socket_mock.call_count)
+
     def test_init_storage_agent_prepopulates_one_mediator(self):
         # one mediator client is already initialized.
         self.client_mock.get_system.assert_called_once_with()
@@ -187,6 +212,168 @@ class TestStorageAgent(unittest.TestCase):
         # After some iteration, the inactive client is disconnected and removed.
         self.assertEqual(1, self.agent.conn_pool.current_size)
 
+    def test_maintain_replaces_inactive_idle_mediator(self):
+        with self.agent.get_mediator() as mediator:
+            mediator.is_active = Mock(return_value=False)
+
+        self.agent.conn_pool.maintain()
+
+        self.assertEqual(1, self.agent.conn_pool.current_size)
+        self.assertEqual(2, self.client_mock.get_system.call_count)
+        with self.agent.get_mediator() as new_mediator:
+            self.assertIsNot(mediator, new_mediator)
+        self.assertEqual(2, self.client_mock.get_system.call_count)
+        self.assertEqual(1, self.agent.conn_pool.get_metrics()["reconnects"])
+
+    def test_maintain_keeps_active_idle_mediators(self):
+        with self.agent.get_mediator(), self.agent.get_mediator():
+            pass
+
+        self.agent.conn_pool.maintain()
+
+        self.assertEqual(2, self.agent.conn_pool.current_size)
+        self.assertEqual(2, self.client_mock.get_system.call_count)
+
+    def test_maintain_does_not_touch_mediators_in_use(self):
+        with self.agent.get_mediator() as mediator:
+            mediator.is_active = Mock(return_value=False)
+            self.agent.conn_pool.maintain()
+            self.assertEqual(1, self.agent.conn_pool.current_size)
+            mediator.is_active.assert_not_called()
+
+    def test_get_metrics(self):
+        with self.agent.get_mediator():
+            metrics = self.agent.conn_pool.get_metrics()
+            self.assertEqual(1, metrics["current_size"])
+            self.assertEqual(1, metrics["in_use"])
+            self.assertEqual(0, metrics["idle"])
+        metrics = self.agent.conn_pool.get_metrics()
+        self.assertEqual(1, metrics["idle"])
+        self.assertEqual(1, metrics["created"])
+        # one get when the pool is prepopulated, and one for the mediator above.
+        self.assertEqual(2, metrics["waits"])
+
+    @patch("controllers.array_action.storage_agent.get_health_check_interval", Mock(return_value=0.05))
+    def test_maintainer_replaces_inactive_idle_mediator_in_background(self):
+        agent = StorageAgent(["ds8k_host", ], "", "")
+        with agent.get_mediator() as mediator:
+            mediator.is_active = Mock(return_value=False)
+
+        for _ in range(50):
+            if agent.conn_pool.get_metrics()["created"] == 2:
+                break
+            sleep(0.05)
+
+        metrics = agent.conn_pool.get_metrics()
+        self.assertEqual(1, metrics["reconnects"])
+        self.assertEqual(2, metrics["created"])
+        self.assertEqual(1, metrics["current_size"])
+
+    def _wait_for_waiting_count(self, target_count):
+        while self.agent.conn_pool.get_metrics()["waiting"] != target_count:
+            sleep(0.01)
+
+    def test_waiting_callers_are_served_in_order(self):
+        pool = self.agent.conn_pool
+        mediators = [pool.get() for _ in range(pool.max_size)]
+        served_order = []
+
+        def wait_for_mediator(name):
+            pool.put(pool.get())
+            served_order.append(name)
+
+        first_thread = Thread(target=wait_for_mediator, args=("first",))
+        first_thread.start()
+        self._wait_for_waiting_count(1)
+        second_thread = Thread(target=wait_for_mediator, args=("second",))
+        second_thread.start()
+        self._wait_for_waiting_count(2)
+
+        pool.put(mediators.pop())
+        first_thread.join()
+        second_thread.join()
+        for mediator in mediators:
+            pool.put(mediator)
+
+        self.assertEqual(["first", "second"], served_order)
+        self.assertEqual(pool.max_size, pool.current_size)
+
+    def test_waiting_caller_creates_mediator_when_one_is_closed(self):
+        pool = self.agent.conn_pool
+        mediators = [pool.get() for _ in range(pool.max_size)]
+        mediators[0].is_active = Mock(return_value=False)
+        waiting_thread = Thread(target=lambda: pool.put(pool.get()))
+        waiting_thread.start()
+        self._wait_for_waiting_count(1)
+
+        pool.put(mediators[0])
+        waiting_thread.join()
+        for mediator in mediators[1:]:
+            pool.put(mediator)
+
+        self.assertEqual(pool.max_size + 1, self.client_mock.get_system.call_count)
+
+    @patch.dict("os.environ", {"ARRAY_MAX_CONNECTIONS": "3"})
+    def test_max_connections_from_environment(self):
+        agent = StorageAgent(["ds8k_host", ], "", "")
+        self.assertEqual(3, agent.conn_pool.max_size)
+
+    @patch.dict("os.environ", {"CSI_CONTROLLER_SERVER_WORKERS": "50"})
+    def test_max_connections_is_capped_by_the_mediator(self):
+        agent = StorageAgent(["ds8k_host", ], "", "")
+        self.assertEqual(DS8KArrayMediator.max_connections, agent.conn_pool.max_size)
+
+    def test_set_max_size_lets_waiting_caller_create_mediator(self):
+        pool = self.agent.conn_pool
+        mediators = [pool.get() for _ in range(pool.max_size)]
+        waiting_thread = Thread(target=lambda: mediators.append(pool.get()))
+        waiting_thread.start()
+        self._wait_for_waiting_count(1)
+
+        pool.set_max_size(pool.max_size + 1)
+        waiting_thread.join()
+
+        self.assertEqual(pool.max_size, pool.current_size)
+        for mediator in mediators:
+            pool.put(mediator)
+
+    def test_set_max_size_closes_extra_idle_mediators(self):
+        pool = self.agent.conn_pool
+        mediators = [pool.get() for _ in range(3)]
+        for mediator in mediators:
+            pool.put(mediator)
+
+        pool.set_max_size(1)
+
+        self.assertEqual(1, pool.current_size)
+        self.assertEqual(1, pool.get_metrics()["idle"])
+
+    @patch.dict("os.environ", {"ARRAY_ADAPTIVE_CONCURRENCY": "true"})
+    def test_get_mediator_resizes_pool_by_adaptive_limit(self):
+        agent = StorageAgent(["ds8k_host", ], "", "")
+        agent.concurrency_limit = Mock()
+        agent.concurrency_limit.record.return_value = 4
+        with agent.get_mediator():
+            pass
+        agent.concurrency_limit.record.assert_called_once()
+        self.assertEqual(4, agent.conn_pool.max_size)
+
+    @patch.dict("os.environ", {"ARRAY_ADAPTIVE_CONCURRENCY": "true", "ARRAY_MAX_CONNECTIONS": "3"})
+    def test_adaptive_limit_is_capped_by_configured_max_connections(self):
+        agent = StorageAgent(["ds8k_host", ], "", "")
+        self.assertEqual(3, agent.concurrency_limit.max_limit)
+        self.assertEqual(3, agent.concurrency_limit.limit)
+
+    @patch("controllers.array_action.storage_agent._get_acquire_timeout", Mock(return_value=0.1))
+    def test_get_mediator_with_default_acquire_timeout(self):
+        pool = self.agent.conn_pool
+        mediators = [pool.get() for _ in range(pool.max_size)]
+        with self.assertRaises(array_errors.NoConnectionAvailableException):
+            with self.agent.get_mediator():
+                pass
+        for mediator in mediators:
+            pool.put(mediator)
+
     @staticmethod
     def _wait_for_count(count, target_count):
         while count.get_value() != target_count:
@@ -9,6 +9,7 @@ import controllers.tests.array_action.test_settings as array_settings
 import controllers.tests.array_action.xiv.test_settings as xiv_settings
 import controllers.tests.common.test_settings as common_settings
 from controllers.array_action.array_mediator_xiv import XIVArrayMediator
+from controllers.array_action.lun_allocator import host_luns_allocators
 from controllers.common.node_info import Initiators
 from controllers.tests.array_action.xiv import utils
 
@@ -22,6 +23,7 @@ class TestArrayMediatorXIV(unittest.TestCase):
                                              common_settings.SECRET_PASSWORD_VALUE, self.endpoint)
         self.mediator.client = Mock()
         self.required_bytes = 2000
+        host_luns_allocators.clear()
 
     def test_get_volume_raise_correct_errors(self):
         error_msg = array_settings.DUMMY_ERROR_MESSAGE
@@ -49,6 +51,48 @@ class TestArrayMediatorXIV(unittest.TestCase):
         with self.assertRaises(array_errors.ObjectNotFoundError):
             self.mediator.get_volume(common_settings.VOLUME_NAME, None, False)
 
+    def test_get_pool_available_capacity(self):
+        self.mediator.client.cmd.pool_list.return_value = Mock(as_single_element=Munch(empty_space_soft="17"))
+        self.assertEqual(17 * 1000 ** 3, self.mediator.get_pool_available_capacity(common_settings.DUMMY_POOL1))
+        self.mediator.client.cmd.pool_list.assert_called_once_with(pool=common_settings.DUMMY_POOL1)
+
+    def test_get_pool_available_capacity_of_missing_pool(self):
+        self.mediator.client.cmd.pool_list.return_value = Mock(as_single_element=None)
+        with self.assertRaises(array_errors.PoolDoesNotExist):
+            self.mediator.get_pool_available_capacity(common_settings.DUMMY_POOL1)
+
+    def _get_mock_listed_xiv_volume(self, volume_id, name, pool_name, master_name=""):
+        xcli_volume = utils.get_mock_xiv_volume(10, name, common_settings.VOLUME_UID)
+        xcli_volume.id = volume_id
+        xcli_volume.pool_name = pool_name
+        xcli_volume.master_name = master_name
+        return xcli_volume
+
+    def _prepare_mocks_for_list_volumes(self):
+        volumes_by_pool = {
+            "pool1": [self._get_mock_listed_xiv_volume("12", "vol2", "pool1"),
+                      self._get_mock_listed_xiv_volume("3", "vol1", "pool1"),
+                      self._get_mock_listed_xiv_volume("4", "snap1", "pool1", master_name="vol1")],
+            "pool2": [self._get_mock_listed_xiv_volume("1", "other", "pool2")]}
+        self.mediator.client.cmd.pool_list.return_value = Mock(as_list=[Munch(name="pool2"), Munch(name="pool1")])
+        self.mediator.client.cmd.vol_list.side_effect = lambda pool: Mock(as_list=volumes_by_pool[pool])
+
+    def test_list_volumes_by_pool_and_id_without_snapshots(self):
+        self._prepare_mocks_for_list_volumes()
+        listed_volumes = list(self.mediator.list_volumes("", None))
+        self.assertEqual(["pool1:3", "pool1:12", "pool2:1"], [token for _, token in listed_volumes])
+        self.assertEqual(["vol1", "vol2", "other"], [volume.name for volume, _ in listed_volumes])
+        self.mediator.client.cmd.snapshot_list.assert_not_called()
+
+    def test_list_volumes_from_token_with_name_prefix(self):
+        self._prepare_mocks_for_list_volumes()
+        listed_volumes = list(self.mediator.list_volumes("pool1:3", "o"))
+        self.assertEqual(["pool2:1"], [token for _, token in listed_volumes])
+
+    def test_list_volumes_with_invalid_token(self):
+        with self.assertRaises(array_errors.InvalidArgumentError):
+            next(self.mediator.list_volumes("pool1", None))
+
     @patch("controllers.array_action.array_mediator_xiv.XCLIClient")
     def test_connect_errors(self, client):
         client.connect_multiendpoint_ssl.return_value = Mock()
@@ -505,39 +549,56 @@ class TestArrayMediatorXIV(unittest.TestCase):
         with self.assertRaises(array_errors.InvalidArgumentError):
             self.mediator.get_volume_mappings(common_settings.VOLUME_UID)
 
-    def test_get_next_available_lun_raises_host_bad_name(self):
+    def test_reserve_next_available_lun_raises_host_bad_name(self):
         # mapping = get_mock_xiv_host_mapping(1)
         self.mediator.client.cmd.mapping_list.side_effect = [
             xcli_errors.HostBadNameError("", common_settings.HOST_NAME, "")]
         with self.assertRaises(array_errors.HostNotFoundError):
-            self.mediator._get_next_available_lun(common_settings.HOST_NAME)
+            self.mediator._reserve_next_available_lun(common_settings.HOST_NAME)
 
-    def test_get_next_available_lun_with_no_host_mappings(self):
+    def test_reserve_next_available_lun_with_no_host_mappings(self):
         self.mediator.client.cmd.mapping_list.return_value = Mock(as_list=[])
-        lun = self.mediator._get_next_available_lun(common_settings.HOST_NAME)
+        lun = self.mediator._reserve_next_available_lun(common_settings.HOST_NAME)
         self.assertTrue(lun <= self.mediator.MAX_LUN_NUMBER)
         self.assertTrue(lun >= self.mediator.MIN_LUN_NUMBER)
 
     @patch.object(XIVArrayMediator, "MAX_LUN_NUMBER", 3)
     @patch.object(XIVArrayMediator, "MIN_LUN_NUMBER", 1)
-    def test_get_next_available_lun_success(self):
+    def test_reserve_next_available_lun_success(self):
         mapping1 = utils.get_mock_xiv_host_mapping("1")
         mapping2 = utils.get_mock_xiv_host_mapping("3")
 
         self.mediator.client.cmd.mapping_list.return_value = Mock(as_list=[mapping1, mapping2])
-        lun = self.mediator._get_next_available_lun(common_settings.HOST_NAME)
+        lun = self.mediator._reserve_next_available_lun(common_settings.HOST_NAME)
         self.assertEqual(lun, 2)
 
     @patch.object(XIVArrayMediator, "MAX_LUN_NUMBER", 3)
     @patch.object(XIVArrayMediator, "MIN_LUN_NUMBER", 1)
-    def test_get_next_available_lun_no_available_lun(self):
+    def test_reserve_next_available_lun_no_available_lun(self):
         mapping1 = utils.get_mock_xiv_host_mapping("1")
         mapping2 = utils.get_mock_xiv_host_mapping("3")
         mapping3 = utils.get_mock_xiv_host_mapping("2")
 
         self.mediator.client.cmd.mapping_list.return_value = Mock(as_list=[mapping1, mapping2, mapping3])
         with self.assertRaises(array_errors.NoAvailableLunError):
-            self.mediator._get_next_available_lun(common_settings.HOST_NAME)
+            self.mediator._reserve_next_available_lun(common_settings.HOST_NAME)
+
+    @patch.object(XIVArrayMediator, "MAX_LUN_NUMBER", 3)
+    @patch.object(XIVArrayMediator, "MIN_LUN_NUMBER", 1)
+    def test_map_volume_keeps_used_luns_of_host(self):
+        self.mediator.client.cmd.mapping_list.return_value = Mock(as_list=[utils.get_mock_xiv_host_mapping("1")])
+        lun = self.mediator.map_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME,
+                                       array_settings.DUMMY_CONNECTIVITY_TYPE)
+        self.assertEqual("2", lun)
+        self.mediator.client.cmd.map_vol.side_effect = [xcli_errors.CommandFailedRuntimeError(
+            "", "LUN is already in use 3", "")]
+        with self.assertRaises(array_errors.LunAlreadyInUseError):
+            self.mediator.map_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME,
+                                     array_settings.DUMMY_CONNECTIVITY_TYPE)
+        with self.assertRaises(array_errors.NoAvailableLunError):
+            self.mediator.map_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME,
+                                     array_settings.DUMMY_CONNECTIVITY_TYPE)
+        self.mediator.client.cmd.mapping_list.assert_called_once_with(host=common_settings.HOST_NAME)
 
     def test_map_volume_volume_not_found(self):
         self.mediator.client.cmd.vol_list.return_value = Mock(as_single_element=None)
@@ -565,7 +626,7 @@ class TestArrayMediatorXIV(unittest.TestCase):
 
     def map_volume_with_error(self, xcli_err, status, returned_err):
         self.mediator.client.cmd.map_vol.side_effect = [xcli_err("", status, "")]
-        with patch.object(XIVArrayMediator, "_get_next_available_lun"):
+        with patch.object(XIVArrayMediator, "_reserve_next_available_lun"):
             with self.assertRaises(returned_err):
                 self.mediator.map_volume(common_settings.VOLUME_UID, common_settings.HOST_NAME,
                                          array_settings.DUMMY_CONNECTIVITY_TYPE)
@@ -590,7 +651,7 @@ class TestArrayMediatorXIV(unittest.TestCase):
         self.map_volume_with_error(xcli_errors.CommandFailedRuntimeError, "",
                                    array_errors.MappingError)
 
-    @patch.object(XIVArrayMediator, "_get_next_available_lun")
+    @patch.object(XIVArrayMediator, "_reserve_next_available_lun")
     def test_map_volume_success(self, next_lun):
         next_lun.return_value = array_settings.DUMMY_LUN_ID_INT
         self.mediator.client.cmd.map_vol.return_value = None
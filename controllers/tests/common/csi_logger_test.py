@@ -0,0 +1,119 @@
+import logging
+import unittest
+
+from mock import Mock, patch
+
+from controllers.common.csi_logger import RepeatedMessagesFilter, lazy, is_debug_enabled, LOGGER_NAME, \
+    _RecordsQueueHandler, _get_rate_limit_filter
+
+
+def _get_record(message="message", args=None, lineno=1, level=logging.DEBUG):
+    return logging.LogRecord(LOGGER_NAME, level, "path", lineno, message, args, None)
+
+
+class TestRepeatedMessagesFilter(unittest.TestCase):
+
+    def setUp(self):
+        self.filter = RepeatedMessagesFilter(burst=2, interval=10)
+
+    @patch("controllers.common.csi_logger.monotonic")
+    def test_repeated_messages_are_dropped_after_burst(self, monotonic):
+        monotonic.return_value = 100
+        self.assertEqual([True, True, False], [self.filter.filter(_get_record()) for _ in range(3)])
+        self.assertTrue(self.filter.filter(_get_record("other message")))
+        self.assertTrue(self.filter.filter(_get_record(lineno=2)))
+
+    @patch("controllers.common.csi_logger.monotonic")
+    def test_first_message_of_next_interval_tells_the_dropped_count(self, monotonic):
+        monotonic.return_value = 100
+        for _ in range(4):
+            self.filter.filter(_get_record("message %s", ("arg",)))
+        monotonic.return_value = 110
+        record = _get_record("message %s", ("arg",))
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual("message arg (suppressed 2 repeated messages)", record.getMessage())
+
+    def test_zero_burst_disables_the_filter(self):
+        self.filter = RepeatedMessagesFilter(burst=0, interval=10)
+        self.assertTrue(all(self.filter.filter(_get_record()) for _ in range(5)))
+
+    def test_tracked_messages_are_bounded(self):
+        self.filter = RepeatedMessagesFilter(burst=1, interval=10, max_tracked_messages=2)
+        for message in ("first", "second", "third"):
+            self.filter.filter(_get_record(message))
+        self.assertTrue(self.filter.filter(_get_record("first")))
+        self.assertFalse(self.filter.filter(_get_record("third")))
+
+    def test_dropped_count_of_evicted_message_is_told_by_next_message(self):
+        self.filter = RepeatedMessagesFilter(burst=1, interval=10, max_tracked_messages=1)
+        for _ in range(3):
+            self.filter.filter(_get_record("first"))
+        self.filter.filter(_get_record("second"))
+        record = _get_record("third")
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual("third (suppressed 2 repeated messages of other lines)", record.getMessage())
+
+    def test_messages_above_max_level_are_not_dropped(self):
+        records = [_get_record(level=logging.WARNING) for _ in range(3)]
+        self.assertTrue(all(self.filter.filter(record) for record in records))
+        self.filter = RepeatedMessagesFilter(burst=2, interval=10, max_level=logging.WARNING)
+        self.assertEqual([True, True, False], [self.filter.filter(record) for record in records])
+
+    def test_messages_are_compared_without_formatting(self):
+        build_message = Mock(return_value="built")
+        self.assertTrue(self.filter.filter(_get_record("message %s", (lazy(build_message),))))
+        build_message.assert_not_called()
+        self.assertEqual([True, True, False],
+                         [self.filter.filter(_get_record("message %s", (["unhashable"],))) for _ in range(3)])
+        self.assertTrue(self.filter.filter(_get_record("message %s", (["other"],))))
+
+
+class TestRecordsQueueHandler(unittest.TestCase):
+
+    def test_record_is_queued_with_its_message(self):
+        records_queue = Mock()
+        arg = ["value"]
+        _RecordsQueueHandler(records_queue).emit(_get_record("message %s", (arg,)))
+        arg.append("changed")
+        record = records_queue.put_nowait.call_args[0][0]
+        self.assertEqual("message ['value']", record.msg)
+        self.assertIsNone(record.args)
+
+    def test_dropped_record_is_not_formatted(self):
+        records_queue = Mock()
+        build_message = Mock(return_value="built")
+        handler = _RecordsQueueHandler(records_queue)
+        handler.addFilter(Mock(filter=Mock(return_value=False)))
+        handler.handle(_get_record("message %s", (lazy(build_message),)))
+        records_queue.put_nowait.assert_not_called()
+        build_message.assert_not_called()
+
+
+class TestGetRateLimitFilter(unittest.TestCase):
+
+    @patch.dict("os.environ", {"CSI_LOG_RATE_LIMIT_MAX_LEVEL": "warning"})
+    def test_max_level_from_env(self):
+        self.assertEqual(logging.WARNING, _get_rate_limit_filter()._max_level)
+
+    @patch.dict("os.environ", {"CSI_LOG_RATE_LIMIT_MAX_LEVEL": "unknown"})
+    def test_unknown_max_level_falls_back_to_info(self):
+        self.assertEqual(logging.INFO, _get_rate_limit_filter()._max_level)
+
+
+class TestLazyMessage(unittest.TestCase):
+
+    def test_message_is_built_only_when_formatted(self):
+        build_message = Mock(return_value="built")
+        message = lazy(build_message, "arg", key="value")
+        build_message.assert_not_called()
+        self.assertEqual("message built", _get_record("message %s", (message,)).getMessage())
+        build_message.assert_called_once_with("arg", key="value")
+
+    def test_is_debug_enabled(self):
+        logger = logging.getLogger(LOGGER_NAME)
+        level = logger.level
+        self.addCleanup(logger.setLevel, level)
+        logger.setLevel(logging.INFO)
+        self.assertFalse(is_debug_enabled())
+        logger.setLevel(logging.DEBUG)
+        self.assertTrue(is_debug_enabled())
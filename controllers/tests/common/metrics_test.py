@@ -0,0 +1,82 @@
+import unittest
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from mock import Mock, patch
+
+from controllers.array_action.utils import time_array_commands
+from controllers.common.metrics import MetricsRegistry, start_metrics_server
+
+METRIC_NAME = "dummy_duration_seconds"
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry(buckets=(0.1, 1))
+
+    def test_observe_counts_value_in_buckets(self):
+        self.registry.observe(METRIC_NAME, 0.5, method="CreateVolume")
+        self.registry.observe(METRIC_NAME, 2, method="CreateVolume")
+        histogram = self.registry.get_histogram(METRIC_NAME, method="CreateVolume")
+        self.assertEqual([0, 1], histogram.bucket_counts)
+        self.assertEqual(2, histogram.count)
+        self.assertEqual(2.5, histogram.sum)
+        self.assertIsNone(self.registry.get_histogram(METRIC_NAME, method="DeleteVolume"))
+
+    def test_time_observes_even_when_failed(self):
+        with self.assertRaises(ValueError):
+            with self.registry.time(METRIC_NAME, method="CreateVolume"):
+                raise ValueError
+        self.assertEqual(1, self.registry.get_histogram(METRIC_NAME, method="CreateVolume").count)
+
+    def test_increment(self):
+        self.registry.increment("dummy_total", cache="volumes", result="hit")
+        self.registry.increment("dummy_total", 2, cache="volumes", result="hit")
+        self.assertEqual(3, self.registry.get_counter("dummy_total", cache="volumes", result="hit"))
+        self.assertEqual(0, self.registry.get_counter("dummy_total", cache="volumes", result="miss"))
+
+    def test_render(self):
+        self.registry.observe(METRIC_NAME, 0.5, method="Create\"Volume")
+        self.registry.increment("dummy_total", cache="volumes")
+        self.registry.add_collector("dummy", lambda: [("dummy_gauge", {"endpoint": "array"}, 3),
+                                                      ("dummy_gauge", {"endpoint": "other"}, None)])
+        rendered = self.registry.render()
+        self.assertIn('dummy_duration_seconds_bucket{method="Create\\"Volume",le="1"} 1', rendered)
+        self.assertIn('dummy_duration_seconds_bucket{method="Create\\"Volume",le="+Inf"} 1', rendered)
+        self.assertIn('dummy_duration_seconds_count{method="Create\\"Volume"} 1', rendered)
+        self.assertIn('dummy_total{cache="volumes"} 1', rendered)
+        self.assertIn('dummy_gauge{endpoint="array"} 3', rendered)
+        self.assertNotIn('endpoint="other"', rendered)
+
+    def test_render_skips_failed_collector(self):
+        self.registry.add_collector("dummy", Mock(side_effect=Exception))
+        self.assertEqual("\n", self.registry.render())
+
+    @patch("controllers.array_action.utils.metrics")
+    def test_time_array_commands(self, metrics):
+        send_command = Mock(return_value="output")
+        send_timed_command = time_array_commands(send_command, "SVC", lambda cmd: cmd.split()[0])
+        self.assertEqual("output", send_timed_command("lsvdisk -bytes"))
+        send_command.assert_called_once_with("lsvdisk -bytes")
+        metrics.time.assert_called_once_with("csi_array_command_duration_seconds", array_type="SVC",
+                                             command="lsvdisk")
+
+
+class TestMetricsServer(unittest.TestCase):
+
+    def test_server_is_not_started_by_default(self):
+        self.assertIsNone(start_metrics_server())
+
+    @patch.dict("os.environ", {"CSI_METRICS_PORT": "0"})
+    def test_server_serves_metrics(self):
+        with start_metrics_server() as server:
+            try:
+                port = server.server_address[1]
+                with urlopen("http://127.0.0.1:{}/metrics".format(port)) as response:
+                    self.assertEqual(200, response.status)
+                with self.assertRaises(HTTPError):
+                    with urlopen("http://127.0.0.1:{}/other".format(port)):
+                        pass
+            finally:
+                server.shutdown()
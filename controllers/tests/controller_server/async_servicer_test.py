@@ -0,0 +1,61 @@
+import asyncio
+import unittest
+
+from mock import Mock, patch
+from munch import Munch
+
+import controllers.tests.common.test_settings as common_settings
+from controllers.servers.csi.async_servicer import ArrayExecutors, AsyncServicer
+
+
+class TestAsyncServicer(unittest.TestCase):
+
+    def setUp(self):
+        self.servicer = Mock()
+        self.servicer.CreateVolume.return_value = "response"
+        self.array_executors = ArrayExecutors()
+        self.addCleanup(self.array_executors.shutdown)
+        self.async_servicer = AsyncServicer(self.servicer, self.array_executors)
+
+    def _call(self, request):
+        return asyncio.run(self.async_servicer.CreateVolume(request, "context"))
+
+    def test_method_runs_the_servicer_method(self):
+        request = Munch(secrets=common_settings.SECRET)
+        self.assertEqual("response", self._call(request))
+        self.servicer.CreateVolume.assert_called_once_with(request, "context")
+
+    def test_method_runs_in_the_executor_of_its_array(self):
+        with patch.object(self.array_executors, "get", wraps=self.array_executors.get) as get_executor:
+            self._call(Munch(secrets=common_settings.SECRET))
+        get_executor.assert_called_once_with([common_settings.SECRET_MANAGEMENT_ADDRESS_VALUE])
+
+    def test_method_without_secrets_runs_in_the_shared_executor(self):
+        with patch.object(self.array_executors, "get", wraps=self.array_executors.get) as get_executor:
+            self._call(Munch())
+        get_executor.assert_called_once_with(None)
+
+    def test_servicer_error_is_raised(self):
+        self.servicer.CreateVolume.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            self._call(Munch())
+
+    def test_identity_method_runs_in_the_identity_executor(self):
+        self.servicer.Probe.return_value = "response"
+        with patch.object(self.array_executors, "get") as get_executor:
+            self.assertEqual("response", asyncio.run(self.async_servicer.Probe(Munch(), "context")))
+        get_executor.assert_not_called()
+
+    def test_array_executors_are_reused(self):
+        self.assertIs(self.array_executors.get(["endpoint"]), self.array_executors.get(["endpoint"]))
+        self.assertIsNot(self.array_executors.get(["endpoint"]), self.array_executors.get(["other_endpoint"]))
+
+    @patch("controllers.servers.csi.async_servicer.get_max_connections_by_endpoints")
+    def test_array_executor_is_sized_by_the_max_connections_of_the_array(self, get_max_connections):
+        get_max_connections.return_value = 10
+        executor = self.array_executors.get(["endpoint"])
+        self.assertEqual(10, executor._max_workers)
+        get_max_connections.return_value = 2
+        resized_executor = self.array_executors.get(["endpoint"])
+        self.assertEqual(2, resized_executor._max_workers)
+        self.assertIs(resized_executor, self.array_executors.get(["endpoint"]))
@@ -1566,3 +1566,248 @@ class TestValidateVolumeCapabilities(BaseControllerSetUp, CommonControllerTest):
         self.servicer.ValidateVolumeCapabilities(self.request, self.context)
 
         self.assertEqual(self.context.code, grpc.StatusCode.OK)
+
+
+class TestListVolumes(BaseControllerSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.request.max_entries = 2
+        self.request.starting_token = ""
+        self.volumes = [utils.get_mock_mediator_response_volume(name=name) for name in ("vol1", "vol2", "vol3")]
+        self.other_mediator = mock_mediator()
+        self.other_mediator.list_volumes.return_value = (listed_volume for listed_volume in [])
+        self.mediator.list_volumes.side_effect = self._list_volumes
+        agents_by_endpoint_key = {"endpoint2": self._get_agent(self.other_mediator),
+                                  "endpoint1": self._get_agent(self.mediator)}
+        self.get_agent.side_effect = lambda array_connection_info: agents_by_endpoint_key[
+            array_connection_info.array_addresses[0]]
+
+        managed_secrets_patcher = patch("{}.managed_secrets".format(CONTROLLER_SERVER_PATH))
+        self.managed_secrets = managed_secrets_patcher.start()
+        self.addCleanup(managed_secrets_patcher.stop)
+        self.managed_secrets.get_all.return_value = [
+            dict(SECRET, **{SECRET_MANAGEMENT_ADDRESS_KEY: endpoint_key}) for endpoint_key in agents_by_endpoint_key]
+        generate_response_patcher = patch("{}.utils.generate_csi_list_volumes_response".format(
+            CONTROLLER_SERVER_PATH))
+        self.generate_response = generate_response_patcher.start()
+        self.addCleanup(generate_response_patcher.stop)
+
+    @staticmethod
+    def _get_agent(mediator):
+        agent = MagicMock()
+        agent.get_mediator.return_value.__enter__.return_value = mediator
+        return agent
+
+    def _list_volumes(self, start_token, _):
+        start_index = int(start_token) if start_token else 0
+        for index, volume in enumerate(self.volumes[start_index:], start_index + 1):
+            yield volume, str(index)
+
+    def _assert_listed(self, volumes, next_token):
+        self.assertEqual(grpc.StatusCode.OK, self.context.code)
+        self.generate_response.assert_called_once_with([(volume, None) for volume in volumes], next_token)
+
+    def test_list_volumes_first_page(self):
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self._assert_listed(self.volumes[:2], "endpoint1/2")
+        self.mediator.list_volumes.assert_called_once_with("", None)
+        self.other_mediator.list_volumes.assert_not_called()
+
+    def test_list_volumes_of_config_secret_have_the_system_id(self):
+        self.managed_secrets.get_all.return_value = [
+            utils.get_fake_secret_config(system_id="u1", management_address="endpoint1"),
+            utils.get_fake_secret_config(system_id="u2", management_address="endpoint2")]
+        self.request.max_entries = 0
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self.generate_response.assert_called_once_with([(volume, "u1") for volume in self.volumes], "")
+        self.other_mediator.list_volumes.assert_called_once_with("", None)
+
+    def test_list_volumes_continues_from_token_to_next_array(self):
+        self.request.starting_token = "endpoint1/2"
+        other_volume = utils.get_mock_mediator_response_volume(name="other_vol")
+        self.other_mediator.list_volumes.return_value = (listed_volume for listed_volume in [(other_volume, "7")])
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self._assert_listed([self.volumes[2], other_volume], "")
+        self.mediator.list_volumes.assert_called_once_with("2", None)
+        self.other_mediator.list_volumes.assert_called_once_with("", None)
+
+    def test_list_volumes_stops_reading_the_array_after_the_page(self):
+        self.request.max_entries = 1
+        listed_volumes = self._list_volumes("", None)
+        self.mediator.list_volumes.side_effect = None
+        self.mediator.list_volumes.return_value = listed_volumes
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self._assert_listed(self.volumes[:1], "endpoint1/1")
+        self.assertIsNone(listed_volumes.gi_frame)
+
+    @patch.dict("os.environ", {"LIST_VOLUMES_NAME_PREFIX": NAME_PREFIX})
+    def test_list_volumes_with_name_prefix(self):
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self.mediator.list_volumes.assert_called_once_with("", NAME_PREFIX)
+
+    def test_list_volumes_with_default_max_entries(self):
+        self.request.max_entries = 0
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self._assert_listed(self.volumes, "")
+
+    def test_list_volumes_with_negative_max_entries(self):
+        self.request.max_entries = -1
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.INVALID_ARGUMENT, self.context.code)
+
+    def _test_list_volumes_aborted(self, starting_token):
+        self.request.starting_token = starting_token
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.ABORTED, self.context.code)
+        self.generate_response.assert_not_called()
+
+    def test_list_volumes_without_managed_secrets_is_unavailable(self):
+        self.managed_secrets.get_all.return_value = []
+
+        self.servicer.ListVolumes(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.UNAVAILABLE, self.context.code)
+        self.generate_response.assert_not_called()
+        self.mediator.list_volumes.assert_not_called()
+
+    def test_list_volumes_with_token_of_unknown_endpoint(self):
+        self._test_list_volumes_aborted("endpoint3/2")
+
+    def test_list_volumes_with_token_without_endpoint(self):
+        self._test_list_volumes_aborted("2")
+
+    def test_list_volumes_with_invalid_array_token(self):
+        self.mediator.list_volumes.side_effect = array_errors.InvalidArgumentError("token")
+        self._test_list_volumes_aborted("endpoint1/token")
+
+
+class TestGetCapacity(BaseControllerSetUp):
+
+    def setUp(self):
+        super().setUp()
+        self.request.parameters = {servers_settings.PARAMETERS_POOL: DUMMY_POOL1}
+        del self.request.accessible_topology
+        self.second_secret = dict(SECRET, **{SECRET_MANAGEMENT_ADDRESS_KEY: "second_address"})
+        managed_secrets_patcher = patch("{}.managed_secrets".format(CONTROLLER_SERVER_PATH))
+        self.managed_secrets = managed_secrets_patcher.start()
+        self.addCleanup(managed_secrets_patcher.stop)
+        self.managed_secrets.get_all.return_value = [SECRET, self.second_secret]
+        pollers_patcher = patch("{}.pool_capacity_pollers".format(CONTROLLER_SERVER_PATH))
+        self.pollers = pollers_patcher.start()
+        self.addCleanup(pollers_patcher.stop)
+        generate_response_patcher = patch("{}.utils.generate_csi_get_capacity_response".format(
+            CONTROLLER_SERVER_PATH))
+        self.generate_response = generate_response_patcher.start()
+        self.addCleanup(generate_response_patcher.stop)
+
+    def _get_array_connection_info(self, array_address, system_id=None):
+        return utils.get_fake_array_connection_info(user=SECRET_USERNAME_VALUE, password=SECRET_PASSWORD_VALUE,
+                                                    array_addresses=[array_address], system_id=system_id)
+
+    def _set_config_secret(self):
+        secrets_config = {
+            "u1": {SECRET_USERNAME_KEY: SECRET_USERNAME_VALUE, SECRET_PASSWORD_KEY: SECRET_PASSWORD_VALUE,
+                   SECRET_MANAGEMENT_ADDRESS_KEY: "first_address", "supported_topologies": [{"zone": "first"}]},
+            "u2": {SECRET_USERNAME_KEY: SECRET_USERNAME_VALUE, SECRET_PASSWORD_KEY: SECRET_PASSWORD_VALUE,
+                   SECRET_MANAGEMENT_ADDRESS_KEY: "second_address", "supported_topologies": [{"zone": "second"}]}}
+        self.managed_secrets.get_all.return_value = [{"config": json.dumps(secrets_config)}]
+
+    def test_get_capacity_returns_the_smallest_capacity_of_a_pool_on_several_systems(self):
+        self.pollers.get_available_capacity.side_effect = [10, 20]
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.OK, self.context.code)
+        self.generate_response.assert_called_once_with(10)
+        self.pollers.get_available_capacity.assert_has_calls([
+            call(self._get_array_connection_info(SECRET_MANAGEMENT_ADDRESS_VALUE), DUMMY_POOL1),
+            call(self._get_array_connection_info("second_address"), DUMMY_POOL1)])
+
+    def test_get_capacity_ignores_systems_without_the_pool(self):
+        self.pollers.get_available_capacity.side_effect = [array_errors.PoolDoesNotExist(DUMMY_POOL1, "address"),
+                                                           20]
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.generate_response.assert_called_once_with(20)
+
+    def test_get_capacity_of_pool_that_does_not_exist(self):
+        self.pollers.get_available_capacity.side_effect = array_errors.PoolDoesNotExist(DUMMY_POOL1, "address")
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.generate_response.assert_called_once_with(0)
+
+    def test_get_capacity_that_was_not_polled_yet_is_unavailable(self):
+        self.pollers.get_available_capacity.side_effect = [None, 20]
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.UNAVAILABLE, self.context.code)
+        self.generate_response.assert_not_called()
+
+    def test_get_capacity_without_managed_secrets_is_unavailable(self):
+        self.managed_secrets.get_all.return_value = []
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.UNAVAILABLE, self.context.code)
+        self.pollers.get_available_capacity.assert_not_called()
+
+    def test_get_capacity_uses_the_pool_of_every_system(self):
+        self._set_config_secret()
+        self.request.parameters = {servers_settings.PARAMETERS_BY_SYSTEM: json.dumps(
+            {"u2": {servers_settings.PARAMETERS_POOL: DUMMY_POOL2}})}
+        self.pollers.get_available_capacity.return_value = 10
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.generate_response.assert_called_once_with(10)
+        self.pollers.get_available_capacity.assert_called_once_with(
+            self._get_array_connection_info("second_address", system_id="u2"), DUMMY_POOL2)
+
+    def test_get_capacity_of_accessible_topology(self):
+        self._set_config_secret()
+        self.request.accessible_topology = ProtoBufMock(segments={"zone": "first"})
+        self.pollers.get_available_capacity.return_value = 10
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.generate_response.assert_called_once_with(10)
+        self.pollers.get_available_capacity.assert_called_once_with(
+            self._get_array_connection_info("first_address", system_id="u1"), DUMMY_POOL1)
+
+    def test_get_capacity_of_accessible_topology_skips_secrets_without_topologies(self):
+        self._set_config_secret()
+        self.managed_secrets.get_all.return_value.append(SECRET)
+        self.request.accessible_topology = ProtoBufMock(segments={"zone": "first"})
+        self.pollers.get_available_capacity.return_value = 10
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.generate_response.assert_called_once_with(10)
+        self.pollers.get_available_capacity.assert_called_once_with(
+            self._get_array_connection_info("first_address", system_id="u1"), DUMMY_POOL1)
+
+    def test_get_capacity_without_pool(self):
+        self.request.parameters = {}
+
+        self.servicer.GetCapacity(self.request, self.context)
+
+        self.assertEqual(grpc.StatusCode.INVALID_ARGUMENT, self.context.code)
+        self.pollers.get_available_capacity.assert_not_called()
@@ -9,6 +9,9 @@ import controllers.tests.controller_server.host_definer.settings as test_setting
 class BaseSetUp(unittest.TestCase):
     def setUp(self):
         test_utils.patch_kubernetes_manager_init()
+        test_utils.clear_informers()
+        self.addCleanup(patch.stopall)
+        self.addCleanup(test_utils.patch_definitions_executor())
         self.os = patch('{}.os'.format(test_settings.WATCHER_HELPER_PATH)).start()
         self.nodes_on_watcher_helper = test_utils.patch_nodes_global_variable(test_settings.WATCHER_HELPER_PATH)
         self.managed_secrets_on_watcher_helper = test_utils.patch_managed_secrets_global_variable(
@@ -1,4 +1,5 @@
 from kubernetes.client.rest import ApiException
+from mock import patch
 
 import controllers.tests.controller_server.host_definer.utils.test_utils as test_utils
 import controllers.tests.controller_server.host_definer.utils.k8s_manifests_utils as k8s_manifests_utils
@@ -93,6 +94,7 @@ class TestWatchCsiNodesResources(CsiNodeWatcherBase):
 
     def test_updated_node_id_of_csi_node(self):
         self._prepare_mocks_for_updated_csi_node()
+        patch('{}.time'.format(test_settings.CSI_NODE_WATCHER_PATH)).start()
         host_definitions = self.ready_k8s_host_definitions
         host_definitions.items[0].spec.hostDefinition.nodeId = 'other_node_id'
         self.csi_node_watcher.host_definitions_api.get.return_value = self.ready_k8s_host_definitions
@@ -107,6 +109,8 @@ class TestWatchCsiNodesResources(CsiNodeWatcherBase):
         self.managed_secrets_on_csi_node_watcher.append(test_utils.get_fake_secret_info())
         self.csi_node_watcher.csi_nodes_api.watch.return_value = iter(
             [test_utils.get_fake_csi_node_watch_event(test_settings.DELETED_EVENT_TYPE)])
+        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.get_fake_k8s_csi_node_items(
+            test_settings.CSI_PROVISIONER_NAME)
         self.csi_node_watcher.core_api.read_node.return_value = self.k8s_node_with_manage_node_label
         self.csi_node_watcher.apps_api.list_daemon_set_for_all_namespaces.side_effect = [
             self.not_updated_daemon_set, self.updated_daemon_set]
@@ -136,7 +140,7 @@ class TestWatchCsiNodesResources(CsiNodeWatcherBase):
 
     def test_remove_manage_node_label(self):
         self._prepare_default_mocks_for_deletion()
-        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.get_fake_k8s_csi_node(
+        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.get_fake_k8s_csi_node_items(
             test_settings.FAKE_CSI_PROVISIONER)
         self.csi_node_watcher.host_definitions_api.get.return_value = test_utils.get_empty_k8s_host_definitions()
         test_utils.run_function_with_timeout(self.csi_node_watcher.watch_csi_nodes_resources, 0.5)
@@ -187,7 +191,7 @@ class TestWatchCsiNodesResources(CsiNodeWatcherBase):
         self.csi_node_watcher.storage_host_servicer.undefine_host.return_value = DefineHostResponse()
         self.csi_node_watcher.host_definitions_api.get.return_value = self.ready_k8s_host_definitions
         self.csi_node_watcher.core_api.read_namespaced_secret.return_value = test_utils.get_fake_k8s_secret()
-        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.get_fake_k8s_csi_node(
+        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.get_fake_k8s_csi_node_items(
             test_settings.CSI_PROVISIONER_NAME)
         self.managed_secrets_on_csi_node_watcher.append(test_utils.get_fake_secret_info())
 
@@ -226,6 +230,7 @@ class TestWatchCsiNodesResources(CsiNodeWatcherBase):
         self.managed_secrets_on_watcher_helper.append(test_utils.get_fake_secret_info())
         self.csi_node_watcher.csi_nodes_api.watch.return_value = iter(
             [test_utils.get_fake_csi_node_watch_event(test_settings.MODIFIED_EVENT_TYPE)])
+        self.csi_node_watcher.csi_nodes_api.get.return_value = test_utils.K8sResourceItems()
         self.os.getenv.return_value = test_settings.TRUE_STRING
         self.csi_node_watcher.core_api.read_namespaced_secret.return_value = test_utils.get_fake_k8s_secret()
         self.csi_node_watcher.storage_host_servicer.define_host.return_value = DefineHostResponse()
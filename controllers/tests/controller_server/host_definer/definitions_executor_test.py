@@ -0,0 +1,101 @@
+import unittest
+from threading import Event, Lock
+
+from mock import patch, Mock
+
+from controllers.servers.host_definer.definitions_executor import DefinitionsExecutor
+
+DEFINITIONS_EXECUTOR_PATH = 'controllers.servers.host_definer.definitions_executor'
+ENDPOINTS = ['endpoint']
+
+
+class TestDefinitionsExecutor(unittest.TestCase):
+
+    def setUp(self):
+        patch.dict('os.environ', {'DEFINITIONS_WORKERS': '1'}).start()
+        self.addCleanup(patch.stopall)
+        self.executor = DefinitionsExecutor()
+        self.release_worker = Event()
+        self.addCleanup(self.release_worker.set)
+
+    def _block_worker(self):
+        worker_started = Event()
+
+        def block():
+            worker_started.set()
+            self.release_worker.wait(5)
+
+        self.executor.submit('blocker', block)
+        worker_started.wait(5)
+
+    def test_submit_of_queued_key_returns_queued_future(self):
+        self._block_worker()
+        function = Mock()
+        first_future = self.executor.submit('key', function, 'argument')
+        second_future = self.executor.submit('key', function, 'argument')
+        self.assertIs(first_future, second_future)
+        self.assertEqual(1, self.executor.get_metrics()['queued'])
+        self.release_worker.set()
+        first_future.result(5)
+        function.assert_called_once_with('argument')
+
+    def test_submit_of_running_key_reruns_it_once_after_it_finishes(self):
+        worker_started = Event()
+        calls = []
+
+        def function(argument):
+            calls.append(argument)
+            worker_started.set()
+            self.release_worker.wait(5)
+
+        first_future = self.executor.submit('key', function, 'first')
+        worker_started.wait(5)
+        second_future = self.executor.submit('key', function, 'second')
+        third_future = self.executor.submit('key', function, 'third')
+        self.assertIsNot(first_future, second_future)
+        self.assertIs(second_future, third_future)
+        self.assertEqual({'queued': 1, 'running': 1, 'completed': 0, 'failed': 0}, self.executor.get_metrics())
+        self.release_worker.set()
+        second_future.result(5)
+        self.assertEqual(['first', 'second'], calls)
+        self.assertEqual(0, self.executor.get_metrics()['queued'])
+
+    def test_run_all_waits_for_all_tasks_and_counts_failures(self):
+        succeeded_function = Mock()
+        failed_function = Mock(side_effect=Exception)
+        self.executor.run_all([('first', succeeded_function, ('first',)),
+                               ('second', failed_function, ('second',))])
+        succeeded_function.assert_called_once_with('first')
+        failed_function.assert_called_once_with('second')
+        self.assertEqual({'queued': 0, 'running': 0, 'completed': 2, 'failed': 1}, self.executor.get_metrics())
+
+    def test_run_all_from_worker_runs_the_tasks_in_the_worker(self):
+        function = Mock()
+        future = self.executor.submit('outer', self.executor.run_all, [('inner', function, ())])
+        future.result(5)
+        function.assert_called_once_with()
+
+    def test_submit_after_runs_the_function_after_the_delay(self):
+        function_called = Event()
+        self.executor.submit_after(0.05, 'key', function_called.set)
+        self.assertTrue(function_called.wait(5))
+
+    @patch.dict('os.environ', {'DEFINITIONS_WORKERS': '4'})
+    @patch('{}.get_max_connections_by_endpoints'.format(DEFINITIONS_EXECUTOR_PATH), Mock(return_value=2))
+    def test_array_slot_limits_concurrent_calls_to_array(self):
+        executor = DefinitionsExecutor()
+        lock = Lock()
+        in_array = []
+        max_in_array = []
+
+        def call_array():
+            with executor.array_slot(ENDPOINTS):
+                with lock:
+                    in_array.append(None)
+                    max_in_array.append(len(in_array))
+                self.release_worker.wait(0.1)
+                with lock:
+                    in_array.pop()
+
+        executor.run_all([(index, call_array, ()) for index in range(4)])
+        self.assertEqual(2, max(max_in_array))
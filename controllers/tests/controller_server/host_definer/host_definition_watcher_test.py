@@ -18,8 +18,8 @@ class HostDefinitionWatcherBase(BaseSetUp):
 class TestWatchHostDefinitionsResources(HostDefinitionWatcherBase):
     def setUp(self):
         super().setUp()
-        self.host_definition_watcher._get_k8s_object_resource_version = Mock()
-        self.host_definition_watcher._get_k8s_object_resource_version.return_value = test_settings.FAKE_RESOURCE_VERSION
+        self.host_definition_watcher.host_definitions_api.get.return_value = \
+            test_utils.get_empty_k8s_host_definitions()
 
     def test_events_on_host_definition_in_ready_state(self):
         self.host_definition_watcher._define_host_definition_after_pending_state = Mock()
@@ -56,7 +56,11 @@ class TestWatchHostDefinitionsResources(HostDefinitionWatcherBase):
 
     def test_handle_pending_host_definition_that_became_ready(self):
         self._prepare_default_mocks_for_pending_creation()
-        self.host_definition_watcher.host_definitions_api.get.return_value = self.ready_k8s_host_definitions
+        self.host_definition_watcher.host_definitions_api.watch.return_value = iter(
+            [test_utils.get_fake_host_definition_watch_event(test_settings.MODIFIED_EVENT_TYPE,
+                                                             test_settings.PENDING_CREATION_PHASE),
+             test_utils.get_fake_host_definition_watch_event(test_settings.MODIFIED_EVENT_TYPE,
+                                                             test_settings.READY_PHASE)])
         test_utils.patch_pending_variables()
         self.host_definition_watcher.core_api.read_node.return_value = self.k8s_node_with_fake_label
         test_utils.run_function_with_timeout(self.host_definition_watcher.watch_host_definitions_resources, 0.5)
@@ -0,0 +1,94 @@
+import unittest
+
+from kubernetes.client.rest import ApiException
+from mock import Mock
+from munch import Munch
+
+import controllers.tests.controller_server.host_definer.utils.test_utils as test_utils
+import controllers.tests.controller_server.host_definer.settings as test_settings
+from controllers.servers.host_definer.kubernetes_manager.informer import Informer
+
+NODE_KIND = 'Node'
+
+
+def _get_k8s_node(name, resource_version):
+    return Munch.fromDict({'metadata': {'name': name, 'resource_version': resource_version}})
+
+
+def _get_watch_event(event_type, k8s_object):
+    return {test_settings.EVENT_TYPE_FIELD: event_type, test_settings.EVENT_OBJECT_FIELD: k8s_object}
+
+
+class TestInformer(unittest.TestCase):
+    def setUp(self):
+        self.list_resources = Mock()
+        self.list_resources.return_value = test_utils.K8sResourceItems([_get_k8s_node('node1', '1')])
+        self.watch_resources = Mock()
+        self.watch_resources.return_value = iter([])
+        self.informer = Informer(NODE_KIND, self.list_resources, self.watch_resources)
+
+    def _watch(self):
+        return list(self.informer.watch())
+
+    def test_watch_lists_only_once(self):
+        self.assertFalse(self.informer.has_synced())
+        self._watch()
+        self._watch()
+        self.list_resources.assert_called_once_with()
+        self.assertTrue(self.informer.has_synced())
+        self.assertEqual('node1', self.informer.get('node1').metadata.name)
+        self.watch_resources.assert_called_with(test_settings.FAKE_RESOURCE_VERSION)
+
+    def test_watch_events_update_store(self):
+        self.watch_resources.return_value = iter([
+            _get_watch_event(test_settings.ADDED_EVENT, _get_k8s_node('node2', '7')),
+            _get_watch_event(test_settings.DELETED_EVENT_TYPE, _get_k8s_node('node1', '8'))])
+        watch_events = self._watch()
+        self.assertEqual([test_settings.ADDED_EVENT, test_settings.DELETED_EVENT_TYPE],
+                         [watch_event.type for watch_event in watch_events])
+        self.assertEqual(['node2'], [k8s_node.metadata.name for k8s_node in self.informer.list()])
+        self._watch()
+        self.watch_resources.assert_called_with('8')
+
+    def test_bookmark_updates_resource_version_only(self):
+        self.watch_resources.return_value = iter([
+            _get_watch_event('BOOKMARK', {'metadata': {'resourceVersion': '9'}})])
+        self.assertEqual([], self._watch())
+        self._watch()
+        self.watch_resources.assert_called_with('9')
+
+    def test_expired_resource_version_lists_again_and_yields_missed_events(self):
+        self._watch()
+        self.watch_resources.side_effect = ApiException(status=410)
+        self._watch()
+        self.watch_resources.side_effect = None
+        self.list_resources.return_value = test_utils.K8sResourceItems([_get_k8s_node('node2', '3')])
+        watch_events = self._watch()
+        self.assertEqual(2, self.list_resources.call_count)
+        self.assertEqual([(test_settings.ADDED_EVENT, 'node2'), (test_settings.DELETED_EVENT_TYPE, 'node1')],
+                         [(watch_event.type, watch_event.object.metadata.name) for watch_event in watch_events])
+
+    def test_other_watch_errors_are_raised(self):
+        self.watch_resources.side_effect = ApiException(status=500)
+        with self.assertRaises(ApiException):
+            self._watch()
+
+    def test_watch_from_start(self):
+        informer = Informer(NODE_KIND, self.list_resources, self.watch_resources, watch_from_start=True)
+        self.watch_resources.return_value = iter([
+            _get_watch_event(test_settings.ADDED_EVENT, _get_k8s_node('node1', '5'))])
+        self.assertEqual(1, len(list(informer.watch())))
+        self.watch_resources.assert_called_once_with('')
+        list(informer.watch())
+        self.watch_resources.assert_called_with('5')
+
+    def test_indexes_follow_store(self):
+        informer = Informer(NODE_KIND, self.list_resources, self.watch_resources,
+                            indexers={'zone': lambda k8s_node: k8s_node.metadata.get('zone')})
+        list(informer.watch())
+        self.assertEqual(['node1'], [k8s_node.metadata.name for k8s_node in informer.get_by_index('zone', None)])
+        informer.put(Munch.fromDict({'metadata': {'name': 'node1', 'zone': 'zone1'}}))
+        self.assertEqual([], informer.get_by_index('zone', None))
+        self.assertEqual(1, len(informer.get_by_index('zone', 'zone1')))
+        informer.remove('node1')
+        self.assertEqual([], informer.get_by_index('zone', 'zone1'))
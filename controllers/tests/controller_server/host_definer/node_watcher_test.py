@@ -54,9 +54,8 @@ class TestAddInitialNodes(NodeWatcherBase):
 class TestWatchNodesResources(NodeWatcherBase):
     def setUp(self):
         super().setUp()
-        self.node_watcher._get_k8s_object_resource_version = Mock()
-        self.node_watcher._get_k8s_object_resource_version.return_value = test_settings.FAKE_RESOURCE_VERSION
-        self.nodes_stream = patch('{}.watch.Watch.stream'.format(test_settings.NODES_WATCHER_PATH)).start()
+        self.node_watcher.core_api.list_node.return_value = test_utils.get_fake_k8s_nodes_items()
+        self.nodes_stream = patch('{}.watch.Watch.stream'.format(test_settings.KUBERNETES_MANAGER_PATH)).start()
         self.node_watcher._loop_forever = Mock()
         self.node_watcher._loop_forever.side_effect = [True, False]
 
@@ -92,7 +91,8 @@ class TestWatchNodesResources(NodeWatcherBase):
 
     def test_do_not_create_host_definitions_on_modified_node_with_no_manage_node_label(self):
         self._prepare_default_mocks_for_modified_event()
-        self.node_watcher.core_api.read_node.return_value = self.k8s_node_with_fake_label
+        self.nodes_stream.return_value = iter([test_utils.get_fake_node_watch_event(
+            test_settings.MODIFIED_EVENT_TYPE, test_settings.FAKE_LABEL)])
         self.node_watcher.watch_nodes_resources()
         self.node_watcher.storage_host_servicer.define_host.assert_not_called()
         self.assertEqual(self.expected_unmanaged_csi_nodes_with_driver, self.unmanaged_csi_nodes_with_driver)
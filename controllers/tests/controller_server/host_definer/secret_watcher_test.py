@@ -17,9 +17,10 @@ class SecretWatcherBase(BaseSetUp):
 class TestWatchSecretResources(SecretWatcherBase):
     def setUp(self):
         super().setUp()
-        self.secret_stream = patch('{}.watch.Watch.stream'.format(test_settings.SECRET_WATCHER_PATH)).start()
+        self.secret_stream = patch('{}.watch.Watch.stream'.format(test_settings.KUBERNETES_MANAGER_PATH)).start()
         self.secret_watcher._loop_forever = Mock()
         self.secret_watcher._loop_forever.side_effect = [True, False]
+        self.secret_watcher.core_api.list_secret_for_all_namespaces.return_value = test_utils.K8sResourceItems()
         self.secret_watcher.core_api.read_node.return_value = self.k8s_node_with_fake_label
 
     def test_create_definitions_managed_secret_was_modified(self):
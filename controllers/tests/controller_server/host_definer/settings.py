@@ -32,6 +32,7 @@ SECRET_WATCHER_PATH = 'controllers.servers.host_definer.watcher.secret_watcher'
 CSI_NODE_WATCHER_PATH = 'controllers.servers.host_definer.watcher.csi_node_watcher'
 STORAGE_CLASS_WATCHER_PATH = 'controllers.servers.host_definer.watcher.storage_class_watcher'
 SETTINGS_PATH = 'controllers.servers.host_definer.settings'
+KUBERNETES_MANAGER_PATH = 'controllers.servers.host_definer.kubernetes_manager.manager'
 METADATA_RESOURCE_VERSION_FIELD = 'resource_version'
 FAKE_RESOURCE_VERSION = '495873498573'
 FAKE_UID = '50345093486093'
@@ -51,7 +51,7 @@ class TestAddInitialStorageClasses(StorageClassWatcherBase):
 class TestWatchStorageClassResources(StorageClassWatcherBase):
     def setUp(self):
         super().setUp()
-        self.storage_class_stream = patch('{}.watch.Watch.stream'.format(test_settings.SECRET_WATCHER_PATH)).start()
+        self.storage_class_stream = patch('{}.watch.Watch.stream'.format(test_settings.KUBERNETES_MANAGER_PATH)).start()
         self.storage_class_stream.return_value = iter([test_utils.get_fake_secret_storage_event(
             test_settings.ADDED_EVENT, test_settings.CSI_PROVISIONER_NAME)])
         self.storage_class_watcher.host_definitions_api.get.return_value = \
@@ -60,6 +60,7 @@ class TestWatchStorageClassResources(StorageClassWatcherBase):
         self.os.getenv.return_value = ''
         self.storage_class_watcher._loop_forever = Mock()
         self.storage_class_watcher._loop_forever.side_effect = [True, False]
+        self.storage_class_watcher.storage_api.list_storage_class.return_value = test_utils.K8sResourceItems()
         self.storage_class_watcher.core_api.read_node.return_value = self.k8s_node_with_fake_label
 
     def test_add_new_storage_class_with_new_secret(self):
@@ -1,4 +1,6 @@
+from concurrent import futures
 from dataclasses import dataclass, field
+from threading import Event, Thread
 import func_timeout
 from munch import Munch
 from mock import patch, Mock
@@ -7,6 +9,8 @@ import controllers.tests.controller_server.host_definer.utils.k8s_manifests_util
 import controllers.tests.controller_server.host_definer.settings as test_settings
 from controllers.tests.common.test_settings import HOST_NAME, SECRET_MANAGEMENT_ADDRESS_VALUE
 from controllers.servers.host_definer.kubernetes_manager.manager import KubernetesManager
+from controllers.servers.host_definer.kubernetes_manager.informer import informers
+from controllers.servers.host_definer.definitions_executor import definitions_executor
 from controllers.servers.host_definer.hd_types import DefineHostRequest, DefineHostResponse
 from controllers.servers.csi.controller_types import ArrayConnectionInfo
 
@@ -14,6 +18,7 @@ from controllers.servers.csi.controller_types import ArrayConnectionInfo
 @dataclass
 class K8sResourceItems():
     items: list = field(default_factory=list)
+    metadata: Munch = field(default_factory=lambda: Munch(resource_version=test_settings.FAKE_RESOURCE_VERSION))
 
 
 class HttpResp():
@@ -40,6 +45,10 @@ def get_fake_k8s_csi_node(csi_provisioner_name):
     return Munch.fromDict(csi_node_manifest)
 
 
+def get_fake_k8s_csi_node_items(csi_provisioner_name):
+    return K8sResourceItems([get_fake_k8s_csi_node(csi_provisioner_name)])
+
+
 def get_fake_csi_node_watch_event(event_type):
     return manifest_utils.generate_watch_event(event_type, manifest_utils.get_k8s_csi_node_manifest(
         test_settings.CSI_PROVISIONER_NAME))
@@ -80,9 +89,8 @@ def get_fake_host_definition_watch_event(event_type, host_definition_phase):
         event_type, manifest_utils.get_fake_k8s_host_definition_manifest(host_definition_phase))
 
 
-def get_fake_node_watch_event(event_type):
-    return manifest_utils.generate_watch_event(event_type, manifest_utils.get_fake_k8s_node_manifest(
-        test_settings.MANAGE_NODE_LABEL))
+def get_fake_node_watch_event(event_type, label=test_settings.MANAGE_NODE_LABEL):
+    return manifest_utils.generate_watch_event(event_type, manifest_utils.get_fake_k8s_node_manifest(label))
 
 
 def get_fake_k8s_nodes_items():
@@ -115,6 +123,48 @@ def patch_pending_variables():
             test_settings.SETTINGS_PATH, pending_var), value).start()
 
 
+def patch_definitions_executor():
+    """
+    Runs the submitted definitions in the calling thread, so the tests can assert on them once the watcher returns.
+    A scheduled definition runs in its own thread after its delay, unless the test ended first.
+    Returns a function that stops the patching.
+    """
+    test_ended = Event()
+
+    def run_after(delay_in_seconds, key, function, *args):
+        if not test_ended.wait(delay_in_seconds):
+            _run_definition_inline(key, function, *args)
+
+    def submit_after(delay_in_seconds, key, function, *args):
+        Thread(target=run_after, args=(delay_in_seconds, key, function) + args, daemon=True).start()
+
+    patchers = [patch.object(definitions_executor, 'submit', side_effect=_run_definition_inline),
+                patch.object(definitions_executor, 'submit_after', side_effect=submit_after)]
+    for patcher in patchers:
+        patcher.start()
+
+    def stop():
+        test_ended.set()
+        for patcher in patchers:
+            patcher.stop()
+
+    return stop
+
+
+def _run_definition_inline(_key, function, *args):
+    future = futures.Future()
+    try:
+        function(*args)
+        future.set_result(None)
+    except Exception as ex:
+        future.set_exception(ex)
+    return future
+
+
+def clear_informers():
+    informers.clear()
+
+
 def patch_kubernetes_manager_init():
     for function_to_patch in test_settings.KUBERNETES_MANAGER_INIT_FUNCTIONS_TO_PATCH:
         _patch_function(KubernetesManager, function_to_patch)
@@ -0,0 +1,30 @@
+import unittest
+
+from mock import Mock
+
+from controllers.servers.csi.managed_secrets import ManagedSecrets
+from controllers.tests.common.test_settings import SECRET, SECRET_PASSWORD_KEY, SECRET_MANAGEMENT_ADDRESS_KEY
+
+
+class TestManagedSecrets(unittest.TestCase):
+
+    def setUp(self):
+        self.managed_secrets = ManagedSecrets(max_size=2)
+
+    def test_secret_with_changed_password_replaces_the_previous_one(self):
+        self.managed_secrets.add(SECRET)
+        changed_secret = dict(SECRET, **{SECRET_PASSWORD_KEY: "changed_password"})
+        self.managed_secrets.add(changed_secret)
+        self.assertEqual([changed_secret], self.managed_secrets.get_all())
+
+    def test_least_recently_seen_secret_is_evicted(self):
+        secrets = [dict(SECRET, **{SECRET_MANAGEMENT_ADDRESS_KEY: address}) for address in ("first", "second", "third")]
+        for secret in secrets:
+            self.managed_secrets.add(secret)
+        self.assertEqual(secrets[1:], self.managed_secrets.get_all())
+
+    def test_request_without_secrets_is_ignored(self):
+        self.managed_secrets.add({})
+        self.managed_secrets.add(None)
+        self.managed_secrets.add(Mock())
+        self.assertEqual([], self.managed_secrets.get_all())
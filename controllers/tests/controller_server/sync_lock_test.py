@@ -0,0 +1,101 @@
+import unittest
+from threading import Thread
+from time import sleep
+
+from mock import patch
+
+from controllers.servers.csi.sync_lock import SyncLock, sync_lock_metrics
+from controllers.servers.errors import ObjectAlreadyProcessingError
+
+LOCK_KEY = "volume_id"
+OBJECT_ID = "object_id"
+ACTION_NAME = "action"
+
+
+class TestSyncLock(unittest.TestCase):
+
+    def setUp(self):
+        sync_lock_metrics.clear()
+
+    def _get_lock(self, object_id=OBJECT_ID):
+        return SyncLock(LOCK_KEY, object_id, ACTION_NAME)
+
+    def _get_action_metrics(self):
+        return sync_lock_metrics.get_metrics()[ACTION_NAME]
+
+    def _start_waiting_thread(self, results, name):
+        def acquire():
+            try:
+                with self._get_lock():
+                    results.append(name)
+            except ObjectAlreadyProcessingError:
+                results.append("{} rejected".format(name))
+
+        thread = Thread(target=acquire)
+        thread.start()
+        return thread
+
+    def _wait_for_queue_depth(self, queue_depth):
+        while self._get_action_metrics()["queue_depth"] < queue_depth:
+            sleep(0.001)
+
+    def test_lock_in_use_is_rejected_by_default(self):
+        with self._get_lock():
+            with self.assertRaises(ObjectAlreadyProcessingError):
+                with self._get_lock():
+                    pass
+        self.assertEqual(1, self._get_action_metrics()["rejected"])
+
+    def test_lock_is_released(self):
+        with self._get_lock():
+            pass
+        with self._get_lock():
+            pass
+        self.assertEqual(2, self._get_action_metrics()["acquired"])
+
+    def test_locks_of_different_objects(self):
+        with self._get_lock():
+            with self._get_lock(object_id="other_object_id"):
+                pass
+
+    def test_lock_without_key(self):
+        with SyncLock("", OBJECT_ID, ACTION_NAME):
+            with SyncLock("", OBJECT_ID, ACTION_NAME):
+                pass
+
+    @patch.dict("os.environ", {"SYNC_LOCK_WAIT_TIMEOUT": "10"})
+    def test_waiting_requests_get_the_lock_in_arrival_order(self):
+        results = []
+        with self._get_lock():
+            first = self._start_waiting_thread(results, "first")
+            self._wait_for_queue_depth(1)
+            second = self._start_waiting_thread(results, "second")
+            self._wait_for_queue_depth(2)
+        first.join()
+        second.join()
+
+        self.assertEqual(["first", "second"], results)
+        action_metrics = self._get_action_metrics()
+        self.assertEqual(2, action_metrics["max_queue_depth"])
+        self.assertEqual(0, action_metrics["queue_depth"])
+        self.assertEqual(3, action_metrics["acquired"])
+
+    @patch.dict("os.environ", {"SYNC_LOCK_WAIT_TIMEOUT": "0.01"})
+    def test_waiting_request_is_rejected_after_the_timeout(self):
+        results = []
+        with self._get_lock():
+            self._start_waiting_thread(results, "waiter").join()
+        self.assertEqual(["waiter rejected"], results)
+
+        with self._get_lock():
+            pass
+        self.assertEqual(1, self._get_action_metrics()["rejected"])
+
+    @patch("controllers.servers.csi.sync_lock.monotonic")
+    def test_hold_time_is_measured(self, monotonic):
+        monotonic.side_effect = [10, 12.5]
+        with self._get_lock():
+            pass
+        action_metrics = self._get_action_metrics()
+        self.assertEqual(2.5, action_metrics["total_hold_time"])
+        self.assertEqual(2.5, action_metrics["max_hold_time"])
@@ -0,0 +1,36 @@
+import unittest
+
+from controllers.servers.topology_index import TopologyIndex
+
+ZONE_LABEL = "topology.block.csi.ibm.com/zone"
+REGION_LABEL = "topology.block.csi.ibm.com/region"
+
+
+class TestTopologyIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TopologyIndex({
+            "u1": [{ZONE_LABEL: "zone1"}, {ZONE_LABEL: "zone2", REGION_LABEL: "region1"}],
+            "u2": [{ZONE_LABEL: "zone3"}],
+            "u3": [{REGION_LABEL: "region1"}],
+            "u4": None,
+        })
+
+    def test_get_system_id_of_single_label_topology(self):
+        self.assertEqual("u2", self.index.get_system_id({ZONE_LABEL: "zone3", REGION_LABEL: "region2"}))
+
+    def test_get_system_id_requires_all_topology_labels(self):
+        self.assertEqual("u3", self.index.get_system_id({REGION_LABEL: "region1"}))
+        self.assertIsNone(self.index.get_system_id({ZONE_LABEL: "zone2"}))
+
+    def test_get_system_id_prefers_first_system_in_config(self):
+        self.assertEqual("u1", self.index.get_system_id({ZONE_LABEL: "zone2", REGION_LABEL: "region1"}))
+
+    def test_get_system_id_without_match(self):
+        self.assertIsNone(self.index.get_system_id({ZONE_LABEL: "zone4"}))
+        self.assertIsNone(self.index.get_system_id({}))
+
+    def test_from_secrets_config(self):
+        index = TopologyIndex.from_secrets_config({"u1": {"supported_topologies": [{ZONE_LABEL: "zone1"}]},
+                                                   "u2": {}})
+        self.assertEqual("u1", index.get_system_id({ZONE_LABEL: "zone1"}))
@@ -15,7 +15,7 @@ from controllers.common.settings import SPACE_EFFICIENCY_DEDUPLICATED_COMPRESSED
     SPACE_EFFICIENCY_DEDUPLICATED, SPACE_EFFICIENCY_THIN
 from controllers.servers import settings as controller_config
 from controllers.servers.csi.csi_controller_server import CSIControllerServicer
-from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId
+from controllers.servers.errors import ObjectIdError, ValidationException, InvalidNodeId, InvalidStartingToken
 from controllers.tests import utils as test_utils
 from controllers.tests.common.test_settings import DUMMY_POOL1, SECRET_USERNAME_VALUE, SECRET_PASSWORD_VALUE, ARRAY
 from controllers.tests.controller_server.csi_controller_server_test import ProtoBufMock
@@ -136,6 +136,37 @@ class TestUtils(unittest.TestCase):
                                                           topologies={"topology.block.csi.ibm.com/test1": "zone1",
                                                                       "topology.block.csi.ibm.com/test2": "dev1"})
 
+    @patch("controllers.servers.utils._parse_raw_json", wraps=utils._parse_raw_json)
+    def test_get_array_connection_info_from_secrets_parses_the_same_secrets_once(self, parse_raw_json):
+        utils.parsed_requests_cache.clear()
+        secrets = get_fake_secret_config()
+        first_array_connection_info = utils.get_array_connection_info_from_secrets(secrets, system_id="u1")
+        second_array_connection_info = utils.get_array_connection_info_from_secrets(dict(secrets), system_id="u1")
+        self.assertIs(first_array_connection_info, second_array_connection_info)
+        parse_raw_json.assert_called_once()
+        utils.get_array_connection_info_from_secrets(get_fake_secret_config(system_id="u2"), system_id="u2")
+        self.assertEqual(2, parse_raw_json.call_count)
+
+    def test_get_array_connection_info_from_secrets_failure_is_not_cached(self):
+        utils.parsed_requests_cache.clear()
+        secrets = get_fake_secret_config()
+        with self.assertRaises(ValidationException):
+            utils.get_array_connection_info_from_secrets(secrets)
+        with patch("controllers.servers.utils._get_system_info_from_secrets") as get_system_info:
+            get_system_info.side_effect = ValidationException("error")
+            with self.assertRaises(ValidationException):
+                utils.get_array_connection_info_from_secrets(secrets)
+            get_system_info.assert_called_once()
+
+    def test_parsed_requests_cache_evicts_least_recently_used(self):
+        cache = utils.ParsedRequestsCache(max_size=2)
+        cache.get_or_parse(["first"], lambda: 1)
+        cache.get_or_parse(["second"], lambda: 2)
+        cache.get_or_parse(["first"], lambda: 3)
+        cache.get_or_parse(["third"], lambda: 4)
+        self.assertEqual(1, cache.get_or_parse(["first"], lambda: 5))
+        self.assertEqual(6, cache.get_or_parse(["second"], lambda: 6))
+
     def _test_get_pool_from_parameters(self, parameters, expected_pool=DUMMY_POOL1, system_id=None):
         volume_parameters = utils.get_volume_parameters(parameters, system_id)
         self.assertEqual(expected_pool, volume_parameters.pool)
@@ -535,6 +566,15 @@ class TestUtils(unittest.TestCase):
                                                     parameter_field=controller_config.PARAMETERS_VOLUME_NAME_PREFIX,
                                                     parameter_value="prefix")
 
+    def test_split_list_volumes_token(self):
+        token = utils.get_list_volumes_token("endpoint1,endpoint2", "pool:3")
+        self.assertEqual(("endpoint1,endpoint2", "pool:3"), utils.split_list_volumes_token(token))
+        self.assertEqual((None, None), utils.split_list_volumes_token(""))
+
+    def test_split_list_volumes_token_fail(self):
+        with self.assertRaises(InvalidStartingToken):
+            utils.split_list_volumes_token("3")
+
     def test_is_call_home_enabled_true(self):
         self._test_is_call_home_enabled('true', True)
 